@@ -19,6 +19,7 @@ from app.models.models import (
 from app.schemas.abm import ABMModelCreate, ABMModelUpdate, ABMModel as ABMModelSchema
 from app.schemas.abm import SimulationCreate, SimulationUpdate, Simulation as SimulationSchema
 from app.services.abm_simulation import ABMSimulationService, SimulationType
+from app.services.network_store import NetworkStore
 
 router = APIRouter(
     prefix="/abm",
@@ -483,13 +484,9 @@ async def run_simulation(
             raise HTTPException(status_code=400, detail="Network file not found")
         
         # Load graph
-        if file_path.endswith(".graphml"):
-            G = nx.read_graphml(file_path)
-        elif file_path.endswith(".gexf"):
-            G = nx.read_gexf(file_path)
-        elif file_path.endswith(".gml"):
-            G = nx.read_gml(file_path)
-        else:
+        try:
+            G = NetworkStore.load_graph(file_path)
+        except ValueError:
             raise HTTPException(status_code=400, detail="Unsupported network file format")
     else:
         # Create a default network if none specified
@@ -664,13 +661,9 @@ async def parameter_sweep(
             raise HTTPException(status_code=400, detail="Network file not found")
         
         # Load graph
-        if file_path.endswith(".graphml"):
-            G = nx.read_graphml(file_path)
-        elif file_path.endswith(".gexf"):
-            G = nx.read_gexf(file_path)
-        elif file_path.endswith(".gml"):
-            G = nx.read_gml(file_path)
-        else:
+        try:
+            G = NetworkStore.load_graph(file_path)
+        except ValueError:
             raise HTTPException(status_code=400, detail="Unsupported network file format")
     else:
         # Create a default network if none specified
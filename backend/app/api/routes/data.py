@@ -1,24 +1,43 @@
-from fastapi import APIRouter, HTTPException, status, UploadFile, File, Form, Depends, Query, Response
+from fastapi import APIRouter, HTTPException, status, UploadFile, File, Form, Depends, Query, Header, BackgroundTasks
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import iterate_in_threadpool
 from typing import List, Dict, Any, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy import update
 import os
-import pandas as pd
-import json
+import asyncio
+import logging
 
 from app.core.database import get_async_session
 from app.services.data_service import DataService
+from app.services.pair_table import PairTableService
+from app.services.dataset_reader import DatasetReader
+from app.services.processing_plan import ProcessingRecipeService
+from app.services.artifact_cache import ArtifactCache
+from app.services.dataset_export import DatasetExporter
+from app.services.excel_ingest import ExcelIngestService
+from app.services.dataset_query import DatasetQueryService
+from app.services.association_stats import AssociationService
+from app.services.dataset_append import DatasetAppendService
+from app.services.dataset_join import DatasetJoinService
+from app.services.disclosure_risk import DisclosureRiskService
 from app.auth.authentication import current_active_user
 from app.models.user import User
 from app.models.models import Dataset
 from app.schemas.data import (
     Dataset as DatasetSchema, DatasetCreate, DatasetUpdate,
     ProcessingOptions, AnonymizationOptions,
-    DatasetPreview, DatasetStats,
+    ProcessingRecipe, ProcessingRecipeCreate, DatasetVersion, DatasetSheet, DatasetAppendResult, DatasetJoinRequest,
+    DatasetPreview, DatasetStats, StatsMode, DatasetQuery, DatasetQueryResult,
+    AssociationMethod, AssociationMatrix, RiskAnalysisRequest, RiskAnalysis,
     TieStrengthDefinition, TieStrengthCalculationMethod
 )
 
+# Set up logging
+logger = logging.getLogger(__name__)
+
 router = APIRouter(
     prefix="/data",
     tags=["data"],
@@ -49,6 +68,54 @@ async def get_datasets(
     
     return datasets
 
+@router.get("/recipes", response_model=List[ProcessingRecipe])
+async def get_processing_recipes(
+    user: User = Depends(current_active_user)
+):
+    """
+    Retrieve saved processing recipes.
+    """
+    return ProcessingRecipeService.list_recipes(None if user.is_superuser else user.id)
+
+@router.post("/recipes", response_model=ProcessingRecipe, status_code=status.HTTP_201_CREATED)
+async def create_processing_recipe(
+    recipe: ProcessingRecipeCreate,
+    user: User = Depends(current_active_user)
+):
+    """
+    Save processing options as a reusable recipe.
+    """
+    return ProcessingRecipeService.save_recipe(
+        user.id, recipe.name, recipe.options,
+        description=recipe.description, source_dataset_id=recipe.source_dataset_id
+    )
+
+@router.get("/recipes/{recipe_id}", response_model=ProcessingRecipe)
+async def get_processing_recipe(
+    recipe_id: str,
+    user: User = Depends(current_active_user)
+):
+    """
+    Retrieve a processing recipe by ID.
+    """
+    recipe = ProcessingRecipeService.get_recipe(recipe_id)
+    if recipe["user_id"] != user.id and not user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not authorized to access this recipe")
+    return recipe
+
+@router.delete("/recipes/{recipe_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_processing_recipe(
+    recipe_id: str,
+    user: User = Depends(current_active_user)
+):
+    """
+    Delete a processing recipe.
+    """
+    recipe = ProcessingRecipeService.get_recipe(recipe_id)
+    if recipe["user_id"] != user.id and not user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not authorized to delete this recipe")
+    ProcessingRecipeService.delete_recipe(recipe_id)
+
 @router.get("/{dataset_id}", response_model=DatasetSchema)
 async def get_dataset(
     dataset_id: int,
@@ -79,6 +146,7 @@ async def create_dataset(
 
 @router.post("/upload", response_model=DatasetSchema, status_code=status.HTTP_201_CREATED)
 async def upload_dataset(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     dataset_name: Optional[str] = Form(None),
     project_id: Optional[int] = Form(None),
@@ -87,14 +155,71 @@ async def upload_dataset(
 ):
     """
     Upload a dataset file.
+    
+    Excel workbooks are converted to Parquet (one file per sheet) after the
+    response; the dataset metadata tracks the conversion.
     """
-    return await DataService.upload_dataset(
+    dataset = await DataService.upload_dataset(
         db, 
         file, 
         dataset_name=dataset_name,
         user_id=user.id,
         project_id=project_id
     )
+    
+    if ((dataset.dataset_metadata or {}).get("conversion") or {}).get("status") == "pending":
+        background_tasks.add_task(ExcelIngestService.convert_dataset, dataset.id)
+    
+    return dataset
+
+@router.post("/join", response_model=DatasetSchema, status_code=status.HTTP_201_CREATED)
+async def join_datasets(
+    request: DatasetJoinRequest,
+    db: AsyncSession = Depends(get_async_session),
+    user: User = Depends(current_active_user)
+):
+    """
+    Join two datasets on key columns into a new dataset.
+    
+    The join is partitioned on disk when the datasets do not fit in memory,
+    e.g. to add HR attributes to interaction data.
+    """
+    datasets = []
+    for dataset_id in (request.left_dataset_id, request.right_dataset_id):
+        dataset = await DataService.get_dataset(db, dataset_id)
+        if not dataset:
+            raise HTTPException(status_code=404, detail=f"Dataset {dataset_id} not found")
+        
+        # Check access permission
+        if dataset.user_id != user.id and not user.is_superuser:
+            raise HTTPException(status_code=403, detail="Not authorized to access this dataset")
+        datasets.append(dataset)
+    
+    return await DatasetJoinService.join_datasets(db, datasets[0], datasets[1], request, user_id=user.id)
+
+@router.post("/{dataset_id}/append", response_model=DatasetAppendResult)
+async def append_to_dataset(
+    dataset_id: int,
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_async_session),
+    user: User = Depends(current_active_user)
+):
+    """
+    Append a batch of rows (CSV, JSON or Excel) to a dataset.
+    
+    The batch must have the dataset's columns and types. Its rows are added
+    to the dataset file and profile, and networks built from the dataset are
+    extended with the interactions of the batch instead of being rebuilt.
+    """
+    dataset = await DataService.get_dataset(db, dataset_id)
+    if not dataset:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    
+    # Check access permission
+    if dataset.user_id != user.id and not user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not authorized to modify this dataset")
+    
+    return await DatasetAppendService.append_to_dataset(db, dataset_id, file)
 
 @router.put("/{dataset_id}", response_model=DatasetSchema)
 async def update_dataset(
@@ -141,6 +266,7 @@ async def delete_dataset(
 async def process_dataset(
     dataset_id: int,
     processing_options: ProcessingOptions,
+    save_as_recipe: Optional[str] = Query(None, description="Also save the options as a recipe with this name"),
     db: AsyncSession = Depends(get_async_session),
     user: User = Depends(current_active_user)
 ):
@@ -155,7 +281,53 @@ async def process_dataset(
     if dataset.user_id != user.id and not user.is_superuser:
         raise HTTPException(status_code=403, detail="Not authorized to process this dataset")
     
-    return await DataService.process_dataset(db, dataset_id, processing_options)
+    recipe_id = None
+    if save_as_recipe:
+        recipe = ProcessingRecipeService.save_recipe(user.id, save_as_recipe, processing_options, source_dataset_id=dataset_id)
+        recipe_id = recipe["id"]
+    
+    try:
+        dataset = await DataService.process_dataset(db, dataset_id, processing_options, recipe_id=recipe_id)
+    except HTTPException:
+        # Do not keep recipes whose options could not be applied
+        if recipe_id:
+            ProcessingRecipeService.delete_recipe(recipe_id)
+        raise
+    
+    # Keep the pre-aggregated pair table in sync with the processed file
+    await asyncio.to_thread(PairTableService.refresh_for_dataset, dataset)
+    
+    return dataset
+
+@router.post("/{dataset_id}/apply-recipe/{recipe_id}", response_model=DatasetSchema)
+async def apply_processing_recipe(
+    dataset_id: int,
+    recipe_id: str,
+    db: AsyncSession = Depends(get_async_session),
+    user: User = Depends(current_active_user)
+):
+    """
+    Process a dataset with a saved recipe.
+    """
+    dataset = await DataService.get_dataset(db, dataset_id)
+    if not dataset:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    
+    # Check ownership
+    if dataset.user_id != user.id and not user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not authorized to process this dataset")
+    
+    recipe = ProcessingRecipeService.get_recipe(recipe_id)
+    if recipe["user_id"] != user.id and not user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not authorized to use this recipe")
+    
+    options = ProcessingOptions(**recipe["options"])
+    dataset = await DataService.process_dataset(db, dataset_id, options, recipe_id=recipe_id)
+    
+    # Keep the pre-aggregated pair table in sync with the processed file
+    await asyncio.to_thread(PairTableService.refresh_for_dataset, dataset)
+    
+    return dataset
 
 @router.post("/{dataset_id}/anonymize", response_model=DatasetSchema)
 async def anonymize_dataset(
@@ -175,7 +347,153 @@ async def anonymize_dataset(
     if dataset.user_id != user.id and not user.is_superuser:
         raise HTTPException(status_code=403, detail="Not authorized to anonymize this dataset")
     
-    return await DataService.anonymize_dataset(db, dataset_id, anonymization_options)
+    dataset = await DataService.anonymize_dataset(db, dataset_id, anonymization_options)
+    
+    # Keep the pre-aggregated pair table in sync with the anonymized file
+    await asyncio.to_thread(PairTableService.refresh_for_dataset, dataset)
+    
+    return dataset
+
+@router.post("/{dataset_id}/risk", response_model=RiskAnalysis)
+async def analyze_dataset_risk(
+    dataset_id: int,
+    request: RiskAnalysisRequest,
+    db: AsyncSession = Depends(get_async_session),
+    user: User = Depends(current_active_user)
+):
+    """
+    Analyze the re-identification risk of a dataset's quasi-identifiers.
+    
+    Returns the equivalence class sizes, the unique records, the l-diversity
+    of sensitive fields and the risk against information loss of k-anonymity
+    with candidate k values, to choose anonymization settings.
+    """
+    dataset = await DataService.get_dataset(db, dataset_id)
+    if not dataset:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    
+    # Check access permission
+    if dataset.user_id != user.id and not user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not authorized to access this dataset")
+    
+    file_path = DatasetReader.resolve_path(dataset, request.version)
+    return await asyncio.to_thread(
+        DisclosureRiskService.analyze_file,
+        file_path,
+        request.quasi_identifiers,
+        request.sensitive_fields,
+        request.k_value,
+        request.l_value,
+        request.candidate_k
+    )
+
+@router.get("/{dataset_id}/versions", response_model=List[DatasetVersion])
+async def get_dataset_versions(
+    dataset_id: int,
+    db: AsyncSession = Depends(get_async_session),
+    user: User = Depends(current_active_user)
+):
+    """
+    List the cached processed and anonymized versions of a dataset.
+    """
+    dataset = await DataService.get_dataset(db, dataset_id)
+    if not dataset:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    
+    # Check ownership
+    if dataset.user_id != user.id and not user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not authorized to access this dataset")
+    
+    active_paths = {dataset.processed_file_path, dataset.anonymized_file_path}
+    return [
+        {
+            "key": manifest["key"],
+            "kind": manifest["kind"],
+            "options": manifest["options"],
+            "row_count": manifest["result"].get("row_count"),
+            "columns": manifest["result"].get("columns"),
+            "size": manifest["size"],
+            "created_at": manifest["created_at"],
+            "last_used": manifest["last_used"],
+            "active": ArtifactCache.data_path(manifest["kind"], manifest["key"]) in active_paths
+        }
+        for manifest in ArtifactCache.list_versions(dataset_id)
+    ]
+
+@router.post("/{dataset_id}/versions/{key}/activate", response_model=DatasetSchema)
+async def activate_dataset_version(
+    dataset_id: int,
+    key: str,
+    db: AsyncSession = Depends(get_async_session),
+    user: User = Depends(current_active_user)
+):
+    """
+    Make a cached version the dataset's current processed or anonymized version.
+    """
+    dataset = await DataService.get_dataset(db, dataset_id)
+    if not dataset:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    
+    # Check ownership
+    if dataset.user_id != user.id and not user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not authorized to modify this dataset")
+    
+    dataset = await DataService.activate_version(db, dataset_id, key)
+    
+    # Keep the pre-aggregated pair table in sync with the active file
+    await asyncio.to_thread(PairTableService.refresh_for_dataset, dataset)
+    
+    return dataset
+
+@router.get("/{dataset_id}/sheets", response_model=List[DatasetSheet])
+async def get_dataset_sheets(
+    dataset_id: int,
+    db: AsyncSession = Depends(get_async_session),
+    user: User = Depends(current_active_user)
+):
+    """
+    List the sheets of an Excel dataset.
+    """
+    dataset = await DataService.get_dataset(db, dataset_id)
+    if not dataset:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    
+    # Check ownership
+    if dataset.user_id != user.id and not user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not authorized to access this dataset")
+    
+    metadata = dataset.dataset_metadata or {}
+    return [
+        {**sheet, "selected": sheet["file_path"] == dataset.file_path}
+        for sheet in metadata.get("sheets") or []
+    ]
+
+@router.post("/{dataset_id}/sheets/{sheet}/select", response_model=DatasetSchema)
+async def select_dataset_sheet(
+    dataset_id: int,
+    sheet: str,
+    db: AsyncSession = Depends(get_async_session),
+    user: User = Depends(current_active_user)
+):
+    """
+    Make a sheet (by name or index) the data of an Excel dataset.
+    
+    Processed and anonymized versions of the previous sheet are deactivated.
+    """
+    dataset = await DataService.get_dataset(db, dataset_id)
+    if not dataset:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    
+    # Check ownership
+    if dataset.user_id != user.id and not user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not authorized to modify this dataset")
+    
+    dataset = await ExcelIngestService.select_sheet(db, dataset, sheet)
+    
+    # Keep the pre-aggregated pair table in sync with the active file
+    await asyncio.to_thread(PairTableService.refresh_for_dataset, dataset)
+    
+    return dataset
 
 @router.get("/{dataset_id}/preview", response_model=DatasetPreview)
 async def get_dataset_preview(
@@ -197,14 +515,79 @@ async def get_dataset_preview(
     
     return await DataService.get_dataset_preview(db, dataset_id, limit)
 
+@router.post("/{dataset_id}/query", response_model=DatasetQueryResult)
+async def query_dataset(
+    dataset_id: int,
+    query: DatasetQuery,
+    db: AsyncSession = Depends(get_async_session),
+    user: User = Depends(current_active_user)
+):
+    """
+    Page through a dataset with column projection, filters and sorting.
+    
+    Predicates are pushed down to the Parquet row groups. Pass the returned
+    next_cursor to get the next page; unlike offset, its cost does not grow
+    with the depth of the page.
+    """
+    dataset = await DataService.get_dataset(db, dataset_id)
+    if not dataset:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    
+    # Check access permission
+    if dataset.user_id != user.id and not user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not authorized to access this dataset")
+    
+    file_path = DatasetReader.resolve_path(dataset, query.version)
+    request = query.dict(exclude={"version"})
+    request["filters"] = [{**predicate, "op": predicate["op"].value} for predicate in request["filters"]]
+    return await asyncio.to_thread(DatasetQueryService.query, file_path, request)
+
 @router.get("/{dataset_id}/stats", response_model=DatasetStats)
 async def get_dataset_stats(
     dataset_id: int,
+    background_tasks: BackgroundTasks,
+    mode: StatsMode = Query(StatsMode.AUTO, description="auto (exact for small datasets), approximate or exact"),
     db: AsyncSession = Depends(get_async_session),
     user: User = Depends(current_active_user)
 ):
     """
     Get statistics about the dataset.
+    
+    Approximate statistics come with error bounds. Exact statistics of a
+    large dataset are computed by a background job; until it completes the
+    approximate statistics are returned with the job state.
+    """
+    dataset = await DataService.get_dataset(db, dataset_id)
+    if not dataset:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    
+    # Check access permission
+    if dataset.user_id != user.id and not user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not authorized to access this dataset")
+    
+    stats = await DataService.get_dataset_stats(db, dataset_id, mode.value)
+    
+    job = stats.get("exact_job")
+    if job and job["status"] == "queued":
+        background_tasks.add_task(DataService.run_exact_stats_job, dataset_id, job["id"])
+    
+    return stats
+
+@router.get("/{dataset_id}/associations", response_model=AssociationMatrix)
+async def get_dataset_associations(
+    dataset_id: int,
+    method: AssociationMethod = Query(AssociationMethod.PEARSON, description="pearson, spearman or cramers_v"),
+    columns: Optional[List[str]] = Query(None, description="Columns to include (all if omitted)"),
+    version: str = Query("latest", description="latest, original, processed or anonymized"),
+    db: AsyncSession = Depends(get_async_session),
+    user: User = Depends(current_active_user)
+):
+    """
+    Get the correlation (numeric columns) or Cramér's V (categorical columns)
+    matrix of a dataset.
+    
+    All matrices of a column selection are computed in one chunked pass and
+    stored with the dataset version, so later requests are served from disk.
     """
     dataset = await DataService.get_dataset(db, dataset_id)
     if not dataset:
@@ -214,7 +597,8 @@ async def get_dataset_stats(
     if dataset.user_id != user.id and not user.is_superuser:
         raise HTTPException(status_code=403, detail="Not authorized to access this dataset")
     
-    return await DataService.get_dataset_stats(db, dataset_id)
+    file_path = DatasetReader.resolve_path(dataset, version)
+    return await asyncio.to_thread(AssociationService.get_matrix, file_path, method.value, columns)
 
 @router.post("/{dataset_id}/tie-strength", response_model=DatasetSchema)
 async def define_tie_strength(
@@ -235,9 +619,24 @@ async def define_tie_strength(
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
 
     # Validate columns exist in dataset.columns (if dataset.columns is populated)
-    required_cols = [definition.source_column, definition.target_column]
-    if definition.calculation_method == TieStrengthCalculationMethod.ATTRIBUTE_VALUE and definition.weight_column:
-        required_cols.append(definition.weight_column)
+    if definition.calculation_method == TieStrengthCalculationMethod.AFFILIATION:
+        if not definition.person_column or not definition.affiliation_column:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Person and affiliation columns are required for the affiliation method"
+            )
+        required_cols = [definition.person_column, definition.affiliation_column]
+        if definition.weight_column:
+            required_cols.append(definition.weight_column)
+    else:
+        if not definition.source_column or not definition.target_column:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Source and target columns are required"
+            )
+        required_cols = [definition.source_column, definition.target_column]
+        if definition.calculation_method == TieStrengthCalculationMethod.ATTRIBUTE_VALUE and definition.weight_column:
+            required_cols.append(definition.weight_column)
     if definition.timestamp_column:
         required_cols.append(definition.timestamp_column)
 
@@ -259,17 +658,24 @@ async def define_tie_strength(
     await db.commit()
     await db.refresh(dataset)
 
+    # Pre-aggregate the interaction pairs so networks rebuild from the small table
+    await asyncio.to_thread(PairTableService.refresh_for_dataset, dataset)
+
     return dataset
 
 @router.get("/{dataset_id}/download")
 async def download_dataset(
     dataset_id: int,
-    format: str = Query('csv', enum=['csv', 'xlsx', 'json']),
+    format: str = Query('csv', enum=['csv', 'xlsx', 'json', 'ndjson', 'parquet']),
+    range_header: Optional[str] = Header(None, alias="Range"),
     db: AsyncSession = Depends(get_async_session),
     user: User = Depends(current_active_user)
 ):
     """
     Download a dataset in the specified format.
+    
+    A stored file already in the requested format is sent as it is and
+    supports byte ranges; other formats are converted while streaming.
     """
     dataset = await DataService.get_dataset(db, dataset_id)
     if not dataset:
@@ -286,64 +692,39 @@ async def download_dataset(
         raise HTTPException(status_code=400, detail="Dataset file not found")
     
     try:
-        # Read file into pandas DataFrame
-        if file_path.endswith('.csv'):
-            df = pd.read_csv(file_path)
-        elif file_path.endswith(('.xlsx', '.xls')):
-            df = pd.read_excel(file_path)
-        elif file_path.endswith('.json'):
-            with open(file_path, 'r') as f:
-                data = json.load(f)
-            if isinstance(data, list):
-                df = pd.DataFrame(data)
-            else:
-                df = pd.DataFrame([data])
-        else:
-            # For other formats, try csv first
-            try:
-                df = pd.read_csv(file_path)
-            except:
-                raise HTTPException(status_code=400, detail="Unsupported file format for download")
+        download = DatasetExporter.download_headers(dataset.name, format)
         
-        # Prepare the file in the requested format
-        if format == 'csv':
-            output = df.to_csv(index=False)
-            media_type = "text/csv"
-            filename = f"{dataset.name.replace(' ', '_')}.csv"
-        elif format == 'xlsx':
-            from io import BytesIO
-            output_buffer = BytesIO()
-            df.to_excel(output_buffer, index=False)
-            output = output_buffer.getvalue()
-            media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            filename = f"{dataset.name.replace(' ', '_')}.xlsx"
-        elif format == 'json':
-            output = df.to_json(orient='records')
-            media_type = "application/json"
-            filename = f"{dataset.name.replace(' ', '_')}.json"
-        else:
-            raise HTTPException(status_code=400, detail="Unsupported format")
+        # Send the stored file as it is
+        if DatasetExporter.is_passthrough(file_path, format):
+            status_code, headers, body = DatasetExporter.file_response_parts(file_path, range_header)
+            return StreamingResponse(
+                body,
+                status_code=status_code,
+                media_type=download["media_type"],
+                headers={**download["headers"], **headers}
+            )
         
-        # Set appropriate headers
-        headers = {
-            "Content-Disposition": f'attachment; filename="{filename}"'
-        }
+        DatasetExporter.check_readable(file_path)
         
         if format == 'xlsx':
-            # Return binary response for Excel
-            return Response(
-                content=output,
-                media_type=media_type,
-                headers=headers
-            )
-        else:
-            # Return text response for CSV and JSON
-            return Response(
-                content=output,
-                media_type=media_type,
-                headers=headers
+            # XLSX can only be sent once the workbook is complete
+            xlsx_path = await asyncio.to_thread(DatasetExporter.write_xlsx, file_path)
+            return StreamingResponse(
+                DatasetExporter.iter_file(xlsx_path),
+                media_type=download["media_type"],
+                headers={**download["headers"], "Content-Length": str(os.path.getsize(xlsx_path))},
+                background=BackgroundTask(os.remove, xlsx_path)
             )
+        
+        # Convert batch by batch while sending
+        return StreamingResponse(
+            iterate_in_threadpool(DatasetExporter.conversion_stream(file_path, format)),
+            media_type=download["media_type"],
+            headers=download["headers"]
+        )
             
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error downloading dataset: {e}")
         raise HTTPException(status_code=500, detail=f"Error downloading dataset: {str(e)}")
\ No newline at end of file
@@ -1,11 +1,10 @@
 from fastapi import APIRouter, HTTPException, status, Depends, File, UploadFile, Form, Query
 from typing import List, Dict, Any, Optional
 import networkx as nx
-import json
 import os
 import uuid
+import asyncio
 import shutil
-import pandas as pd
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
@@ -13,11 +12,17 @@ from sqlalchemy import delete, update
 
 from app.core.database import get_async_session
 from app.auth.authentication import current_active_user
-from app.models.models import Network, Dataset, User
-from app.schemas.network import NetworkCreate, NetworkUpdate, Network as NetworkSchema, NetworkData
+from app.models.models import Network, Dataset, Project, User
+from app.schemas.network import (
+    NetworkCreate, NetworkUpdate, Network as NetworkSchema, NetworkData,
+    NetworkComparisonRequest, NetworkComparison, MultiplexNetworkCreate
+)
 from app.schemas.data import TieStrengthCalculationMethod
-from app.services.network_analysis import NetworkAnalysisService
+from app.services.network_analysis import NetworkAnalysisService, COMPARISON_METRICS, get_analysis_pool
 from app.services.data_service import DataService
+from app.services.network_store import NetworkStore, NATIVE_EXTENSION
+from app.services.network_ingest import NetworkIngestService
+from app.services.pair_table import PairTableService
 
 router = APIRouter(
     prefix="/network",
@@ -101,13 +106,9 @@ async def create_network(
         
         # If the dataset is already a network file, we can use it directly
         if dataset.type == "NETWORK":
-            if file_path.endswith(".graphml"):
-                G = nx.read_graphml(file_path)
-            elif file_path.endswith(".gexf"):
-                G = nx.read_gexf(file_path)
-            elif file_path.endswith(".gml"):
-                G = nx.read_gml(file_path)
-            else:
+            try:
+                G = NetworkStore.load_graph(file_path)
+            except ValueError:
                 raise HTTPException(status_code=400, detail="Unsupported network file format")
             
             # Update network properties
@@ -118,90 +119,52 @@ async def create_network(
         
         # Otherwise, create network from dataset
         else:
-            # Load the dataset
-            if file_path.endswith(".csv"):
-                df = pd.read_csv(file_path)
-            elif file_path.endswith((".xlsx", ".xls")):
-                df = pd.read_excel(file_path)
-            elif file_path.endswith(".json"):
-                with open(file_path, 'r') as f:
-                    data = json.load(f)
-                if isinstance(data, list):
-                    df = pd.DataFrame(data)
-                else:
-                    raise HTTPException(status_code=400, detail="JSON must contain an array of objects")
-            else:
-                raise HTTPException(status_code=400, detail="Unsupported file format")
-
             # Check if tie strength definition exists
             if not dataset.tie_strength_definition:
                 raise HTTPException(status_code=400, detail="A tie strength definition must be set for the dataset before creating a network")
             
             # Extract definition details
             definition = dataset.tie_strength_definition
-            source_col = definition['source_column']
-            target_col = definition['target_column']
             calc_method = definition['calculation_method']
             weight_col = definition.get('weight_column')
             is_directed_def = definition.get('directed', False)
             
-            # Ensure required columns exist in DataFrame
-            required_cols_df = [source_col, target_col]
-            if calc_method == TieStrengthCalculationMethod.ATTRIBUTE_VALUE and weight_col:
-                required_cols_df.append(weight_col)
-            missing_cols_df = [col for col in required_cols_df if col not in df.columns]
-            if missing_cols_df:
-                raise HTTPException(status_code=400, detail=f"Required columns missing in data file: {', '.join(missing_cols_df)}")
-            
-            # Create graph based on definition's directed flag or parameter override
-            if directed or is_directed_def:
-                G = nx.DiGraph()
-            else:
-                G = nx.Graph()
-            
-            # Add nodes first (ensure all nodes from source/target exist)
-            all_nodes = pd.unique(df[[source_col, target_col]].values.ravel('K'))
-            for node_id in all_nodes:
-                if not pd.isna(node_id):
-                    # Try to find attributes for this node (e.g., from the first occurrence)
-                    node_rows = df[(df[source_col] == node_id) | (df[target_col] == node_id)]
-                    if not node_rows.empty:
-                        node_row = node_rows.iloc[0]
-                        node_attrs = {col: node_row[col] for col in df.columns if col not in [source_col, target_col, weight_col]}
-                        G.add_node(str(node_id), **node_attrs)
-            
-            # Calculate weights based on method
-            if weighted:
-                if calc_method == TieStrengthCalculationMethod.FREQUENCY:
-                    # Group by source and target, count occurrences
-                    edge_weights = df.groupby([source_col, target_col]).size().reset_index(name='weight')
-                elif calc_method == TieStrengthCalculationMethod.ATTRIBUTE_VALUE and weight_col:
-                    # Group by source and target, sum the weight column
-                    # Ensure weight column is numeric
-                    if not pd.api.types.is_numeric_dtype(df[weight_col]):
-                        raise HTTPException(status_code=400, detail=f"Weight column '{weight_col}' must be numeric for ATTRIBUTE_VALUE method.")
-                    edge_weights = df.groupby([source_col, target_col])[weight_col].sum().reset_index(name='weight')
-                else:
-                    # Default or unsupported method for weighted - treat as unweighted for now
-                    edge_weights = df[[source_col, target_col]].drop_duplicates()
-                    edge_weights['weight'] = 1.0  # Assign default weight
-                    weighted = False  # Mark as effectively unweighted if method not supported
+            if calc_method == TieStrengthCalculationMethod.AFFILIATION:
+                # Load the dataset
+                try:
+                    df = PairTableService.read_source(file_path)
+                except ValueError as e:
+                    raise HTTPException(status_code=400, detail=str(e))
                 
-                # Add edges with calculated weights
-                for _, row in edge_weights.iterrows():
-                    source = row[source_col]
-                    target = row[target_col]
-                    weight = row['weight']
-                    if not pd.isna(source) and not pd.isna(target):
-                        G.add_edge(str(source), str(target), weight=float(weight))
+                # Project person x affiliation memberships onto a person network
+                person_col = definition.get('person_column')
+                affiliation_col = definition.get('affiliation_column')
+                required_cols_df = [person_col, affiliation_col] + ([weight_col] if weight_col else [])
+                missing_cols_df = [col for col in required_cols_df if col not in df.columns]
+                if missing_cols_df:
+                    raise HTTPException(status_code=400, detail=f"Required columns missing in data file: {', '.join(missing_cols_df)}")
+                
+                G = NetworkAnalysisService.create_affiliation_network(
+                    df,
+                    person_column=person_col,
+                    affiliation_column=affiliation_col,
+                    weight_column=weight_col,
+                    normalization=definition.get('projection_normalization') or "none",
+                    weighted=weighted,
+                    max_affiliation_size=definition.get('max_affiliation_size')
+                )
             else:
-                # Add unweighted edges (unique pairs)
-                unique_edges = df[[source_col, target_col]].drop_duplicates()
-                for _, row in unique_edges.iterrows():
-                    source = row[source_col]
-                    target = row[target_col]
-                    if not pd.isna(source) and not pd.isna(target):
-                        G.add_edge(str(source), str(target))
+                # Rebuild from the pre-aggregated pair table (built from the file if missing or stale)
+                try:
+                    pair_table = PairTableService.get_or_build(file_path, definition)
+                    G, weighted = PairTableService.build_graph(
+                        pair_table,
+                        definition,
+                        directed=directed or is_directed_def,
+                        weighted=weighted
+                    )
+                except ValueError as e:
+                    raise HTTPException(status_code=400, detail=str(e))
         
         # Calculate metrics using NetworkAnalysisService
         metrics = NetworkAnalysisService.calculate_network_metrics(G)
@@ -210,10 +173,10 @@ async def create_network(
         network_uuid = str(uuid.uuid4())
         network_folder = os.path.join("networks", network_uuid)
         os.makedirs(network_folder, exist_ok=True)
-        saved_graph_path = os.path.join(network_folder, "network.graphml")
+        saved_graph_path = os.path.join(network_folder, f"network{NATIVE_EXTENSION}")
         
-        # Save the graph
-        nx.write_graphml(G, saved_graph_path)
+        # Save the graph in the compact native format
+        NetworkStore.save_graph(G, saved_graph_path)
         
         # Create new Network instance
         new_network = Network(
@@ -357,13 +320,9 @@ async def get_network_metrics(
             raise HTTPException(status_code=400, detail="Network file path not found")
         
         # Load graph
-        if file_path.endswith(".graphml"):
-            G = nx.read_graphml(file_path)
-        elif file_path.endswith(".gexf"):
-            G = nx.read_gexf(file_path)
-        elif file_path.endswith(".gml"):
-            G = nx.read_gml(file_path)
-        else:
+        try:
+            G = NetworkStore.load_graph(file_path)
+        except ValueError:
             raise HTTPException(status_code=400, detail="Unsupported network file format")
         
         # Calculate metrics
@@ -413,13 +372,9 @@ async def calculate_network_metrics(
             raise HTTPException(status_code=400, detail="Network file path not found")
         
         # Load graph
-        if file_path.endswith(".graphml"):
-            G = nx.read_graphml(file_path)
-        elif file_path.endswith(".gexf"):
-            G = nx.read_gexf(file_path)
-        elif file_path.endswith(".gml"):
-            G = nx.read_gml(file_path)
-        else:
+        try:
+            G = NetworkStore.load_graph(file_path)
+        except ValueError:
             raise HTTPException(status_code=400, detail="Unsupported network file format")
         
         # Calculate metrics
@@ -439,6 +394,237 @@ async def calculate_network_metrics(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error calculating network metrics: {str(e)}")
 
+@router.post("/project/{project_id}/compare", response_model=NetworkComparison)
+async def compare_project_networks(
+    project_id: int,
+    comparison: NetworkComparisonRequest,
+    db: AsyncSession = Depends(get_async_session),
+    user: User = Depends(current_active_user)
+):
+    """
+    Compare global metrics across several networks of a project.
+    
+    Metrics already stored on a network are reused; the remaining ones are
+    computed in parallel in a process pool and stored for later requests.
+    """
+    # Fetch and authorize the project
+    result = await db.execute(select(Project).where(Project.id == project_id))
+    project = result.scalar_one_or_none()
+    if project is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+    if project.user_id != user.id and not user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+    
+    unknown_metrics = [metric for metric in comparison.metrics if metric not in COMPARISON_METRICS]
+    if unknown_metrics:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported metrics: {', '.join(unknown_metrics)}. Available: {', '.join(COMPARISON_METRICS)}"
+        )
+    
+    # Fetch and authorize the networks
+    network_ids = list(dict.fromkeys(comparison.network_ids))
+    result = await db.execute(select(Network).where(Network.id.in_(network_ids)))
+    networks = {network.id: network for network in result.scalars().all()}
+    
+    missing_ids = [str(network_id) for network_id in network_ids if network_id not in networks]
+    if missing_ids:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Networks not found: {', '.join(missing_ids)}")
+    
+    for network in networks.values():
+        if network.user_id != user.id and not user.is_superuser:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"Not authorized to access network {network.id}")
+        if network.project_id != project_id:
+            raise HTTPException(status_code=400, detail=f"Network {network.id} does not belong to project {project_id}")
+    
+    # Reuse metrics already stored with each network
+    rows = {}
+    pending = {}
+    for network_id in network_ids:
+        network = networks[network_id]
+        cached = {**(network.metrics or {})}
+        if network.communities:
+            cached.setdefault("modularity", network.communities.get("modularity"))
+            cached.setdefault("num_communities", network.communities.get("num_communities"))
+        
+        rows[network_id] = {metric: cached[metric] for metric in comparison.metrics if cached.get(metric) is not None}
+        missing_metrics = [metric for metric in comparison.metrics if metric not in rows[network_id]]
+        if missing_metrics:
+            pending[network_id] = missing_metrics
+    
+    # Fan the remaining work out across the process pool
+    errors = {}
+    if pending:
+        loop = asyncio.get_running_loop()
+        pool = get_analysis_pool()
+        pending_ids = list(pending.keys())
+        results = await asyncio.gather(
+            *[
+                loop.run_in_executor(
+                    pool,
+                    NetworkAnalysisService.calculate_comparison_metrics,
+                    networks[network_id].file_path,
+                    pending[network_id]
+                )
+                for network_id in pending_ids
+            ],
+            return_exceptions=True
+        )
+        
+        for network_id, computed in zip(pending_ids, results):
+            if isinstance(computed, Exception):
+                errors[str(network_id)] = str(computed)
+                continue
+            rows[network_id].update(computed)
+            
+            # Store the new values so later comparisons are served from the cache
+            networks[network_id].metrics = {**(networks[network_id].metrics or {}), **computed}
+        
+        await db.commit()
+    
+    return {
+        "project_id": project_id,
+        "metrics": comparison.metrics,
+        "rows": [
+            {
+                "network_id": network_id,
+                "name": networks[network_id].name,
+                **{metric: rows[network_id].get(metric) for metric in comparison.metrics}
+            }
+            for network_id in network_ids
+        ],
+        "errors": errors
+    }
+
+@router.post("/multiplex", response_model=NetworkSchema, status_code=status.HTTP_201_CREATED)
+async def create_multiplex_network(
+    multiplex: MultiplexNetworkCreate,
+    db: AsyncSession = Depends(get_async_session),
+    user: User = Depends(current_active_user)
+):
+    """
+    Create a multiplex network from existing networks used as layers.
+    
+    Layers share one node table; edges are kept per layer and as a summed
+    aggregate so single-layer endpoints keep working on the result.
+    """
+    # Fetch and authorize the layer networks
+    layer_ids = [layer.network_id for layer in multiplex.layers]
+    if len(set(layer_ids)) != len(layer_ids):
+        raise HTTPException(status_code=400, detail="Each network can only be used as one layer")
+    
+    result = await db.execute(select(Network).where(Network.id.in_(layer_ids)))
+    networks = {network.id: network for network in result.scalars().all()}
+    
+    missing_ids = [str(network_id) for network_id in layer_ids if network_id not in networks]
+    if missing_ids:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Networks not found: {', '.join(missing_ids)}")
+    
+    for network in networks.values():
+        if network.user_id != user.id and not user.is_superuser:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"Not authorized to access network {network.id}")
+        if not network.file_path or not os.path.exists(network.file_path):
+            raise HTTPException(status_code=404, detail=f"Network file not found for network {network.id}")
+    
+    if multiplex.project_id is not None:
+        result = await db.execute(select(Project).where(Project.id == multiplex.project_id))
+        project = result.scalar_one_or_none()
+        if project is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+        if project.user_id != user.id and not user.is_superuser:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+    
+    # Resolve unique layer names
+    layer_names = [layer.name or networks[layer.network_id].name for layer in multiplex.layers]
+    if len(set(layer_names)) != len(layer_names):
+        raise HTTPException(status_code=400, detail="Layer names must be unique")
+    
+    network_folder = None
+    try:
+        # Load layer arrays and combine them over a shared node table
+        layers = []
+        for layer_name, network_id in zip(layer_names, layer_ids):
+            try:
+                layers.append((layer_name, NetworkStore.load_network_arrays(networks[network_id].file_path)))
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"Unsupported network file format for network {network_id}")
+        arrays = NetworkStore.build_multiplex(layers, directed=multiplex.directed)
+        
+        # Save the multiplex network in the native format
+        network_folder = os.path.join("networks", str(uuid.uuid4()))
+        os.makedirs(network_folder, exist_ok=True)
+        file_path = os.path.join(network_folder, f"network{NATIVE_EXTENSION}")
+        NetworkStore.save_arrays(file_path, arrays)
+        
+        # Calculate layer-aware metrics
+        multiplex_metrics = NetworkAnalysisService.calculate_multiplex_metrics(arrays)
+        
+        new_network = Network(
+            name=multiplex.name,
+            description=multiplex.description or f"Multiplex network with layers: {', '.join(layer_names)}",
+            dataset_id=None,
+            project_id=multiplex.project_id,
+            created_at=datetime.now().isoformat(),
+            updated_at=datetime.now().isoformat(),
+            directed=multiplex.directed,
+            weighted=True,
+            user_id=user.id,
+            file_path=file_path,
+            node_count=len(arrays["node_ids"]),
+            edge_count=len(arrays["source"]),
+            metrics=multiplex_metrics["global_metrics"],
+            attributes={
+                "network_type": "multiplex",
+                "layers": layer_names,
+                "layer_network_ids": layer_ids
+            }
+        )
+        
+        db.add(new_network)
+        await db.commit()
+        await db.refresh(new_network)
+        
+        return new_network
+    
+    except HTTPException:
+        if network_folder:
+            shutil.rmtree(network_folder, ignore_errors=True)
+        raise
+    except Exception as e:
+        if network_folder:
+            shutil.rmtree(network_folder, ignore_errors=True)
+        raise HTTPException(status_code=500, detail=f"Error creating multiplex network: {str(e)}")
+
+@router.get("/{network_id}/multiplex-metrics", response_model=Dict[str, Any])
+async def get_multiplex_metrics(
+    network_id: int,
+    db: AsyncSession = Depends(get_async_session),
+    user: User = Depends(current_active_user)
+):
+    """
+    Get per-layer, overlap and node-level metrics of a multiplex network.
+    """
+    # Fetch network
+    result = await db.execute(select(Network).where(Network.id == network_id))
+    network = result.scalar_one_or_none()
+    
+    if network is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Network not found")
+    
+    if network.user_id != user.id and not user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+    
+    if (network.attributes or {}).get("network_type") != "multiplex":
+        raise HTTPException(status_code=400, detail="Network is not a multiplex network")
+    
+    if not network.file_path or not os.path.exists(network.file_path):
+        raise HTTPException(status_code=404, detail="Network file not found")
+    
+    # Layer-aware metrics are computed off the event loop
+    loop = asyncio.get_running_loop()
+    arrays = await loop.run_in_executor(None, NetworkStore.load_arrays, network.file_path)
+    return await loop.run_in_executor(None, NetworkAnalysisService.calculate_multiplex_metrics, arrays)
+
 @router.get("/{network_id}/communities", response_model=Dict[str, Any])
 async def get_network_communities(
     network_id: int,
@@ -473,13 +659,9 @@ async def get_network_communities(
             raise HTTPException(status_code=400, detail="Network file path not found")
         
         # Load graph
-        if file_path.endswith(".graphml"):
-            G = nx.read_graphml(file_path)
-        elif file_path.endswith(".gexf"):
-            G = nx.read_gexf(file_path)
-        elif file_path.endswith(".gml"):
-            G = nx.read_gml(file_path)
-        else:
+        try:
+            G = NetworkStore.load_graph(file_path)
+        except ValueError:
             raise HTTPException(status_code=400, detail="Unsupported network file format")
         
         # Detect communities
@@ -525,13 +707,9 @@ async def detect_communities(
             raise HTTPException(status_code=400, detail="Network file path not found")
         
         # Load graph
-        if file_path.endswith(".graphml"):
-            G = nx.read_graphml(file_path)
-        elif file_path.endswith(".gexf"):
-            G = nx.read_gexf(file_path)
-        elif file_path.endswith(".gml"):
-            G = nx.read_gml(file_path)
-        else:
+        try:
+            G = NetworkStore.load_graph(file_path)
+        except ValueError:
             raise HTTPException(status_code=400, detail="Unsupported network file format")
         
         # Detect communities
@@ -578,13 +756,9 @@ async def predict_links(
             raise HTTPException(status_code=400, detail="Network file path not found")
         
         # Load graph
-        if file_path.endswith(".graphml"):
-            G = nx.read_graphml(file_path)
-        elif file_path.endswith(".gexf"):
-            G = nx.read_gexf(file_path)
-        elif file_path.endswith(".gml"):
-            G = nx.read_gml(file_path)
-        else:
+        try:
+            G = NetworkStore.load_graph(file_path)
+        except ValueError:
             raise HTTPException(status_code=400, detail="Unsupported network file format")
         
         # Predict links
@@ -633,13 +807,9 @@ async def get_network_data(
             raise HTTPException(status_code=400, detail="Network file path not found")
         
         # Load graph
-        if file_path.endswith(".graphml"):
-            G = nx.read_graphml(file_path)
-        elif file_path.endswith(".gexf"):
-            G = nx.read_gexf(file_path)
-        elif file_path.endswith(".gml"):
-            G = nx.read_gml(file_path)
-        else:
+        try:
+            G = NetworkStore.load_graph(file_path)
+        except ValueError:
             raise HTTPException(status_code=400, detail="Unsupported network file format")
         
         # Prepare data for visualization
@@ -690,13 +860,9 @@ async def export_network(
             raise HTTPException(status_code=400, detail="Network file path not found")
         
         # Load graph
-        if file_path.endswith(".graphml"):
-            G = nx.read_graphml(file_path)
-        elif file_path.endswith(".gexf"):
-            G = nx.read_gexf(file_path)
-        elif file_path.endswith(".gml"):
-            G = nx.read_gml(file_path)
-        else:
+        try:
+            G = NetworkStore.load_graph(file_path)
+        except ValueError:
             raise HTTPException(status_code=400, detail="Unsupported network file format")
         
         # Export to requested formats
@@ -740,13 +906,9 @@ async def calculate_homophily(
             raise HTTPException(status_code=400, detail="Network file path not found")
         
         # Load graph
-        if file_path.endswith(".graphml"):
-            G = nx.read_graphml(file_path)
-        elif file_path.endswith(".gexf"):
-            G = nx.read_gexf(file_path)
-        elif file_path.endswith(".gml"):
-            G = nx.read_gml(file_path)
-        else:
+        try:
+            G = NetworkStore.load_graph(file_path)
+        except ValueError:
             raise HTTPException(status_code=400, detail="Unsupported network file format")
         
         # Calculate homophily
@@ -773,7 +935,11 @@ async def upload_network_file(
 ):
     """
     Upload a network file (GraphML, GEXF, GML) directly.
+    
+    The upload is streamed to disk, parsed incrementally and stored in the
+    compact native format.
     """
+    network_folder = None
     try:
         # Check file extension
         filename = file.filename.lower()
@@ -783,78 +949,51 @@ async def upload_network_file(
                 detail="Unsupported file format. Please upload GraphML, GEXF, or GML files."
             )
         
-        # Read file content
-        content = await file.read()
+        # Define persistent save folder
+        network_uuid = str(uuid.uuid4())
+        network_folder = os.path.join("networks", network_uuid)
+        os.makedirs(network_folder, exist_ok=True)
         
-        # Create a temporary file to load the network
-        import tempfile
+        # Stream, parse and store the network as node/edge arrays
+        ingested = await NetworkIngestService.ingest_upload(file, network_folder, directed=directed)
+        arrays = ingested["arrays"]
+        saved_graph_path = ingested["file_path"]
         
-        with tempfile.NamedTemporaryFile(delete=False) as temp:
-            temp.write(content)
-            temp_path = temp.name
+        # Calculate basic network metrics
+        G = NetworkStore.arrays_to_graph(arrays)
+        metrics = NetworkAnalysisService.calculate_network_metrics(G)
         
-        try:
-            # Load the graph to validate
-            if filename.endswith(".graphml"):
-                G = nx.read_graphml(temp_path)
-            elif filename.endswith(".gexf"):
-                G = nx.read_gexf(temp_path)
-            elif filename.endswith(".gml"):
-                G = nx.read_gml(temp_path)
-            
-            # Update directed property if needed
-            if directed and not G.is_directed():
-                G = nx.DiGraph(G)
-            elif not directed and G.is_directed():
-                G = nx.Graph(G)
-            
-            # Define persistent save path
-            network_uuid = str(uuid.uuid4())
-            network_folder = os.path.join("networks", network_uuid)
-            os.makedirs(network_folder, exist_ok=True)
-            saved_graph_path = os.path.join(network_folder, filename)
-            
-            # Save the graph
-            if filename.endswith(".graphml"):
-                nx.write_graphml(G, saved_graph_path)
-            elif filename.endswith(".gexf"):
-                nx.write_gexf(G, saved_graph_path)
-            elif filename.endswith(".gml"):
-                nx.write_gml(G, saved_graph_path)
-            
-            # Calculate basic network metrics
-            metrics = NetworkAnalysisService.calculate_network_metrics(G)
-            
-            # Create network record
-            new_network = Network(
-                name=name,
-                description=description or f"Uploaded network file: {filename}",
-                dataset_id=None,
-                created_at=datetime.now().isoformat(),
-                updated_at=datetime.now().isoformat(),
-                directed=G.is_directed(),
-                weighted=weighted,
-                user_id=user.id,
-                file_path=saved_graph_path,
-                node_count=G.number_of_nodes(),
-                edge_count=G.number_of_edges(),
-                metrics=metrics["global_metrics"],
-                attributes={
-                    "original_filename": filename
-                }
-            )
-            
-            # Save to database
-            db.add(new_network)
-            await db.commit()
-            await db.refresh(new_network)
-            
-            return new_network
+        # Create network record
+        new_network = Network(
+            name=name,
+            description=description or f"Uploaded network file: {filename}",
+            dataset_id=None,
+            created_at=datetime.now().isoformat(),
+            updated_at=datetime.now().isoformat(),
+            directed=G.is_directed(),
+            weighted=weighted,
+            user_id=user.id,
+            file_path=saved_graph_path,
+            node_count=G.number_of_nodes(),
+            edge_count=G.number_of_edges(),
+            metrics=metrics["global_metrics"],
+            attributes={
+                "original_filename": filename
+            }
+        )
         
-        finally:
-            # Clean up temporary file
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
+        # Save to database
+        db.add(new_network)
+        await db.commit()
+        await db.refresh(new_network)
+        
+        return new_network
     
+    except HTTPException:
+        if network_folder:
+            shutil.rmtree(network_folder, ignore_errors=True)
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error uploading network file: {str(e)}")
\ No newline at end of file
+        if network_folder:
+            shutil.rmtree(network_folder, ignore_errors=True)
+        raise HTTPException(status_code=500, detail=f"Error uploading network file: {str(e)}")
@@ -8,6 +8,7 @@ from sqlalchemy.orm import sessionmaker
 
 # Import all models to ensure they're included in Base.metadata
 from app.models.models import Base
+from app.core.schema_upgrade import upgrade_schema
 
 # Load environment variables from .env file
 load_dotenv()
@@ -56,6 +57,11 @@ async def init_db(reset: bool = False):
         # Create all tables
         print("Creating tables...")
         await conn.run_sync(Base.metadata.create_all)
+        
+        # Tables created by earlier versions lack columns added since
+        added = await conn.run_sync(upgrade_schema)
+        if added:
+            print(f"Added columns: {', '.join(added)}")
     
     print("Database initialization completed!")
 
@@ -0,0 +1,57 @@
+import logging
+from typing import List, Tuple
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import Column
+
+from app.models.models import Base
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Columns added to existing tables after their creation: (table, column name)
+# create_all only creates missing tables, so databases created before these
+# columns existed get them added here.
+ADDED_COLUMNS: List[Tuple[str, str]] = [
+    ("datasets", "content_hash"),
+    ("datasets", "metadata"),
+]
+
+
+def upgrade_schema(connection: Connection) -> List[str]:
+    """
+    Add columns that are missing from existing tables.
+
+    Idempotent: columns that already exist are left alone, so it runs on
+    every startup right after ``Base.metadata.create_all``.
+
+    Args:
+        connection: Synchronous connection (use with ``AsyncConnection.run_sync``)
+
+    Returns:
+        List of the added columns as "table.column"
+    """
+    inspector = inspect(connection)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+    for table_name, column_name in ADDED_COLUMNS:
+        if table_name not in existing_tables:
+            continue
+        existing_columns = {column["name"] for column in inspector.get_columns(table_name)}
+        if column_name in existing_columns:
+            continue
+
+        column: Column = Base.metadata.tables[table_name].c[column_name]
+        preparer = connection.dialect.identifier_preparer
+        column_type = column.type.compile(dialect=connection.dialect)
+        connection.execute(text(
+            f"ALTER TABLE {preparer.quote(table_name)} ADD COLUMN {preparer.quote(column_name)} {column_type}"
+        ))
+        # Indexes declared on the column (index=True) are not created by ALTER TABLE
+        for index in Base.metadata.tables[table_name].indexes:
+            if column_name in index.columns:
+                index.create(connection, checkfirst=True)
+        added.append(f"{table_name}.{column_name}")
+        logger.info(f"Added column {table_name}.{column_name}")
+    return added
@@ -1,5 +1,6 @@
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 import pydantic
 
@@ -45,8 +46,10 @@ SQLAlchemyUserDatabase.get_by_email = patched_get_by_email
 # Import routers
 from app.api.routes import projects_router, data_router, network_router, ml_router, abm_router, auth_router
 from app.core.database import get_async_session, engine
+from app.services.file_storage import MAX_UPLOAD_BYTES
 # Import models from models.py which includes complete model definitions with relationships
 from app.models.models import Base
+from app.core.schema_upgrade import upgrade_schema
 
 app = FastAPI(
     title="OrgAI API",
@@ -66,11 +69,24 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    """Reject request bodies larger than the upload limit before they are read."""
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_UPLOAD_BYTES:
+        return JSONResponse(
+            status_code=413,
+            content={"detail": f"Request body exceeds the maximum upload size of {MAX_UPLOAD_BYTES} bytes"}
+        )
+    return await call_next(request)
+
+
 @app.on_event("startup")
 async def create_db_tables():
-    """Create database tables on app startup."""
+    """Create database tables on app startup and add columns missing from existing tables."""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(upgrade_schema)
 
 
 @app.get("/")
@@ -103,6 +103,12 @@ class Dataset(Base):
     processed_file_path = Column(String(255), nullable=True)
     anonymized_file_path = Column(String(255), nullable=True)
     
+    # SHA-256 of the uploaded content (key into the blob store)
+    content_hash = Column(String(64), nullable=True, index=True)
+    
+    # Processing/anonymization details as JSON ("metadata" is reserved on declarative models)
+    dataset_metadata = Column("metadata", JSON, nullable=True)
+    
     # Store tie strength definition as JSON
     tie_strength_definition = Column(JSON, nullable=True)
     
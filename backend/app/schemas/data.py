@@ -1,4 +1,4 @@
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Union, Tuple
 from datetime import datetime
 from enum import Enum
 from pydantic import BaseModel, Field
@@ -7,16 +7,29 @@ class TieStrengthCalculationMethod(str, Enum):
     """Enum for tie strength calculation methods."""
     FREQUENCY = "frequency"
     ATTRIBUTE_VALUE = "attribute_value"
+    AFFILIATION = "affiliation"
+
+class ProjectionNormalization(str, Enum):
+    """Enum for weighting of one-mode projections of affiliation data."""
+    NONE = "none"
+    NEWMAN = "newman"
 
 class TieStrengthDefinition(BaseModel):
     """Schema for tie strength definition."""
-    source_column: str = Field(..., description="Column representing the source node")
-    target_column: str = Field(..., description="Column representing the target node")
+    source_column: Optional[str] = Field(None, description="Column representing the source node (required unless 'affiliation' method)")
+    target_column: Optional[str] = Field(None, description="Column representing the target node (required unless 'affiliation' method)")
     calculation_method: TieStrengthCalculationMethod = Field(..., description="Method to calculate tie strength")
-    weight_column: Optional[str] = Field(None, description="Column containing the value for 'attribute_value' method")
+    weight_column: Optional[str] = Field(None, description="Column containing the value for 'attribute_value' method, or the membership weight for 'affiliation' method")
     timestamp_column: Optional[str] = Field(None, description="Column containing timestamps for 'frequency' method (optional for simple count)")
     time_window_seconds: Optional[int] = Field(None, description="Time window in seconds for frequency calculation (optional)")
     directed: bool = Field(False, description="Whether the relationship is directed")
+    person_column: Optional[str] = Field(None, description="Column identifying the person for 'affiliation' method")
+    affiliation_column: Optional[str] = Field(None, description="Column identifying the affiliation (project, meeting, ...) for 'affiliation' method")
+    projection_normalization: ProjectionNormalization = Field(
+        ProjectionNormalization.NONE,
+        description="'none' counts shared affiliations, 'newman' weights each by 1/(size - 1)"
+    )
+    max_affiliation_size: Optional[int] = Field(None, description="Ignore affiliations with more members than this (optional)")
 
 class DatasetBase(BaseModel):
     """Base dataset schema with common attributes."""
@@ -87,6 +100,21 @@ class ProcessingOptions(BaseModel):
         ]
     )
 
+class ProcessingRecipeCreate(BaseModel):
+    """Schema for saving processing options as a reusable recipe."""
+    name: str = Field(..., description="Recipe name")
+    description: Optional[str] = Field(None, description="Recipe description")
+    options: ProcessingOptions = Field(..., description="Processing options applied by the recipe")
+    source_dataset_id: Optional[int] = Field(None, description="Dataset the recipe was created from")
+
+class ProcessingRecipe(ProcessingRecipeCreate):
+    """Schema for a saved processing recipe."""
+    id: str
+    required_columns: List[str] = Field(..., description="Columns a dataset needs for the recipe to apply")
+    date_formats: Dict[str, str] = Field(default_factory=dict, description="Date formats inferred per column on earlier runs")
+    user_id: int
+    created_at: datetime
+
 class AnonymizationOptions(BaseModel):
     """Schema for dataset anonymization options."""
     method: str = Field(
@@ -106,20 +134,198 @@ class AnonymizationOptions(BaseModel):
     )
     parameters: Optional[Dict[str, Any]] = Field(
         None,
-        description="Method-specific parameters",
+        description="Method-specific parameters (pseudonymization: prefix shared by all pseudonyms, field_prefix to start each with its field name)",
         example={"k_value": 5, "keep_mapping": True}
     )
 
+class DatasetVersion(BaseModel):
+    """Schema for a cached processed or anonymized version of a dataset."""
+    key: str = Field(..., description="Key derived from the source content and the options")
+    kind: str = Field(..., description="processed or anonymized")
+    options: Dict[str, Any]
+    row_count: Optional[int] = None
+    columns: Optional[List[str]] = None
+    size: int = Field(..., description="Size on disk in bytes")
+    created_at: datetime
+    last_used: datetime
+    active: bool = Field(..., description="Whether this is the dataset's current version of its kind")
+
+class DatasetSheet(BaseModel):
+    """Schema for a sheet of an Excel dataset, converted to its own Parquet file."""
+    index: int
+    name: str
+    row_count: int
+    columns: List[str]
+    selected: bool = Field(..., description="Whether this sheet is the dataset's current data")
+
+class DatasetAppendResult(BaseModel):
+    """Schema for the result of appending a batch of rows to a dataset."""
+    dataset: Dataset
+    batch: int = Field(..., description="Number of the batch among the dataset's appended batches")
+    rows_appended: int
+    row_count: int = Field(..., description="Rows of the dataset after the append")
+    widened_columns: List[str] = Field(default_factory=list, description="Compacted integer columns widened to hold the batch's values")
+    edge_delta: Optional[Dict[str, Any]] = Field(None, description="Pairs and new nodes the batch adds to the dataset's pair table")
+    networks_updated: List[int] = Field(default_factory=list, description="Networks extended with the edge delta")
+    networks_stale: List[int] = Field(default_factory=list, description="Networks that must be rebuilt to include the batch")
+    stale_versions: List[str] = Field(default_factory=list, description="Processed or anonymized versions that do not include the batch")
+
+class JoinHow(str, Enum):
+    """Enum for the types of dataset joins."""
+    INNER = "inner"
+    LEFT = "left"
+    RIGHT = "right"
+    OUTER = "outer"
+
+class DatasetJoinRequest(BaseModel):
+    """Schema for joining two datasets into a new dataset."""
+    left_dataset_id: int
+    right_dataset_id: int
+    left_on: List[str] = Field(..., min_length=1, description="Key columns of the left dataset")
+    right_on: Optional[List[str]] = Field(None, description="Key columns of the right dataset, paired with left_on (defaults to left_on)")
+    how: JoinHow = JoinHow.INNER
+    left_columns: Optional[List[str]] = Field(None, description="Left columns to keep besides the keys (all if omitted)")
+    right_columns: Optional[List[str]] = Field(None, description="Right columns to keep besides the keys (all if omitted)")
+    suffixes: Tuple[str, str] = Field(("_x", "_y"), description="Suffixes of left and right columns with the same name")
+    left_version: str = Field("latest", description="Version of the left dataset: latest, original, processed or anonymized")
+    right_version: str = Field("latest", description="Version of the right dataset: latest, original, processed or anonymized")
+    name: Optional[str] = None
+    description: Optional[str] = None
+    project_id: Optional[int] = Field(None, description="Project of the new dataset (defaults to the left dataset's)")
+
 class DatasetPreview(BaseModel):
     """Schema for dataset preview."""
     columns: List[str]
     data: List[Dict[str, Any]]
     total_rows: int
 
+class QueryOperator(str, Enum):
+    """Enum for predicate operators of a dataset query."""
+    EQ = "="
+    NE = "!="
+    LT = "<"
+    LE = "<="
+    GT = ">"
+    GE = ">="
+    IN = "in"
+    NOT_IN = "not in"
+    IS_NULL = "is null"
+    IS_NOT_NULL = "is not null"
+
+class QueryFilter(BaseModel):
+    """Schema for a predicate of a dataset query."""
+    column: str
+    op: QueryOperator
+    value: Optional[Any] = Field(None, description="Value to compare with (a list for 'in'; omitted for null checks)")
+
+class QuerySort(BaseModel):
+    """Schema for a sort key of a dataset query."""
+    column: str
+    descending: bool = False
+
+class DatasetQuery(BaseModel):
+    """Schema for a filtered, sorted and paginated dataset query."""
+    columns: Optional[List[str]] = Field(None, description="Columns to return (all if omitted)")
+    filters: List[QueryFilter] = Field(default_factory=list, description="Predicates combined with AND")
+    sort: List[QuerySort] = Field(default_factory=list, description="Sort keys; missing values sort last")
+    offset: int = Field(0, ge=0, description="Matching rows to skip (ignored with a cursor)")
+    limit: int = Field(100, ge=1, le=10000)
+    cursor: Optional[str] = Field(None, description="next_cursor of the previous page; faster than offset for deep pages")
+    include_total: bool = Field(False, description="Count all matching rows (needs a scan of the filter columns)")
+    version: str = Field("latest", description="latest, original, processed or anonymized")
+
+class DatasetQueryResult(BaseModel):
+    """Schema for a page of dataset query results."""
+    columns: List[str]
+    data: List[Dict[str, Any]]
+    total_rows: Optional[int] = Field(None, description="Matching rows, if known")
+    offset: Optional[int] = None
+    limit: int
+    next_cursor: Optional[str] = Field(None, description="Cursor of the next page; null on the last page")
+
+class StatsMode(str, Enum):
+    """Enum for how dataset statistics are computed."""
+    AUTO = "auto"
+    APPROXIMATE = "approximate"
+    EXACT = "exact"
+
 class DatasetStats(BaseModel):
     """Schema for dataset statistics."""
     row_count: int
     column_count: int
     missing_values: Dict[str, int]
     data_types: Dict[str, str]
-    statistics: Dict[str, Dict[str, Any]]
\ No newline at end of file
+    statistics: Dict[str, Dict[str, Any]]
+    mode: Optional[str] = Field(None, description="exact, or approximate (from streaming sketches)")
+    error_bounds: Optional[Dict[str, Dict[str, List[Optional[float]]]]] = Field(
+        None,
+        description="[low, high] bounds of approximate statistics by column; statistics not listed are exact"
+    )
+    exact_job: Optional[Dict[str, Any]] = Field(None, description="State of the background job computing exact statistics")
+
+class AssociationMethod(str, Enum):
+    """Enum for pairwise association measures between columns."""
+    PEARSON = "pearson"
+    SPEARMAN = "spearman"
+    CRAMERS_V = "cramers_v"
+
+class AssociationMatrix(BaseModel):
+    """Schema for a pairwise association matrix of dataset columns."""
+    method: AssociationMethod
+    columns: List[str] = Field(..., description="Numeric columns for correlations, categorical columns for Cramér's V")
+    matrix: List[List[Optional[float]]] = Field(..., description="Association of each pair of columns, in the order of columns; null if undefined")
+    row_count: int
+    approximate: bool = Field(..., description="Whether the values are estimated from sketches (Spearman ranks)")
+
+class RiskAnalysisRequest(BaseModel):
+    """Schema for a re-identification risk analysis of quasi-identifiers."""
+    quasi_identifiers: List[str] = Field(..., min_length=1, description="Columns an attacker may know")
+    sensitive_fields: Optional[List[str]] = Field(None, description="Fields checked for l-diversity")
+    k_value: int = Field(5, ge=1, description="Class size below which records count as at risk")
+    l_value: int = Field(2, ge=1, description="Minimum distinct sensitive values per equivalence class")
+    candidate_k: Optional[List[int]] = Field(None, description="Minimum class sizes of the k-anonymity generalizations to evaluate (default 2, 3, 5, 10, 20, 50)")
+    version: str = Field("latest", description="latest, original, processed or anonymized")
+
+class ClassSizeCount(BaseModel):
+    """Schema for the number of equivalence classes of one size."""
+    class_size: int
+    classes: int
+    records: int
+
+class LDiversityCheck(BaseModel):
+    """Schema for the l-diversity of a sensitive field."""
+    field: str
+    min_l: int = Field(..., description="Fewest distinct values of the field in an equivalence class")
+    classes_below_l: int
+    records_below_l: int
+    satisfied: bool
+
+class RiskUtilityPoint(BaseModel):
+    """Schema for the risk and information loss of one generalization level."""
+    k: int = Field(..., description="Minimum class size of the generalization (1 = data as is)")
+    equivalence_classes: int
+    max_risk: float = Field(..., description="Highest re-identification probability of a record (1 / smallest class)")
+    average_risk: float = Field(..., description="Average re-identification probability of a record")
+    records_below_l: int
+    l_diverse: bool
+    ncp: float = Field(..., description="Normalized certainty penalty (0 = original values, 1 = fully generalized)")
+    utility: float = Field(..., description="1 - ncp")
+    discernibility: int
+
+class RiskAnalysis(BaseModel):
+    """Schema for the re-identification risk of a dataset's quasi-identifiers."""
+    row_count: int
+    quasi_identifiers: List[str]
+    k_value: int
+    l_value: int
+    equivalence_classes: int
+    min_class_size: int
+    unique_records: int = Field(..., description="Records alone in their equivalence class")
+    unique_share: float
+    records_below_k: int
+    share_below_k: float
+    max_risk: float
+    average_risk: float
+    k_distribution: List[ClassSizeCount] = Field(..., description="Equivalence classes and records by class size")
+    l_diversity: List[LDiversityCheck]
+    curve: List[RiskUtilityPoint] = Field(..., description="Risk against information loss of the data as is and of each candidate k")
@@ -101,6 +101,41 @@ class NetworkMetrics(BaseModel):
     node_metrics: Dict[str, NodeMetrics]
 
 
+class MultiplexLayer(BaseModel):
+    """Schema for one layer of a multiplex network."""
+    network_id: int = Field(..., description="Existing network used as the layer")
+    name: Optional[str] = Field(None, description="Layer name (defaults to the network name)")
+
+
+class MultiplexNetworkCreate(BaseModel):
+    """Schema for creating a multiplex (multi-layer) network."""
+    name: str
+    description: Optional[str] = None
+    project_id: Optional[int] = None
+    directed: bool = False
+    layers: List[MultiplexLayer] = Field(..., min_length=2, description="Networks combined as layers over a shared node set")
+
+
+class NetworkComparisonRequest(BaseModel):
+    """Schema for comparing several networks of a project."""
+    network_ids: List[int] = Field(..., min_length=1, description="Networks to compare")
+    metrics: List[str] = Field(
+        default_factory=lambda: [
+            "node_count", "edge_count", "density", "average_clustering",
+            "degree_centralization", "betweenness_centralization", "modularity"
+        ],
+        description="Global metrics to include in the comparison table"
+    )
+
+
+class NetworkComparison(BaseModel):
+    """Schema for a cross-network comparison table."""
+    project_id: int
+    metrics: List[str]
+    rows: List[Dict[str, Any]]
+    errors: Dict[str, str] = Field(default_factory=dict)
+
+
 class Community(BaseModel):
     """Schema for network communities."""
     size: int
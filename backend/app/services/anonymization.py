@@ -0,0 +1,563 @@
+import os
+import hmac
+import hashlib
+import logging
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.services.file_storage import STORAGE_DIR
+from app.services.parquet_store import ParquetStore
+from app.services.dataset_reader import DatasetReader
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Value replacing suppressed cells
+REDACTED = "[REDACTED]"
+
+# Most categories listed in a generalized value before showing a range
+MONDRIAN_LABEL_VALUES = 5
+
+# Pseudonymization keys, one per project (override with environment variable)
+PSEUDONYM_KEY_DIR = os.getenv("PSEUDONYM_KEY_DIR", os.path.join(STORAGE_DIR, "keys"))
+
+# Bytes of a generated pseudonymization key
+PSEUDONYM_KEY_BYTES = 32
+
+# Hex characters of the HMAC kept in a pseudonym (64 bits)
+PSEUDONYM_LENGTH = 16
+
+
+class AnonymizationService:
+    """
+    Service for vectorized anonymization of tabular datasets.
+
+    Rows are mapped to integer group ids once (one per combination of
+    quasi-identifier values) and group sizes, aggregates and suppression are
+    computed with array operations over those ids instead of one boolean
+    mask per group. K-anonymity generalizes quasi-identifiers with Mondrian
+    partitioning over integer-encoded columns. Pseudonyms are keyed HMACs
+    of the values, computed once per distinct value.
+    """
+
+    @staticmethod
+    def group_ids(df: pd.DataFrame, quasi_identifiers: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Assign each row the id of its quasi-identifier group.
+
+        Args:
+            df: DataFrame to group
+            quasi_identifiers: Columns defining the groups
+
+        Returns:
+            Tuple of the group id per row (-1 for rows with a missing
+            quasi-identifier) and the size of each group
+        """
+        # ngroup() gives NaN for rows dropped from grouping
+        ids = df.groupby(quasi_identifiers, sort=False, dropna=True).ngroup()
+        ids = ids.fillna(-1).to_numpy(dtype=np.int64)
+        sizes = np.bincount(ids[ids >= 0], minlength=int(ids.max()) + 1 if len(ids) else 0)
+        return ids, sizes
+
+    @staticmethod
+    def group_mean(values: pd.Series, ids: np.ndarray, n_groups: int) -> np.ndarray:
+        """
+        Mean of a numeric column per group, ignoring missing values.
+
+        Args:
+            values: Numeric column
+            ids: Group id per row (negative ids are ignored)
+            n_groups: Number of groups
+
+        Returns:
+            Array of group means (NaN for groups without values)
+        """
+        numbers = values.to_numpy(dtype=np.float64, na_value=np.nan)
+        present = (ids >= 0) & ~np.isnan(numbers)
+        sums = np.bincount(ids[present], weights=numbers[present], minlength=n_groups)
+        counts = np.bincount(ids[present], minlength=n_groups)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+    @staticmethod
+    def group_mode(values: pd.Series, ids: np.ndarray, n_groups: int) -> np.ndarray:
+        """
+        Most frequent value of a column per group.
+
+        Ties go to the smallest value, as with ``Series.mode()``.
+
+        Args:
+            values: Column
+            ids: Group id per row (negative ids are ignored)
+            n_groups: Number of groups
+
+        Returns:
+            Object array of group modes (NaN for groups without values)
+        """
+        try:
+            codes, uniques = pd.factorize(values, sort=True)
+        except TypeError:
+            # Values of mixed types cannot be ordered
+            codes, uniques = pd.factorize(values)
+        present = (ids >= 0) & (codes >= 0)
+        modes = np.full(n_groups, np.nan, dtype=object)
+        if not present.any():
+            return modes
+
+        # Count each (group, value) pair
+        pair_keys = ids[present].astype(np.int64) * len(uniques) + codes[present]
+        pairs, counts = np.unique(pair_keys, return_counts=True)
+        pair_groups, pair_codes = np.divmod(pairs, len(uniques))
+
+        # Per group: highest count first, then smallest value
+        order = np.lexsort((pair_codes, -counts, pair_groups))
+        first = order[np.r_[True, pair_groups[order][1:] != pair_groups[order][:-1]]]
+        modes[pair_groups[first]] = np.asarray(uniques, dtype=object)[pair_codes[first]]
+        return modes
+
+    @staticmethod
+    def aggregate(
+        df: pd.DataFrame,
+        sensitive_fields: List[str],
+        quasi_identifiers: List[str],
+        k_value: int
+    ) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        """
+        Replace sensitive values by their group aggregate and suppress small groups.
+
+        Numeric fields get the group mean and other fields the group mode in
+        groups of at least k rows; in smaller groups they are redacted. Rows
+        with a missing quasi-identifier belong to no group and are kept.
+
+        Args:
+            df: DataFrame to anonymize
+            sensitive_fields: Fields to aggregate
+            quasi_identifiers: Columns defining the groups
+            k_value: Minimum group size
+
+        Returns:
+            Tuple of the anonymized DataFrame and a summary of the groups
+        """
+        ids, sizes = AnonymizationService.group_ids(df, quasi_identifiers)
+        n_groups = len(sizes)
+        grouped = ids >= 0
+        row_sizes = np.zeros(len(ids), dtype=np.int64)
+        row_sizes[grouped] = sizes[ids[grouped]]
+        valid = grouped & (row_sizes >= k_value)
+        small = grouped & (row_sizes < k_value)
+
+        updates = {}
+        for field in sensitive_fields:
+            if field not in df.columns:
+                continue
+            if pd.api.types.is_numeric_dtype(df[field]) and not pd.api.types.is_bool_dtype(df[field]):
+                aggregates = AnonymizationService.group_mean(df[field], ids, n_groups)
+            else:
+                aggregates = AnonymizationService.group_mode(df[field], ids, n_groups)
+
+            if small.any():
+                values = df[field].to_numpy(dtype=object, na_value=np.nan).copy()
+                values[small] = REDACTED
+            else:
+                values = df[field].to_numpy(dtype=aggregates.dtype, na_value=np.nan).copy()
+            values[valid] = aggregates[ids[valid]]
+            updates[field] = pd.Series(values, index=df.index).infer_objects()
+
+        summary = {
+            "groups": n_groups,
+            "suppressed_groups": int((sizes < k_value).sum()),
+            "suppressed_rows": int(small.sum()),
+            "ungrouped_rows": int((~grouped).sum())
+        }
+        return df.assign(**updates) if updates else df, summary
+
+    @staticmethod
+    def encode_quasi_identifier(values: pd.Series) -> Dict[str, Any]:
+        """
+        Encode a quasi-identifier as ordered integer codes.
+
+        Missing values get the code after all values.
+
+        Returns:
+            Dict with the codes, the sorted distinct values, the value
+            distance used for information loss and the column kind
+        """
+        if pd.api.types.is_bool_dtype(values):
+            kind = "categorical"
+        elif pd.api.types.is_numeric_dtype(values):
+            kind = "numeric"
+        elif pd.api.types.is_datetime64_any_dtype(values):
+            kind = "datetime"
+        else:
+            kind = "categorical"
+            values = values.where(values.isna(), values.astype(str))
+
+        codes, uniques = pd.factorize(values, sort=True)
+        codes = np.where(codes < 0, len(uniques), codes).astype(np.int64)
+
+        # Position of each code on the column's scale (ranks for categories)
+        if kind == "numeric":
+            positions = np.asarray(uniques, dtype=np.float64)
+        elif kind == "datetime":
+            positions = np.asarray(pd.DatetimeIndex(uniques).asi8, dtype=np.float64)
+        else:
+            positions = np.arange(len(uniques), dtype=np.float64)
+        value_range = float(positions[-1] - positions[0]) if len(positions) > 1 else 0.0
+
+        # Text of each distinct value, used in generalized values
+        if kind == "datetime":
+            dates = pd.DatetimeIndex(uniques)
+            texts = dates.strftime("%Y-%m-%d") if (dates == dates.normalize()).all() else dates.astype(str)
+        elif kind == "numeric":
+            texts = [str(int(value)) if float(value).is_integer() else str(value) for value in uniques]
+        else:
+            texts = [str(value) for value in uniques]
+
+        return {
+            "codes": codes,
+            "uniques": uniques,
+            "n_values": len(uniques),
+            "texts": np.asarray(texts, dtype=object),
+            "positions": positions,
+            "range": value_range,
+            "kind": kind
+        }
+
+    @staticmethod
+    def normalized_spans(encoding: Dict[str, Any], lows: np.ndarray, highs: np.ndarray) -> np.ndarray:
+        """Vectorized normalized_span over arrays of code ranges."""
+        n_values = encoding["n_values"]
+        if encoding["range"] == 0:
+            widths = np.zeros(len(lows), dtype=np.float64)
+        else:
+            positions = encoding["positions"]
+            widths = (positions[np.minimum(highs, n_values - 1)] - positions[np.minimum(lows, n_values - 1)]) / encoding["range"]
+        # Ranges mixing values and missing values are fully generalized
+        return np.where(highs >= n_values, np.where(lows >= n_values, 0.0, 1.0), widths)
+
+    @staticmethod
+    def normalized_span(encoding: Dict[str, Any], low: int, high: int) -> float:
+        """Width of a code range relative to the column's full range (1 if it includes missing values)."""
+        n_values = encoding["n_values"]
+        if high >= n_values:
+            return 0.0 if low >= n_values else 1.0
+        if encoding["range"] == 0:
+            return 0.0
+        positions = encoding["positions"]
+        return float(positions[high] - positions[low]) / encoding["range"]
+
+    @staticmethod
+    def _range_label(encoding: Dict[str, Any], low: int, high: int) -> Any:
+        """Generalized value of a code range."""
+        n_values = encoding["n_values"]
+        if low >= n_values:
+            return np.nan
+        if high >= n_values:
+            # Mixes values and missing values: fully suppressed
+            return "*"
+        texts = encoding["texts"]
+        if low == high:
+            return texts[low]
+        if encoding["kind"] == "categorical":
+            if high - low + 1 <= MONDRIAN_LABEL_VALUES:
+                return "{" + ", ".join(texts[low:high + 1]) + "}"
+            return f"{{{texts[low]} .. {texts[high]}}}"
+        return f"[{texts[low]} - {texts[high]}]"
+
+    @staticmethod
+    def mondrian_partition(codes: np.ndarray, spans: List[Any], k_value: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Split rows into equivalence classes of at least k rows (Mondrian).
+
+        Starting from all rows, a partition is cut at the median of the
+        quasi-identifier with the widest normalized range among those that
+        allow a cut leaving at least k rows on each side; partitions no cut
+        applies to become equivalence classes. Each level of the recursion
+        costs O(n), so partitioning takes O(n log n).
+
+        Args:
+            codes: Integer codes, one row per quasi-identifier and one column per data row
+            spans: Function per quasi-identifier giving the normalized width of a (low, high) code range
+            k_value: Minimum equivalence class size
+
+        Returns:
+            Tuple of the class id per row and the lowest and highest code of
+            each class per quasi-identifier (classes x quasi-identifiers)
+        """
+        n_dims, n_rows = codes.shape
+        class_ids = np.zeros(n_rows, dtype=np.int64)
+        n_classes = 0
+
+        stack = [np.arange(n_rows)]
+        while stack:
+            rows = stack.pop()
+            split = None
+            if len(rows) >= 2 * k_value:
+                part = codes[:, rows]
+                low = part.min(axis=1).tolist()
+                high = part.max(axis=1).tolist()
+                widths = [spans[d](low[d], high[d]) for d in range(n_dims)]
+                for d in sorted(range(n_dims), key=lambda d: -widths[d]):
+                    if low[d] == high[d]:
+                        continue
+                    column = part[d]
+                    median = np.partition(column, len(column) // 2)[len(column) // 2]
+                    left = column < median if median == high[d] else column <= median
+                    n_left = int(left.sum())
+                    if n_left < k_value or len(rows) - n_left < k_value:
+                        # Fall back to the other side of the median value
+                        left = column <= median if median == high[d] else column < median
+                        n_left = int(left.sum())
+                    if k_value <= n_left <= len(rows) - k_value:
+                        split = left
+                        break
+
+            if split is None:
+                class_ids[rows] = n_classes
+                n_classes += 1
+            else:
+                stack.append(rows[~split])
+                stack.append(rows[split])
+
+        # Code ranges of all classes at once
+        if not n_rows:
+            return class_ids, np.zeros((0, n_dims), dtype=np.int64), np.zeros((0, n_dims), dtype=np.int64)
+        order = np.argsort(class_ids, kind="stable")
+        starts = np.searchsorted(class_ids[order], np.arange(n_classes))
+        ordered = codes[:, order]
+        lows = np.minimum.reduceat(ordered, starts, axis=1).T
+        highs = np.maximum.reduceat(ordered, starts, axis=1).T
+        return class_ids, lows, highs
+
+    @staticmethod
+    def mondrian(
+        df: pd.DataFrame,
+        sensitive_fields: List[str],
+        quasi_identifiers: List[str],
+        k_value: int
+    ) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        """
+        Make a DataFrame k-anonymous by multidimensional generalization.
+
+        Rows are partitioned with Mondrian and every quasi-identifier is
+        replaced by the range (or set of categories) it spans in the row's
+        equivalence class. Only a dataset with fewer than k rows cannot be
+        partitioned; its sensitive values are redacted.
+
+        Args:
+            df: DataFrame to anonymize
+            sensitive_fields: Fields redacted if k-anonymity cannot be reached
+            quasi_identifiers: Columns to generalize
+            k_value: Minimum equivalence class size
+
+        Returns:
+            Tuple of the anonymized DataFrame and a summary with information loss
+            metrics: normalized certainty penalty (0 = original values,
+            1 = fully generalized), discernibility (sum of squared class sizes)
+            and the normalized average class size (1 = optimal)
+        """
+        n_rows = len(df)
+        encodings = [AnonymizationService.encode_quasi_identifier(df[qi]) for qi in quasi_identifiers]
+        codes = np.vstack([encoding["codes"] for encoding in encodings]) if n_rows else np.zeros((len(quasi_identifiers), 0), dtype=np.int64)
+        spans = [
+            (lambda low, high, encoding=encoding: AnonymizationService.normalized_span(encoding, low, high))
+            for encoding in encodings
+        ]
+
+        class_ids, lows, highs = AnonymizationService.mondrian_partition(codes, spans, k_value)
+        class_sizes = np.bincount(class_ids, minlength=len(lows)) if n_rows else np.zeros(0, dtype=np.int64)
+
+        # Generalize each quasi-identifier, labelling each distinct range once
+        updates = {}
+        penalty = 0.0
+        for d, (qi, encoding) in enumerate(zip(quasi_identifiers, encodings)):
+            ranges = lows[:, d] * (encoding["n_values"] + 1) + highs[:, d]
+            distinct, range_ids = np.unique(ranges, return_inverse=True)
+            distinct_lows, distinct_highs = np.divmod(distinct, encoding["n_values"] + 1)
+            labels = np.empty(len(distinct), dtype=object)
+            labels[:] = [
+                AnonymizationService._range_label(encoding, low, high)
+                for low, high in zip(distinct_lows.tolist(), distinct_highs.tolist())
+            ]
+            widths = AnonymizationService.normalized_spans(encoding, distinct_lows, distinct_highs)
+            updates[qi] = pd.Series(labels[range_ids][class_ids], index=df.index, dtype=object)
+            penalty += float((widths[range_ids] * class_sizes).sum())
+
+        suppressed_rows = 0
+        if 0 < n_rows < k_value:
+            # Too few rows for any class of k rows
+            for field in sensitive_fields:
+                if field in df.columns and field not in updates:
+                    updates[field] = pd.Series(REDACTED, index=df.index, dtype=object)
+            suppressed_rows = n_rows
+
+        summary = {
+            "equivalence_classes": int(len(lows)),
+            "min_class_size": int(class_sizes.min()) if len(class_sizes) else 0,
+            "suppressed_rows": suppressed_rows,
+            "ncp": penalty / (n_rows * len(quasi_identifiers)) if n_rows and quasi_identifiers else 0.0,
+            "discernibility": int((class_sizes.astype(np.int64) ** 2).sum()),
+            "avg_class_size": n_rows / len(lows) / k_value if len(lows) else 0.0
+        }
+        return df.assign(**updates) if updates else df, summary
+
+    @staticmethod
+    def project_key(project_id: Optional[int]) -> bytes:
+        """
+        Get the pseudonymization key of a project, creating it on first use.
+
+        Datasets without a project share one key.
+
+        Args:
+            project_id: Project ID
+
+        Returns:
+            bytes: Secret key
+        """
+        os.makedirs(PSEUDONYM_KEY_DIR, exist_ok=True)
+        name = f"project_{int(project_id)}.key" if project_id is not None else "default.key"
+        key_path = os.path.join(PSEUDONYM_KEY_DIR, name)
+        try:
+            # Exclusive creation: concurrent first uses agree on one key
+            fd = os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            with open(key_path, "rb") as f:
+                return f.read()
+        key = os.urandom(PSEUDONYM_KEY_BYTES)
+        with os.fdopen(fd, "wb") as f:
+            f.write(key)
+        return key
+
+    @staticmethod
+    def key_fingerprint(key: bytes) -> str:
+        """Identify a key without revealing it (e.g. in cache keys)."""
+        return hmac.new(key, b"fingerprint", hashlib.sha256).hexdigest()[:PSEUDONYM_LENGTH]
+
+    @staticmethod
+    def _canonical_texts(uniques: pd.Index) -> pd.Index:
+        """Text of values as they are hashed; whole floats hash like integers so typing does not matter."""
+        if pd.api.types.is_float_dtype(uniques.dtype):
+            numbers = uniques.to_numpy(dtype=np.float64)
+            whole = np.isfinite(numbers) & (numbers == np.floor(numbers))
+            texts = numbers.astype(str).astype(object)
+            texts[whole] = numbers[whole].astype(np.int64).astype(str)
+            return pd.Index(texts, dtype=object)
+        if uniques.dtype == object:
+            return pd.Index([
+                str(int(value)) if isinstance(value, (float, np.floating)) and float(value).is_integer() else str(value)
+                for value in uniques
+            ], dtype=object)
+        return pd.Index(uniques.astype(str), dtype=object)
+
+    @staticmethod
+    def pseudonymize(
+        values: pd.Series,
+        key: bytes,
+        prefix: str = "",
+        known: Optional[Dict[str, str]] = None
+    ) -> Tuple[pd.Series, Dict[str, str]]:
+        """
+        Replace values by keyed pseudonyms.
+
+        The pseudonym of a value is the HMAC-SHA256 of its text under the
+        key, so it is the same in every dataset and chunk pseudonymized with
+        the same key. Each distinct value is hashed once; missing values are
+        kept.
+
+        Args:
+            values: Column to pseudonymize
+            key: Secret key (see project_key)
+            prefix: Text put before each pseudonym
+            known: Pseudonyms of values seen before (e.g. in earlier chunks),
+                updated with the new values
+
+        Returns:
+            Tuple of the pseudonymized column and the mapping of original
+            values (as text) to pseudonyms
+        """
+        known = {} if known is None else known
+        codes, uniques = pd.factorize(values)
+        texts = AnonymizationService._canonical_texts(pd.Index(uniques))
+
+        # Hash only values not seen before, from one keyed state
+        keyed = hmac.new(key, digestmod=hashlib.sha256)
+        new_texts = texts[~texts.isin(list(known))] if known else texts
+        for text in new_texts:
+            mac = keyed.copy()
+            mac.update(text.encode("utf-8"))
+            known[text] = prefix + mac.hexdigest()[:PSEUDONYM_LENGTH]
+        pseudonyms = texts.map(known).to_numpy(dtype=object)
+
+        result = values.to_numpy(dtype=object, na_value=np.nan).copy()
+        present = codes >= 0
+        result[present] = pseudonyms[codes[present]]
+        return pd.Series(result, index=values.index, name=values.name), known
+
+    @staticmethod
+    def pseudonymize_frame(
+        df: pd.DataFrame,
+        fields: List[str],
+        key: bytes,
+        prefixes: Optional[Dict[str, str]] = None,
+        mappings: Optional[Dict[str, Dict[str, str]]] = None
+    ) -> pd.DataFrame:
+        """
+        Pseudonymize fields of a DataFrame or of one chunk of a dataset.
+
+        Args:
+            df: DataFrame or chunk
+            fields: Fields to pseudonymize
+            key: Secret key
+            prefixes: Pseudonym prefix per field (none if omitted)
+            mappings: Value mapping per field, reused and extended across chunks
+
+        Returns:
+            Pseudonymized DataFrame
+        """
+        mappings = {} if mappings is None else mappings
+        updates = {}
+        for field in fields:
+            if field not in df.columns:
+                continue
+            updates[field], mappings[field] = AnonymizationService.pseudonymize(
+                df[field], key, (prefixes or {}).get(field, ""), mappings.get(field)
+            )
+        return df.assign(**updates) if updates else df
+
+    @staticmethod
+    def pseudonymize_file(
+        file_path: str,
+        output_path: str,
+        fields: List[str],
+        key: bytes,
+        prefixes: Optional[Dict[str, str]] = None,
+        keep_mapping: bool = False
+    ) -> Tuple[int, List[str], Dict[str, Dict[str, str]]]:
+        """
+        Pseudonymize a dataset file chunk by chunk into a Parquet file.
+
+        Args:
+            file_path: Path to the dataset file (Parquet files are streamed)
+            output_path: Destination Parquet path
+            fields: Fields to pseudonymize
+            key: Secret key
+            prefixes: Pseudonym prefix per field
+            keep_mapping: Whether to return the value mappings
+
+        Returns:
+            Tuple of the row count, the columns and the mappings per field
+            (empty unless keep_mapping)
+        """
+        mappings: Dict[str, Dict[str, str]] = {}
+        if ParquetStore.is_parquet(file_path):
+            chunks = ParquetStore.iter_batches(file_path)
+        else:
+            chunks = iter([DatasetReader.read_file(file_path)])
+
+        rows = ParquetStore.write_chunks(
+            (AnonymizationService.pseudonymize_frame(chunk, fields, key, prefixes, mappings) for chunk in chunks),
+            output_path
+        )
+        return rows, ParquetStore.read_columns(output_path), mappings if keep_mapping else {}
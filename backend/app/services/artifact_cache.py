@@ -0,0 +1,384 @@
+import os
+import json
+import shutil
+import hashlib
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Optional, Tuple
+
+from app.services.file_storage import STORAGE_DIR, UPLOAD_CHUNK_SIZE
+from app.services.parquet_store import ParquetStore
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Store of derived dataset files (artifacts/<kind>/<key>/)
+ARTIFACT_DIR = os.path.join(STORAGE_DIR, "artifacts")
+
+# Disk budget of unpinned artifacts (override with environment variable)
+ARTIFACT_CACHE_BYTES = int(os.getenv("ARTIFACT_CACHE_BYTES", 10 * 1024 * 1024 * 1024))
+
+# Files inside an artifact folder
+ARTIFACT_FILE_NAME = "data.parquet"
+MANIFEST_FILE_NAME = "manifest.json"
+
+# Serializes manifest updates within the process
+_manifest_lock = threading.Lock()
+
+# Content hashes of files, keyed by path, size and modification time
+_file_hashes: Dict[Tuple[str, int, int], str] = {}
+
+
+class ArtifactCache:
+    """
+    Service for caching derived dataset files (processed and anonymized versions).
+
+    An artifact is keyed by the hash of its source content and the hash of
+    the canonicalized options that produced it, so repeating a request is a
+    lookup and different option sets coexist as versions. Each artifact
+    lives in its own folder with a manifest recording the options, the
+    result metadata, the datasets it belongs to and the datasets using it as
+    their active version. Artifacts in use are pinned; the others are
+    evicted least recently used first once the cache exceeds its budget.
+    """
+
+    @staticmethod
+    def options_hash(options: Dict[str, Any]) -> str:
+        """
+        Hash options independently of key order.
+
+        Args:
+            options: JSON-serializable options
+
+        Returns:
+            str: SHA-256 hex digest
+        """
+        canonical = json.dumps(options, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def file_hash(file_path: str) -> str:
+        """
+        Hash the content of a file, reusing the hash while the file is unchanged.
+
+        Fragments appended to a Parquet file are hashed after it.
+
+        Args:
+            file_path: Path to the file
+
+        Returns:
+            str: SHA-256 hex digest
+        """
+        signature = ParquetStore.signature(file_path)
+        memo_key = (os.path.abspath(file_path), signature["size"], signature["mtime_ns"])
+        if memo_key not in _file_hashes:
+            digest = hashlib.sha256()
+            for part_path in ParquetStore.part_paths(file_path):
+                with open(part_path, 'rb') as f:
+                    for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b""):
+                        digest.update(chunk)
+            _file_hashes[memo_key] = digest.hexdigest()
+        return _file_hashes[memo_key]
+
+    @staticmethod
+    def path_artifact(file_path: Optional[str]) -> Optional[Tuple[str, str]]:
+        """
+        Get the kind and key of the artifact a file belongs to.
+
+        Args:
+            file_path: Path to a dataset file
+
+        Returns:
+            Tuple of kind and key, or None if the file is not an artifact
+        """
+        if not file_path:
+            return None
+        artifact_dir = os.path.dirname(os.path.abspath(file_path))
+        kind_dir = os.path.dirname(artifact_dir)
+        if os.path.dirname(kind_dir) != os.path.abspath(ARTIFACT_DIR):
+            return None
+        return os.path.basename(kind_dir), os.path.basename(artifact_dir)
+
+    @staticmethod
+    def source_hash(file_path: str, content_hash: Optional[str] = None) -> str:
+        """
+        Get the hash identifying the content of a source file.
+
+        Artifacts are identified by their key and uploads by their content
+        hash, so only other files have to be read.
+
+        Args:
+            file_path: Path to the source file
+            content_hash: Known content hash of the file's upload
+
+        Returns:
+            str: Source hash
+        """
+        artifact = ArtifactCache.path_artifact(file_path)
+        if artifact:
+            return artifact[1]
+        return content_hash or ArtifactCache.file_hash(file_path)
+
+    @staticmethod
+    def artifact_key(kind: str, source_hash: str, options_hash: str) -> str:
+        """Get the key of the artifact derived from a source with some options."""
+        return hashlib.sha256(f"{kind}:{source_hash}:{options_hash}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def artifact_dir(kind: str, key: str) -> str:
+        """Get the folder of an artifact."""
+        return os.path.join(ARTIFACT_DIR, kind, key)
+
+    @staticmethod
+    def data_path(kind: str, key: str) -> str:
+        """Get the data file of an artifact."""
+        return os.path.join(ArtifactCache.artifact_dir(kind, key), ARTIFACT_FILE_NAME)
+
+    @staticmethod
+    def _read_manifest(artifact_dir: str) -> Optional[Dict[str, Any]]:
+        path = os.path.join(artifact_dir, MANIFEST_FILE_NAME)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Could not read artifact manifest {path}: {str(e)}")
+            return None
+
+    @staticmethod
+    def _write_manifest(manifest: Dict[str, Any]) -> None:
+        path = os.path.join(ArtifactCache.artifact_dir(manifest["kind"], manifest["key"]), MANIFEST_FILE_NAME)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def _iter_manifests() -> List[Dict[str, Any]]:
+        manifests = []
+        if not os.path.isdir(ARTIFACT_DIR):
+            return manifests
+        for kind in os.listdir(ARTIFACT_DIR):
+            kind_dir = os.path.join(ARTIFACT_DIR, kind)
+            if not os.path.isdir(kind_dir):
+                continue
+            for key in os.listdir(kind_dir):
+                manifest = ArtifactCache._read_manifest(os.path.join(kind_dir, key))
+                if manifest is not None:
+                    manifests.append(manifest)
+        return manifests
+
+    @staticmethod
+    def _folder_size(folder: str) -> int:
+        size = 0
+        for root, _, files in os.walk(folder):
+            for file_name in files:
+                try:
+                    size += os.path.getsize(os.path.join(root, file_name))
+                except OSError:
+                    pass
+        return size
+
+    @staticmethod
+    def lookup(kind: str, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a complete artifact and mark it as recently used.
+
+        Args:
+            kind: Artifact kind (processed, anonymized)
+            key: Artifact key
+
+        Returns:
+            Manifest dictionary, or None on a cache miss
+        """
+        artifact_dir = ArtifactCache.artifact_dir(kind, key)
+        with _manifest_lock:
+            manifest = ArtifactCache._read_manifest(artifact_dir)
+            if manifest is None or not os.path.exists(ArtifactCache.data_path(kind, key)):
+                return None
+            manifest["last_used"] = datetime.now(timezone.utc).isoformat()
+            ArtifactCache._write_manifest(manifest)
+        return manifest
+
+    @staticmethod
+    def prepare(kind: str, key: str) -> str:
+        """
+        Create an empty folder for an artifact being built.
+
+        Args:
+            kind: Artifact kind
+            key: Artifact key
+
+        Returns:
+            str: Path to the artifact folder
+        """
+        artifact_dir = ArtifactCache.artifact_dir(kind, key)
+        # Remove leftovers of an interrupted build
+        if os.path.isdir(artifact_dir) and ArtifactCache._read_manifest(artifact_dir) is None:
+            shutil.rmtree(artifact_dir, ignore_errors=True)
+        os.makedirs(artifact_dir, exist_ok=True)
+        return artifact_dir
+
+    @staticmethod
+    def store(
+        kind: str,
+        key: str,
+        source_hash: str,
+        options: Dict[str, Any],
+        result: Dict[str, Any],
+        dataset_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Record a built artifact; its files must already be in the artifact folder.
+
+        Args:
+            kind: Artifact kind
+            key: Artifact key
+            source_hash: Hash of the source content
+            options: Options that produced the artifact
+            result: Metadata of the result to restore on cache hits
+            dataset_id: Dataset the artifact was built for
+
+        Returns:
+            Manifest dictionary
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        manifest = {
+            "key": key,
+            "kind": kind,
+            "source_hash": source_hash,
+            "options_hash": ArtifactCache.options_hash(options),
+            "options": options,
+            "result": result,
+            "created_at": now,
+            "last_used": now,
+            "size": ArtifactCache._folder_size(ArtifactCache.artifact_dir(kind, key)),
+            "dataset_ids": [dataset_id] if dataset_id is not None else [],
+            "pinned_by": []
+        }
+        with _manifest_lock:
+            ArtifactCache._write_manifest(manifest)
+        return manifest
+
+    @staticmethod
+    def _update(kind: str, key: str, update) -> Optional[Dict[str, Any]]:
+        """Apply a function to a manifest and save it."""
+        with _manifest_lock:
+            manifest = ArtifactCache._read_manifest(ArtifactCache.artifact_dir(kind, key))
+            if manifest is None:
+                return None
+            update(manifest)
+            ArtifactCache._write_manifest(manifest)
+        return manifest
+
+    @staticmethod
+    def activate(dataset_id: int, kind: str, key: str, previous_path: Optional[str] = None) -> None:
+        """
+        Pin an artifact as a dataset's active version and unpin the one it replaces.
+
+        Args:
+            dataset_id: ID of the dataset
+            kind: Artifact kind
+            key: Artifact key
+            previous_path: File of the dataset's previous active version
+        """
+        def pin(manifest: Dict[str, Any]) -> None:
+            for field in ("dataset_ids", "pinned_by"):
+                if dataset_id not in manifest[field]:
+                    manifest[field].append(dataset_id)
+
+        ArtifactCache._update(kind, key, pin)
+
+        previous = ArtifactCache.path_artifact(previous_path)
+        if previous and previous != (kind, key):
+            ArtifactCache._update(*previous, lambda manifest: manifest.update(
+                pinned_by=[pinned for pinned in manifest["pinned_by"] if pinned != dataset_id]
+            ))
+        ArtifactCache.evict()
+
+    @staticmethod
+    def list_versions(dataset_id: int, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        List the cached artifacts of a dataset, newest first.
+
+        Args:
+            dataset_id: ID of the dataset
+            kind: Only list artifacts of this kind
+
+        Returns:
+            List of manifest dictionaries
+        """
+        versions = [
+            manifest for manifest in ArtifactCache._iter_manifests()
+            if dataset_id in manifest.get("dataset_ids", []) and (kind is None or manifest["kind"] == kind)
+        ]
+        return sorted(versions, key=lambda manifest: manifest["created_at"], reverse=True)
+
+    @staticmethod
+    def get_version(dataset_id: int, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a cached artifact of a dataset by key.
+
+        Args:
+            dataset_id: ID of the dataset
+            key: Artifact key
+
+        Returns:
+            Manifest dictionary, or None if the dataset has no such artifact
+        """
+        for manifest in ArtifactCache.list_versions(dataset_id):
+            if manifest["key"] == key:
+                return manifest
+        return None
+
+    @staticmethod
+    def release_dataset(dataset_id: int) -> None:
+        """
+        Detach a deleted dataset from all artifacts and evict what is no longer needed.
+
+        Args:
+            dataset_id: ID of the dataset
+        """
+        for manifest in ArtifactCache.list_versions(dataset_id):
+            ArtifactCache._update(manifest["kind"], manifest["key"], lambda current: current.update(
+                dataset_ids=[other for other in current["dataset_ids"] if other != dataset_id],
+                pinned_by=[other for other in current["pinned_by"] if other != dataset_id]
+            ))
+        ArtifactCache.evict()
+
+    @staticmethod
+    def evict(max_bytes: int = ARTIFACT_CACHE_BYTES) -> List[str]:
+        """
+        Remove least recently used unpinned artifacts until the cache fits its budget.
+
+        Artifacts no dataset belongs to any more are always removed.
+
+        Args:
+            max_bytes: Disk budget of the cache
+
+        Returns:
+            List of removed artifact keys
+        """
+        removed = []
+        with _manifest_lock:
+            manifests = ArtifactCache._iter_manifests()
+            sizes = {
+                manifest["key"]: ArtifactCache._folder_size(ArtifactCache.artifact_dir(manifest["kind"], manifest["key"]))
+                for manifest in manifests
+            }
+            total = sum(sizes.values())
+            candidates = sorted(
+                (manifest for manifest in manifests if not manifest.get("pinned_by")),
+                key=lambda manifest: (bool(manifest.get("dataset_ids")), manifest["last_used"])
+            )
+            for manifest in candidates:
+                if total <= max_bytes and manifest.get("dataset_ids"):
+                    break
+                shutil.rmtree(ArtifactCache.artifact_dir(manifest["kind"], manifest["key"]), ignore_errors=True)
+                total -= sizes[manifest["key"]]
+                removed.append(manifest["key"])
+        if removed:
+            logger.info(f"Evicted {len(removed)} artifacts, cache now uses {total} bytes")
+        return removed
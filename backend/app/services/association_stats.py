@@ -0,0 +1,291 @@
+import os
+import json
+import hashlib
+import logging
+from typing import Dict, List, Any, Optional, Iterator
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from fastapi import HTTPException
+
+from app.services.parquet_store import ParquetStore
+from app.services.dataset_profiler import DatasetProfiler, TDigest, TopK
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Association methods: correlations of numeric columns and Cramér's V of categorical ones
+ASSOCIATION_METHODS = ("pearson", "spearman", "cramers_v")
+
+# Suffix of the association matrices stored next to a dataset file
+ASSOCIATIONS_SUFFIX = ".associations.json"
+
+# Most frequent values kept per categorical column (at most the top-k sketch capacity); the others are counted as one level
+CRAMERS_MAX_LEVELS = int(os.getenv("CRAMERS_MAX_LEVELS", 50))
+
+# Values (rows x columns) per chunk, so wide datasets are read in shorter chunks
+ASSOCIATION_CHUNK_CELLS = int(os.getenv("ASSOCIATION_CHUNK_CELLS", 5_000_000))
+
+
+class _MomentMatrices:
+    """Pairwise-complete sums and cross-products of numeric columns, for correlations."""
+
+    def __init__(self, size: int):
+        self.n = np.zeros((size, size))
+        self.sums = np.zeros((size, size))
+        self.squares = np.zeros((size, size))
+        self.products = np.zeros((size, size))
+
+    def update(self, values: np.ndarray) -> None:
+        # values: rows x columns, NaN where missing
+        present = (~np.isnan(values)).astype(np.float64)
+        filled = np.nan_to_num(values, nan=0.0)
+        self.n += present.T @ present
+        # sums[i, j]: sum of column i over the rows where columns i and j are present
+        self.sums += filled.T @ present
+        self.squares += (filled * filled).T @ present
+        self.products += filled.T @ filled
+
+    def correlation(self) -> np.ndarray:
+        n, sums, squares = self.n, self.sums, self.squares
+        with np.errstate(divide="ignore", invalid="ignore"):
+            covariance = n * self.products - sums * sums.T
+            variance = (n * squares - sums * sums) * (n * squares.T - sums.T * sums.T)
+            matrix = covariance / np.sqrt(variance)
+        matrix[(n < 2) | ~np.isfinite(matrix)] = np.nan
+        return np.clip(matrix, -1.0, 1.0)
+
+
+class AssociationService:
+    """
+    Service for correlation and association matrices of dataset columns.
+
+    The matrices are built in one chunked pass from accumulated sufficient
+    statistics, so only one chunk of the data is in memory at a time:
+
+    - Pearson: pairwise-complete counts, sums, squares and cross-products of
+      the numeric columns, centered on their profiled means.
+    - Spearman (approximate): the same statistics of the values' ranks, which
+      are read from each column's t-digest in the profile.
+    - Cramér's V: the contingency tables of every pair of categorical
+      columns, taken together as the co-occurrence matrix of their one-hot
+      encodings. Values beyond the most frequent CRAMERS_MAX_LEVELS of a
+      column are counted as one level.
+
+    Results are stored next to the dataset file with its signature, so each
+    version of a dataset is scanned once per column selection.
+    """
+
+    @staticmethod
+    def select_columns(profile: Dict[str, Any], columns: Optional[List[str]]) -> Dict[str, List[str]]:
+        """
+        Split columns into numeric and categorical ones.
+
+        Args:
+            profile: Profile of the dataset file
+            columns: Columns to include (all if omitted)
+
+        Returns:
+            Dictionary with the numeric and categorical columns
+        """
+        data_types = profile["data_types"]
+        if columns:
+            unknown = [col for col in columns if col not in data_types]
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Unknown columns: {', '.join(unknown)}")
+        selected = list(dict.fromkeys(columns)) if columns else profile["columns"]
+
+        numeric, categorical = [], []
+        for col in selected:
+            column_profile = profile["column_profiles"][col]
+            # Only numeric columns with values are profiled with moments and a t-digest
+            if column_profile.get("numeric"):
+                numeric.append(col)
+            elif not column_profile.get("datetime") and column_profile["top_k"]:
+                categorical.append(col)
+        return {"numeric": numeric, "categorical": categorical}
+
+    @staticmethod
+    def _iter_chunks(file_path: str, columns: List[str]) -> Iterator[pd.DataFrame]:
+        """Read the needed columns of a dataset file in chunks sized by their number."""
+        chunk_rows = max(1_000, ASSOCIATION_CHUNK_CELLS // max(len(columns), 1))
+        if ParquetStore.is_parquet(file_path):
+            yield from ParquetStore.iter_batches(file_path, columns=columns, batch_rows=chunk_rows)
+        else:
+            for chunk in DatasetProfiler.iter_chunks(file_path, chunk_rows=chunk_rows):
+                yield chunk[columns]
+
+    @staticmethod
+    def compute(file_path: str, profile: Dict[str, Any], numeric: List[str], categorical: List[str]) -> Dict[str, Any]:
+        """
+        Compute the association matrices of a dataset file in one pass.
+
+        Args:
+            file_path: Path to the dataset file
+            profile: Profile of the file (means, t-digests and top values)
+            numeric: Numeric columns (Pearson and Spearman)
+            categorical: Categorical columns (Cramér's V)
+
+        Returns:
+            Dictionary with the matrices by method and their columns
+        """
+        column_profiles = profile["column_profiles"]
+        means = np.array([column_profiles[col]["numeric"]["mean"] for col in numeric], dtype=np.float64)
+        digests = [TDigest.from_dict(profile["sketches"][col]["tdigest"]) for col in numeric]
+        pearson = _MomentMatrices(len(numeric))
+        spearman = _MomentMatrices(len(numeric))
+
+        # Levels of each categorical column: its top values, then one level for the rest
+        levels = [
+            [value for value, _ in TopK.from_dict(profile["sketches"][col]["top_k"]).top(CRAMERS_MAX_LEVELS)]
+            for col in categorical
+        ]
+        offsets = np.concatenate([[0], np.cumsum([len(values) + 1 for values in levels])]).astype(np.int64)
+        co_occurrence = sparse.csr_matrix((int(offsets[-1]), int(offsets[-1])), dtype=np.float64)
+
+        for chunk in AssociationService._iter_chunks(file_path, numeric + categorical):
+            if numeric:
+                values = np.column_stack([
+                    pd.to_numeric(chunk[col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+                    for col in numeric
+                ])
+                pearson.update(values - means)
+                ranks = np.column_stack([
+                    np.where(np.isnan(values[:, i]), np.nan, digest.cdf(np.nan_to_num(values[:, i])))
+                    for i, digest in enumerate(digests)
+                ])
+                spearman.update(ranks - 0.5)
+
+            if categorical:
+                rows, cols = [], []
+                for i, col in enumerate(categorical):
+                    series = chunk[col]
+                    present = series.notna().to_numpy()
+                    # Top values are stored as text in the profile
+                    codes = pd.Categorical(series.astype(str), categories=levels[i]).codes.astype(np.int64)
+                    codes[codes < 0] = len(levels[i])
+                    rows.append(np.flatnonzero(present))
+                    cols.append(offsets[i] + codes[present])
+                rows, cols = np.concatenate(rows), np.concatenate(cols)
+                one_hot = sparse.csr_matrix(
+                    (np.ones(len(rows)), (rows, cols)),
+                    shape=(len(chunk), int(offsets[-1]))
+                )
+                co_occurrence = co_occurrence + (one_hot.T @ one_hot)
+
+        result = {
+            "row_count": profile["row_count"],
+            "numeric_columns": numeric,
+            "categorical_columns": categorical,
+            "pearson": AssociationService._to_json(pearson.correlation()),
+            "spearman": AssociationService._to_json(spearman.correlation()),
+            "cramers_v": AssociationService._to_json(
+                AssociationService._cramers_v(co_occurrence.toarray(), offsets)
+            )
+        }
+        return result
+
+    @staticmethod
+    def _cramers_v(co_occurrence: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+        """Cramér's V of every pair of columns from the co-occurrence matrix of their one-hot encodings."""
+        size = len(offsets) - 1
+        matrix = np.full((size, size), np.nan)
+        for i in range(size):
+            for j in range(i, size):
+                table = co_occurrence[offsets[i]:offsets[i + 1], offsets[j]:offsets[j + 1]]
+                # Levels that never occur with the other column present do not count
+                table = table[table.sum(axis=1) > 0][:, table.sum(axis=0) > 0]
+                total = table.sum()
+                dimension = min(table.shape) - 1
+                if total == 0 or dimension < 1:
+                    continue
+                expected = np.outer(table.sum(axis=1), table.sum(axis=0)) / total
+                chi2 = float(((table - expected) ** 2 / expected).sum())
+                matrix[i, j] = matrix[j, i] = min(np.sqrt(chi2 / total / dimension), 1.0)
+        return matrix
+
+    @staticmethod
+    def _to_json(matrix: np.ndarray) -> List[List[Optional[float]]]:
+        """Convert a matrix to nested lists with missing values as None."""
+        return [[None if np.isnan(value) else round(float(value), 6) for value in row] for row in matrix]
+
+    @staticmethod
+    def _cache_key(numeric: List[str], categorical: List[str]) -> str:
+        return hashlib.sha1(json.dumps([numeric, categorical, CRAMERS_MAX_LEVELS]).encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def _load_cached(file_path: str, key: str) -> Optional[Dict[str, Any]]:
+        """Load stored matrices of a column selection, or None if missing or stale."""
+        path = f"{file_path}{ASSOCIATIONS_SUFFIX}"
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r') as f:
+                stored = json.load(f)
+        except Exception as e:
+            logger.warning(f"Could not read associations {path}: {str(e)}")
+            return None
+        if stored.get("signature") != DatasetProfiler.file_signature(file_path):
+            return None
+        return stored["entries"].get(key)
+
+    @staticmethod
+    def _save_cached(file_path: str, key: str, result: Dict[str, Any]) -> None:
+        """Store the matrices of a column selection next to the dataset file."""
+        path = f"{file_path}{ASSOCIATIONS_SUFFIX}"
+        signature = DatasetProfiler.file_signature(file_path)
+        entries = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    stored = json.load(f)
+                if stored.get("signature") == signature:
+                    entries = stored["entries"]
+            except Exception:
+                pass
+        entries[key] = result
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump({"signature": signature, "entries": entries}, f)
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def get_matrix(file_path: str, method: str, columns: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Get an association matrix of a dataset file, computing it once per file version.
+
+        Args:
+            file_path: Path to the dataset file
+            method: pearson, spearman or cramers_v
+            columns: Columns to include (all if omitted); numeric columns are
+                used for correlations and categorical ones for Cramér's V
+
+        Returns:
+            Dictionary with the method, columns, matrix and whether it is approximate
+        """
+        if method not in ASSOCIATION_METHODS:
+            raise HTTPException(status_code=400, detail=f"Unknown method '{method}'. Available: {', '.join(ASSOCIATION_METHODS)}")
+        if not ParquetStore.is_tabular(file_path):
+            raise HTTPException(status_code=400, detail="Dataset version is not a tabular file")
+
+        profile = DatasetProfiler.get_or_create_profile(file_path)
+        selected = AssociationService.select_columns(profile, columns)
+        key = AssociationService._cache_key(selected["numeric"], selected["categorical"])
+        result = AssociationService._load_cached(file_path, key)
+        if result is None:
+            result = AssociationService.compute(file_path, profile, selected["numeric"], selected["categorical"])
+            AssociationService._save_cached(file_path, key, result)
+            logger.info(
+                f"Computed associations of {file_path}: {len(selected['numeric'])} numeric, "
+                f"{len(selected['categorical'])} categorical columns"
+            )
+
+        matrix_columns = result["categorical_columns"] if method == "cramers_v" else result["numeric_columns"]
+        return {
+            "method": method,
+            "columns": matrix_columns,
+            "matrix": result[method],
+            "row_count": result["row_count"],
+            "approximate": method == "spearman"
+        }
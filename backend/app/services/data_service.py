@@ -1,8 +1,8 @@
 import os
 import json
+import shutil
 import csv
 import pandas as pd
-import numpy as np
 from typing import List, Dict, Any, Optional, BinaryIO, Union
 from fastapi import UploadFile, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -11,13 +11,25 @@ from sqlalchemy import update, delete, desc
 import networkx as nx
 from datetime import datetime, timezone
 import uuid
+import asyncio
 import logging
-from sklearn.preprocessing import MinMaxScaler, StandardScaler, RobustScaler, OneHotEncoder
+from sklearn.preprocessing import OneHotEncoder
 from sklearn.compose import ColumnTransformer # Import from sklearn.compose
 from sklearn.impute import SimpleImputer
 
 from app.models.models import Dataset # Corrected import path
+from app.core.database import async_session_maker
 from app.services.network_analysis import NetworkAnalysisService
+from app.services.file_storage import FileStorageService
+from app.services.dataset_profiler import DatasetProfiler
+from app.services.parquet_store import ParquetStore, PARQUET_EXTENSION
+from app.services.dataset_reader import DatasetReader
+from app.services.processing_plan import ProcessingPlan, ProcessingRecipeService, PLAN_VERSION
+from app.services.artifact_cache import ArtifactCache
+from app.services.anonymization import AnonymizationService
+from app.services.dtype_optimizer import DtypeOptimizer
+from app.services.association_stats import ASSOCIATIONS_SUFFIX
+from app.services.pair_table import PAIR_TABLE_DIR
 from app.schemas.data import ProcessingOptions, AnonymizationOptions
 
 # Set up logging
@@ -28,6 +40,18 @@ logger = logging.getLogger(__name__)
 DATA_DIR = "data"
 os.makedirs(DATA_DIR, exist_ok=True)
 
+# Largest dataset (rows) whose exact statistics are computed within the request
+EXACT_STATS_MAX_ROWS = int(os.getenv("EXACT_STATS_MAX_ROWS", 1_000_000))
+
+# Suffix of the exact statistics stored next to a dataset file
+EXACT_STATS_SUFFIX = ".stats.json"
+
+# Dataset file field and metadata key of each cached artifact kind
+ARTIFACT_FIELDS = {
+    "processed": ("processed_file_path", "processing"),
+    "anonymized": ("anonymized_file_path", "anonymization")
+}
+
 class DataService:
     """Service for managing datasets and data processing."""
     
@@ -43,10 +67,24 @@ class DataService:
         result = await db.execute(select(Dataset).where(Dataset.id == dataset_id))
         return result.scalars().first()
     
+    @staticmethod
+    def source_content_hash(dataset: Dataset) -> Optional[str]:
+        """Get the hash identifying the content of a dataset's file, including appended batches."""
+        return (dataset.dataset_metadata or {}).get("source_hash") or dataset.content_hash
+    
+    @staticmethod
+    def _map_dataset_fields(dataset_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Map the "metadata" key to the model attribute storing it."""
+        if "metadata" not in dataset_data:
+            return dataset_data
+        mapped = dict(dataset_data)
+        mapped["dataset_metadata"] = mapped.pop("metadata")
+        return mapped
+    
     @staticmethod
     async def create_dataset(db: AsyncSession, dataset_data: Dict[str, Any]) -> Dataset:
         """Create a new dataset (metadata only)."""
-        dataset = Dataset(**dataset_data)
+        dataset = Dataset(**DataService._map_dataset_fields(dataset_data))
         db.add(dataset)
         await db.commit()
         await db.refresh(dataset)
@@ -61,7 +99,7 @@ class DataService:
             return None
             
         # Update individual attributes instead of using bulk update
-        for key, value in dataset_data.items():
+        for key, value in DataService._map_dataset_fields(dataset_data).items():
             setattr(dataset, key, value)
             
         await db.commit()
@@ -76,8 +114,51 @@ class DataService:
         if dataset and dataset.file_path:
             # Delete the file if it exists
             try:
-                if os.path.exists(dataset.file_path):
-                    os.remove(dataset.file_path)
+                # Drop cached frames of every version
+                for version_path in (dataset.file_path, dataset.processed_file_path, dataset.anonymized_file_path):
+                    if version_path:
+                        DatasetReader.invalidate(version_path)
+                original_file_path = (dataset.dataset_metadata or {}).get("original_file_path")
+                # The stored versions and their sidecars (profiles, exact stats, associations)
+                for version_path in dict.fromkeys(path for path in (dataset.file_path, original_file_path) if path):
+                    for version_file in (
+                        version_path,
+                        DatasetProfiler.profile_path(version_path),
+                        f"{version_path}{EXACT_STATS_SUFFIX}",
+                        f"{version_path}{ASSOCIATIONS_SUFFIX}"
+                    ):
+                        if os.path.exists(version_file):
+                            os.remove(version_file)
+                    # Fragments appended to the file
+                    shutil.rmtree(ParquetStore.fragment_dir(version_path), ignore_errors=True)
+                # Parquet files of the sheets of a workbook
+                for sheet in (dataset.dataset_metadata or {}).get("sheets") or []:
+                    for sheet_file in (
+                        sheet["file_path"],
+                        DatasetProfiler.profile_path(sheet["file_path"]),
+                        f"{sheet['file_path']}{ASSOCIATIONS_SUFFIX}"
+                    ):
+                        if os.path.exists(sheet_file):
+                            os.remove(sheet_file)
+                    shutil.rmtree(ParquetStore.fragment_dir(sheet["file_path"]), ignore_errors=True)
+                # Appended batches, their Parquet fragments and edge deltas
+                for entry in (dataset.dataset_metadata or {}).get("appends") or []:
+                    for append_file in (entry["batch_path"], entry.get("fragment_path"), (entry.get("edge_delta") or {}).get("path")):
+                        if append_file and os.path.exists(append_file):
+                            os.remove(append_file)
+                    FileStorageService.release_blob(entry["content_hash"])
+                # Pair tables derived from the dataset's files
+                dataset_dir = os.path.dirname(dataset.file_path)
+                shutil.rmtree(os.path.join(dataset_dir, PAIR_TABLE_DIR), ignore_errors=True)
+                # Remove the dataset's folder once nothing is left in it
+                if os.path.isdir(dataset_dir) and os.path.abspath(dataset_dir) != os.path.abspath(DATA_DIR):
+                    for folder, _, _ in sorted(os.walk(dataset_dir), key=lambda entry: -len(entry[0])):
+                        if not os.listdir(folder):
+                            os.rmdir(folder)
+                # Drop the stored content once no other dataset links it
+                FileStorageService.release_blob(dataset.content_hash)
+                # Unpin the dataset's processed and anonymized versions
+                ArtifactCache.release_dataset(dataset.id)
             except Exception as e:
                 logger.error(f"Error deleting file: {e}")
         
@@ -95,7 +176,12 @@ class DataService:
         project_id: Optional[int] = None,
         description: Optional[str] = None
     ) -> Dataset:
-        """Upload a dataset file and create a dataset record."""
+        """
+        Upload a dataset file and create a dataset record.
+        
+        The upload is streamed into the content-addressed blob store, so
+        re-uploading identical content stores no new data.
+        """
         if not file.filename:
             raise HTTPException(status_code=400, detail="File has no filename")
         
@@ -113,7 +199,7 @@ class DataService:
             file_type = "CSV"
         elif extension in ["xlsx", "xls"]:
             file_type = "XLSX"
-        elif extension == "json":
+        elif extension in ["json", "ndjson", "jsonl"]:
             file_type = "JSON"
         elif extension in ["graphml", "gexf", "gml"]:
             file_type = "NETWORK"
@@ -124,26 +210,89 @@ class DataService:
         dataset_dir = os.path.join(DATA_DIR, file_uuid)
         os.makedirs(dataset_dir, exist_ok=True)
         
-        # Define file path
+        # Define file paths (the original upload and its Parquet version)
         file_path = os.path.join(dataset_dir, f"data.{extension}")
+        parquet_path = os.path.join(dataset_dir, f"data{PARQUET_EXTENSION}")
         
         # Save file
         try:
-            contents = await file.read()
-            with open(file_path, "wb") as buffer:
-                buffer.write(contents)
-            file_size = len(contents)
+            # Stream into the content-addressed store and link into the dataset folder
+            blob = await FileStorageService.stream_to_blob(file)
+            FileStorageService.link_blob(blob["blob_path"], file_path)
+            file_size = blob["size"]
             
-            # Process the file to extract metadata
-            try:
-                column_names, row_count, sample_data = await DataService._extract_file_info(
-                    file_path, file_type, 100  # Sample 100 rows
+            # Identical content uploaded before: reuse its extracted file info and profile
+            file_info = None
+            profile = None
+            compaction = None
+            if blob["deduplicated"]:
+                result = await db.execute(
+                    select(Dataset)
+                    .where(Dataset.content_hash == blob["content_hash"], Dataset.type == file_type)
+                    .order_by(desc(Dataset.created_at))
                 )
-            except Exception as e:
-                logger.error(f"Error extracting file info: {e}")
-                column_names = []
-                row_count = 0
-                sample_data = []
+                for existing in result.scalars().all():
+                    upload_info = (existing.dataset_metadata or {}).get("upload_info")
+                    if upload_info:
+                        file_info = (upload_info["columns"], upload_info["row_count"], upload_info["sample_data"])
+                        if file_type not in ("NETWORK", "XLSX"):
+                            existing_original = (existing.dataset_metadata or {}).get("original_file_path") or existing.file_path
+                            profile = DatasetProfiler.copy_profile(existing_original, file_path)
+                            # The profile and compaction of a dataset with appended batches describe more than the upload
+                            appended = bool((existing.dataset_metadata or {}).get("appends"))
+                            if profile is not None and not appended and ParquetStore.is_parquet(existing.file_path) and os.path.exists(existing.file_path):
+                                FileStorageService.link_blob(existing.file_path, parquet_path)
+                                compaction = (existing.dataset_metadata or {}).get("compaction")
+                        break
+            
+            # Process the file to extract metadata
+            if file_type == "NETWORK":
+                if file_info is None:
+                    file_info = await DataService._extract_file_info(
+                        file_path, file_type, 100  # Sample 100 nodes
+                    )
+            elif file_type == "XLSX":
+                # Workbooks are converted sheet by sheet in the background; read only the first rows now
+                if file_info is None:
+                    try:
+                        head = await asyncio.to_thread(
+                            lambda: DatasetProfiler.profile_chunks([next(ParquetStore.iter_excel_chunks(file_path, chunk_rows=5))])
+                        )
+                        file_info = (head["columns"], None, head["head"])
+                    except Exception as e:
+                        logger.error(f"Error reading workbook: {e}")
+                        file_info = ([], 0, [])
+            else:
+                # Profile tabular files in one chunked pass
+                if profile is None:
+                    try:
+                        profile = await asyncio.to_thread(DatasetProfiler.profile_file, file_path, file_type)
+                    except Exception as e:
+                        logger.error(f"Error profiling file: {e}")
+                if profile is not None:
+                    file_info = (profile["columns"], profile["row_count"], profile["head"])
+                else:
+                    file_info = ([], 0, [])
+            column_names, row_count, sample_data = file_info
+            
+            # Convert tabular files to Parquet once; readers use the Parquet version
+            stored_path = file_path
+            if profile is not None:
+                try:
+                    if not os.path.exists(parquet_path):
+                        # Stored with compact dtypes, so every later load gets them
+                        compaction = await asyncio.to_thread(
+                            DtypeOptimizer.write_parquet,
+                            DatasetProfiler.iter_chunks(file_path, file_type),
+                            parquet_path,
+                            profile
+                        )
+                    DatasetProfiler.copy_profile(file_path, parquet_path)
+                    stored_path = parquet_path
+                except Exception as e:
+                    logger.error(f"Error converting dataset to Parquet: {e}")
+                    if os.path.exists(parquet_path):
+                        os.remove(parquet_path)
             
             # Create dataset record
             name = dataset_name or os.path.basename(file.filename) or "Unnamed dataset"
@@ -155,13 +304,32 @@ class DataService:
                 "status": "Raw",
                 "row_count": row_count,
                 "columns": column_names,
-                "file_path": file_path,
+                "file_path": stored_path,
+                "content_hash": blob["content_hash"],
                 "metadata": {
                     "original_filename": file.filename,
+                    "original_file_path": file_path,
+                    "original_format": extension,
                     "upload_timestamp": datetime.now().isoformat(),
+                    "content_hash": blob["content_hash"],
+                    "deduplicated": blob["deduplicated"],
+                    "upload_info": {
+                        "columns": column_names,
+                        "row_count": row_count,
+                        "sample_data": sample_data[:5]
+                    },
                     "sample_data": sample_data[:5] if len(sample_data) > 5 else sample_data  # Store first 5 rows
                 }
             }
+            if profile is not None:
+                dataset_data["metadata"]["profile"] = DatasetProfiler.summarize(
+                    DatasetProfiler.load_profile(stored_path) or profile
+                )
+            if compaction is not None and stored_path == parquet_path:
+                dataset_data["metadata"]["compaction"] = compaction
+            if file_type == "XLSX":
+                # See ExcelIngestService.convert_dataset
+                dataset_data["metadata"]["conversion"] = {"status": "pending"}
             
             if user_id:
                 dataset_data["user_id"] = user_id
@@ -181,48 +349,20 @@ class DataService:
             except:
                 pass
             
+            if isinstance(e, HTTPException):
+                raise
             raise HTTPException(status_code=500, detail=f"Error uploading dataset: {str(e)}")
     
     @staticmethod
     async def _extract_file_info(file_path: str, file_type: str, sample_rows: int = 100) -> tuple:
-        """Extract column names, row count, and sample data from a file."""
+        """Extract column names, node count, and sample nodes from a network file."""
         columns = []
         row_count = 0
         sample_data = []
         
         try:
-            # CSV handling
-            if file_type == "CSV":
-                df = pd.read_csv(file_path, nrows=sample_rows)
-                columns = df.columns.tolist()
-                row_count = len(pd.read_csv(file_path, usecols=[0]))  # Count rows more efficiently
-                sample_data = df.to_dict(orient='records')
-                
-            # XLSX handling
-            elif file_type == "XLSX":
-                df = pd.read_excel(file_path, nrows=sample_rows)
-                columns = df.columns.tolist()
-                # For Excel files, we need to read the full file to get row count
-                row_count = len(pd.read_excel(file_path, usecols=[0]))
-                sample_data = df.to_dict(orient='records')
-                
-            # JSON handling
-            elif file_type == "JSON":
-                with open(file_path, 'r') as f:
-                    data = json.load(f)
-                
-                # If it's an array of objects, get keys from first object
-                if isinstance(data, list) and len(data) > 0 and isinstance(data[0], dict):
-                    columns = list(data[0].keys())
-                    row_count = len(data)
-                    sample_data = data[:sample_rows]
-                else:
-                    columns = list(data.keys())
-                    row_count = 1
-                    sample_data = [data]
-                    
-            # Network file handling
-            elif file_type == "NETWORK":
+            # Network file handling (tabular files are profiled by DatasetProfiler)
+            if file_type == "NETWORK":
                 if file_path.endswith(".graphml"):
                     G = nx.read_graphml(file_path)
                 elif file_path.endswith(".gexf"):
@@ -264,7 +404,8 @@ class DataService:
     async def process_dataset(
         db: AsyncSession, 
         dataset_id: int, 
-        options: ProcessingOptions
+        options: ProcessingOptions,
+        recipe_id: Optional[str] = None
     ) -> Dataset:
         """Process a dataset (clean, transform, normalize)."""
         dataset = await DataService.get_dataset(db, dataset_id)
@@ -276,336 +417,90 @@ class DataService:
             raise HTTPException(status_code=400, detail="Dataset file not found")
         
         try:
-            # Load dataset from most processed version available
-            if dataset.anonymized_file_path and os.path.exists(dataset.anonymized_file_path):
+            # Load dataset from most processed version available (versions missing appended batches excluded)
+            stale_versions = (dataset.dataset_metadata or {}).get("stale_versions") or []
+            if dataset.anonymized_file_path and "anonymized" not in stale_versions and os.path.exists(dataset.anonymized_file_path):
                 file_path = dataset.anonymized_file_path
-            elif dataset.processed_file_path and os.path.exists(dataset.processed_file_path):
+            elif dataset.processed_file_path and "processed" not in stale_versions and os.path.exists(dataset.processed_file_path):
                 file_path = dataset.processed_file_path
             else:
                 file_path = dataset.file_path
                 
             file_type = dataset.type
             
-            # Load data based on file type
-            try:
-                if file_type == "CSV" or file_path.endswith(".csv"):
-                    df = pd.read_csv(file_path)
-                elif file_type == "XLSX" or file_path.endswith((".xlsx", ".xls")):
-                    df = pd.read_excel(file_path)
-                elif file_type == "JSON" or file_path.endswith(".json"):
-                    with open(file_path, 'r') as f:
-                        data = json.load(f)
-                    if isinstance(data, list):
-                        df = pd.DataFrame(data)
-                    else:
-                        df = pd.DataFrame([data])
-                elif file_type == "NETWORK":
-                    # For network files, we need special handling
+            # Network files are processed as graphs
+            if not ParquetStore.is_tabular(file_path):
+                if file_type == "NETWORK":
                     return await DataService._process_network_dataset(db, dataset, options)
-                else:
-                    raise HTTPException(status_code=400, detail=f"Unsupported file type for processing: {file_type}")
-            except Exception as e:
-                logger.error(f"Error loading dataset file: {e}")
-                raise HTTPException(status_code=500, detail=f"Error loading dataset file: {str(e)}")
+                raise HTTPException(status_code=400, detail=f"Unsupported file type for processing: {file_type}")
             
-            # Handle missing values if specified
-            if options.missing_values and options.missing_values.get("strategy"):
-                try:
-                    strategy = options.missing_values.get("strategy")
-                    columns = options.missing_values.get("columns", [])
-                    
-                    # Apply only to specified columns or all if empty
-                    if not columns:
-                        columns = df.columns.tolist()
-                    
-                    # Validate columns exist in the dataframe
-                    missing_cols = [col for col in columns if col not in df.columns]
-                    if missing_cols:
-                        raise HTTPException(
-                            status_code=400, 
-                            detail=f"Columns not found in dataset: {', '.join(missing_cols)}"
-                        )
-                    
-                    # Apply the appropriate imputation strategy based on data types
-                    if strategy == "mean":
-                        for col in columns:
-                            if col in df.columns and pd.api.types.is_numeric_dtype(df[col]):
-                                # Handle case where all values might be NaN
-                                if df[col].isna().all():
-                                    logger.warning(f"Column {col} contains all NaN values, cannot apply mean imputation")
-                                    continue
-                                df[col] = df[col].fillna(df[col].mean())
-                            elif col in df.columns:
-                                logger.warning(f"Cannot apply 'mean' strategy to non-numeric column: {col}")
-                    
-                    elif strategy == "median":
-                        for col in columns:
-                            if col in df.columns and pd.api.types.is_numeric_dtype(df[col]):
-                                # Handle case where all values might be NaN
-                                if df[col].isna().all():
-                                    logger.warning(f"Column {col} contains all NaN values, cannot apply median imputation")
-                                    continue
-                                df[col] = df[col].fillna(df[col].median())
-                            elif col in df.columns:
-                                logger.warning(f"Cannot apply 'median' strategy to non-numeric column: {col}")
-                    
-                    elif strategy == "mode":
-                        for col in columns:
-                            if col in df.columns:
-                                # Handle case where all values might be NaN
-                                if df[col].isna().all():
-                                    logger.warning(f"Column {col} contains all NaN values, cannot apply mode imputation")
-                                    continue
-                                # Get the mode value (most common)
-                                mode_value = df[col].mode()
-                                if not mode_value.empty:
-                                    df[col] = df[col].fillna(mode_value[0])
-                    
-                    elif strategy == "constant":
-                        fill_value = options.missing_values.get("fill_value")
-                        if fill_value is None:
-                            raise HTTPException(
-                                status_code=400, 
-                                detail="Fill value is required for constant strategy"
-                            )
-                        
-                        for col in columns:
-                            if col in df.columns:
-                                # Try to convert fill_value to the appropriate type for the column
-                                try:
-                                    if pd.api.types.is_numeric_dtype(df[col]):
-                                        typed_fill_value = float(fill_value)
-                                    elif pd.api.types.is_datetime64_dtype(df[col]):
-                                        typed_fill_value = pd.to_datetime(fill_value)
-                                    else:
-                                        typed_fill_value = str(fill_value)
-                                    df[col] = df[col].fillna(typed_fill_value)
-                                except ValueError:
-                                    df[col] = df[col].fillna(str(fill_value))
-                    
-                    elif strategy == "remove":
-                        # Drop rows with missing values in specified columns
-                        valid_columns = [col for col in columns if col in df.columns]
-                        if valid_columns:
-                            before_count = len(df)
-                            df = df.dropna(subset=valid_columns)
-                            after_count = len(df)
-                            logger.info(f"Removed {before_count - after_count} rows with missing values")
-                except Exception as e:
-                    logger.error(f"Error handling missing values: {e}")
-                    raise HTTPException(status_code=500, detail=f"Error handling missing values: {str(e)}")
+            options_dict = options.dict()
+            options_hash = ArtifactCache.options_hash({"plan_version": PLAN_VERSION, **options_dict})
             
-            # Handle data type conversions
-            if options.data_types:
-                try:
-                    for col, dtype in options.data_types.items():
-                        if col in df.columns:
-                            try:
-                                if dtype == "number":
-                                    df[col] = pd.to_numeric(df[col], errors="coerce")
-                                elif dtype == "string":
-                                    df[col] = df[col].astype(str)
-                                elif dtype == "boolean":
-                                    # Handle various boolean representations
-                                    if pd.api.types.is_numeric_dtype(df[col]):
-                                        # If numeric, treat non-zero as True
-                                        df[col] = df[col].astype(bool)
-                                    else:
-                                        # For string-like, map common representations
-                                        bool_map = {
-                                            "true": True, "True": True, "TRUE": True, "1": True, 1: True, 
-                                            "yes": True, "Yes": True, "YES": True, "y": True, "Y": True, "t": True, "T": True,
-                                            "false": False, "False": False, "FALSE": False, "0": False, 0: False, 
-                                            "no": False, "No": False, "NO": False, "n": False, "N": False, "f": False, "F": False
-                                        }
-                                        # First convert to string to handle numeric values safely
-                                        df[col] = df[col].astype(str).map(lambda x: bool_map.get(x, None))
-                                elif dtype == "date":
-                                    # Try to parse dates with more robust error handling
-                                    try:
-                                        df[col] = pd.to_datetime(df[col], errors="coerce")
-                                    except Exception as date_err:
-                                        logger.warning(f"Advanced date parsing failed for {col}: {date_err}")
-                                        # Try with a more flexible parser as backup
-                                        try:
-                                            from dateutil.parser import parse as parse_date
-                                            df[col] = df[col].apply(lambda x: parse_date(x) if pd.notna(x) and x != '' else pd.NaT)
-                                        except Exception as flex_err:
-                                            logger.error(f"Flexible date parsing also failed: {flex_err}")
-                                            # Last resort: keep original and inform user
-                                            raise ValueError(f"Could not convert column {col} to date format")
-                            except Exception as type_err:
-                                logger.warning(f"Failed to convert column {col} to {dtype}: {type_err}")
-                                raise HTTPException(
-                                    status_code=400,
-                                    detail=f"Failed to convert column {col} to {dtype}: {str(type_err)}"
-                                )
-                except Exception as e:
-                    logger.error(f"Error converting data types: {e}")
-                    raise HTTPException(status_code=500, detail=f"Error converting data types: {str(e)}")
+            # The active version already is the result of these options: repeating the
+            # request returns it instead of applying the plan to its own output again
+            active = ArtifactCache.path_artifact(file_path)
+            if active and active[0] == "processed":
+                active_manifest = ArtifactCache.lookup("processed", active[1])
+                if active_manifest and ArtifactCache.artifact_key("processed", active_manifest["source_hash"], options_hash) == active[1]:
+                    return await DataService._activate_artifact(db, dataset, active_manifest, cache_hit=True)
             
-            # Handle normalization
-            if options.normalization and options.normalization.get("strategy") and options.normalization.get("strategy") != "none":
-                try:
-                    strategy = options.normalization.get("strategy")
-                    columns = options.normalization.get("columns", [])
-                    
-                    # If no columns specified, try to apply to all numeric columns
-                    if not columns:
-                        columns = [col for col in df.columns if pd.api.types.is_numeric_dtype(df[col])]
-                        
-                    # Validate columns exist in the dataframe
-                    missing_cols = [col for col in columns if col not in df.columns]
-                    if missing_cols:
-                        raise HTTPException(
-                            status_code=400, 
-                            detail=f"Columns not found in dataset for normalization: {', '.join(missing_cols)}"
-                        )
-                    
-                    # Identify numeric columns from the specified columns
-                    numeric_columns = [col for col in columns if col in df.columns and pd.api.types.is_numeric_dtype(df[col])]
-                    if not numeric_columns:
-                        logger.warning("No numeric columns found for normalization")
-                    else:
-                        # Use sklearn transformers for more robust normalization
-                        if strategy == "min_max":
-                            scaler = MinMaxScaler()
-                        elif strategy == "standard":
-                            scaler = StandardScaler()
-                        elif strategy == "robust":
-                            scaler = RobustScaler()
-                        else:
-                            logger.warning(f"Unsupported normalization strategy: {strategy}")
-                            raise HTTPException(
-                                status_code=400,
-                                detail=f"Unsupported normalization strategy: {strategy}"
-                            )
-                        
-                        # Apply scaler to each column separately to handle missing values
-                        for col in numeric_columns:
-                            # Get non-missing values
-                            mask = df[col].notna()
-                            if mask.sum() > 1:  # Need at least 2 values for scaling
-                                try:
-                                    values = df.loc[mask, col].values.reshape(-1, 1)
-                                    scaled_values = scaler.fit_transform(values)
-                                    df.loc[mask, col] = scaled_values.flatten()
-                                except Exception as scale_err:
-                                    logger.warning(f"Failed to normalize column {col}: {scale_err}")
-                except Exception as e:
-                    logger.error(f"Error normalizing data: {e}")
-                    raise HTTPException(status_code=500, detail=f"Error normalizing data: {str(e)}")
+            # Identical options on identical content reuse the cached result
+            source_hash = ArtifactCache.source_hash(file_path, DataService.source_content_hash(dataset) if file_path == dataset.file_path else None)
+            artifact_key = ArtifactCache.artifact_key("processed", source_hash, options_hash)
+            manifest = ArtifactCache.lookup("processed", artifact_key)
+            if manifest is not None:
+                return await DataService._activate_artifact(db, dataset, manifest, cache_hit=True)
             
-            # Apply transformations if specified
-            if options.transformations:
-                try:
-                    for transform in options.transformations:
-                        operation = transform.get("operation")
-                        columns = transform.get("columns", [])
-                        parameters = transform.get("parameters", {})
-                        
-                        # Validate columns exist in the dataframe
-                        missing_cols = [col for col in columns if col not in df.columns]
-                        if missing_cols:
-                            raise HTTPException(
-                                status_code=400, 
-                                detail=f"Columns not found in dataset for transformation: {', '.join(missing_cols)}"
-                            )
-                        
-                        for col in columns:
-                            if col in df.columns:
-                                # Check if column is numeric for numeric operations
-                                if operation in ["log", "sqrt", "power"] and not pd.api.types.is_numeric_dtype(df[col]):
-                                    logger.warning(f"Cannot apply {operation} to non-numeric column: {col}")
-                                    continue
-                                
-                                try:
-                                    if operation == "log":
-                                        base = float(parameters.get("base", 10))
-                                        # Handle zeros and negative values
-                                        min_val = df[col].min()
-                                        if min_val <= 0:
-                                            # Add offset to make all values positive
-                                            offset = abs(min_val) + 1.0 if min_val <= 0 else 0
-                                            df[col] = np.log(df[col] + offset) / np.log(base)
-                                        else:
-                                            df[col] = np.log(df[col]) / np.log(base)
-                                        
-                                    elif operation == "sqrt":
-                                        # Handle negative values
-                                        min_val = df[col].min()
-                                        if (min_val < 0):
-                                            # Add offset to make all values positive
-                                            offset = abs(min_val) + 1.0
-                                            df[col] = np.sqrt(df[col] + offset)
-                                        else:
-                                            df[col] = np.sqrt(df[col])
-                                    
-                                    elif operation == "power":
-                                        power = float(parameters.get("power", 2))
-                                        df[col] = df[col] ** power
-                                    
-                                    elif operation == "bin":
-                                        bins = int(parameters.get("bins", 5))
-                                        labels = parameters.get("labels", None)
-                                        if labels and len(labels) != bins:
-                                            labels = None
-                                        # Handle case where data is constant
-                                        if df[col].min() == df[col].max():
-                                            logger.warning(f"Cannot bin column {col} with constant value {df[col].min()}")
-                                            continue
-                                        df[col] = pd.cut(
-                                            df[col], 
-                                            bins=bins, 
-                                            labels=labels,
-                                            include_lowest=True
-                                        )
-                                    
-                                except Exception as trans_err:
-                                    logger.warning(f"Failed to apply {operation} to column {col}: {trans_err}")
-                except Exception as e:
-                    logger.error(f"Error applying transformations: {e}")
-                    raise HTTPException(status_code=500, detail=f"Error applying transformations: {str(e)}")
+            # Date formats inferred on earlier runs of the dataset or recipe
+            existing_metadata = dataset.dataset_metadata if isinstance(dataset.dataset_metadata, dict) else {}
+            known_date_formats = dict(existing_metadata.get("date_formats") or {})
+            if recipe_id:
+                known_date_formats.update(ProcessingRecipeService.get_recipe(recipe_id).get("date_formats") or {})
             
-            # Save processed dataset
+            # Compile the options into a fused plan and run it over the source file
             try:
-                dataset_dir = os.path.dirname(dataset.file_path)
-                processed_file_path = os.path.join(dataset_dir, "processed_data.csv")
-                df.to_csv(processed_file_path, index=False)
+                plan = await asyncio.to_thread(ProcessingPlan.for_file, options, file_path, known_date_formats)
+                ArtifactCache.prepare("processed", artifact_key)
+                processed_file_path = ArtifactCache.data_path("processed", artifact_key)
+                execution = await asyncio.to_thread(plan.execute, file_path, processed_file_path)
+                profile = await asyncio.to_thread(DatasetProfiler.profile_file, processed_file_path)
+            except HTTPException:
+                raise
             except Exception as e:
-                logger.error(f"Error saving processed dataset: {e}")
-                raise HTTPException(status_code=500, detail=f"Error saving processed dataset: {str(e)}")
+                logger.error(f"Error processing dataset file: {e}")
+                raise HTTPException(status_code=500, detail=f"Error processing dataset file: {str(e)}")
             
-            # Update dataset record
-            try:
-                # Safely handle existing metadata
-                existing_metadata = dataset.metadata if isinstance(dataset.metadata, dict) else {}
-                
-                update_data = {
-                    "status": "Processed",
-                    "row_count": len(df),
-                    "columns": df.columns.tolist(),
-                    "processed_file_path": processed_file_path,
-                    "metadata": {
-                        **existing_metadata, # Safely merge existing metadata
-                        "processing": {
-                            "options": options.dict(),
-                            "timestamp": datetime.now(timezone.utc).isoformat(), # Use timezone aware
-                            "column_stats": {
-                                col: {
-                                    "dtype": str(df[col].dtype),
-                                    "missing": int(df[col].isna().sum()),
-                                    "unique": int(df[col].nunique())
-                                } for col in df.columns
-                            }
-                        }
-                    }
+            # Remember the inferred date formats for later runs
+            if recipe_id and plan.date_formats:
+                ProcessingRecipeService.update_date_formats(recipe_id, plan.date_formats)
+            
+            processing = {
+                "options": options_dict,
+                "plan": plan.to_dict(),
+                "execution": execution,
+                "timestamp": datetime.now(timezone.utc).isoformat(), # Use timezone aware
+                "column_stats": {
+                    col: {
+                        "dtype": profile["data_types"][col],
+                        "missing": profile["missing_values"][col],
+                        "unique": profile["column_profiles"][col]["distinct"]
+                    } for col in profile["columns"]
                 }
-                
-                return await DataService.update_dataset(db, dataset_id, update_data)
-            except Exception as e:
-                logger.error(f"Error updating dataset record: {e}")
-                raise HTTPException(status_code=500, detail=f"Error updating dataset record: {str(e)}")
+            }
+            if recipe_id:
+                processing["recipe_id"] = recipe_id
+            
+            manifest = ArtifactCache.store("processed", artifact_key, source_hash, options_dict, {
+                "status": "Processed",
+                "row_count": profile["row_count"],
+                "columns": profile["columns"],
+                "metadata": {
+                    "processing": processing,
+                    "date_formats": {**known_date_formats, **plan.date_formats}
+                }
+            }, dataset_id=dataset_id)
+            return await DataService._activate_artifact(db, dataset, manifest, cache_hit=False)
             
         except HTTPException as http_ex:
             # Re-raise HTTP exceptions directly
@@ -614,6 +509,73 @@ class DataService:
             logger.error(f"Unexpected error processing dataset: {e}")
             raise HTTPException(status_code=500, detail=f"Unexpected error processing dataset: {str(e)}")
     
+    @staticmethod
+    async def _activate_artifact(
+        db: AsyncSession,
+        dataset: Dataset,
+        manifest: Dict[str, Any],
+        cache_hit: bool
+    ) -> Dataset:
+        """
+        Make a cached artifact the active processed or anonymized version of a dataset.
+        
+        Args:
+            db: Database session
+            dataset: Dataset model instance
+            manifest: Artifact manifest
+            cache_hit: Whether the artifact was reused instead of built
+            
+        Returns:
+            Updated dataset
+        """
+        kind, key, result = manifest["kind"], manifest["key"], manifest["result"]
+        path_field, metadata_key = ARTIFACT_FIELDS[kind]
+        previous_path = getattr(dataset, path_field)
+        
+        existing_metadata = dataset.dataset_metadata if isinstance(dataset.dataset_metadata, dict) else {}
+        metadata = {**existing_metadata, **result["metadata"]}
+        metadata[metadata_key] = {
+            **result["metadata"][metadata_key],
+            "artifact": {"key": key, "cache_hit": cache_hit, "created_at": manifest["created_at"]}
+        }
+        
+        # A version built from the current content (after appended batches) is up to date again
+        stale_versions = metadata.get("stale_versions") or []
+        if kind in stale_versions:
+            current_sources = {DataService.source_content_hash(dataset)}
+            processed = ArtifactCache.path_artifact(dataset.processed_file_path)
+            if processed and "processed" not in stale_versions:
+                current_sources.add(processed[1])
+            if manifest.get("source_hash") in current_sources:
+                metadata["stale_versions"] = [stale for stale in stale_versions if stale != kind]
+        
+        try:
+            updated = await DataService.update_dataset(db, dataset.id, {
+                "status": result["status"],
+                "row_count": result["row_count"],
+                "columns": result["columns"],
+                path_field: ArtifactCache.data_path(kind, key),
+                "metadata": metadata
+            })
+        except Exception as e:
+            logger.error(f"Error updating dataset record: {e}")
+            raise HTTPException(status_code=500, detail=f"Error updating dataset record: {str(e)}")
+        
+        ArtifactCache.activate(dataset.id, kind, key, previous_path)
+        return updated
+    
+    @staticmethod
+    async def activate_version(db: AsyncSession, dataset_id: int, key: str) -> Dataset:
+        """Switch a dataset to one of its cached processed or anonymized versions."""
+        dataset = await DataService.get_dataset(db, dataset_id)
+        if not dataset:
+            raise HTTPException(status_code=404, detail="Dataset not found")
+        
+        manifest = ArtifactCache.get_version(dataset_id, key)
+        if manifest is None or ArtifactCache.lookup(manifest["kind"], key) is None:
+            raise HTTPException(status_code=404, detail="Dataset version not found")
+        return await DataService._activate_artifact(db, dataset, manifest, cache_hit=True)
+    
     @staticmethod
     async def _process_network_dataset(
         db: AsyncSession, 
@@ -664,7 +626,7 @@ class DataService:
                 "columns": ["id"] + list(G.nodes[list(G.nodes())[0]].keys()) if G.number_of_nodes() > 0 else ["id"],
                 "processed_file_path": processed_file_path,
                 "metadata": {
-                    **(dataset.metadata or {}),
+                    **(dataset.dataset_metadata or {}),
                     "processing": processing_details,
                     "network_metrics": {
                         "node_count": G.number_of_nodes(),
@@ -694,28 +656,52 @@ class DataService:
         if not dataset:
             raise HTTPException(status_code=404, detail="Dataset not found")
         
-        # Determine which file to use (processed or original)
-        file_path = dataset.processed_file_path if dataset.processed_file_path else dataset.file_path
+        # Determine which file to use (processed or original, unless the processed version misses appended batches)
+        stale_versions = (dataset.dataset_metadata or {}).get("stale_versions") or []
+        file_path = dataset.processed_file_path if dataset.processed_file_path and "processed" not in stale_versions else dataset.file_path
         
         if not file_path or not os.path.exists(file_path):
             raise HTTPException(status_code=400, detail="Dataset file not found")
         
         try:
+            # Identical options on identical content reuse the cached result
+            if ParquetStore.is_tabular(file_path):
+                source_hash = ArtifactCache.source_hash(file_path, DataService.source_content_hash(dataset) if file_path == dataset.file_path else None)
+                options_dict = options.dict()
+                hash_options = options_dict
+                if options.method == "pseudonymization":
+                    # Pseudonyms are keyed per project, so they match across the project's datasets
+                    pseudonym_key = AnonymizationService.project_key(dataset.project_id)
+                    # No prefix by default, so a value gets the same pseudonym in every column;
+                    # prefixing each pseudonym with its field name is opt-in
+                    parameters = options.parameters or {}
+                    prefix = str(parameters.get("prefix") or "")
+                    prefixes = {
+                        field: f"{prefix}{field}_" if parameters.get("field_prefix") else prefix
+                        for field in options.sensitive_fields
+                    }
+                    hash_options = {
+                        **options_dict,
+                        "key": AnonymizationService.key_fingerprint(pseudonym_key),
+                        "prefixes": prefixes
+                    }
+                artifact_key = ArtifactCache.artifact_key("anonymized", source_hash, ArtifactCache.options_hash(hash_options))
+                manifest = ArtifactCache.lookup("anonymized", artifact_key)
+                if manifest is not None:
+                    return await DataService._activate_artifact(db, dataset, manifest, cache_hit=True)
+            
             # Load the dataset based on file type
             try:
                 file_type = dataset.type
                 
-                if file_type == "CSV" or (file_type == "NETWORK" and file_path.endswith(".csv")):
-                    df = pd.read_csv(file_path)
-                elif file_type == "XLSX":
-                    df = pd.read_excel(file_path)
-                elif file_type == "JSON":
-                    with open(file_path, 'r') as f:
-                        data = json.load(f)
-                    if isinstance(data, list):
-                        df = pd.DataFrame(data)
+                if ParquetStore.is_tabular(file_path):
+                    if options.method == "pseudonymization":
+                        # Pseudonymization streams the file chunk by chunk
+                        df = None
+                        columns = ParquetStore.read_columns(file_path)
                     else:
-                        df = pd.DataFrame([data])
+                        df = await asyncio.to_thread(DatasetReader.read_file, file_path)
+                        columns = df.columns.tolist()
                 elif file_type == "NETWORK":
                     # For network files, use special handling
                     return await DataService._anonymize_network_dataset(db, dataset, options)
@@ -732,7 +718,7 @@ class DataService:
                 )
                 
             # Validate that specified fields exist in the dataset
-            missing_fields = [field for field in options.sensitive_fields if field not in df.columns]
+            missing_fields = [field for field in options.sensitive_fields if field not in columns]
             if missing_fields:
                 raise HTTPException(
                     status_code=400, 
@@ -740,7 +726,7 @@ class DataService:
                 )
             
             if options.quasi_identifiers:
-                missing_qi = [field for field in options.quasi_identifiers if field not in df.columns]
+                missing_qi = [field for field in options.quasi_identifiers if field not in columns]
                 if missing_qi:
                     raise HTTPException(
                         status_code=400, 
@@ -750,32 +736,24 @@ class DataService:
             # Store mapping between original and anonymized values
             mappings = {}
             mapping_file_path = None
+            anonymization_summary = None
             
             # Apply anonymization based on method
             if options.method == "pseudonymization":
                 try:
-                    # Create mappings and apply replacement for each sensitive field
-                    for field in options.sensitive_fields:
-                        if field in df.columns:
-                            # Create a mapping of original values to pseudonyms
-                            unique_values = df[field].dropna().unique()
-                            
-                            # Generate pseudonyms with better identifiers
-                            pseudonyms = {
-                                val: f"{field}_{uuid.uuid4().hex[:8]}" 
-                                for val in unique_values
-                            }
-                            
-                            # Store mapping if requested
-                            if options.parameters and options.parameters.get("keep_mapping", True):
-                                # Convert non-string keys to strings for JSON serialization
-                                try:
-                                    mappings[field] = {str(k): v for k, v in pseudonyms.items()}
-                                except Exception as mapping_err:
-                                    logger.warning(f"Error storing mapping for field {field}: {mapping_err}")
-                            
-                            # Replace values with pseudonyms
-                            df[field] = df[field].map(lambda x: pseudonyms.get(x, x) if pd.notna(x) else x)
+                    keep_mapping = bool(options.parameters and options.parameters.get("keep_mapping", True))
+                    
+                    dataset_dir = ArtifactCache.prepare("anonymized", artifact_key)
+                    anonymized_file_path = ArtifactCache.data_path("anonymized", artifact_key)
+                    row_count, columns, mappings = await asyncio.to_thread(
+                        AnonymizationService.pseudonymize_file,
+                        file_path,
+                        anonymized_file_path,
+                        options.sensitive_fields,
+                        pseudonym_key,
+                        prefixes,
+                        keep_mapping
+                    )
                 except Exception as e:
                     logger.error(f"Error applying pseudonymization: {e}")
                     raise HTTPException(
@@ -796,105 +774,11 @@ class DataService:
                     # Determine minimum group size (k value)
                     k_value = int(options.parameters.get("k_value", 2)) if options.parameters else 2
                     
-                    # Group by quasi-identifiers and aggregate sensitive fields
+                    # Aggregate sensitive fields per quasi-identifier group and suppress small groups
                     if quasi_identifiers:
-                        # Create a copy for the aggregation
-                        agg_df = df.copy()
-                        
-                        # For each sensitive field, replace values with aggregated values
-                        for field in sensitive_fields:
-                            if field in df.columns:
-                                # Create groups based on quasi-identifiers
-                                try:
-                                    grouped = df.groupby(quasi_identifiers)[field]
-                                    group_sizes = grouped.size()
-                                    
-                                    # Only aggregate groups meeting k-anonymity threshold
-                                    valid_groups = group_sizes[group_sizes >= k_value].index
-                                    invalid_groups = group_sizes[group_sizes < k_value].index
-                                    
-                                    # Apply different aggregation strategies based on data type
-                                    if pd.api.types.is_numeric_dtype(df[field]):
-                                        # For numeric fields, use mean
-                                        agg_values = grouped.mean()
-                                    else:
-                                        # For non-numeric fields, use most frequent value
-                                        # We need to handle each group separately
-                                        agg_values = pd.Series(index=grouped.groups.keys())
-                                        for name, group in grouped:
-                                            mode_val = group.mode()
-                                            if not mode_val.empty:
-                                                if isinstance(name, tuple):
-                                                    # Convert the value to the appropriate type before assignment
-                                                    try:
-                                                        # Get the correct type from the series
-                                                        series_dtype = str(df[field].dtype)
-                                                        value = mode_val.iloc[0]
-                                                        
-                                                        # Handle different dtypes appropriately
-                                                        if 'float' in series_dtype:
-                                                            # Try to convert to float, use str if fails
-                                                            try:
-                                                                value = float(value)
-                                                            except:
-                                                                value = str(value)
-                                                        elif 'int' in series_dtype:
-                                                            # Try to convert to int, use str if fails
-                                                            try:
-                                                                value = int(value)
-                                                            except:
-                                                                value = str(value)
-                                                        
-                                                        agg_values[name] = value
-                                                    except Exception as e:
-                                                        logger.warning(f"Type conversion error: {e}, using string conversion")
-                                                        agg_values[name] = str(mode_val.iloc[0])
-                                                else:
-                                                    # Same type conversion for non-tuple name
-                                                    try:
-                                                        series_dtype = str(df[field].dtype)
-                                                        value = mode_val.iloc[0]
-                                                        
-                                                        if 'float' in series_dtype:
-                                                            try:
-                                                                value = float(value)
-                                                            except:
-                                                                value = str(value)
-                                                        elif 'int' in series_dtype:
-                                                            try:
-                                                                value = int(value)
-                                                            except:
-                                                                value = str(value)
-                                                        
-                                                        agg_values[name] = value
-                                                    except Exception as e:
-                                                        logger.warning(f"Type conversion error: {e}, using string conversion")
-                                                        agg_values[name] = str(mode_val.iloc[0])
-                                    
-                                    # Apply aggregation to each valid group
-                                    for idx in valid_groups:
-                                        # Handle both single and multiple quasi-identifiers
-                                        mask = DataService._create_group_mask(df, quasi_identifiers, idx)
-                                        
-                                        # Apply aggregated value
-                                        if idx in agg_values:
-                                            agg_df.loc[mask, field] = agg_values[idx]
-                                    
-                                    # Suppress small groups
-                                    for idx in invalid_groups:
-                                        mask = DataService._create_group_mask(df, quasi_identifiers, idx)
-                                        
-                                        # Suppress values in small groups
-                                        agg_df.loc[mask, field] = "[REDACTED]"
-                                        
-                                except Exception as agg_err:
-                                    logger.warning(f"Error aggregating field {field}: {agg_err}")
-                                    # Apply fallback: simple suppression for this field
-                                    for idx in invalid_groups:
-                                        mask = DataService._create_group_mask(df, quasi_identifiers, idx)
-                                        agg_df.loc[mask, field] = "[REDACTED]"
-                        
-                        df = agg_df
+                        df, anonymization_summary = await asyncio.to_thread(
+                            AnonymizationService.aggregate, df, sensitive_fields, quasi_identifiers, k_value
+                        )
                 except Exception as e:
                     logger.error(f"Error applying aggregation: {e}")
                     raise HTTPException(
@@ -913,76 +797,10 @@ class DataService:
                     # Determine k value (minimum group size)
                     k_value = int(options.parameters.get("k_value", 5)) if options.parameters else 5
                     
-                    # Implement k-anonymity algorithm
-                    anon_df = df.copy()
-                    
-                    # 1. For each quasi-identifier, apply generalization
-                    for qi in options.quasi_identifiers:
-                        if qi in df.columns:
-                            # Get the data type and apply appropriate anonymization technique
-                            if pd.api.types.is_numeric_dtype(df[qi]):
-                                # For numeric columns, bin the data
-                                try:
-                                    anon_df = DataService._anonymize_numeric_column(
-                                        df=anon_df,
-                                        column=qi,
-                                        quasi_identifiers=options.quasi_identifiers,
-                                        k_value=k_value
-                                    )
-                                except Exception as num_err:
-                                    logger.error(f"Error anonymizing numeric column {qi}: {num_err}")
-                                    # Fallback to simple suppression
-                                    anon_df[qi] = f"[NUMERIC_{qi.upper()}]"
-                            
-                            elif pd.api.types.is_datetime64_dtype(df[qi]) or pd.api.types.is_datetime64_any_dtype(df[qi]):
-                                # For datetime columns, apply date generalization
-                                try:
-                                    anon_df = DataService._anonymize_datetime_column(
-                                        df=anon_df,
-                                        column=qi,
-                                        date_column=df[qi],
-                                        quasi_identifiers=options.quasi_identifiers,
-                                        k_value=k_value
-                                    )
-                                except Exception as date_err:
-                                    logger.error(f"Error anonymizing datetime column {qi}: {date_err}")
-                                    # Fallback to simple suppression
-                                    anon_df[qi] = f"[DATE_{qi.upper()}]"
-                            
-                            else:
-                                # For string/categorical columns
-                                try:
-                                    anon_df = DataService._anonymize_categorical_column(
-                                        df=anon_df,
-                                        column=qi,
-                                        quasi_identifiers=options.quasi_identifiers,
-                                        k_value=k_value
-                                    )
-                                except Exception as cat_err:
-                                    logger.error(f"Error anonymizing categorical column {qi}: {cat_err}")
-                                    # Fallback to simple suppression
-                                    anon_df[qi] = f"[TEXT_{qi.upper()}]"
-                    
-                    # Check if we've achieved k-anonymity after generalizing all quasi-identifiers
-                    try:
-                        group_counts = anon_df.groupby(options.quasi_identifiers).size()
-                        
-                        # If we still have small groups, suppress sensitive values in those groups
-                        if len(group_counts) > 0 and group_counts.min() < k_value:
-                            for idx, count in group_counts.items():
-                                if count < k_value:
-                                    # Create mask for this group
-                                    mask = DataService._create_group_mask(anon_df, options.quasi_identifiers, idx)
-                                    
-                                    # Suppress sensitive fields for small groups
-                                    for field in options.sensitive_fields:
-                                        if field in anon_df.columns:
-                                            anon_df.loc[mask, field] = "[REDACTED]"
-                    except Exception as grp_err:
-                        logger.warning(f"Error in final k-anonymity verification: {grp_err}")
-                    
-                    # Use the anonymized dataframe
-                    df = anon_df
+                    # Generalize quasi-identifiers into equivalence classes of at least k rows
+                    df, anonymization_summary = await asyncio.to_thread(
+                        AnonymizationService.mondrian, df, options.sensitive_fields, options.quasi_identifiers, k_value
+                    )
                 except Exception as e:
                     logger.error(f"Error applying k-anonymity: {e}")
                     raise HTTPException(
@@ -990,11 +808,13 @@ class DataService:
                         detail=f"Error applying k-anonymity: {str(e)}"
                     )
             
-            # Save anonymized dataset
+            # Save anonymized dataset (pseudonymization has written it already)
             try:
-                dataset_dir = os.path.dirname(file_path)
-                anonymized_file_path = os.path.join(dataset_dir, "anonymized_data.csv")
-                df.to_csv(anonymized_file_path, index=False)
+                if df is not None:
+                    dataset_dir = ArtifactCache.prepare("anonymized", artifact_key)
+                    anonymized_file_path = ArtifactCache.data_path("anonymized", artifact_key)
+                    ParquetStore.write(df, anonymized_file_path)
+                    row_count, columns = len(df), df.columns.tolist()
                 logger.info(f"Anonymized dataset saved to {anonymized_file_path}")
             except Exception as save_err:
                 logger.error(f"Error saving anonymized dataset: {save_err}")
@@ -1017,9 +837,6 @@ class DataService:
             
             # Update dataset record
             try:
-                # Safely handle existing metadata
-                existing_metadata = dataset.metadata if isinstance(dataset.metadata, dict) else {}
-                
                 # Build anonymization details
                 anonymization_details = {
                     "method": options.method,
@@ -1032,19 +849,18 @@ class DataService:
                 # Include mapping path in metadata if mapping was saved
                 if mapping_file_path:
                     anonymization_details["mapping_file_path"] = mapping_file_path
+                if anonymization_summary:
+                    anonymization_details["summary"] = anonymization_summary
                 
-                update_data = {
+                manifest = ArtifactCache.store("anonymized", artifact_key, source_hash, options_dict, {
                     "status": "Anonymized",
-                    "anonymized_file_path": anonymized_file_path,
-                    "columns": df.columns.tolist(),
-                    "row_count": len(df),
-                    "metadata": {
-                        **existing_metadata, # Safely merge existing metadata
-                        "anonymization": anonymization_details
-                    }
-                }
-                
-                return await DataService.update_dataset(db, dataset_id, update_data)
+                    "row_count": row_count,
+                    "columns": columns,
+                    "metadata": {"anonymization": anonymization_details}
+                }, dataset_id=dataset_id)
+                return await DataService._activate_artifact(db, dataset, manifest, cache_hit=False)
+            except HTTPException:
+                raise
             except Exception as update_err:
                 logger.error(f"Error updating dataset record: {update_err}")
                 raise HTTPException(
@@ -1062,126 +878,6 @@ class DataService:
                 detail=f"Unexpected error anonymizing dataset: {str(e)}"
             )
     
-    @staticmethod
-    def _create_group_mask(df, quasi_identifiers, idx):
-        """Helper method to create a mask for a group based on quasi-identifiers."""
-        if len(quasi_identifiers) == 1:
-            return df[quasi_identifiers[0]] == idx
-        else:
-            mask = True
-            for i, qi in enumerate(quasi_identifiers):
-                mask &= df[qi] == idx[i] if isinstance(idx, tuple) else idx
-            return mask
-        
-    @staticmethod
-    def _anonymize_numeric_column(df, column, quasi_identifiers, k_value):
-        """Apply anonymization to a numeric column."""
-        anon_df = df.copy()
-        
-        # 1. Try binning with different numbers of bins
-        for bins in range(10, 0, -1):
-            try:
-                # Skip if data has no range (constant value)
-                if df[column].min() == df[column].max():
-                    anon_df[column] = f"[{df[column].min()}]"
-                    break
-                
-                # Create bins
-                bin_ranges = pd.cut(df[column], bins=bins, precision=2)
-                anon_df[column] = bin_ranges.astype(str)
-                
-                # Check if k-anonymity is satisfied
-                group_counts = anon_df.groupby(quasi_identifiers).size()
-                if group_counts.min() >= k_value:
-                    break
-            except Exception as e:
-                logger.warning(f"Error creating bins for {column} with {bins} bins: {e}")
-        
-        # 2. If binning didn't work, use even broader generalization
-        if bins == 1 or df[column].min() == df[column].max():
-            # For numeric data, use ranges like "[min-max]" or mean value
-            min_val = df[column].min()
-            max_val = df[column].max()
-            if min_val != max_val:
-                anon_df[column] = f"[{min_val:.2f}-{max_val:.2f}]"
-            else:
-                anon_df[column] = f"[{min_val:.2f}]"
-        
-        return anon_df
-        
-    @staticmethod
-    def _anonymize_datetime_column(df, column, date_column, quasi_identifiers, k_value):
-        """Apply anonymization to a datetime column."""
-        anon_df = df.copy()
-        
-        # Ensure date_column is datetime type
-        try:
-            date_column = pd.to_datetime(date_column)
-        except:
-            # If conversion fails, treat as string
-            return DataService._anonymize_categorical_column(df, column, quasi_identifiers, k_value)
-            
-        # Try different levels of date generalization
-        generalization_levels = [
-            "%Y-%m-%d",  # Year-Month-Day
-            "%Y-%m",     # Year-Month
-            "%Y",        # Year
-            "decade"     # Decade
-        ]
-        
-        for level in generalization_levels:
-            if level == "decade":
-                # For decade level, calculate decade from year
-                anon_df[column] = (date_column.dt.year // 10 * 10).astype(str) + "s"
-            else:
-                # Use strftime for other levels
-                anon_df[column] = date_column.dt.strftime(level)
-            
-            # Check if this level achieves k-anonymity
-            group_counts = anon_df.groupby(quasi_identifiers).size()
-            if len(group_counts) > 0 and group_counts.min() >= k_value:
-                break
-        
-        return anon_df
-        
-    @staticmethod
-    def _anonymize_categorical_column(df, column, quasi_identifiers, k_value):
-        """Apply anonymization to a categorical/string column."""
-        anon_df = df.copy()
-        str_col = df[column].astype(str)
-        
-        # Try different levels of generalization for string/categorical columns
-        
-        # 1. Try truncation at different lengths
-        max_len = str_col.str.len().max()
-        
-        # Try different lengths, starting from the maximum and reducing
-        for length in range(max_len, 0, -1):
-            # Skip if all strings are already shorter than current length
-            if max_len < length:
-                continue
-                
-            # Apply truncation
-            anon_df[column] = str_col.str[:length]
-            
-            # Check if k-anonymity is satisfied
-            group_counts = anon_df.groupby(quasi_identifiers).size()
-            if len(group_counts) > 0 and group_counts.min() >= k_value:
-                break
-        
-        # 2. If truncation doesn't work, try first character + asterisks
-        if length == 1 and (len(group_counts) == 0 or group_counts.min() < k_value):
-            anon_df[column] = str_col.str[:1] + "*" * (max_len - 1 if max_len > 1 else 1)
-            
-            # Check if k-anonymity is satisfied
-            group_counts = anon_df.groupby(quasi_identifiers).size()
-            
-            # 3. If still not enough, use complete suppression
-            if len(group_counts) == 0 or group_counts.min() < k_value:
-                anon_df[column] = "[REDACTED]"
-        
-        return anon_df
-    
     @staticmethod
     async def get_dataset_preview(
         db: AsyncSession, 
@@ -1204,27 +900,12 @@ class DataService:
             # Load the data based on file type
             file_type = dataset.type
             
-            if file_type == "CSV" or file_path.endswith(".csv"):
-                df = pd.read_csv(file_path, nrows=limit)
-                columns = df.columns.tolist()
-                data = df.to_dict(orient='records')
-                
-            elif file_type == "XLSX" or file_path.endswith((".xlsx", ".xls")):
-                df = pd.read_excel(file_path, nrows=limit)
+            if ParquetStore.is_tabular(file_path):
+                # Only the first rows are read
+                df = DatasetReader.read_file(file_path, nrows=limit)
                 columns = df.columns.tolist()
                 data = df.to_dict(orient='records')
                 
-            elif file_type == "JSON" or file_path.endswith(".json"):
-                with open(file_path, 'r') as f:
-                    json_data = json.load(f)
-                
-                if isinstance(json_data, list):
-                    data = json_data[:limit]
-                    columns = list(data[0].keys()) if data else []
-                else:
-                    data = [json_data]
-                    columns = list(json_data.keys())
-                    
             elif file_type == "NETWORK" or file_path.endswith((".graphml", ".gexf", ".gml")):
                 # For network files, convert to a node-attribute dataframe for preview
                 if file_path.endswith(".graphml"):
@@ -1261,8 +942,18 @@ class DataService:
             raise HTTPException(status_code=500, detail=f"Error getting dataset preview: {str(e)}")
     
     @staticmethod
-    async def get_dataset_stats(db: AsyncSession, dataset_id: int) -> Dict[str, Any]:
-        """Get statistics about the dataset."""
+    async def get_dataset_stats(db: AsyncSession, dataset_id: int, mode: str = "auto") -> Dict[str, Any]:
+        """
+        Get statistics about the dataset.
+        
+        Tabular statistics are exact or approximate (from the profile's
+        sketches, with error bounds). "auto" is exact up to
+        EXACT_STATS_MAX_ROWS rows; "exact" on a larger dataset returns the
+        approximate statistics and queues a background job (see
+        run_exact_stats_job), whose state is under "exact_job".
+        """
+        if mode not in ("auto", "approximate", "exact"):
+            raise HTTPException(status_code=400, detail=f"Unknown statistics mode: {mode}")
         dataset = await DataService.get_dataset(db, dataset_id)
         
         if not dataset:
@@ -1278,25 +969,32 @@ class DataService:
             # Load the data based on file type
             file_type = dataset.type
             
-            if file_type == "CSV" or file_path.endswith(".csv"):
-                df = pd.read_csv(file_path)
-                stats = DataService._calculate_dataframe_stats(df)
+            if ParquetStore.is_tabular(file_path):
+                exact = DataService.load_exact_stats(file_path) if mode != "approximate" else None
+                if exact is not None:
+                    return exact
                 
-            elif file_type == "XLSX" or file_path.endswith((".xlsx", ".xls")):
-                df = pd.read_excel(file_path)
-                stats = DataService._calculate_dataframe_stats(df)
+                # Serve statistics from the stored profile; profile the file once if it has none
+                profile = DatasetProfiler.load_profile(file_path)
+                if profile is None:
+                    profile = await asyncio.to_thread(DatasetProfiler.profile_file, file_path)
+                    await DataService.update_dataset(db, dataset_id, {
+                        "metadata": {
+                            **(dataset.dataset_metadata or {}),
+                            "profile": DatasetProfiler.summarize(profile)
+                        }
+                    })
                 
-            elif file_type == "JSON" or file_path.endswith(".json"):
-                with open(file_path, 'r') as f:
-                    json_data = json.load(f)
+                if mode != "approximate" and profile["row_count"] <= EXACT_STATS_MAX_ROWS:
+                    stats = await asyncio.to_thread(DataService.compute_exact_stats, file_path)
+                    DataService.save_exact_stats(stats, file_path)
+                    return stats
                 
-                if isinstance(json_data, list):
-                    df = pd.DataFrame(json_data)
-                    stats = DataService._calculate_dataframe_stats(df)
-                else:
-                    # Single object
-                    df = pd.DataFrame([json_data])
-                    stats = DataService._calculate_dataframe_stats(df)
+                stats = DatasetProfiler.to_stats(profile)
+                # Profiles of compacted files hold the compacted dtypes; report them as the exact statistics do
+                stats["data_types"] = {col: DtypeOptimizer.logical_dtype(dtype) for col, dtype in stats["data_types"].items()}
+                if mode == "exact":
+                    stats["exact_job"] = await DataService._queue_exact_stats_job(db, dataset, file_path)
                     
             elif file_type == "NETWORK" or file_path.endswith((".graphml", ".gexf", ".gml")):
                 # For network files, calculate network statistics
@@ -1371,6 +1069,129 @@ class DataService:
             logger.error(f"Error getting dataset statistics: {e}")
             raise HTTPException(status_code=500, detail=f"Error getting dataset statistics: {str(e)}")
     
+    @staticmethod
+    def compute_exact_stats(file_path: str) -> Dict[str, Any]:
+        """
+        Compute exact statistics of a tabular dataset file.
+        
+        Parquet files are read one column at a time, so memory use is
+        bounded by the largest column rather than the whole table.
+        
+        Args:
+            file_path: Path to the dataset file
+            
+        Returns:
+            Statistics in the layout of the dataset stats endpoint
+        """
+        if not ParquetStore.is_parquet(file_path):
+            stats = DataService._calculate_dataframe_stats(DatasetReader.read_file(file_path))
+            stats["mode"] = "exact"
+            return stats
+        
+        columns = ParquetStore.read_columns(file_path)
+        stats = {
+            "row_count": ParquetStore.row_count(file_path),
+            "column_count": len(columns),
+            "missing_values": {},
+            "data_types": {},
+            "statistics": {},
+            "mode": "exact"
+        }
+        for col in columns:
+            # Statistics describe the values, not their compacted storage
+            df = ParquetStore.read_dataset_file(file_path, columns=[col])
+            df[col] = DtypeOptimizer.widen(df[col])
+            column_stats = DataService._calculate_dataframe_stats(df)
+            for key in ("missing_values", "data_types", "statistics"):
+                stats[key][col] = column_stats[key][col]
+        return stats
+    
+    @staticmethod
+    def save_exact_stats(stats: Dict[str, Any], file_path: str) -> None:
+        """Store exact statistics next to a dataset file, with the file's signature."""
+        path = f"{file_path}{EXACT_STATS_SUFFIX}"
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump({"signature": DatasetProfiler.file_signature(file_path), "stats": stats}, f, default=str)
+        os.replace(temp_path, path)
+    
+    @staticmethod
+    def load_exact_stats(file_path: str) -> Optional[Dict[str, Any]]:
+        """Load the stored exact statistics of a dataset file, or None if missing or stale."""
+        path = f"{file_path}{EXACT_STATS_SUFFIX}"
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r') as f:
+                stored = json.load(f)
+        except Exception as e:
+            logger.warning(f"Could not read statistics {path}: {str(e)}")
+            return None
+        if stored.get("signature") != DatasetProfiler.file_signature(file_path):
+            return None
+        stats = stored["stats"]
+        # Statistics stored before compacted dtypes were mapped back
+        stats["data_types"] = {col: DtypeOptimizer.logical_dtype(dtype) for col, dtype in stats["data_types"].items()}
+        return stats
+    
+    @staticmethod
+    async def _queue_exact_stats_job(db: AsyncSession, dataset: Dataset, file_path: str) -> Dict[str, Any]:
+        """Record a queued exact statistics job unless one is queued or running for the file."""
+        metadata = dict(dataset.dataset_metadata or {})
+        job = metadata.get("exact_stats_job")
+        if job and job.get("file_path") == file_path and job.get("status") in ("queued", "running"):
+            return job
+        
+        job = {
+            "id": str(uuid.uuid4()),
+            "status": "queued",
+            "file_path": file_path,
+            "queued_at": datetime.now(timezone.utc).isoformat()
+        }
+        metadata["exact_stats_job"] = job
+        await DataService.update_dataset(db, dataset.id, {"metadata": metadata})
+        return job
+    
+    @staticmethod
+    async def run_exact_stats_job(dataset_id: int, job_id: str) -> None:
+        """
+        Compute the exact statistics of a dataset in the background.
+        
+        Runs after the response with its own database session. The job
+        state is kept in the dataset metadata under "exact_stats_job"; a job
+        no longer queued (e.g. picked up by an earlier task) is skipped.
+        
+        Args:
+            dataset_id: Dataset ID
+            job_id: ID of the queued job
+        """
+        async with async_session_maker() as db:
+            dataset = await DataService.get_dataset(db, dataset_id)
+            if not dataset:
+                return
+            metadata = dict(dataset.dataset_metadata or {})
+            job = dict(metadata.get("exact_stats_job") or {})
+            if job.get("id") != job_id or job.get("status") != "queued":
+                return
+            
+            job.update({"status": "running", "started_at": datetime.now(timezone.utc).isoformat()})
+            metadata["exact_stats_job"] = job
+            await DataService.update_dataset(db, dataset_id, {"metadata": metadata})
+            
+            try:
+                stats = await asyncio.to_thread(DataService.compute_exact_stats, job["file_path"])
+                DataService.save_exact_stats(stats, job["file_path"])
+                job.update({"status": "completed", "completed_at": datetime.now(timezone.utc).isoformat()})
+            except Exception as e:
+                logger.error(f"Error computing exact statistics of dataset {dataset_id}: {e}")
+                job.update({"status": "failed", "error": str(e)})
+            
+            # Re-read the metadata, which may have changed while the job ran
+            await db.refresh(dataset)
+            metadata = dict(dataset.dataset_metadata or {})
+            metadata["exact_stats_job"] = job
+            await DataService.update_dataset(db, dataset_id, {"metadata": metadata})
+    
     @staticmethod
     def _calculate_dataframe_stats(df: pd.DataFrame) -> Dict[str, Any]:
         """Calculate comprehensive statistics for a dataframe."""
@@ -1433,7 +1254,7 @@ class DataService:
                     pass
             
             # Stats for string/object columns
-            elif pd.api.types.is_string_dtype(df[col]) or pd.api.types.is_object_dtype(df[col]):
+            elif pd.api.types.is_string_dtype(df[col]) or pd.api.types.is_object_dtype(df[col]) or isinstance(df[col].dtype, pd.CategoricalDtype):
                 try:
                     # Length statistics
                     df[col] = df[col].astype(str)
@@ -1469,7 +1290,10 @@ class DataService:
             raise HTTPException(status_code=404, detail="Dataset not found")
 
         # Basic validation
-        if not definition.source_column or not definition.target_column:
+        if definition.calculation_method == "affiliation":
+            if not definition.person_column or not definition.affiliation_column:
+                raise HTTPException(status_code=400, detail="Person and affiliation columns are required.")
+        elif not definition.source_column or not definition.target_column:
             raise HTTPException(status_code=400, detail="Source and target columns are required.")
 
         # Update dataset
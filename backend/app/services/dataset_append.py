@@ -0,0 +1,449 @@
+import os
+import asyncio
+import hashlib
+import logging
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from fastapi import UploadFile, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.models.models import Dataset, Network
+from app.services.data_service import DataService
+from app.services.file_storage import FileStorageService
+from app.services.parquet_store import ParquetStore, PARQUET_EXTENSION, PARQUET_ROW_GROUP_SIZE
+from app.services.dataset_profiler import DatasetProfiler
+from app.services.dataset_reader import DatasetReader
+from app.services.pair_table import PairTableService
+from app.services.network_store import NetworkStore
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Folder of a dataset holding the uploaded batches and their edge deltas
+APPEND_DIR_NAME = "appends"
+
+# Upload formats accepted for appended batches
+APPEND_EXTENSIONS = {"csv": "CSV", "json": "JSON", "ndjson": "JSON", "jsonl": "JSON", "xlsx": "XLSX", "xls": "XLSX"}
+
+# Appends to the same dataset run one at a time
+_append_locks: Dict[int, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+
+class DatasetAppendService:
+    """
+    Service for appending batches of rows to a tabular dataset.
+
+    A batch is validated against the stored schema (same columns, values of
+    the stored types) and written as a Parquet fragment in the fragment
+    folder of the dataset file (see ParquetStore.fragment_paths), which the
+    readers read together with the file. The earlier rows are not read,
+    rewritten or profiled again, so an append costs only the batch. The
+    dataset profile is updated by merging the sketches of the batch, and the
+    pair table and networks derived from the dataset are extended with the
+    batch's edge delta instead of being rebuilt from its history.
+    """
+
+    @staticmethod
+    def append_dir(file_path: str) -> str:
+        """Get the folder of the appended batches of a dataset file."""
+        return os.path.join(os.path.dirname(file_path), APPEND_DIR_NAME)
+
+    @staticmethod
+    def validate_chunk(chunk: pd.DataFrame, data_types: Dict[str, str], row_offset: int = 0) -> pd.DataFrame:
+        """
+        Check a chunk of a batch against the stored schema and cast it to the stored types.
+
+        Args:
+            chunk: DataFrame chunk of the batch
+            data_types: Stored column dtypes (from the dataset profile)
+            row_offset: Rows of the batch before this chunk, for error messages
+
+        Returns:
+            Chunk with the stored columns, in the stored order and types
+        """
+        missing = [col for col in data_types if col not in chunk.columns]
+        extra = [str(col) for col in chunk.columns if col not in data_types]
+        if missing or extra:
+            problems = []
+            if missing:
+                problems.append(f"missing columns: {', '.join(missing)}")
+            if extra:
+                problems.append(f"unknown columns: {', '.join(extra)}")
+            raise HTTPException(status_code=400, detail=f"Batch does not match the dataset schema ({'; '.join(problems)})")
+        chunk = chunk[list(data_types)]
+
+        for col, dtype in data_types.items():
+            values = chunk[col]
+            present = values.notna()
+            if dtype.startswith(("int", "uint", "float")):
+                converted = pd.to_numeric(values, errors="coerce")
+                invalid = present & converted.isna()
+                if dtype.startswith(("int", "uint")):
+                    invalid |= converted.notna() & (converted % 1 != 0)
+            elif dtype.startswith("datetime64"):
+                invalid = present & pd.to_datetime(values, errors="coerce").isna()
+            elif dtype in ("bool", "boolean") and not pd.api.types.is_bool_dtype(values):
+                invalid = present & ~values.astype(str).str.lower().isin(["true", "false", "1", "0"])
+            else:
+                continue
+            if invalid.any():
+                position = int(np.flatnonzero(invalid.to_numpy())[0])
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Column '{col}' expects {dtype} values; row {row_offset + position + 1} of the batch has '{values.iloc[position]}'"
+                )
+
+        for col, dtype in data_types.items():
+            if dtype in ("bool", "boolean") and not pd.api.types.is_bool_dtype(chunk[col]):
+                chunk = chunk.copy()
+                chunk[col] = chunk[col].astype(str).str.lower().isin(["true", "1"]).where(chunk[col].notna()).astype("boolean")
+        chunk = ParquetStore.cast_to_types(chunk, data_types)
+        for col, dtype in data_types.items():
+            # Keep the stored text and timestamp dtypes, so the merged profile keeps them too
+            if str(chunk[col].dtype) != dtype:
+                try:
+                    chunk[col] = chunk[col].astype(dtype)
+                except (TypeError, ValueError):
+                    pass
+        return chunk
+
+    @staticmethod
+    def _iter_validated(batch_path: str, file_type: str, data_types: Dict[str, str]):
+        """Read a batch in chunks, validated and cast to the stored types."""
+        rows = 0
+        for chunk in DatasetProfiler.iter_chunks(batch_path, file_type):
+            yield DatasetAppendService.validate_chunk(chunk, data_types, rows)
+            rows += len(chunk)
+
+    @staticmethod
+    def _widen_schema(schema: pa.Schema, batch_profile: Dict[str, Any]) -> Tuple[pa.Schema, List[str]]:
+        """
+        Widen integer fields whose compacted type cannot hold the values of a batch.
+
+        Args:
+            schema: Arrow schema of the dataset file
+            batch_profile: Profile of the batch
+
+        Returns:
+            Tuple of the schema for the appended file and the widened columns
+        """
+        widened = []
+        for i, field in enumerate(schema):
+            numeric = (batch_profile["column_profiles"].get(field.name) or {}).get("numeric")
+            if not numeric or not pa.types.is_integer(field.type):
+                continue
+            info = np.iinfo(field.type.to_pandas_dtype())
+            if numeric["min"] < info.min or numeric["max"] > info.max:
+                schema = schema.set(i, field.with_type(pa.int64()))
+                widened.append(field.name)
+        return schema, widened
+
+    @staticmethod
+    def _to_table(chunk: pd.DataFrame, schema: pa.Schema) -> pa.Table:
+        """Convert a validated chunk to an Arrow table with the schema of the dataset file."""
+        chunk = ParquetStore.prepare_frame(chunk)
+        for field in schema:
+            if pa.types.is_dictionary(field.type) and not isinstance(chunk[field.name].dtype, pd.CategoricalDtype):
+                values = chunk[field.name]
+                chunk = chunk.copy()
+                chunk[field.name] = values.where(values.isna(), values.astype(str)).astype("category")
+        return pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+
+    @staticmethod
+    def append_file(file_path: str, batch_path: str, file_type: str, fragment_path: str) -> Dict[str, Any]:
+        """
+        Append a batch file to a Parquet dataset file as a new fragment.
+
+        Args:
+            file_path: Path to the Parquet dataset file
+            batch_path: Path to the uploaded batch (CSV, JSON or Excel)
+            file_type: Type of the batch file
+            fragment_path: Destination of the batch as a Parquet fragment
+
+        Returns:
+            Dictionary with the appended rows, the signature of the file before
+            the append, the merged profile and the widened columns
+        """
+        profile = DatasetProfiler.get_or_create_profile(file_path)
+        previous_signature = DatasetProfiler.file_signature(file_path)
+        data_types = profile["data_types"]
+
+        # First pass: validate and profile the batch before anything is written
+        batch_profile = DatasetProfiler.profile_chunks(DatasetAppendService._iter_validated(batch_path, file_type, data_types))
+        if batch_profile["row_count"] == 0:
+            raise HTTPException(status_code=400, detail="Batch has no rows")
+        schema, widened = DatasetAppendService._widen_schema(ParquetStore.read_schema(file_path), batch_profile)
+
+        # Second pass: write the batch as a fragment with the dataset's schema. It is
+        # moved into the fragment folder once complete, so readers never see it half written.
+        os.makedirs(os.path.dirname(fragment_path), exist_ok=True)
+        temp_path = f"{fragment_path}.tmp"
+        try:
+            with pq.ParquetWriter(temp_path, schema) as writer:
+                for chunk in DatasetAppendService._iter_validated(batch_path, file_type, data_types):
+                    writer.write_table(DatasetAppendService._to_table(chunk, schema), row_group_size=PARQUET_ROW_GROUP_SIZE)
+            # Cached frames are keyed by the file's current signature
+            DatasetReader.invalidate(file_path)
+            os.replace(temp_path, fragment_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        merged = DatasetProfiler.save_profile(DatasetProfiler.merge_profiles(profile, batch_profile), file_path)
+        logger.info(f"Appended {batch_profile['row_count']} rows to {file_path}: {merged['row_count']} rows")
+        return {
+            "rows": batch_profile["row_count"],
+            "previous_signature": previous_signature,
+            "profile": merged,
+            "widened": widened
+        }
+
+    @staticmethod
+    def apply_edge_delta(
+        graph_path: str,
+        delta: Dict[str, Any],
+        definition: Dict[str, Any],
+        weighted: bool
+    ) -> Dict[str, int]:
+        """
+        Add the edge delta of an appended batch to a stored network.
+
+        Weights of existing edges are increased by the weights of the batch;
+        new nodes get the attributes of their first occurrence in the batch.
+
+        Args:
+            graph_path: Path to the stored network
+            delta: Edge delta (see PairTableService.append)
+            definition: Tie strength definition the network was built with
+            weighted: Whether the network is weighted
+
+        Returns:
+            Dictionary with the added nodes and edges and the network's new size
+        """
+        G = NetworkStore.load_graph(graph_path)
+        delta_graph, weighted = PairTableService.build_graph(delta, definition, directed=G.is_directed(), weighted=weighted)
+
+        nodes_added = 0
+        for node, attributes in delta_graph.nodes(data=True):
+            if node not in G:
+                G.add_node(node, **attributes)
+                nodes_added += 1
+        edges_added = 0
+        for source, target, data in delta_graph.edges(data=True):
+            if not G.has_edge(source, target):
+                G.add_edge(source, target, **data)
+                edges_added += 1
+            elif weighted:
+                G[source][target]["weight"] = G[source][target].get("weight", 0) + data["weight"]
+
+        NetworkStore.save_graph(G, graph_path)
+        return {
+            "nodes_added": nodes_added,
+            "edges_added": edges_added,
+            "node_count": G.number_of_nodes(),
+            "edge_count": G.number_of_edges()
+        }
+
+    @staticmethod
+    def update_edges(
+        dataset: Dataset,
+        networks: List[Network],
+        batch_number: int,
+        fragment_path: str,
+        previous_signature: Dict[str, int]
+    ) -> Dict[str, Any]:
+        """
+        Extend the pair table and networks derived from a dataset with an appended batch.
+
+        Only networks built from the dataset's original file with a
+        source/target definition can take the delta; others (affiliation
+        projections, networks of processed or anonymized versions) are
+        reported as stale.
+
+        Args:
+            dataset: Dataset model instance, before the append is recorded
+            networks: Networks derived from the dataset
+            batch_number: Number of the appended batch
+            fragment_path: Parquet fragment of the batch
+            previous_signature: Signature of the dataset file before the append
+
+        Returns:
+            Dictionary with the edge delta summary and the updated and stale networks
+        """
+        derived_from_original = not dataset.processed_file_path and not dataset.anonymized_file_path
+        definition = dataset.tie_strength_definition
+        batch = None
+        delta = None
+        edge_delta = None
+        if derived_from_original and PairTableService.uses_pair_table(definition):
+            batch = ParquetStore.read_dataset_file(fragment_path)
+            delta = PairTableService.append(dataset.file_path, definition, batch, previous_signature)
+            edges_path = os.path.join(DatasetAppendService.append_dir(dataset.file_path), f"{batch_number}.edges{PARQUET_EXTENSION}")
+            ParquetStore.write(delta["pairs"], edges_path)
+            edge_delta = {
+                "path": edges_path,
+                "pairs": int(len(delta["pairs"])),
+                "interactions": int(delta["pairs"]["count"].sum()) if len(delta["pairs"]) else 0,
+                "new_nodes": int(len(delta["nodes"]))
+            }
+
+        updated: Dict[int, Dict[str, int]] = {}
+        stale: Dict[int, str] = {}
+        for network in networks:
+            network_definition = (network.attributes or {}).get("tie_strength_definition")
+            if not derived_from_original:
+                stale[network.id] = "built from a processed or anonymized version"
+            elif not PairTableService.uses_pair_table(network_definition):
+                stale[network.id] = "definition cannot be updated incrementally"
+            elif not network.file_path or not os.path.exists(network.file_path):
+                stale[network.id] = "network file not found"
+            else:
+                try:
+                    network_delta = delta
+                    if network_definition != definition:
+                        if batch is None:
+                            batch = ParquetStore.read_dataset_file(fragment_path)
+                        network_delta = PairTableService.aggregate(batch, network_definition)
+                    updated[network.id] = DatasetAppendService.apply_edge_delta(
+                        network.file_path, network_delta, network_definition, bool(network.weighted)
+                    )
+                except Exception as e:
+                    logger.warning(f"Could not apply the edge delta to network {network.id}: {str(e)}")
+                    stale[network.id] = f"edge delta failed: {str(e)}"
+        return {"edge_delta": edge_delta, "updated": updated, "stale": stale}
+
+    @staticmethod
+    async def append_to_dataset(db: AsyncSession, dataset_id: int, file: UploadFile) -> Dict[str, Any]:
+        """
+        Append an uploaded batch of rows to a dataset.
+
+        Args:
+            db: Database session
+            dataset_id: Dataset ID
+            file: Uploaded batch with the dataset's columns
+
+        Returns:
+            Dictionary with the updated dataset and a summary of the append
+        """
+        if not file.filename:
+            raise HTTPException(status_code=400, detail="File has no filename")
+        extension = os.path.splitext(file.filename)[1].lstrip(".").lower()
+        file_type = APPEND_EXTENSIONS.get(extension)
+        if file_type is None:
+            raise HTTPException(status_code=400, detail=f"Unsupported file type for appending: {extension or 'none'}")
+
+        async with _append_locks[dataset_id]:
+            dataset = await DataService.get_dataset(db, dataset_id)
+            if not dataset:
+                raise HTTPException(status_code=404, detail="Dataset not found")
+            metadata = dict(dataset.dataset_metadata or {})
+            if (metadata.get("conversion") or {}).get("status") in ("pending", "running"):
+                raise HTTPException(status_code=409, detail="The workbook has not been converted yet")
+            if not dataset.file_path or not ParquetStore.is_parquet(dataset.file_path) or not os.path.exists(dataset.file_path):
+                raise HTTPException(status_code=400, detail="Only datasets stored as Parquet can be appended to")
+
+            appends = list(metadata.get("appends") or [])
+            blob = await FileStorageService.stream_to_blob(file)
+            if blob["content_hash"] == dataset.content_hash or any(entry["content_hash"] == blob["content_hash"] for entry in appends):
+                if not blob["deduplicated"]:
+                    FileStorageService.release_blob(blob["content_hash"])
+                raise HTTPException(status_code=409, detail="This batch has already been appended to the dataset")
+
+            batch_number = len(appends) + 1
+            append_dir = DatasetAppendService.append_dir(dataset.file_path)
+            batch_path = os.path.join(append_dir, f"{batch_number}.{extension}")
+            fragment_path = os.path.join(ParquetStore.fragment_dir(dataset.file_path), f"{batch_number}{PARQUET_EXTENSION}")
+            FileStorageService.link_blob(blob["blob_path"], batch_path)
+
+            try:
+                result = await asyncio.to_thread(DatasetAppendService.append_file, dataset.file_path, batch_path, file_type, fragment_path)
+            except Exception as e:
+                for path in (batch_path, fragment_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+                FileStorageService.release_blob(blob["content_hash"])
+                if isinstance(e, HTTPException):
+                    raise
+                logger.error(f"Error appending to dataset {dataset_id}: {e}")
+                raise HTTPException(status_code=500, detail=f"Error appending to dataset: {str(e)}")
+
+            networks = (await db.execute(select(Network).where(Network.dataset_id == dataset_id))).scalars().all()
+            try:
+                edges = await asyncio.to_thread(
+                    DatasetAppendService.update_edges, dataset, networks, batch_number, fragment_path, result["previous_signature"]
+                )
+            except Exception as e:
+                logger.warning(f"Could not compute the edge delta of dataset {dataset_id}: {str(e)}")
+                edges = {"edge_delta": None, "updated": {}, "stale": {network.id: "edge delta failed" for network in networks}}
+
+            appended_at = datetime.now(timezone.utc).isoformat()
+            for network in networks:
+                attributes = dict(network.attributes or {})
+                if network.id in edges["updated"]:
+                    update = edges["updated"][network.id]
+                    network.node_count = update["node_count"]
+                    network.edge_count = update["edge_count"]
+                    # Recalculated on the next request for the metrics and communities
+                    network.metrics = None
+                    network.communities = None
+                    attributes["last_append"] = {"batch": batch_number, **update, "appended_at": appended_at}
+                else:
+                    attributes["stale"] = {"batch": batch_number, "reason": edges["stale"][network.id], "since": appended_at}
+                network.attributes = attributes
+
+            # Processed and anonymized versions do not hold the batch
+            stale_versions = [
+                kind for kind, path in (("processed", dataset.processed_file_path), ("anonymized", dataset.anonymized_file_path)) if path
+            ]
+            entry = {
+                "batch": batch_number,
+                "filename": file.filename,
+                "content_hash": blob["content_hash"],
+                "batch_path": batch_path,
+                "fragment_path": fragment_path,
+                "rows": result["rows"],
+                "widened_columns": result["widened"],
+                "edge_delta": edges["edge_delta"],
+                "networks_updated": sorted(edges["updated"]),
+                "networks_stale": sorted(edges["stale"]),
+                "appended_at": appended_at
+            }
+            metadata["appends"] = appends + [entry]
+            # Identifies the appended content for cached processed and anonymized versions
+            previous_hash = metadata.get("source_hash") or dataset.content_hash or ""
+            metadata["source_hash"] = hashlib.sha256(f"{previous_hash}:{blob['content_hash']}".encode("utf-8")).hexdigest()
+            metadata["profile"] = DatasetProfiler.summarize(result["profile"])
+            if stale_versions:
+                metadata["stale_versions"] = sorted(set(metadata.get("stale_versions") or []) | set(stale_versions))
+            if result["widened"] and metadata.get("compaction"):
+                compaction = dict(metadata["compaction"])
+                compaction["dtypes"] = {col: dtype for col, dtype in compaction["dtypes"].items() if col not in result["widened"]}
+                metadata["compaction"] = compaction
+            if metadata.get("sheets"):
+                metadata["sheets"] = [
+                    {**sheet, "row_count": result["profile"]["row_count"]} if sheet["file_path"] == dataset.file_path else sheet
+                    for sheet in metadata["sheets"]
+                ]
+
+            updated = await DataService.update_dataset(db, dataset_id, {
+                "row_count": result["profile"]["row_count"],
+                "metadata": metadata
+            })
+            return {
+                "dataset": updated,
+                "batch": batch_number,
+                "rows_appended": result["rows"],
+                "row_count": result["profile"]["row_count"],
+                "widened_columns": result["widened"],
+                "edge_delta": edges["edge_delta"],
+                "networks_updated": sorted(edges["updated"]),
+                "networks_stale": sorted(edges["stale"]),
+                "stale_versions": stale_versions
+            }
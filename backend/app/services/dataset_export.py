@@ -0,0 +1,332 @@
+import os
+import re
+import logging
+import tempfile
+from typing import Dict, Any, Iterator, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from fastapi import HTTPException
+
+from app.services.parquet_store import ParquetStore, READ_BATCH_ROWS
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Download formats: media type and file extension
+EXPORT_FORMATS = {
+    "csv": ("text/csv", ".csv"),
+    "json": ("application/json", ".json"),
+    "ndjson": ("application/x-ndjson", ".ndjson"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", ".xlsx")
+}
+
+# Stored file extensions served without conversion, by download format
+PASSTHROUGH_EXTENSIONS = {
+    "csv": (".csv",),
+    "json": (".json",),
+    "ndjson": (".ndjson", ".jsonl"),
+    "parquet": (".parquet",),
+    "xlsx": (".xlsx",)
+}
+
+# Bytes read per chunk when streaming a stored file
+EXPORT_CHUNK_BYTES = 1024 * 1024
+
+# Single byte range of a Range header (bytes=start-end, bytes=start- or bytes=-suffix)
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class _StreamSink:
+    """Write-only file object buffering written bytes until drained, for streaming writers."""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+class DatasetExporter:
+    """
+    Service for streaming dataset downloads.
+
+    A stored file already in the requested format is served as it is, in
+    fixed-size chunks and with support for byte ranges. Other formats are
+    converted batch by batch while the response is sent, so memory use does
+    not depend on the size of the dataset.
+    """
+
+    @staticmethod
+    def is_passthrough(file_path: str, export_format: str) -> bool:
+        """Check whether a stored file can be served as the requested format without conversion."""
+        if ParquetStore.fragment_paths(file_path):
+            # Rows appended as fragments are only in the file once converted
+            return False
+        return file_path.lower().endswith(PASSTHROUGH_EXTENSIONS.get(export_format, ()))
+
+    @staticmethod
+    def check_readable(file_path: str) -> None:
+        """
+        Check that a file can be converted before the response starts.
+
+        Raises:
+            HTTPException: If the file is not a readable table
+        """
+        try:
+            if ParquetStore.is_tabular(file_path):
+                ParquetStore.read_columns(file_path)
+            else:
+                # Other files (e.g. edge lists) are read as CSV
+                pd.read_csv(file_path, nrows=1)
+        except Exception as e:
+            logger.warning(f"Cannot read {file_path} for download: {e}")
+            raise HTTPException(status_code=400, detail="Unsupported file format for download")
+
+    @staticmethod
+    def parse_range(range_header: Optional[str], file_size: int) -> Optional[Tuple[int, int]]:
+        """
+        Parse a single-range Range header.
+
+        Args:
+            range_header: Value of the Range header
+            file_size: Size of the file in bytes
+
+        Returns:
+            Inclusive (start, end) byte positions, or None to send the whole file
+
+        Raises:
+            HTTPException: 416 if the range cannot be satisfied
+        """
+        if not range_header:
+            return None
+        match = RANGE_PATTERN.match(range_header.strip())
+        if not match or match.group(1) == match.group(2) == "":
+            # Multiple or malformed ranges: send the whole file
+            return None
+
+        start_text, end_text = match.groups()
+        if start_text == "":
+            # Suffix range: the last N bytes
+            start, end = max(file_size - int(end_text), 0), file_size - 1
+        else:
+            start = int(start_text)
+            end = min(int(end_text), file_size - 1) if end_text else file_size - 1
+        if start >= file_size or start > end:
+            raise HTTPException(
+                status_code=416,
+                detail="Requested range not satisfiable",
+                headers={"Content-Range": f"bytes */{file_size}"}
+            )
+        return start, end
+
+    @staticmethod
+    def iter_file(file_path: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        """
+        Read a byte range of a file in chunks.
+
+        Args:
+            file_path: Path to the file
+            start: First byte
+            end: Last byte (inclusive); end of file if omitted
+
+        Returns:
+            Iterator of byte chunks
+        """
+        remaining = (end - start + 1) if end is not None else None
+        with open(file_path, "rb") as f:
+            f.seek(start)
+            while remaining is None or remaining > 0:
+                data = f.read(EXPORT_CHUNK_BYTES if remaining is None else min(EXPORT_CHUNK_BYTES, remaining))
+                if not data:
+                    break
+                if remaining is not None:
+                    remaining -= len(data)
+                yield data
+
+    @staticmethod
+    def file_response_parts(file_path: str, range_header: Optional[str]) -> Tuple[int, Dict[str, str], Iterator[bytes]]:
+        """
+        Get the status, headers and body of a response serving a stored file.
+
+        Args:
+            file_path: Path to the file
+            range_header: Value of the request's Range header
+
+        Returns:
+            Tuple of the status code (200 or 206), headers and body chunks
+        """
+        file_size = os.path.getsize(file_path)
+        byte_range = DatasetExporter.parse_range(range_header, file_size)
+        headers = {"Accept-Ranges": "bytes"}
+        if byte_range is None:
+            headers["Content-Length"] = str(file_size)
+            return 200, headers, DatasetExporter.iter_file(file_path)
+
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
+        headers["Content-Length"] = str(end - start + 1)
+        return 206, headers, DatasetExporter.iter_file(file_path, start, end)
+
+    @staticmethod
+    def iter_chunks(file_path: str, typed: bool = False) -> Iterator[pd.DataFrame]:
+        """
+        Read a dataset file in batches of rows.
+
+        Parquet, CSV and JSON files are read incrementally; other formats are
+        read whole.
+
+        Args:
+            file_path: Path to the dataset file
+            typed: Whether all batches must have the same dtypes; CSV and JSON
+                batches are typed independently, so these files are then read whole
+
+        Returns:
+            Iterator of DataFrame batches
+        """
+        is_csv = file_path.lower().endswith(".csv") or not ParquetStore.is_tabular(file_path)
+        if ParquetStore.is_parquet(file_path):
+            yield from ParquetStore.iter_batches(file_path)
+        elif is_csv and typed:
+            yield pd.read_csv(file_path)
+        elif is_csv:
+            yield from pd.read_csv(file_path, chunksize=READ_BATCH_ROWS)
+        elif ParquetStore.is_json(file_path) and not typed:
+            yield from ParquetStore.iter_json_chunks(file_path)
+        else:
+            yield ParquetStore.read_dataset_file(file_path)
+
+    @staticmethod
+    def iter_csv(file_path: str) -> Iterator[bytes]:
+        """Convert a dataset file to CSV batch by batch."""
+        header = True
+        for chunk in DatasetExporter.iter_chunks(file_path):
+            yield chunk.to_csv(index=False, header=header).encode("utf-8")
+            header = False
+
+    @staticmethod
+    def iter_ndjson(file_path: str) -> Iterator[bytes]:
+        """Convert a dataset file to newline-delimited JSON batch by batch."""
+        for chunk in DatasetExporter.iter_chunks(file_path):
+            if len(chunk):
+                text = chunk.to_json(orient="records", lines=True, date_format="iso")
+                yield (text if text.endswith("\n") else text + "\n").encode("utf-8")
+
+    @staticmethod
+    def iter_json(file_path: str) -> Iterator[bytes]:
+        """Convert a dataset file to a JSON array of records batch by batch."""
+        yield b"["
+        first = True
+        for chunk in DatasetExporter.iter_chunks(file_path):
+            if not len(chunk):
+                continue
+            # Records of the batch without the enclosing brackets
+            records = chunk.to_json(orient="records", date_format="iso")[1:-1]
+            yield ((b"" if first else b",") + records.encode("utf-8"))
+            first = False
+        yield b"]"
+
+    @staticmethod
+    def iter_parquet(file_path: str) -> Iterator[bytes]:
+        """Convert a dataset file to Parquet, sending each row group as it is written."""
+        sink = _StreamSink()
+        writer = None
+        try:
+            for chunk in DatasetExporter.iter_chunks(file_path, typed=True):
+                table = pa.Table.from_pandas(ParquetStore.prepare_frame(chunk), preserve_index=False)
+                if writer is None:
+                    # Columns without values in the first batch are written as text
+                    schema = table.schema
+                    for i, field in enumerate(schema):
+                        if pa.types.is_null(field.type):
+                            schema = schema.set(i, field.with_type(pa.string()))
+                    writer = pq.ParquetWriter(sink, schema)
+                writer.write_table(table.cast(writer.schema, safe=False) if table.schema != writer.schema else table)
+                yield sink.drain()
+        finally:
+            if writer is not None:
+                writer.close()
+        yield sink.drain()
+
+    @staticmethod
+    def write_xlsx(file_path: str) -> str:
+        """
+        Convert a dataset file to a temporary XLSX file batch by batch.
+
+        XLSX is a zip archive completed only when the workbook is saved, so
+        rows go through a write-only workbook (which keeps no cells in
+        memory) into a file that is then streamed.
+
+        Args:
+            file_path: Path to the dataset file
+
+        Returns:
+            str: Path to the temporary XLSX file (to be deleted by the caller)
+        """
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        header = True
+        for chunk in DatasetExporter.iter_chunks(file_path):
+            if header:
+                sheet.append([str(col) for col in chunk.columns])
+                header = False
+            values = chunk.astype(object).where(chunk.notna(), None)
+            for row in values.itertuples(index=False, name=None):
+                sheet.append(list(row))
+
+        fd, xlsx_path = tempfile.mkstemp(suffix=".xlsx")
+        os.close(fd)
+        workbook.save(xlsx_path)
+        return xlsx_path
+
+    @staticmethod
+    def conversion_stream(file_path: str, export_format: str) -> Iterator[bytes]:
+        """
+        Get the body of a download converted to a format.
+
+        Args:
+            file_path: Path to the dataset file
+            export_format: csv, json, ndjson or parquet
+
+        Returns:
+            Iterator of byte chunks
+        """
+        if export_format == "csv":
+            return DatasetExporter.iter_csv(file_path)
+        if export_format == "ndjson":
+            return DatasetExporter.iter_ndjson(file_path)
+        if export_format == "json":
+            return DatasetExporter.iter_json(file_path)
+        if export_format == "parquet":
+            return DatasetExporter.iter_parquet(file_path)
+        raise HTTPException(status_code=400, detail="Unsupported format")
+
+    @staticmethod
+    def download_headers(name: str, export_format: str) -> Dict[str, Any]:
+        """Get the media type and attachment headers of a download."""
+        media_type, extension = EXPORT_FORMATS[export_format]
+        filename = f"{name.replace(' ', '_')}{extension}"
+        return {"media_type": media_type, "headers": {"Content-Disposition": f'attachment; filename="{filename}"'}}
@@ -0,0 +1,549 @@
+import os
+import json
+import math
+import uuid
+import shutil
+import asyncio
+import hashlib
+import logging
+import tempfile
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Optional, Iterator, Iterable
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import Dataset
+from app.services.data_service import DataService, DATA_DIR
+from app.services.parquet_store import ParquetStore, PARQUET_EXTENSION, READ_BATCH_ROWS
+from app.services.dataset_profiler import DatasetProfiler
+from app.services.dataset_reader import DatasetReader
+from app.services.artifact_cache import ArtifactCache
+from app.services.dtype_optimizer import DtypeOptimizer
+from app.schemas.data import DatasetJoinRequest
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Join types, as in pandas.merge
+JOIN_HOW = ("inner", "left", "right", "outer")
+
+# Memory for the side of a join loaded as a hash table; larger sides are partitioned on disk first
+JOIN_MEMORY_BYTES = int(os.getenv("JOIN_MEMORY_BYTES", 256 * 1024 * 1024))
+
+# Most partitions written per pass (one open file each)
+JOIN_MAX_PARTITIONS = int(os.getenv("JOIN_MAX_PARTITIONS", 256))
+
+# Partitioning passes; a partition still too large after them (one very frequent key) is joined as is
+JOIN_MAX_DEPTH = int(os.getenv("JOIN_MAX_DEPTH", 3))
+
+# Rows sampled from a side to estimate its size in memory
+JOIN_SAMPLE_ROWS = 1_000
+
+# Column numbering the rows of the loaded side, to find those without a match
+_ROW_COLUMN = "__join_row"
+
+
+class _JoinSide:
+    """One side of a join: its Parquet file, key columns and how its rows are kept."""
+
+    def __init__(self, name: str, file_path: str, keys: List[str], columns: List[str], kinds: List[str], preserved: bool, suffix: str):
+        self.name = name
+        self.file_path = file_path
+        self.keys = keys
+        self.columns = columns
+        self.kinds = kinds
+        self.preserved = preserved
+        self.suffix = suffix
+        self.row_count = ParquetStore.row_count(file_path)
+        sample = DatasetJoinService.decode(ParquetStore.read_head(file_path, JOIN_SAMPLE_ROWS, columns))
+        self.empty = sample.iloc[:0]
+        self.row_bytes = float(sample.memory_usage(index=False, deep=True).sum()) / max(len(sample), 1)
+
+    def estimated_bytes(self, file_path: str) -> float:
+        """Estimate the memory of a file of this side's rows when loaded."""
+        return ParquetStore.row_count(file_path) * self.row_bytes
+
+
+class DatasetJoinService:
+    """
+    Service for joining two datasets into a new derived dataset.
+
+    The join is a hash join that spills to disk (a Grace hash join), so
+    neither side has to fit in memory:
+
+    - The smaller side is the build side. If it fits in JOIN_MEMORY_BYTES,
+      it is loaded once and the other side is streamed against it in
+      batches.
+    - Otherwise both sides are hash-partitioned on their keys into Parquet
+      files, so matching rows land in the same partition, and each pair of
+      partitions is joined the same way. A partition that is still too
+      large is partitioned again with another hash seed.
+
+    Rows of the build side that never match are tracked per partition, so
+    left, right and outer joins work whichever side is built. As in SQL,
+    missing keys match nothing. The joined rows are profiled as they are
+    produced and stored as Parquet with compact dtypes, like uploads.
+    """
+
+    @staticmethod
+    def key_kind(dtype: str) -> str:
+        """Get the kind of values of a key column's dtype: numeric, bool, datetime or text."""
+        try:
+            dtype = pd.api.types.pandas_dtype(dtype)
+        except TypeError:
+            return "text"
+        if pd.api.types.is_bool_dtype(dtype):
+            return "bool"
+        if pd.api.types.is_numeric_dtype(dtype):
+            return "numeric"
+        if pd.api.types.is_datetime64_any_dtype(dtype):
+            return "datetime"
+        return "text"
+
+    @staticmethod
+    def decode(df: pd.DataFrame) -> pd.DataFrame:
+        """Turn compacted categorical columns back into their values, so keys of both sides compare alike."""
+        for col in df.columns[[isinstance(dtype, pd.CategoricalDtype) for dtype in df.dtypes]]:
+            df[col] = df[col].astype(df[col].cat.categories.dtype)
+        return df
+
+    @staticmethod
+    def partition_ids(df: pd.DataFrame, side: _JoinSide, partitions: int, depth: int) -> np.ndarray:
+        """
+        Assign rows to partitions by the hash of their keys.
+
+        Keys are normalized by kind first, so equal keys of both sides (e.g.
+        1 and 1.0, or a category and a string) hash alike.
+        """
+        normalized = {}
+        for i, (key, kind) in enumerate(zip(side.keys, side.kinds)):
+            values = df[key]
+            if kind in ("numeric", "bool"):
+                normalized[i] = pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+            elif kind == "datetime":
+                values = pd.to_datetime(values, errors="coerce")
+                if values.dt.tz is not None:
+                    values = values.dt.tz_convert(None)
+                normalized[i] = values.astype("datetime64[ns]").to_numpy()
+            else:
+                normalized[i] = values.astype(str).astype(object).to_numpy()
+        # Each partitioning pass uses its own seed, so a partition split again spreads out
+        hashes = pd.util.hash_pandas_object(pd.DataFrame(normalized), index=False, hash_key=f"{depth:016d}")
+        return (hashes.to_numpy(dtype=np.uint64) % np.uint64(partitions)).astype(np.int64)
+
+    @staticmethod
+    def partition_file(
+        file_path: str,
+        side: _JoinSide,
+        partitions: int,
+        depth: int,
+        directory: str
+    ) -> List[Optional[str]]:
+        """
+        Split a file of one side into partition files by the hash of its keys.
+
+        Args:
+            file_path: Parquet file with the side's columns
+            side: Join side
+            partitions: Number of partitions
+            depth: Partitioning pass, which seeds the hash
+            directory: Folder for the partition files
+
+        Returns:
+            Path of each partition's file, or None if no rows fell into it
+        """
+        paths = [os.path.join(directory, f"{side.name}-{i}{PARQUET_EXTENSION}") for i in range(partitions)]
+        writers: Dict[int, pq.ParquetWriter] = {}
+        buffers: Dict[int, List[pa.Table]] = {}
+        buffered_bytes = 0
+
+        def flush():
+            nonlocal buffered_bytes
+            for partition, tables in buffers.items():
+                table = pa.concat_tables(tables)
+                if partition not in writers:
+                    writers[partition] = pq.ParquetWriter(paths[partition], table.schema)
+                writers[partition].write_table(table)
+            buffers.clear()
+            buffered_bytes = 0
+
+        try:
+            for batch in ParquetStore.iter_record_batches(file_path, side.columns, READ_BATCH_ROWS):
+                table = pa.Table.from_batches([batch])
+                ids = DatasetJoinService.partition_ids(table.select(side.keys).to_pandas(), side, partitions, depth)
+                order = np.argsort(ids, kind="stable")
+                bounds = np.searchsorted(ids[order], np.arange(partitions + 1))
+                for partition in np.flatnonzero(np.diff(bounds)):
+                    part = table.take(order[bounds[partition]:bounds[partition + 1]])
+                    buffers.setdefault(int(partition), []).append(part)
+                    buffered_bytes += part.nbytes
+                # Rows are buffered so partition files get row groups of a useful size
+                if buffered_bytes >= JOIN_MEMORY_BYTES // 2:
+                    flush()
+            flush()
+        finally:
+            for writer in writers.values():
+                writer.close()
+        return [paths[i] if i in writers else None for i in range(partitions)]
+
+    @staticmethod
+    def _iter_side(file_path: Optional[str], side: _JoinSide) -> Iterator[pd.DataFrame]:
+        """Read a file of one side in batches, or no rows if there is no file."""
+        if file_path is None:
+            yield side.empty
+            return
+        for batch in ParquetStore.iter_batches(file_path, columns=side.columns):
+            yield DatasetJoinService.decode(batch)
+
+    @staticmethod
+    def join_partition(
+        build_path: Optional[str],
+        probe_path: Optional[str],
+        build: _JoinSide,
+        probe: _JoinSide,
+        output_columns: List[str]
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Join one partition: load its build rows and stream its probe rows against them.
+
+        Args:
+            build_path: File of the partition's build rows (None if it has none)
+            probe_path: File of the partition's probe rows (None if it has none)
+            build: Build side
+            probe: Probe side
+            output_columns: Columns of the joined rows, in order
+
+        Returns:
+            Iterator of joined DataFrame chunks
+        """
+        if probe_path is None and not build.preserved:
+            return
+        if build_path is None and not probe.preserved:
+            return
+
+        if build_path is None:
+            build_rows = build.empty
+        else:
+            build_rows = pd.concat(list(DatasetJoinService._iter_side(build_path, build)), ignore_index=True)
+        # Rows with a missing key match nothing
+        has_keys = build_rows[build.keys].notna().all(axis=1).to_numpy()
+        candidates = build_rows[has_keys].assign(**{_ROW_COLUMN: np.flatnonzero(has_keys)})
+        matched = np.zeros(len(build_rows), dtype=bool)
+        merge_options = {
+            "left_on": probe.keys,
+            "right_on": build.keys,
+            "suffixes": (probe.suffix, build.suffix)
+        }
+
+        for batch in DatasetJoinService._iter_side(probe_path, probe):
+            joined = pd.merge(batch, candidates, how="left" if probe.preserved else "inner", **merge_options)
+            matched[joined[_ROW_COLUMN].dropna().to_numpy(dtype=np.int64)] = True
+            if len(joined):
+                yield joined[output_columns]
+
+        if build.preserved and not matched.all():
+            unmatched = build_rows[~matched]
+            yield pd.merge(probe.empty, unmatched, how="right", **merge_options)[output_columns]
+
+    @staticmethod
+    def join_sides(
+        build_path: Optional[str],
+        probe_path: Optional[str],
+        build: _JoinSide,
+        probe: _JoinSide,
+        output_columns: List[str],
+        directory: str,
+        depth: int = 0
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Join files of both sides, partitioning them first while the build side is too large.
+
+        Partition files are removed once joined, so disk use stays near the
+        size of both sides.
+        """
+        estimated = build.estimated_bytes(build_path) if build_path is not None else 0.0
+        partitions = min(JOIN_MAX_PARTITIONS, math.ceil(estimated / JOIN_MEMORY_BYTES))
+        if partitions <= 1 or depth >= JOIN_MAX_DEPTH:
+            if partitions > 1:
+                logger.warning(f"Joining a partition of ~{estimated / 1e6:.1f} MB: its keys are too frequent to split further")
+            yield from DatasetJoinService.join_partition(build_path, probe_path, build, probe, output_columns)
+            return
+
+        pass_dir = tempfile.mkdtemp(prefix=f"pass{depth}-", dir=directory)
+        try:
+            build_parts = DatasetJoinService.partition_file(build_path, build, partitions, depth, pass_dir)
+            probe_parts = (
+                DatasetJoinService.partition_file(probe_path, probe, partitions, depth, pass_dir)
+                if probe_path is not None else [None] * partitions
+            )
+            if depth > 0:
+                # Inputs of a later pass are partition files themselves
+                for path in (build_path, probe_path):
+                    if path is not None:
+                        os.remove(path)
+            logger.info(f"Partitioned the join into {partitions} partitions (pass {depth + 1})")
+            for build_part, probe_part in zip(build_parts, probe_parts):
+                yield from DatasetJoinService.join_sides(
+                    build_part, probe_part, build, probe, output_columns, pass_dir, depth + 1
+                )
+                for path in (build_part, probe_part):
+                    if path is not None and os.path.exists(path):
+                        os.remove(path)
+        finally:
+            shutil.rmtree(pass_dir, ignore_errors=True)
+
+    @staticmethod
+    def _rebatch(chunks: Iterable[pd.DataFrame], rows: int = READ_BATCH_ROWS) -> Iterator[pd.DataFrame]:
+        """Combine small joined chunks (one per partition and batch) into chunks of about a number of rows."""
+        pending: List[pd.DataFrame] = []
+        pending_rows = 0
+        for chunk in chunks:
+            if chunk.empty:
+                continue
+            pending.append(chunk)
+            pending_rows += len(chunk)
+            if pending_rows >= rows:
+                yield pd.concat(pending, ignore_index=True)
+                pending, pending_rows = [], 0
+        if pending:
+            yield pd.concat(pending, ignore_index=True)
+
+    @staticmethod
+    def _parquet_source(file_path: str, profile: Dict[str, Any], directory: str, name: str) -> str:
+        """Get a Parquet file of a dataset file, converting files in other formats once."""
+        if ParquetStore.is_parquet(file_path):
+            return file_path
+        parquet_path = os.path.join(directory, f"{name}{PARQUET_EXTENSION}")
+        ParquetStore.write_chunks(DatasetProfiler.iter_chunks(file_path), parquet_path, profile["data_types"])
+        return parquet_path
+
+    @staticmethod
+    def _check_columns(profile: Dict[str, Any], columns: List[str], label: str) -> None:
+        unknown = [col for col in columns if col not in profile["data_types"]]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown {label} columns: {', '.join(unknown)}")
+
+    @staticmethod
+    def join_files(
+        left_path: str,
+        right_path: str,
+        left_on: List[str],
+        right_on: List[str],
+        how: str,
+        output_path: str,
+        left_columns: Optional[List[str]] = None,
+        right_columns: Optional[List[str]] = None,
+        suffixes: Iterable[str] = ("_x", "_y")
+    ) -> Dict[str, Any]:
+        """
+        Join two dataset files into a Parquet file and profile the result.
+
+        Args:
+            left_path: Path to the left dataset file
+            right_path: Path to the right dataset file
+            left_on: Key columns of the left file
+            right_on: Key columns of the right file, paired with left_on
+            how: inner, left, right or outer
+            output_path: Destination Parquet path
+            left_columns: Left columns to keep besides the keys (all if omitted)
+            right_columns: Right columns to keep besides the keys (all if omitted)
+            suffixes: Suffixes of the left and right columns with the same name
+
+        Returns:
+            Dictionary with the profile of the result, its dtype compaction
+            report and how the join was run
+        """
+        if how not in JOIN_HOW:
+            raise HTTPException(status_code=400, detail=f"Unknown join type '{how}'. Available: {', '.join(JOIN_HOW)}")
+        if not left_on or len(left_on) != len(right_on):
+            raise HTTPException(status_code=400, detail="Both datasets need the same number of key columns")
+        for file_path in (left_path, right_path):
+            if not ParquetStore.is_tabular(file_path):
+                raise HTTPException(status_code=400, detail="Only tabular datasets can be joined")
+        suffixes = tuple(suffixes)
+
+        left_profile = DatasetProfiler.get_or_create_profile(left_path)
+        right_profile = DatasetProfiler.get_or_create_profile(right_path)
+        DatasetJoinService._check_columns(left_profile, left_on + list(left_columns or []), "left")
+        DatasetJoinService._check_columns(right_profile, right_on + list(right_columns or []), "right")
+
+        left_kinds = [DatasetJoinService.key_kind(left_profile["data_types"][key]) for key in left_on]
+        right_kinds = [DatasetJoinService.key_kind(right_profile["data_types"][key]) for key in right_on]
+        for left_key, right_key, left_kind, right_kind in zip(left_on, right_on, left_kinds, right_kinds):
+            if left_kind != right_kind:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Cannot join {left_kind} column '{left_key}' with {right_kind} column '{right_key}'"
+                )
+
+        work_dir = tempfile.mkdtemp(prefix="join-", dir=os.path.dirname(output_path))
+        part_paths: List[str] = []
+        try:
+            left = _JoinSide(
+                "left",
+                DatasetJoinService._parquet_source(left_path, left_profile, work_dir, "left"),
+                left_on,
+                list(dict.fromkeys(left_on + list(left_columns))) if left_columns else left_profile["columns"],
+                left_kinds,
+                how in ("left", "outer"),
+                suffixes[0]
+            )
+            right = _JoinSide(
+                "right",
+                DatasetJoinService._parquet_source(right_path, right_profile, work_dir, "right"),
+                right_on,
+                list(dict.fromkeys(right_on + list(right_columns))) if right_columns else right_profile["columns"],
+                right_kinds,
+                how in ("right", "outer"),
+                suffixes[1]
+            )
+            try:
+                output_empty = pd.merge(left.empty, right.empty, how=how, left_on=left_on, right_on=right_on, suffixes=suffixes)
+            except (ValueError, pd.errors.MergeError) as e:
+                raise HTTPException(status_code=400, detail=f"Invalid join: {str(e)}")
+            output_columns = list(output_empty.columns)
+
+            # The smaller side is loaded as the hash table
+            if right.row_count * right.row_bytes <= left.row_count * left.row_bytes:
+                build, probe = right, left
+            else:
+                build, probe = left, right
+
+            def staged_chunks():
+                # Chunks are typed independently; stage them until the result's types are known
+                joined = DatasetJoinService.join_sides(
+                    build.file_path, probe.file_path, build, probe, output_columns, work_dir
+                )
+                for chunk in DatasetJoinService._rebatch(joined):
+                    part_path = os.path.join(work_dir, f"part{len(part_paths)}{PARQUET_EXTENSION}")
+                    ParquetStore.write(chunk, part_path)
+                    part_paths.append(part_path)
+                    yield chunk
+                if not part_paths:
+                    yield output_empty
+
+            profile = DatasetProfiler.profile_chunks(staged_chunks())
+            compaction = DtypeOptimizer.write_parquet(
+                (pd.read_parquet(part_path) for part_path in part_paths),
+                output_path,
+                profile
+            )
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        estimated = build.row_count * build.row_bytes
+        logger.info(
+            f"Joined {left_path} ({left.row_count} rows) and {right_path} ({right.row_count} rows) "
+            f"into {profile['row_count']} rows"
+        )
+        return {
+            "profile": DatasetProfiler.save_profile(profile, output_path),
+            "compaction": compaction,
+            "left_rows": left.row_count,
+            "right_rows": right.row_count,
+            "build_side": build.name,
+            "partitions": max(1, min(JOIN_MAX_PARTITIONS, math.ceil(estimated / JOIN_MEMORY_BYTES)))
+        }
+
+    @staticmethod
+    async def join_datasets(
+        db: AsyncSession,
+        left_dataset: Dataset,
+        right_dataset: Dataset,
+        request: DatasetJoinRequest,
+        user_id: Optional[int] = None
+    ) -> Dataset:
+        """
+        Join two datasets into a new dataset.
+
+        Args:
+            db: Database session
+            left_dataset: Left dataset
+            right_dataset: Right dataset
+            request: Join keys, type, versions and the new dataset's name
+            user_id: Owner of the new dataset
+
+        Returns:
+            The joined dataset
+        """
+        left_path = DatasetReader.resolve_path(left_dataset, request.left_version)
+        right_path = DatasetReader.resolve_path(right_dataset, request.right_version)
+        right_on = request.right_on or request.left_on
+        how = request.how.value
+
+        dataset_dir = os.path.join(DATA_DIR, str(uuid.uuid4()))
+        os.makedirs(dataset_dir, exist_ok=True)
+        output_path = os.path.join(dataset_dir, f"data{PARQUET_EXTENSION}")
+        try:
+            result = await asyncio.to_thread(
+                DatasetJoinService.join_files,
+                left_path,
+                right_path,
+                request.left_on,
+                right_on,
+                how,
+                output_path,
+                request.left_columns,
+                request.right_columns,
+                request.suffixes
+            )
+        except Exception as e:
+            shutil.rmtree(dataset_dir, ignore_errors=True)
+            if isinstance(e, HTTPException):
+                raise
+            logger.error(f"Error joining datasets {left_dataset.id} and {right_dataset.id}: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Error joining datasets: {str(e)}")
+
+        profile = result["profile"]
+        join_info = {
+            "left_dataset_id": left_dataset.id,
+            "right_dataset_id": right_dataset.id,
+            "left_version": request.left_version,
+            "right_version": request.right_version,
+            "left_on": request.left_on,
+            "right_on": right_on,
+            "how": how,
+            "left_rows": result["left_rows"],
+            "right_rows": result["right_rows"],
+            "build_side": result["build_side"],
+            "partitions": result["partitions"],
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        }
+        # Identifies the content like an upload's hash, for cached processed and anonymized versions
+        sources = [
+            ArtifactCache.source_hash(path, DataService.source_content_hash(dataset) if path == dataset.file_path else None)
+            for dataset, path in ((left_dataset, left_path), (right_dataset, right_path))
+        ]
+        spec = {key: join_info[key] for key in ("left_on", "right_on", "how")}
+        spec.update(left_columns=request.left_columns, right_columns=request.right_columns, suffixes=list(request.suffixes))
+        source_hash = hashlib.sha256(json.dumps([sources, spec], sort_keys=True).encode("utf-8")).hexdigest()
+
+        name = request.name or f"{left_dataset.name} + {right_dataset.name}"
+        dataset_data = {
+            "name": name,
+            "type": "PARQUET",
+            "size": f"{os.path.getsize(output_path) / (1024 * 1024):.2f} MB",
+            "description": request.description or f"Join of {left_dataset.name} and {right_dataset.name} on {', '.join(request.left_on)}",
+            "status": "Raw",
+            "row_count": profile["row_count"],
+            "columns": profile["columns"],
+            "file_path": output_path,
+            "metadata": {
+                "join": join_info,
+                "source_hash": source_hash,
+                "profile": DatasetProfiler.summarize(profile),
+                "compaction": result["compaction"],
+                "sample_data": profile["head"][:5]
+            }
+        }
+        if user_id:
+            dataset_data["user_id"] = user_id
+        project_id = request.project_id or left_dataset.project_id
+        if project_id:
+            dataset_data["project_id"] = project_id
+        return await DataService.create_dataset(db, dataset_data)
@@ -0,0 +1,888 @@
+import os
+import json
+import base64
+import logging
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Iterator, Iterable
+
+import numpy as np
+import pandas as pd
+
+from app.services.parquet_store import ParquetStore
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Suffix of the profile stored next to a dataset file
+PROFILE_SUFFIX = ".profile.json"
+
+# Version of the stored profile layout
+PROFILE_VERSION = 1
+
+# Rows read per chunk while profiling (override with environment variable)
+PROFILE_CHUNK_ROWS = int(os.getenv("PROFILE_CHUNK_ROWS", 100_000))
+
+# Sizes of the stored samples and sketches
+HEAD_ROWS = 100
+SAMPLE_SIZE = 1000
+HLL_PRECISION = 12
+TDIGEST_COMPRESSION = 200
+TOP_K_CAPACITY = 100
+
+# Quantiles reported for numeric columns
+REPORTED_QUANTILES = {"p01": 0.01, "p05": 0.05, "q1": 0.25, "median": 0.5, "q3": 0.75, "p95": 0.95, "p99": 0.99}
+
+
+def _is_numeric(dtype: Any) -> bool:
+    """Check whether a dtype holds numbers (booleans excluded)."""
+    return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+
+
+def _unify_dtype(current: Optional[str], new: Any) -> str:
+    """Combine the dtypes inferred for two chunks of the same column."""
+    new = str(new)
+    if current is None or current == new:
+        return new
+    if current.startswith(("int", "uint", "float")) and new.startswith(("int", "uint", "float")):
+        return "float64" if "float" in current or "float" in new else "int64"
+    return "object"
+
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    """Vectorized bit length of unsigned 64-bit integers."""
+    values = values.copy()
+    lengths = np.zeros(len(values), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        mask = values >= (np.uint64(1) << np.uint64(shift))
+        lengths[mask] += shift
+        values[mask] >>= np.uint64(shift)
+    return lengths + (values > 0)
+
+
+def _hash_values(values: pd.Series) -> np.ndarray:
+    """Hash non-null column values to 64 bits, independent of the chunk dtype."""
+    if _is_numeric(values.dtype):
+        values = values.astype("float64")
+    else:
+        values = values.astype(str)
+    return pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64)
+
+
+def _to_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Convert rows to JSON-safe records (NaN as null, timestamps as ISO strings)."""
+    if df.empty:
+        return []
+    return json.loads(df.to_json(orient="records", date_format="iso"))
+
+
+class HyperLogLog:
+    """HyperLogLog distinct-count sketch with mergeable registers."""
+
+    def __init__(self, precision: int = HLL_PRECISION, registers: Optional[np.ndarray] = None):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = registers if registers is not None else np.zeros(self.size, dtype=np.uint8)
+
+    def add_hashes(self, hashes: np.ndarray) -> None:
+        """Add 64-bit hashes to the sketch."""
+        if len(hashes) == 0:
+            return
+        remaining_bits = 64 - self.precision
+        index = (hashes >> np.uint64(remaining_bits)).astype(np.int64)
+        rest = hashes & np.uint64((1 << remaining_bits) - 1)
+        rank = (remaining_bits - _bit_length(rest) + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def add(self, values: pd.Series) -> None:
+        """Add the non-null values of a column chunk."""
+        self.add_hashes(_hash_values(values.dropna()))
+
+    def merge(self, other: "HyperLogLog") -> None:
+        """Merge another sketch of the same precision into this one."""
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def count(self) -> int:
+        """Estimate the number of distinct values."""
+        m = self.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting for small cardinalities
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+    def relative_error(self) -> float:
+        """Standard error of the estimate."""
+        return 1.04 / np.sqrt(self.size)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "precision": self.precision,
+            "registers": base64.b64encode(self.registers.tobytes()).decode("ascii")
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "HyperLogLog":
+        registers = np.frombuffer(base64.b64decode(data["registers"]), dtype=np.uint8).copy()
+        return cls(precision=data["precision"], registers=registers)
+
+
+class TDigest:
+    """Merging t-digest for approximate quantiles and ranks of numeric columns."""
+
+    def __init__(
+        self,
+        compression: int = TDIGEST_COMPRESSION,
+        means: Optional[np.ndarray] = None,
+        weights: Optional[np.ndarray] = None,
+        min_value: Optional[float] = None,
+        max_value: Optional[float] = None
+    ):
+        self.compression = compression
+        self.means = means if means is not None else np.array([], dtype=np.float64)
+        self.weights = weights if weights is not None else np.array([], dtype=np.float64)
+        self.min = min_value
+        self.max = max_value
+
+    @property
+    def count(self) -> float:
+        return float(self.weights.sum())
+
+    def _compress(self, means: np.ndarray, weights: np.ndarray) -> None:
+        """Merge centroids so each covers at most one unit of the k1 scale function."""
+        order = np.argsort(means, kind="stable")
+        means = means[order]
+        weights = weights[order]
+        total = weights.sum()
+        q = (np.cumsum(weights) - weights / 2) / total
+        k = np.floor(self.compression * (np.arcsin(np.clip(2 * q - 1, -1, 1)) / np.pi + 0.5)).astype(np.int64)
+        starts = np.concatenate([[0], np.flatnonzero(np.diff(k)) + 1])
+        merged_weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / merged_weights
+        self.weights = merged_weights
+
+    def update(self, values: np.ndarray) -> None:
+        """Add numeric values to the digest."""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        if len(values) == 0:
+            return
+        low, high = float(values.min()), float(values.max())
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+        self._compress(np.concatenate([self.means, values]), np.concatenate([self.weights, np.ones(len(values))]))
+
+    def merge(self, other: "TDigest") -> None:
+        """Merge another digest into this one."""
+        if other.count == 0:
+            return
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        self._compress(np.concatenate([self.means, other.means]), np.concatenate([self.weights, other.weights]))
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate the value at quantile q (0-1)."""
+        total = self.count
+        if total == 0:
+            return None
+        positions = np.cumsum(self.weights) - self.weights / 2
+        return float(np.interp(
+            q * total,
+            np.concatenate([[0.0], positions, [total]]),
+            np.concatenate([[self.min], self.means, [self.max]])
+        ))
+
+    def rank_error(self, q: float) -> float:
+        """
+        Estimate the rank error (as a fraction) of the value at quantile q.
+
+        Values within a centroid are interpolated, so the error is about
+        half the weight of the centroid holding the rank; it is zero where
+        the digest still holds single values.
+        """
+        total = self.count
+        if total == 0:
+            return 0.0
+        positions = np.cumsum(self.weights) - self.weights / 2
+        nearest = int(np.argmin(np.abs(positions - q * total)))
+        return float((self.weights[nearest] - 1) / 2 / total)
+
+    def cdf(self, x: Any) -> Any:
+        """Estimate the fraction of values below x (scalar or array)."""
+        total = self.count
+        if total == 0:
+            return np.zeros_like(np.asarray(x, dtype=np.float64))
+        positions = np.cumsum(self.weights) - self.weights / 2
+        return np.interp(
+            x,
+            np.concatenate([[self.min], self.means, [self.max]]),
+            np.concatenate([[0.0], positions, [total]])
+        ) / total
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "compression": self.compression,
+            "means": self.means.tolist(),
+            "weights": self.weights.tolist(),
+            "min": self.min,
+            "max": self.max
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TDigest":
+        return cls(
+            compression=data["compression"],
+            means=np.asarray(data["means"], dtype=np.float64),
+            weights=np.asarray(data["weights"], dtype=np.float64),
+            min_value=data["min"],
+            max_value=data["max"]
+        )
+
+
+class TopK:
+    """Misra-Gries heavy-hitter summary; counts are lower bounds within ``error``."""
+
+    def __init__(self, capacity: int = TOP_K_CAPACITY, counts: Optional[Dict[str, float]] = None, error: float = 0.0):
+        self.capacity = capacity
+        self.counts = counts or {}
+        self.error = error
+
+    def update(self, value_counts: pd.Series) -> None:
+        """Add the value counts of a column chunk (index: value, values: count)."""
+        if value_counts.empty:
+            return
+        value_counts = value_counts.groupby(value_counts.index.astype(str)).sum()
+        merged = pd.Series(self.counts, dtype=np.float64).add(value_counts.astype(np.float64), fill_value=0)
+        if len(merged) > self.capacity:
+            merged = merged.sort_values(ascending=False, kind="stable")
+            cut = float(merged.iloc[self.capacity])
+            merged = merged.iloc[:self.capacity] - cut
+            merged = merged[merged > 0]
+            self.error += cut
+        self.counts = {str(key): float(value) for key, value in merged.items()}
+
+    def merge(self, other: "TopK") -> None:
+        """Merge another summary into this one."""
+        self.error += other.error
+        self.update(pd.Series(other.counts, dtype=np.float64))
+
+    def top(self, n: int = 10) -> List[List[Any]]:
+        """Most frequent values as [value, count] pairs."""
+        items = sorted(self.counts.items(), key=lambda item: (-item[1], item[0]))[:n]
+        return [[value, int(count)] for value, count in items]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"capacity": self.capacity, "counts": self.counts, "error": self.error}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TopK":
+        return cls(capacity=data["capacity"], counts=data["counts"], error=data["error"])
+
+
+class Moments:
+    """Mergeable count, mean, variance, minimum and maximum (Chan et al.)."""
+
+    def __init__(self, count: int = 0, mean: float = 0.0, m2: float = 0.0, min_value: Optional[float] = None, max_value: Optional[float] = None):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+        self.min = min_value
+        self.max = max_value
+
+    def update(self, values: np.ndarray) -> None:
+        """Add numeric values."""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        if len(values) == 0:
+            return
+        mean = float(values.mean())
+        self.merge(Moments(len(values), mean, float(((values - mean) ** 2).sum()), float(values.min()), float(values.max())))
+
+    def merge(self, other: "Moments") -> None:
+        """Merge another set of moments into this one."""
+        if other.count == 0:
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.mean += delta * other.count / total
+        self.count = total
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+
+    @property
+    def std(self) -> Optional[float]:
+        """Sample standard deviation."""
+        return float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"count": self.count, "mean": self.mean, "m2": self.m2, "min": self.min, "max": self.max}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Moments":
+        return cls(data["count"], data["mean"], data["m2"], data["min"], data["max"])
+
+
+class _ColumnAccumulator:
+    """Accumulates the sketches of one column over all chunks."""
+
+    def __init__(self):
+        self.dtype = None
+        self.missing = 0
+        self.hll = HyperLogLog()
+        self.top_k = TopK()
+        self.moments = Moments()
+        self.tdigest = TDigest()
+        self.lengths = Moments()
+        self.datetime_min = None
+        self.datetime_max = None
+
+    def update(self, values: pd.Series) -> None:
+        present = values.dropna()
+        # A chunk without values (read as object, e.g. from a sheet) says nothing about the type
+        if not present.empty or values.dtype != object:
+            self.dtype = _unify_dtype(self.dtype, values.dtype)
+        self.missing += len(values) - len(present)
+        if present.empty:
+            return
+        self.hll.add(present)
+        self.top_k.update(present.value_counts(sort=False))
+        if _is_numeric(present.dtype):
+            numbers = present.to_numpy(dtype=np.float64)
+            self.moments.update(numbers)
+            self.tdigest.update(numbers)
+        elif pd.api.types.is_datetime64_any_dtype(present.dtype):
+            low, high = present.min(), present.max()
+            self.datetime_min = low if self.datetime_min is None else min(self.datetime_min, low)
+            self.datetime_max = high if self.datetime_max is None else max(self.datetime_max, high)
+        else:
+            self.lengths.update(present.astype(str).str.len().to_numpy())
+
+    @classmethod
+    def from_profile(cls, column_profile: Dict[str, Any], sketch: Dict[str, Any]) -> "_ColumnAccumulator":
+        """Restore the accumulator of a profiled column from its stored sketches."""
+        acc = cls()
+        acc.missing = column_profile["missing"]
+        acc.hll = HyperLogLog.from_dict(sketch["hll"])
+        # A column without values says nothing about its type (see update)
+        acc.dtype = column_profile["dtype"] if acc.hll.registers.any() else None
+        acc.top_k = TopK.from_dict(sketch["top_k"])
+        if "moments" in sketch:
+            acc.moments = Moments.from_dict(sketch["moments"])
+            acc.tdigest = TDigest.from_dict(sketch["tdigest"])
+        if "length_moments" in sketch:
+            acc.lengths = Moments.from_dict(sketch["length_moments"])
+        if column_profile.get("datetime"):
+            acc.datetime_min = pd.Timestamp(column_profile["datetime"]["min"])
+            acc.datetime_max = pd.Timestamp(column_profile["datetime"]["max"])
+        return acc
+
+    def merge(self, other: "_ColumnAccumulator") -> None:
+        """Merge the accumulator of the same column over other rows into this one."""
+        if other.dtype is not None:
+            self.dtype = _unify_dtype(self.dtype, other.dtype)
+        self.missing += other.missing
+        self.hll.merge(other.hll)
+        self.top_k.merge(other.top_k)
+        self.moments.merge(other.moments)
+        self.tdigest.merge(other.tdigest)
+        self.lengths.merge(other.lengths)
+        if other.datetime_min is not None:
+            self.datetime_min = other.datetime_min if self.datetime_min is None else min(self.datetime_min, other.datetime_min)
+            self.datetime_max = other.datetime_max if self.datetime_max is None else max(self.datetime_max, other.datetime_max)
+
+
+def _merge_samples(rows: List[Dict[str, Any]], row_count: int, other_rows: List[Dict[str, Any]], other_row_count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Merge uniform samples of two sets of rows into a uniform sample of their union."""
+    size = min(SAMPLE_SIZE, len(rows) + len(other_rows))
+    if row_count == 0 or other_row_count == 0:
+        return (rows + other_rows)[:size]
+    rng = np.random.default_rng(seed)
+    # Rows of the union drawn from the first set, as if sampled without replacement
+    taken = int(rng.hypergeometric(row_count, other_row_count, size))
+    taken = min(max(taken, size - len(other_rows)), len(rows))
+    first = rng.choice(len(rows), taken, replace=False)
+    second = rng.choice(len(other_rows), size - taken, replace=False)
+    return [rows[i] for i in sorted(first)] + [other_rows[i] for i in sorted(second)]
+
+
+class _Reservoir:
+    """Uniform random sample of rows (algorithm R, vectorized per chunk)."""
+
+    def __init__(self, size: int = SAMPLE_SIZE, seed: int = 0):
+        self.size = size
+        self.rows: List[Dict[str, Any]] = []
+        self.seen = 0
+        self.rng = np.random.default_rng(seed)
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        # Fill the reservoir first
+        fill = min(self.size - len(self.rows), len(chunk))
+        if fill > 0:
+            self.rows.extend(_to_records(chunk.iloc[:fill]))
+        rest = chunk.iloc[max(fill, 0):]
+
+        # Replace random slots with probability size / (row index + 1)
+        if len(rest):
+            row_index = self.seen + max(fill, 0) + np.arange(len(rest))
+            accepted = np.flatnonzero(self.rng.random(len(rest)) < self.size / (row_index + 1))
+            if len(accepted):
+                slots = pd.Series(self.rng.integers(0, self.size, len(accepted)))
+                last = ~slots.duplicated(keep="last").to_numpy()
+                records = _to_records(rest.iloc[accepted[last]])
+                for slot, record in zip(slots[last], records):
+                    self.rows[slot] = record
+        self.seen += len(chunk)
+
+
+class DatasetProfiler:
+    """
+    Service for profiling tabular datasets in one chunked pass.
+
+    The profile holds the row count, unified dtypes, null counts, the first
+    rows, a reservoir sample and per-column sketches (HyperLogLog distinct
+    counts, t-digest quantiles, Misra-Gries top-k and moments). It is stored
+    next to the profiled file, so statistics are served without rescanning.
+    """
+
+    @staticmethod
+    def profile_path(file_path: str) -> str:
+        """
+        Get the path of the profile stored for a dataset file.
+
+        Args:
+            file_path: Path to the dataset file
+
+        Returns:
+            str: Path to the profile
+        """
+        return f"{file_path}{PROFILE_SUFFIX}"
+
+    @staticmethod
+    def file_signature(file_path: str) -> Dict[str, int]:
+        """Get the size and modification time used to detect changed files (appended fragments included)."""
+        return ParquetStore.signature(file_path)
+
+    @staticmethod
+    def iter_chunks(file_path: str, file_type: Optional[str] = None, chunk_rows: int = PROFILE_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+        """
+        Read a tabular dataset file in chunks.
+
+        Args:
+            file_path: Path to the dataset file
+            file_type: Dataset type (CSV, XLSX, JSON); inferred from the extension if omitted
+            chunk_rows: Rows per chunk
+
+        Returns:
+            Iterator of DataFrame chunks
+        """
+        if ParquetStore.is_parquet(file_path):
+            yield from ParquetStore.iter_batches(file_path, batch_rows=chunk_rows)
+            return
+
+        if file_type == "CSV" or file_path.endswith(".csv"):
+            yield from pd.read_csv(file_path, chunksize=chunk_rows)
+            return
+
+        if file_type == "XLSX" or file_path.endswith((".xlsx", ".xls")):
+            yield from ParquetStore.iter_excel_chunks(file_path, chunk_rows=chunk_rows)
+            return
+
+        if file_type == "JSON" or ParquetStore.is_json(file_path):
+            yield from ParquetStore.iter_json_chunks(file_path, chunk_rows=chunk_rows)
+            return
+
+        raise ValueError(f"Unsupported file type for profiling: {file_type or file_path}")
+
+    @staticmethod
+    def profile_chunks(chunks: Iterable[pd.DataFrame]) -> Dict[str, Any]:
+        """
+        Profile a dataset given as DataFrame chunks.
+
+        Args:
+            chunks: DataFrame chunks with the same columns
+
+        Returns:
+            Profile dictionary (without file information)
+        """
+        columns: List[str] = []
+        accumulators: Dict[str, _ColumnAccumulator] = {}
+        reservoir = _Reservoir()
+        head: List[Dict[str, Any]] = []
+        row_count = 0
+
+        for chunk in chunks:
+            for col in chunk.columns:
+                if col not in accumulators:
+                    columns.append(col)
+                    accumulators[col] = _ColumnAccumulator()
+                    # Rows of earlier chunks lacked this column
+                    accumulators[col].missing += row_count
+            for col in columns:
+                if col in chunk.columns:
+                    accumulators[col].update(chunk[col])
+                else:
+                    accumulators[col].missing += len(chunk)
+
+            if len(head) < HEAD_ROWS:
+                head.extend(_to_records(chunk.iloc[:HEAD_ROWS - len(head)]))
+            reservoir.update(chunk)
+            row_count += len(chunk)
+
+        return DatasetProfiler._finish_profile(columns, accumulators, head, reservoir.rows, row_count)
+
+    @staticmethod
+    def merge_profiles(profile: Dict[str, Any], other: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Merge the profiles of two sets of rows into the profile of their concatenation.
+
+        The sketches are merged without reading any rows again, e.g. when a
+        batch is appended to a dataset.
+
+        Args:
+            profile: Profile of the first rows
+            other: Profile of the rows that follow
+
+        Returns:
+            Profile dictionary (without file information)
+        """
+        columns = list(profile["columns"]) + [col for col in other["columns"] if col not in profile["columns"]]
+        accumulators: Dict[str, _ColumnAccumulator] = {}
+        for col in columns:
+            parts = []
+            for part in (profile, other):
+                if col in part["columns"]:
+                    parts.append(_ColumnAccumulator.from_profile(part["column_profiles"][col], part["sketches"][col]))
+                else:
+                    # Rows without the column count as missing
+                    missing = _ColumnAccumulator()
+                    missing.missing = part["row_count"]
+                    parts.append(missing)
+            parts[0].merge(parts[1])
+            accumulators[col] = parts[0]
+
+        head = (profile["head"] + other["head"])[:HEAD_ROWS]
+        sample = _merge_samples(profile["sample"], profile["row_count"], other["sample"], other["row_count"])
+        return DatasetProfiler._finish_profile(columns, accumulators, head, sample, profile["row_count"] + other["row_count"])
+
+    @staticmethod
+    def _finish_profile(
+        columns: List[str],
+        accumulators: Dict[str, "_ColumnAccumulator"],
+        head: List[Dict[str, Any]],
+        sample: List[Dict[str, Any]],
+        row_count: int
+    ) -> Dict[str, Any]:
+        """Build the profile dictionary from the accumulated column sketches."""
+        column_profiles = {}
+        sketches = {}
+        for col in columns:
+            acc = accumulators[col]
+            dtype = acc.dtype or "object"
+            top = acc.top_k.top(10)
+            column_profile = {
+                "dtype": dtype,
+                "missing": acc.missing,
+                "distinct": acc.hll.count(),
+                "top_k": top,
+                "top_k_error": acc.top_k.error
+            }
+            sketch = {"hll": acc.hll.to_dict(), "top_k": acc.top_k.to_dict()}
+
+            if _is_numeric(dtype) and acc.moments.count:
+                column_profile["numeric"] = {
+                    "count": acc.moments.count,
+                    "min": acc.moments.min,
+                    "max": acc.moments.max,
+                    "mean": acc.moments.mean,
+                    "std": acc.moments.std
+                }
+                column_profile["quantiles"] = {name: acc.tdigest.quantile(q) for name, q in REPORTED_QUANTILES.items()}
+                sketch["tdigest"] = acc.tdigest.to_dict()
+                sketch["moments"] = acc.moments.to_dict()
+            elif pd.api.types.is_datetime64_any_dtype(dtype) and acc.datetime_min is not None:
+                column_profile["datetime"] = {
+                    "min": acc.datetime_min.isoformat(),
+                    "max": acc.datetime_max.isoformat(),
+                    "range_days": (acc.datetime_max - acc.datetime_min).days
+                }
+            elif acc.lengths.count:
+                column_profile["length"] = {
+                    "min": int(acc.lengths.min),
+                    "max": int(acc.lengths.max),
+                    "mean": acc.lengths.mean
+                }
+                sketch["length_moments"] = acc.lengths.to_dict()
+
+            column_profiles[col] = column_profile
+            sketches[col] = sketch
+
+        return {
+            "version": PROFILE_VERSION,
+            "row_count": row_count,
+            "column_count": len(columns),
+            "columns": columns,
+            "data_types": {col: column_profiles[col]["dtype"] for col in columns},
+            "missing_values": {col: column_profiles[col]["missing"] for col in columns},
+            "head": head,
+            "sample": sample,
+            "column_profiles": column_profiles,
+            "sketches": sketches
+        }
+
+    @staticmethod
+    def profile_file(file_path: str, file_type: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Profile a dataset file in one chunked pass and store the profile next to it.
+
+        Args:
+            file_path: Path to the dataset file
+            file_type: Dataset type (CSV, XLSX, JSON)
+
+        Returns:
+            Profile dictionary
+        """
+        profile = DatasetProfiler.profile_chunks(DatasetProfiler.iter_chunks(file_path, file_type))
+        DatasetProfiler.save_profile(profile, file_path)
+        logger.info(f"Profiled {file_path}: {profile['row_count']} rows, {profile['column_count']} columns")
+        return profile
+
+    @staticmethod
+    def save_profile(profile: Dict[str, Any], file_path: str) -> Dict[str, Any]:
+        """
+        Store a profile computed from a file's chunks next to the file.
+
+        Args:
+            profile: Profile dictionary (see profile_chunks)
+            file_path: Path to the profiled dataset file
+
+        Returns:
+            Profile dictionary with file information
+        """
+        profile["file_path"] = file_path
+        profile["signature"] = DatasetProfiler.file_signature(file_path)
+        profile["created_at"] = datetime.now().isoformat()
+
+        with open(DatasetProfiler.profile_path(file_path), 'w') as f:
+            json.dump(profile, f)
+        return profile
+
+    @staticmethod
+    def load_profile(file_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Load the stored profile of a dataset file if it is up to date.
+
+        Args:
+            file_path: Path to the dataset file
+
+        Returns:
+            Profile dictionary, or None if missing or stale
+        """
+        path = DatasetProfiler.profile_path(file_path)
+        if not os.path.exists(path) or not os.path.exists(file_path):
+            return None
+        try:
+            with open(path, 'r') as f:
+                profile = json.load(f)
+        except Exception as e:
+            logger.warning(f"Could not read profile {path}: {str(e)}")
+            return None
+        if profile.get("version") != PROFILE_VERSION or profile.get("signature") != DatasetProfiler.file_signature(file_path):
+            return None
+        return profile
+
+    @staticmethod
+    def get_or_create_profile(file_path: str, file_type: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get the stored profile of a dataset file, profiling it when missing or stale.
+
+        Args:
+            file_path: Path to the dataset file
+            file_type: Dataset type (CSV, XLSX, JSON)
+
+        Returns:
+            Profile dictionary
+        """
+        profile = DatasetProfiler.load_profile(file_path)
+        if profile is None:
+            profile = DatasetProfiler.profile_file(file_path, file_type)
+        return profile
+
+    @staticmethod
+    def copy_profile(source_file_path: str, destination_file_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Reuse the profile of a file for an identical copy (e.g. a deduplicated upload).
+
+        Args:
+            source_file_path: File whose profile is reused
+            destination_file_path: File with the same content
+
+        Returns:
+            Profile dictionary for the destination, or None if no valid profile exists
+        """
+        profile = DatasetProfiler.load_profile(source_file_path)
+        if profile is None:
+            return None
+        profile["file_path"] = destination_file_path
+        profile["signature"] = DatasetProfiler.file_signature(destination_file_path)
+        with open(DatasetProfiler.profile_path(destination_file_path), 'w') as f:
+            json.dump(profile, f)
+        return profile
+
+    @staticmethod
+    def summarize(profile: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Reduce a profile to the summary stored in the dataset metadata.
+
+        Args:
+            profile: Profile dictionary
+
+        Returns:
+            Summary without samples and sketches
+        """
+        return {
+            "file_path": profile.get("file_path"),
+            "profile_path": DatasetProfiler.profile_path(profile["file_path"]) if profile.get("file_path") else None,
+            "created_at": profile.get("created_at"),
+            "row_count": profile["row_count"],
+            "column_count": profile["column_count"],
+            "data_types": profile["data_types"],
+            "missing_values": profile["missing_values"],
+            "distinct": {col: data["distinct"] for col, data in profile["column_profiles"].items()}
+        }
+
+    @staticmethod
+    def error_bounds(profile: Dict[str, Any], stats: Dict[str, Any]) -> Dict[str, Dict[str, List[float]]]:
+        """
+        Get [low, high] bounds of the sketch estimates in profile statistics.
+
+        Distinct counts are HyperLogLog estimates (bounds at two standard
+        errors, about 95%); most common counts are Misra-Gries lower bounds
+        (exact bounds); quantiles and outlier counts come from the t-digest
+        (bounds from its estimated rank error). Other statistics are exact.
+
+        Args:
+            profile: Profile dictionary
+            stats: Statistics built from the profile (see to_stats)
+
+        Returns:
+            Bounds by column and statistic
+        """
+        bounds = {}
+        hll_error = 2 * HyperLogLog(precision=HLL_PRECISION).relative_error()
+        for col, col_stats in stats["statistics"].items():
+            column_profile = profile["column_profiles"][col]
+            present = profile["row_count"] - column_profile["missing"]
+            distinct = col_stats["unique_values"]
+            col_bounds = {
+                "unique_values": [
+                    max(int(distinct * (1 - hll_error)), 1 if present else 0),
+                    min(int(np.ceil(distinct * (1 + hll_error))), present)
+                ]
+            }
+            if "most_common_count" in col_stats:
+                count = col_stats["most_common_count"]
+                col_bounds["most_common_count"] = [count, int(min(count + column_profile.get("top_k_error", 0), present))]
+
+            sketch = profile["sketches"].get(col, {})
+            if "tdigest" in sketch and "median" in col_stats:
+                digest = TDigest.from_dict(sketch["tdigest"])
+                integral = profile["data_types"][col].startswith(("int", "uint"))
+                for name, q in (("q1", 0.25), ("median", 0.5), ("q3", 0.75)):
+                    error = digest.rank_error(q)
+                    low, high = digest.quantile(max(q - error, 0.0)), digest.quantile(min(q + error, 1.0))
+                    if integral:
+                        # Interpolated between integers; the true quantile is an integer
+                        low, high = float(np.floor(low)), float(np.ceil(high))
+                    col_bounds[name] = [low, high]
+                if "outlier_count" in col_stats:
+                    # Rank errors at both fences
+                    lower = col_stats["q1"] - 1.5 * col_stats["iqr"]
+                    upper = col_stats["q3"] + 1.5 * col_stats["iqr"]
+                    error = digest.rank_error(float(digest.cdf(lower))) + digest.rank_error(float(digest.cdf(upper)))
+                    spread = int(np.ceil(error * digest.count))
+                    count = col_stats["outlier_count"]
+                    col_bounds["outlier_count"] = [max(count - spread, 0), count + spread]
+            bounds[col] = col_bounds
+        return bounds
+
+    @staticmethod
+    def to_stats(profile: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Build dataset statistics from a profile.
+
+        Distinct counts, quantiles, top values and outlier counts are sketch
+        estimates, reported with their error bounds; counts, nulls, extremes,
+        means and deviations are exact.
+
+        Args:
+            profile: Profile dictionary
+
+        Returns:
+            Statistics in the layout of the dataset stats endpoint
+        """
+        row_count = profile["row_count"]
+        stats = {
+            "row_count": row_count,
+            "column_count": profile["column_count"],
+            "missing_values": profile["missing_values"],
+            "data_types": profile["data_types"],
+            "statistics": {}
+        }
+
+        for col in profile["columns"]:
+            column_profile = profile["column_profiles"][col]
+            sketch = profile["sketches"].get(col, {})
+            col_stats = {
+                "unique_values": column_profile["distinct"],
+                "missing_percentage": float(column_profile["missing"] / row_count * 100) if row_count else 0.0
+            }
+
+            top = column_profile["top_k"]
+            if top and col_stats["unique_values"] < row_count:
+                col_stats["most_common"] = top[0][0]
+                col_stats["most_common_count"] = top[0][1]
+                col_stats["most_common_percentage"] = float(top[0][1] / row_count * 100)
+
+            if "numeric" in column_profile:
+                numeric = column_profile["numeric"]
+                quantiles = column_profile["quantiles"]
+                col_stats.update({
+                    "min": numeric["min"],
+                    "max": numeric["max"],
+                    "mean": numeric["mean"],
+                    "median": quantiles["median"],
+                    "std": numeric["std"],
+                    "q1": quantiles["q1"],
+                    "q3": quantiles["q3"],
+                    "iqr": quantiles["q3"] - quantiles["q1"]
+                })
+
+                # Estimate outliers (IQR method) from the digest
+                digest = TDigest.from_dict(sketch["tdigest"])
+                lower_bound = quantiles["q1"] - 1.5 * col_stats["iqr"]
+                upper_bound = quantiles["q3"] + 1.5 * col_stats["iqr"]
+                outlier_share = float(digest.cdf(lower_bound) + 1 - digest.cdf(upper_bound))
+                col_stats["outlier_count"] = int(round(outlier_share * numeric["count"]))
+                col_stats["outlier_percentage"] = float(col_stats["outlier_count"] / row_count * 100) if row_count else 0.0
+
+            elif "datetime" in column_profile:
+                col_stats.update(column_profile["datetime"])
+
+            elif "length" in column_profile:
+                length = column_profile["length"]
+                col_stats["min_length"] = length["min"]
+                col_stats["max_length"] = length["max"]
+                col_stats["mean_length"] = length["mean"]
+
+                # Check if it could be categorical
+                if col_stats["unique_values"] < 0.2 * row_count:
+                    col_stats["categorical_candidates"] = True
+                    col_stats["top_categories"] = {value: count for value, count in top[:5]}
+
+            stats["statistics"][col] = col_stats
+
+        stats["mode"] = "approximate"
+        stats["error_bounds"] = DatasetProfiler.error_bounds(profile, stats)
+        return stats
@@ -0,0 +1,466 @@
+import json
+import base64
+import hashlib
+import logging
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from fastapi import HTTPException
+
+from app.services.parquet_store import ParquetStore
+from app.services.dataset_reader import DatasetReader
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Predicate operators of a query
+QUERY_OPERATORS = ("=", "!=", "<", "<=", ">", ">=", "in", "not in", "is null", "is not null")
+
+# Column added to scanned rows to order ties (row group id and position within it)
+ROW_ID_COLUMN = "__row_id"
+
+# Bits of the row id holding the position within a row group
+ROW_ID_SHIFT = 32
+
+
+def _encode_cursor(payload: Dict[str, Any]) -> str:
+    """Encode a cursor as URL-safe text."""
+    return base64.urlsafe_b64encode(json.dumps(payload, default=str).encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Decode a cursor made by _encode_cursor."""
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _value_type(field: pa.Field) -> pa.DataType:
+    """Get the type of the values of a column (the dictionary values of categoricals)."""
+    return field.type.value_type if pa.types.is_dictionary(field.type) else field.type
+
+
+def _to_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Convert rows to JSON-safe records (NaN as null, timestamps as ISO strings)."""
+    return json.loads(df.to_json(orient="records", date_format="iso"))
+
+
+class DatasetQueryService:
+    """
+    Service for filtered, sorted and paginated reads of a dataset.
+
+    Parquet files are scanned row group by row group with pyarrow. Row
+    groups whose min/max statistics exclude the predicates are never read,
+    and only the projected, filtered and sorted columns are decoded.
+
+    Pages are addressed by offset or by an opaque cursor. A cursor records
+    where the previous page ended: the row group and position of the next
+    row when unsorted, or the sort key of the last row when sorted (keyset
+    pagination, with the key pushed down as a predicate). Following cursors,
+    the cost of a page does not grow with its depth.
+
+    Other file formats are read through DatasetReader and paged in memory.
+    """
+
+    @staticmethod
+    def _field_value(field: pa.Field, value: Any) -> Any:
+        """Convert a JSON value to the type of a column (e.g. ISO text to a timestamp)."""
+        if value is None:
+            return None
+        try:
+            return pa.scalar(value).cast(_value_type(field))
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError):
+            raise HTTPException(status_code=400, detail=f"Value {value!r} does not match the type of column '{field.name}' ({_value_type(field)})")
+
+    @staticmethod
+    def filter_expression(schema: pa.Schema, filters: List[Dict[str, Any]]) -> Optional[ds.Expression]:
+        """
+        Build a pyarrow expression from query predicates combined with AND.
+
+        Args:
+            schema: Schema of the dataset file
+            filters: Predicates with column, op and value
+
+        Returns:
+            Expression, or None without predicates
+        """
+        expression = None
+        for predicate in filters:
+            column, op, value = predicate["column"], predicate["op"], predicate.get("value")
+            if column not in schema.names:
+                raise HTTPException(status_code=400, detail=f"Unknown column: {column}")
+            field = schema.field(column)
+            ref = pc.field(column)
+
+            if op == "is null":
+                condition = ref.is_null()
+            elif op == "is not null":
+                condition = ref.is_valid()
+            elif op in ("in", "not in"):
+                if not isinstance(value, list):
+                    raise HTTPException(status_code=400, detail=f"Operator '{op}' needs a list of values")
+                values = pa.array(
+                    [DatasetQueryService._field_value(field, item) for item in value],
+                    type=_value_type(field)
+                )
+                condition = ref.isin(values)
+                if op == "not in":
+                    condition = ~condition
+            elif op in QUERY_OPERATORS:
+                if value is None:
+                    raise HTTPException(status_code=400, detail=f"Operator '{op}' needs a value; use 'is null' for missing values")
+                scalar = DatasetQueryService._field_value(field, value)
+                condition = {
+                    "=": ref == scalar,
+                    "!=": ref != scalar,
+                    "<": ref < scalar,
+                    "<=": ref <= scalar,
+                    ">": ref > scalar,
+                    ">=": ref >= scalar
+                }[op]
+            else:
+                raise HTTPException(status_code=400, detail=f"Unsupported operator: {op}")
+            expression = condition if expression is None else expression & condition
+        return expression
+
+    @staticmethod
+    def _after_key(sort: List[Dict[str, Any]], key: List[Any], row_id: int, schema: pa.Schema) -> Tuple[ds.Expression, ds.Expression]:
+        """
+        Build the keyset predicates selecting rows sorted after a key.
+
+        Missing values sort last in both directions, and ties are broken by
+        the row id.
+
+        Args:
+            sort: Sort keys with column and descending
+            key: Sort values of the last row of the previous page
+            row_id: Row id of that row
+            schema: Schema of the dataset file
+
+        Returns:
+            Tuple of the exact predicate (using the row id column) and a
+            looser predicate on the first sort column for row group pruning
+        """
+        levels = []
+        for spec, value in zip(sort, key):
+            ref = pc.field(spec["column"])
+            if value is None:
+                # Only other missing values follow a missing value
+                levels.append((ref.is_null(), None))
+                continue
+            scalar = DatasetQueryService._field_value(schema.field(spec["column"]), value)
+            after = (ref < scalar) if spec.get("descending") else (ref > scalar)
+            levels.append((ref == scalar, after | ref.is_null()))
+        levels.append((None, pc.field(ROW_ID_COLUMN) > row_id))
+
+        exact = None
+        equal_before = None
+        for equal, after in levels:
+            if after is not None:
+                branch = after if equal_before is None else equal_before & after
+                exact = branch if exact is None else exact | branch
+            if equal is not None:
+                equal_before = equal if equal_before is None else equal_before & equal
+
+        first_equal, first_after = levels[0]
+        pruning = first_equal if first_after is None else first_equal | first_after
+        return exact, pruning
+
+    @staticmethod
+    def _sort_values(page: pa.Table, sort: List[Dict[str, Any]], schema: pa.Schema) -> List[Any]:
+        """Get the sort values of the last row of a page in cursor form."""
+        values = []
+        for spec in sort:
+            scalar = page.column(spec["column"])[-1]
+            if scalar.is_valid and pa.types.is_temporal(_value_type(schema.field(spec["column"]))):
+                # Temporal values travel as text and are cast back when decoded
+                values.append(str(scalar.cast(pa.string())))
+            else:
+                values.append(scalar.as_py())
+        return values
+
+    @staticmethod
+    def _query_signature(file_path: str, filters: List[Dict[str, Any]], sort: List[Dict[str, Any]]) -> str:
+        """Hash the file and the query parts a cursor depends on."""
+        payload = json.dumps([DatasetReader.file_key(file_path), filters, sort], sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def _fragments(dataset: ds.Dataset) -> Iterator[Tuple[int, ds.ParquetFileFragment]]:
+        """
+        Iterate over the files of a dataset (a file and its appended fragments) in order.
+
+        Row group ids restart in every file, so each file comes with the number
+        of row groups before it, which makes ids unique across the dataset.
+        """
+        first_group = 0
+        for fragment in dataset.get_fragments():
+            yield first_group, fragment
+            first_group += fragment.num_row_groups
+
+    @staticmethod
+    def _scan_unsorted(
+        dataset: ds.Dataset,
+        columns: List[str],
+        expression: Optional[ds.Expression],
+        offset: int,
+        limit: int,
+        position: Optional[Dict[str, int]]
+    ) -> Tuple[pa.Table, Optional[Dict[str, int]]]:
+        """
+        Read a page of rows in file order.
+
+        Returns:
+            Tuple of the page and the position of the next row (None at the end)
+        """
+        start_group, start_row = (position["rg"], position["row"]) if position else (-1, 0)
+        skip = offset
+        parts = []
+        collected = 0
+        for first_group, fragment in DatasetQueryService._fragments(dataset):
+            # Row groups whose statistics exclude the predicates are dropped here
+            row_groups = fragment.split_by_row_group(filter=expression, schema=dataset.schema)
+            for i, group in enumerate(row_groups):
+                group_id = first_group + group.row_groups[0].id
+                if group_id < start_group:
+                    continue
+                first = start_row if group_id == start_group else 0
+                if skip > 0:
+                    # Count matches from the filter columns only
+                    matches = group.row_groups[0].num_rows if expression is None else group.count_rows(filter=expression, schema=dataset.schema)
+                    if matches - first <= skip:
+                        skip -= matches - first
+                        continue
+                    first += skip
+                    skip = 0
+
+                table = group.to_table(columns=columns, filter=expression, schema=dataset.schema)
+                taken = table.slice(first, limit - collected)
+                parts.append(taken)
+                collected += taken.num_rows
+                if collected >= limit:
+                    next_row = first + taken.num_rows
+                    if next_row < table.num_rows:
+                        return pa.concat_tables(parts), {"rg": group_id, "row": next_row}
+                    if i + 1 < len(row_groups):
+                        return pa.concat_tables(parts), {"rg": first_group + row_groups[i + 1].row_groups[0].id, "row": 0}
+                    return pa.concat_tables(parts), None
+
+        page = pa.concat_tables(parts) if parts else dataset.schema.empty_table().select(columns)
+        return page, None
+
+    @staticmethod
+    def _scan_sorted(
+        dataset: ds.Dataset,
+        columns: List[str],
+        expression: Optional[ds.Expression],
+        sort: List[Dict[str, Any]],
+        keep: int,
+        after: Optional[Tuple[ds.Expression, ds.Expression]]
+    ) -> pa.Table:
+        """
+        Get the first rows in sort order, keeping only a bounded top list while scanning.
+
+        Returns:
+            Up to `keep` rows sorted, with the row id column
+        """
+        sort_keys = [(spec["column"], "descending" if spec.get("descending") else "ascending") for spec in sort]
+        sort_keys.append((ROW_ID_COLUMN, "ascending"))
+        read_columns = list(dict.fromkeys(columns + [spec["column"] for spec in sort]))
+        pruning = expression
+        if after is not None:
+            pruning = after[1] if pruning is None else pruning & after[1]
+
+        best = None
+        for first_group, fragment in DatasetQueryService._fragments(dataset):
+            for group in fragment.split_by_row_group(filter=pruning, schema=dataset.schema):
+                group_id = first_group + group.row_groups[0].id
+                # Positions are taken under the query predicates only, so they are stable across pages
+                table = group.to_table(columns=read_columns, filter=expression, schema=dataset.schema)
+                row_ids = pa.array(((group_id << ROW_ID_SHIFT) + pd.RangeIndex(table.num_rows)).to_numpy(), type=pa.int64())
+                table = table.append_column(ROW_ID_COLUMN, row_ids)
+                for spec in sort:
+                    # Dictionary-encoded (categorical) columns are sorted by their values
+                    index = table.schema.get_field_index(spec["column"])
+                    if pa.types.is_dictionary(table.schema.field(index).type):
+                        column = table.column(index)
+                        table = table.set_column(index, spec["column"], column.cast(column.type.value_type))
+                if after is not None:
+                    table = table.filter(after[0])
+                if not table.num_rows:
+                    continue
+                if best is not None:
+                    table = pa.concat_tables([best, table])
+                best = table.take(pc.sort_indices(table, sort_keys=sort_keys)[:keep])
+
+        if best is None:
+            best = dataset.schema.empty_table().select(read_columns)
+            best = best.append_column(ROW_ID_COLUMN, pa.array([], type=pa.int64()))
+        return best
+
+    @staticmethod
+    def query_parquet(
+        file_path: str,
+        columns: Optional[List[str]],
+        filters: List[Dict[str, Any]],
+        sort: List[Dict[str, Any]],
+        offset: int,
+        limit: int,
+        cursor: Optional[str],
+        include_total: bool
+    ) -> Dict[str, Any]:
+        """
+        Query a Parquet file with predicate pushdown.
+
+        Args:
+            file_path: Path to the Parquet file
+            columns: Columns to return (all if omitted)
+            filters: Predicates with column, op and value, combined with AND
+            sort: Sort keys with column and descending
+            offset: Matching rows to skip (ignored with a cursor)
+            limit: Maximum number of rows to return
+            cursor: Cursor returned with the previous page
+            include_total: Whether to count all matching rows
+
+        Returns:
+            Dictionary with columns, data, total_rows and next_cursor
+        """
+        dataset = ParquetStore.open_dataset(file_path)
+        schema = dataset.schema
+        columns = columns or list(schema.names)
+        for column in columns + [spec["column"] for spec in sort]:
+            if column not in schema.names:
+                raise HTTPException(status_code=400, detail=f"Unknown column: {column}")
+        expression = DatasetQueryService.filter_expression(schema, filters)
+
+        signature = DatasetQueryService._query_signature(file_path, filters, sort)
+        state = None
+        if cursor:
+            state = _decode_cursor(cursor)
+            if state.get("query") != signature:
+                raise HTTPException(status_code=400, detail="Cursor does not belong to this query or the data has changed")
+            offset = 0
+
+        next_state = None
+        if sort:
+            after = None
+            if state is not None:
+                after = DatasetQueryService._after_key(sort, state["key"], state["row_id"], schema)
+            best = DatasetQueryService._scan_sorted(dataset, columns, expression, sort, offset + limit + 1, after)
+            page = best.slice(offset, limit)
+            if best.num_rows > offset + limit and page.num_rows:
+                next_state = {
+                    "key": DatasetQueryService._sort_values(page, sort, schema),
+                    "row_id": page.column(ROW_ID_COLUMN)[-1].as_py()
+                }
+            page = page.select(columns)
+        else:
+            position = {"rg": state["rg"], "row": state["row"]} if state is not None else None
+            page, next_state = DatasetQueryService._scan_unsorted(dataset, columns, expression, offset, limit, position)
+
+        if expression is None:
+            total_rows = ParquetStore.row_count(file_path)
+        else:
+            total_rows = dataset.count_rows(filter=expression) if include_total else None
+
+        return {
+            "columns": columns,
+            "data": _to_records(page.to_pandas()),
+            "total_rows": total_rows,
+            "next_cursor": _encode_cursor({**next_state, "query": signature}) if next_state else None
+        }
+
+    @staticmethod
+    def query_frame(
+        file_path: str,
+        columns: Optional[List[str]],
+        filters: List[Dict[str, Any]],
+        sort: List[Dict[str, Any]],
+        offset: int,
+        limit: int,
+        cursor: Optional[str]
+    ) -> Dict[str, Any]:
+        """
+        Query a non-Parquet dataset file in memory.
+
+        The cursor holds the offset of the next page.
+
+        Args:
+            See query_parquet
+
+        Returns:
+            Dictionary with columns, data, total_rows and next_cursor
+        """
+        df = DatasetReader.read_file(file_path)
+        for column in (columns or []) + [predicate["column"] for predicate in filters] + [spec["column"] for spec in sort]:
+            if column not in df.columns:
+                raise HTTPException(status_code=400, detail=f"Unknown column: {column}")
+
+        signature = DatasetQueryService._query_signature(file_path, filters, sort)
+        if cursor:
+            state = _decode_cursor(cursor)
+            if state.get("query") != signature:
+                raise HTTPException(status_code=400, detail="Cursor does not belong to this query or the data has changed")
+            offset = state["offset"]
+
+        for predicate in filters:
+            column, op = predicate["column"], predicate["op"]
+            if op == "is null":
+                df = df[df[column].isna()]
+            elif op == "is not null":
+                df = df[df[column].notna()]
+            elif op in QUERY_OPERATORS:
+                df = ParquetStore.apply_filters(df, [(column, op, predicate.get("value"))])
+            else:
+                raise HTTPException(status_code=400, detail=f"Unsupported operator: {op}")
+        if sort:
+            df = df.sort_values(
+                [spec["column"] for spec in sort],
+                ascending=[not spec.get("descending") for spec in sort],
+                kind="stable",
+                na_position="last"
+            )
+
+        page = df.iloc[offset:offset + limit]
+        if columns:
+            page = page[columns]
+        next_offset = offset + limit
+        return {
+            "columns": page.columns.tolist(),
+            "data": _to_records(page),
+            "total_rows": len(df),
+            "next_cursor": _encode_cursor({"offset": next_offset, "query": signature}) if next_offset < len(df) else None
+        }
+
+    @staticmethod
+    def query(file_path: str, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run a query against a dataset file.
+
+        Args:
+            file_path: Path to the dataset file
+            request: Query with columns, filters, sort, offset, limit, cursor and include_total
+
+        Returns:
+            Dictionary with columns, data, total_rows, next_cursor, offset and limit
+        """
+        if not ParquetStore.is_tabular(file_path):
+            raise HTTPException(status_code=400, detail="Dataset version is not a tabular file")
+
+        filters = request.get("filters") or []
+        sort = request.get("sort") or []
+        offset, limit = request.get("offset", 0), request["limit"]
+        if ParquetStore.is_parquet(file_path):
+            result = DatasetQueryService.query_parquet(
+                file_path, request.get("columns"), filters, sort, offset, limit,
+                request.get("cursor"), request.get("include_total", False)
+            )
+        else:
+            result = DatasetQueryService.query_frame(
+                file_path, request.get("columns"), filters, sort, offset, limit, request.get("cursor")
+            )
+        return {**result, "offset": None if request.get("cursor") else offset, "limit": limit}
@@ -0,0 +1,284 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
+
+import pandas as pd
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.models.models import Dataset
+from app.services.parquet_store import ParquetStore, Filter
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Memory budget of the in-process DataFrame cache (override with environment variable)
+DATASET_CACHE_BYTES = int(os.getenv("DATASET_CACHE_BYTES", 512 * 1024 * 1024))
+
+# Dataset versions that can be read
+DATASET_VERSIONS = ("latest", "original", "processed", "anonymized")
+
+
+class _FrameCache:
+    """LRU cache of DataFrames bounded by their memory usage."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[Tuple, Tuple[pd.DataFrame, int]]" = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: Tuple) -> Optional[pd.DataFrame]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Tuple, df: pd.DataFrame) -> None:
+        nbytes = int(df.memory_usage(deep=True).sum())
+        if nbytes > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self.total_bytes -= self.entries.pop(key)[1]
+            self.entries[key] = (df, nbytes)
+            self.total_bytes += nbytes
+            # Evict least recently used frames
+            while self.total_bytes > self.max_bytes and self.entries:
+                _, (_, evicted_bytes) = self.entries.popitem(last=False)
+                self.total_bytes -= evicted_bytes
+
+    def invalidate(self, file_key: str) -> None:
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == file_key]:
+                self.total_bytes -= self.entries.pop(key)[1]
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+
+# Process-wide cache and the dtype maps remembered per file
+_frame_cache = _FrameCache(DATASET_CACHE_BYTES)
+_dtype_maps: Dict[str, Dict[str, str]] = {}
+
+
+def _detach(df: pd.DataFrame) -> pd.DataFrame:
+    """Return a frame callers can modify without changing the cached one."""
+    copy_on_write = int(pd.__version__.split(".")[0]) >= 3 or getattr(pd.options.mode, "copy_on_write", False) is True
+    return df.copy(deep=not copy_on_write)
+
+
+class DatasetReader:
+    """
+    Service for reading dataset versions as DataFrames.
+
+    Reads go through a process-wide LRU cache bounded by memory and keyed by
+    the file identity (path, size and modification time), the projected
+    columns and the filters. A cached full frame also serves projected,
+    filtered and head reads. The dtypes of the last read of each file are
+    remembered and reused when a text file has to be parsed again.
+    """
+
+    @staticmethod
+    def resolve_path(dataset: Dataset, version: str = "latest") -> str:
+        """
+        Get the file of a dataset version.
+
+        Args:
+            dataset: Dataset model instance
+            version: latest, original, processed or anonymized
+
+        Returns:
+            str: Path to the version's file
+        """
+        if version not in DATASET_VERSIONS:
+            raise HTTPException(status_code=400, detail=f"Unknown dataset version '{version}'. Available: {', '.join(DATASET_VERSIONS)}")
+
+        if version == "latest":
+            file_path = dataset.anonymized_file_path or dataset.processed_file_path or dataset.file_path
+        elif version == "original":
+            file_path = dataset.file_path
+        elif version == "processed":
+            file_path = dataset.processed_file_path
+        else:
+            file_path = dataset.anonymized_file_path
+
+        if not file_path or not os.path.exists(file_path):
+            raise HTTPException(status_code=404, detail=f"No {version} version of the dataset file found")
+        return file_path
+
+    @staticmethod
+    def file_key(file_path: str) -> str:
+        """
+        Get the cache key of a file.
+
+        Args:
+            file_path: Path to the file
+
+        Returns:
+            str: Hash of the file's path, size and modification time (appended fragments included)
+        """
+        signature = ParquetStore.signature(file_path)
+        identity = f"{os.path.abspath(file_path)}:{signature['size']}:{signature['mtime_ns']}"
+        return hashlib.sha1(identity.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def read_file(
+        file_path: str,
+        columns: Optional[List[str]] = None,
+        filters: Optional[List[Filter]] = None,
+        nrows: Optional[int] = None
+    ) -> pd.DataFrame:
+        """
+        Read a dataset file through the cache.
+
+        Args:
+            file_path: Path to the dataset file
+            columns: Columns to read (all if omitted)
+            filters: (column, operator, value) filters combined with AND
+            nrows: Maximum number of rows to return
+
+        Returns:
+            DataFrame that can be modified by the caller
+        """
+        file_key = DatasetReader.file_key(file_path)
+
+        # A cached full frame serves every projection, filter and head
+        full = _frame_cache.get((file_key, None, None))
+        if full is not None:
+            df = ParquetStore.apply_filters(full, filters)
+            if columns is not None:
+                df = df[columns]
+            if nrows is not None:
+                df = df.head(nrows)
+            return _detach(df)
+
+        # Partial reads are cheap and not cached
+        if nrows is not None:
+            return ParquetStore.read_dataset_file(file_path, columns=columns, filters=filters, nrows=nrows, dtypes=_dtype_maps.get(file_key))
+
+        cache_key = (
+            file_key,
+            tuple(columns) if columns is not None else None,
+            json.dumps(filters, default=str) if filters else None
+        )
+        df = _frame_cache.get(cache_key)
+        if df is None:
+            df = ParquetStore.read_dataset_file(file_path, columns=columns, filters=filters, dtypes=_dtype_maps.get(file_key))
+            _dtype_maps.setdefault(file_key, {}).update({col: str(dtype) for col, dtype in df.dtypes.items()})
+            _frame_cache.put(cache_key, df)
+        return _detach(df)
+
+    @staticmethod
+    def read_dataset(
+        dataset: Dataset,
+        version: str = "latest",
+        columns: Optional[List[str]] = None,
+        filters: Optional[List[Filter]] = None,
+        nrows: Optional[int] = None
+    ) -> pd.DataFrame:
+        """
+        Read a version of a dataset.
+
+        Args:
+            dataset: Dataset model instance
+            version: latest, original, processed or anonymized
+            columns: Columns to read (all if omitted)
+            filters: (column, operator, value) filters combined with AND
+            nrows: Maximum number of rows to return
+
+        Returns:
+            DataFrame that can be modified by the caller
+        """
+        file_path = DatasetReader.resolve_path(dataset, version)
+        if not ParquetStore.is_tabular(file_path):
+            raise HTTPException(status_code=400, detail="Dataset version is not a tabular file")
+        return DatasetReader.read_file(file_path, columns=columns, filters=filters, nrows=nrows)
+
+    @staticmethod
+    async def read(
+        db: AsyncSession,
+        dataset_id: int,
+        version: str = "latest",
+        columns: Optional[List[str]] = None,
+        filters: Optional[List[Filter]] = None,
+        nrows: Optional[int] = None
+    ) -> pd.DataFrame:
+        """
+        Read a version of a dataset by its ID.
+
+        Args:
+            db: Database session
+            dataset_id: ID of the dataset
+            version: latest, original, processed or anonymized
+            columns: Columns to read (all if omitted)
+            filters: (column, operator, value) filters combined with AND
+            nrows: Maximum number of rows to return
+
+        Returns:
+            DataFrame that can be modified by the caller
+        """
+        result = await db.execute(select(Dataset).where(Dataset.id == dataset_id))
+        dataset = result.scalars().first()
+        if not dataset:
+            raise HTTPException(status_code=404, detail="Dataset not found")
+        return DatasetReader.read_dataset(dataset, version=version, columns=columns, filters=filters, nrows=nrows)
+
+    @staticmethod
+    def get_dtypes(file_path: str) -> Optional[Dict[str, str]]:
+        """
+        Get the dtypes remembered from the last read of a file.
+
+        Args:
+            file_path: Path to the dataset file
+
+        Returns:
+            Column dtypes, or None if the file has not been read
+        """
+        return _dtype_maps.get(DatasetReader.file_key(file_path))
+
+    @staticmethod
+    def invalidate(file_path: str) -> None:
+        """
+        Drop the cached frames of a file.
+
+        Args:
+            file_path: Path to the dataset file
+        """
+        if os.path.exists(file_path):
+            file_key = DatasetReader.file_key(file_path)
+            _frame_cache.invalidate(file_key)
+            _dtype_maps.pop(file_key, None)
+
+    @staticmethod
+    def cache_stats() -> Dict[str, Any]:
+        """
+        Get the size and hit rate of the DataFrame cache.
+
+        Returns:
+            Dictionary with entries, bytes, budget, hits and misses
+        """
+        return _frame_cache.stats()
@@ -0,0 +1,163 @@
+import logging
+import warnings
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pandas.tseries.api import guess_datetime_format
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Values of a column used to infer its date format
+DATE_SAMPLE_SIZE = 1000
+
+# Distinct values whose format is guessed individually
+DATE_GUESS_VALUES = 50
+
+# Share of the sample a format must parse to be used for the whole column
+DATE_FORMAT_MIN_MATCH = 0.9
+
+# Directives Arrow's strptime does not handle like pandas (fractions, offsets, time zone names)
+PANDAS_ONLY_DIRECTIVES = ("%f", "%z", "%Z")
+
+
+class DateParser:
+    """
+    Service for vectorized conversion of text columns to datetimes.
+
+    One format is inferred from a sample of the column and the whole column
+    is converted with it in a single vectorized call (Arrow's strptime where
+    it supports the format, pandas otherwise); only the values that do not
+    match are parsed element by element. Inferred formats can be
+    passed back in on later runs, where they are checked against the sample
+    instead of being guessed again.
+    """
+
+    @staticmethod
+    def _sample(values: pd.Series) -> pd.Series:
+        """Get evenly spaced non-empty values of a column as strings."""
+        values = values.dropna().astype(str).str.strip()
+        values = values[values != ""]
+        if len(values) > DATE_SAMPLE_SIZE:
+            values = values.iloc[np.linspace(0, len(values) - 1, DATE_SAMPLE_SIZE).astype(np.int64)]
+        return values
+
+    @staticmethod
+    def _parse_with_format(values: pd.Series, date_format: str) -> pd.Series:
+        """Parse a column with one format; values that do not match become NaT."""
+        if not any(directive in date_format for directive in PANDAS_ONLY_DIRECTIVES):
+            try:
+                strings = pa.array(values.astype(object).where(values.notna(), None), type=pa.string())
+                parsed = pc.strptime(strings, format=date_format, unit="us", error_is_null=True)
+                result = parsed.to_pandas()
+                result.index = values.index
+                return result.rename(values.name)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError):
+                pass
+        return pd.to_datetime(values, format=date_format, errors="coerce")
+
+    @staticmethod
+    def match_rate(sample: pd.Series, date_format: str) -> float:
+        """
+        Get the share of values a format parses.
+
+        Args:
+            sample: Text values
+            date_format: strftime-style format
+
+        Returns:
+            float: Share of parsed values (0-1)
+        """
+        if sample.empty:
+            return 0.0
+        try:
+            parsed = DateParser._parse_with_format(sample, date_format)
+        except (TypeError, ValueError):
+            return 0.0
+        return float(parsed.notna().mean())
+
+    @staticmethod
+    def infer_format(values: pd.Series, known_format: Optional[str] = None) -> Optional[str]:
+        """
+        Infer the date format of a text column from a sample.
+
+        Args:
+            values: Column values
+            known_format: Format inferred on an earlier run, tried first
+
+        Returns:
+            Format string, or None if no single format fits the column
+        """
+        if pd.api.types.is_datetime64_any_dtype(values) or pd.api.types.is_numeric_dtype(values):
+            return None
+        sample = DateParser._sample(values)
+        if sample.empty:
+            return known_format
+
+        if known_format and DateParser.match_rate(sample, known_format) >= DATE_FORMAT_MIN_MATCH:
+            return known_format
+
+        # Guess formats of a few distinct values, month-first and day-first
+        candidates = []
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)
+            for value in sample.drop_duplicates().head(DATE_GUESS_VALUES):
+                for dayfirst in (False, True):
+                    guessed = guess_datetime_format(value, dayfirst=dayfirst)
+                    if guessed and guessed not in candidates:
+                        candidates.append(guessed)
+
+        best_format, best_rate = None, 0.0
+        for candidate in candidates:
+            rate = DateParser.match_rate(sample, candidate)
+            if rate > best_rate:
+                best_format, best_rate = candidate, rate
+        return best_format if best_rate >= DATE_FORMAT_MIN_MATCH else None
+
+    @staticmethod
+    def parse(values: pd.Series, date_format: Optional[str] = None) -> pd.Series:
+        """
+        Convert a column to datetimes.
+
+        Args:
+            values: Column values
+            date_format: Format of the column (see infer_format)
+
+        Returns:
+            Datetime series; values that cannot be parsed become NaT
+        """
+        if pd.api.types.is_datetime64_any_dtype(values):
+            return values
+        if pd.api.types.is_numeric_dtype(values) or date_format is None:
+            return pd.to_datetime(values, errors="coerce")
+
+        parsed = DateParser._parse_with_format(values, date_format)
+
+        # Parse the values that do not match the format one by one
+        failed = parsed.isna() & values.notna()
+        if failed.any():
+            failed &= values.astype(str).str.strip() != ""
+        if failed.any():
+            try:
+                parsed[failed] = pd.to_datetime(values[failed], format="mixed", errors="coerce")
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Could not parse {int(failed.sum())} values not matching {date_format}: {str(e)}")
+        return parsed
+
+    @staticmethod
+    def infer_and_parse(values: pd.Series, known_format: Optional[str] = None) -> Tuple[pd.Series, Optional[str]]:
+        """
+        Infer the format of a column and convert it to datetimes.
+
+        Args:
+            values: Column values
+            known_format: Format inferred on an earlier run, tried first
+
+        Returns:
+            Tuple of the datetime series and the format used
+        """
+        date_format = DateParser.infer_format(values, known_format)
+        return DateParser.parse(values, date_format), date_format
@@ -0,0 +1,296 @@
+import os
+import math
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException
+
+from app.services.parquet_store import ParquetStore
+from app.services.dataset_reader import DatasetReader
+from app.services.anonymization import AnonymizationService
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Minimum class sizes evaluated for the risk-versus-utility curve when none are given
+RISK_CANDIDATE_K = (2, 3, 5, 10, 20, 50)
+
+# Most candidate generalization levels per analysis
+RISK_MAX_CANDIDATES = int(os.getenv("RISK_MAX_CANDIDATES", 20))
+
+# Threads evaluating candidate generalization levels
+RISK_WORKERS = int(os.getenv("RISK_WORKERS", min(4, os.cpu_count() or 1)))
+
+
+class DisclosureRiskService:
+    """
+    Service for the re-identification risk of quasi-identifiers.
+
+    Quasi-identifiers are encoded as integer codes (missing values are a
+    value of their own) and each row's combination of codes is packed into
+    one integer key, or hashed when the packed key would overflow. One sort
+    of the keys gives the equivalence classes, from which the k
+    distribution, the unique records, the prosecutor risks and the
+    l-diversity of sensitive fields follow with array operations.
+
+    Candidate generalization levels are the minimum class sizes of the
+    Mondrian k-anonymity used by anonymization. They are evaluated in a
+    thread pool on the same codes, giving a curve of risk against
+    information loss to choose k from before anonymizing.
+    """
+
+    @staticmethod
+    def class_ids(codes: np.ndarray, encodings: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Assign each row the id of its equivalence class.
+
+        Args:
+            codes: Integer codes, one row per quasi-identifier and one column per data row
+            encodings: Encoding of each quasi-identifier (see AnonymizationService.encode_quasi_identifier)
+
+        Returns:
+            Tuple of the class id per row and the size of each class
+        """
+        n_dims, n_rows = codes.shape
+        radices = [encoding["n_values"] + 1 for encoding in encodings]
+        if math.prod(radices) < 2 ** 63:
+            keys = np.zeros(n_rows, dtype=np.int64)
+            for d in range(n_dims):
+                keys = keys * radices[d] + codes[d]
+        else:
+            # Too many combinations for one integer: 64-bit hashes of the code rows
+            keys = pd.util.hash_pandas_object(pd.DataFrame(codes.T), index=False).to_numpy(dtype=np.uint64)
+        _, ids, sizes = np.unique(keys, return_inverse=True, return_counts=True)
+        return ids.reshape(-1).astype(np.int64), sizes
+
+    @staticmethod
+    def l_diversity(
+        ids: np.ndarray,
+        sizes: np.ndarray,
+        sensitive_codes: Dict[str, np.ndarray],
+        l_value: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Check the distinct l-diversity of sensitive fields in equivalence classes.
+
+        Args:
+            ids: Class id per row
+            sizes: Size of each class
+            sensitive_codes: Integer codes of each sensitive field (-1 if missing)
+            l_value: Minimum distinct sensitive values per class
+
+        Returns:
+            List with the smallest number of distinct values in a class and
+            the classes and records below l, per sensitive field
+        """
+        checks = []
+        for field, codes in sensitive_codes.items():
+            present = codes >= 0
+            n_values = int(codes.max()) + 1 if present.any() else 1
+            pairs = np.unique(ids[present] * n_values + codes[present])
+            distinct = np.bincount(pairs // n_values, minlength=len(sizes))
+            below = distinct < l_value
+            checks.append({
+                "field": field,
+                "min_l": int(distinct.min()) if len(distinct) else 0,
+                "classes_below_l": int(below.sum()),
+                "records_below_l": int(sizes[below].sum()),
+                "satisfied": not below.any()
+            })
+        return checks
+
+    @staticmethod
+    def class_risk(sizes: np.ndarray, k_value: int) -> Dict[str, Any]:
+        """
+        Risk measures of a partition into equivalence classes.
+
+        Args:
+            sizes: Size of each class
+            k_value: Class size below which records count as at risk
+
+        Returns:
+            Dictionary with the class count, unique records, records below k
+            and the highest and average prosecutor risk (1 / class size)
+        """
+        n_rows = int(sizes.sum())
+        unique_records = int((sizes == 1).sum())
+        records_below_k = int(sizes[sizes < k_value].sum())
+        return {
+            "equivalence_classes": int(len(sizes)),
+            "min_class_size": int(sizes.min()) if len(sizes) else 0,
+            "unique_records": unique_records,
+            "unique_share": unique_records / n_rows if n_rows else 0.0,
+            "records_below_k": records_below_k,
+            "share_below_k": records_below_k / n_rows if n_rows else 0.0,
+            "max_risk": 1.0 / int(sizes.min()) if len(sizes) else 0.0,
+            # Each record's risk is 1 / its class size, so the average is classes / records
+            "average_risk": len(sizes) / n_rows if n_rows else 0.0
+        }
+
+    @staticmethod
+    def evaluate_level(
+        codes: np.ndarray,
+        encodings: List[Dict[str, Any]],
+        sensitive_codes: Dict[str, np.ndarray],
+        k_value: int,
+        l_value: int
+    ) -> Dict[str, Any]:
+        """
+        Evaluate the risk and information loss of Mondrian generalization with a minimum class size.
+
+        Args:
+            codes: Integer codes of the quasi-identifiers (quasi-identifiers x rows)
+            encodings: Encoding of each quasi-identifier
+            sensitive_codes: Integer codes of each sensitive field
+            k_value: Minimum equivalence class size
+            l_value: Minimum distinct sensitive values per class
+
+        Returns:
+            Point of the risk-versus-utility curve
+        """
+        spans = [
+            (lambda low, high, encoding=encoding: AnonymizationService.normalized_span(encoding, low, high))
+            for encoding in encodings
+        ]
+        ids, lows, highs = AnonymizationService.mondrian_partition(codes, spans, k_value)
+        sizes = np.bincount(ids, minlength=len(lows))
+        n_dims, n_rows = codes.shape
+
+        # Normalized certainty penalty: width of each class's ranges, weighted by its size
+        penalty = sum(
+            float((AnonymizationService.normalized_spans(encoding, lows[:, d], highs[:, d]) * sizes).sum())
+            for d, encoding in enumerate(encodings)
+        )
+        ncp = penalty / (n_rows * n_dims) if n_rows and n_dims else 0.0
+        return DisclosureRiskService.curve_point(k_value, ids, sizes, sensitive_codes, l_value, ncp)
+
+    @staticmethod
+    def curve_point(
+        k_value: int,
+        ids: np.ndarray,
+        sizes: np.ndarray,
+        sensitive_codes: Dict[str, np.ndarray],
+        l_value: int,
+        ncp: float
+    ) -> Dict[str, Any]:
+        """Summarize the risk and information loss of a partition into equivalence classes."""
+        l_checks = DisclosureRiskService.l_diversity(ids, sizes, sensitive_codes, l_value)
+        risk = DisclosureRiskService.class_risk(sizes, k_value)
+        return {
+            "k": k_value,
+            "equivalence_classes": risk["equivalence_classes"],
+            "max_risk": risk["max_risk"],
+            "average_risk": risk["average_risk"],
+            "records_below_l": max((check["records_below_l"] for check in l_checks), default=0),
+            "l_diverse": all(check["satisfied"] for check in l_checks),
+            "ncp": ncp,
+            "utility": 1.0 - ncp,
+            "discernibility": int((sizes.astype(np.int64) ** 2).sum())
+        }
+
+    @staticmethod
+    def analyze(
+        df: pd.DataFrame,
+        quasi_identifiers: List[str],
+        sensitive_fields: Optional[List[str]] = None,
+        k_value: int = 5,
+        l_value: int = 2,
+        candidate_k: Optional[List[int]] = None
+    ) -> Dict[str, Any]:
+        """
+        Analyze the re-identification risk of a DataFrame's quasi-identifiers.
+
+        Args:
+            df: DataFrame with the quasi-identifiers and sensitive fields
+            quasi_identifiers: Columns an attacker may know
+            sensitive_fields: Fields checked for l-diversity
+            k_value: Class size below which records count as at risk
+            l_value: Minimum distinct sensitive values per class
+            candidate_k: Minimum class sizes of the generalization levels to evaluate
+
+        Returns:
+            Dictionary with the risk of the data as is, its k distribution,
+            its l-diversity and the risk-versus-utility curve
+        """
+        sensitive_fields = sensitive_fields or []
+        candidates = sorted(set(candidate_k or RISK_CANDIDATE_K))
+        if any(k < 2 for k in candidates):
+            raise HTTPException(status_code=400, detail="Candidate k values must be at least 2")
+        if len(candidates) > RISK_MAX_CANDIDATES:
+            raise HTTPException(status_code=400, detail=f"At most {RISK_MAX_CANDIDATES} candidate k values can be evaluated")
+
+        n_rows = len(df)
+        encodings = [AnonymizationService.encode_quasi_identifier(df[qi]) for qi in quasi_identifiers]
+        codes = np.vstack([encoding["codes"] for encoding in encodings]) if n_rows else np.zeros((len(quasi_identifiers), 0), dtype=np.int64)
+        sensitive_codes = {field: pd.factorize(df[field])[0].astype(np.int64) for field in sensitive_fields}
+
+        ids, sizes = DisclosureRiskService.class_ids(codes, encodings)
+        class_sizes, class_counts = np.unique(sizes, return_counts=True)
+        k_distribution = [
+            {"class_size": int(size), "classes": int(count), "records": int(size * count)}
+            for size, count in zip(class_sizes, class_counts)
+        ]
+
+        # Generalization levels are independent; evaluate them side by side
+        with ThreadPoolExecutor(max_workers=max(1, min(RISK_WORKERS, len(candidates)))) as executor:
+            curve = list(executor.map(
+                lambda k: DisclosureRiskService.evaluate_level(codes, encodings, sensitive_codes, k, l_value),
+                candidates
+            ))
+
+        l_checks = DisclosureRiskService.l_diversity(ids, sizes, sensitive_codes, l_value)
+        risk = DisclosureRiskService.class_risk(sizes, k_value)
+        # The data as is: no generalization, no information loss
+        original = DisclosureRiskService.curve_point(1, ids, sizes, sensitive_codes, l_value, 0.0)
+        return {
+            "row_count": n_rows,
+            "quasi_identifiers": quasi_identifiers,
+            "k_value": k_value,
+            "l_value": l_value,
+            **risk,
+            "k_distribution": k_distribution,
+            "l_diversity": l_checks,
+            "curve": [original] + curve
+        }
+
+    @staticmethod
+    def analyze_file(
+        file_path: str,
+        quasi_identifiers: List[str],
+        sensitive_fields: Optional[List[str]] = None,
+        k_value: int = 5,
+        l_value: int = 2,
+        candidate_k: Optional[List[int]] = None
+    ) -> Dict[str, Any]:
+        """
+        Analyze the re-identification risk of a dataset file, reading only the needed columns.
+
+        Args:
+            file_path: Path to the dataset file
+            quasi_identifiers: Columns an attacker may know
+            sensitive_fields: Fields checked for l-diversity
+            k_value: Class size below which records count as at risk
+            l_value: Minimum distinct sensitive values per class
+            candidate_k: Minimum class sizes of the generalization levels to evaluate
+
+        Returns:
+            Dictionary with the risk analysis (see analyze)
+        """
+        if not ParquetStore.is_tabular(file_path):
+            raise HTTPException(status_code=400, detail="Dataset version is not a tabular file")
+        sensitive_fields = [field for field in dict.fromkeys(sensitive_fields or []) if field not in quasi_identifiers]
+        columns = ParquetStore.read_columns(file_path)
+        missing = [col for col in quasi_identifiers + sensitive_fields if col not in columns]
+        if missing:
+            raise HTTPException(status_code=400, detail=f"Columns not found in dataset: {', '.join(missing)}")
+
+        df = DatasetReader.read_file(file_path, columns=list(dict.fromkeys(quasi_identifiers)) + sensitive_fields)
+        result = DisclosureRiskService.analyze(df, list(dict.fromkeys(quasi_identifiers)), sensitive_fields, k_value, l_value, candidate_k)
+        logger.info(
+            f"Analyzed re-identification risk of {file_path}: {result['unique_records']} unique of "
+            f"{result['row_count']} records on {len(quasi_identifiers)} quasi-identifiers"
+        )
+        return result
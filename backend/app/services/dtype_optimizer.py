@@ -0,0 +1,199 @@
+import os
+import logging
+from typing import Dict, Any, Optional, Iterable
+
+import numpy as np
+import pandas as pd
+
+from app.services.parquet_store import ParquetStore
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Text columns become categoricals when their distinct values are at most this share of their values
+CATEGORY_MAX_RATIO = float(os.getenv("CATEGORY_MAX_RATIO", 0.5))
+
+# Text columns with more distinct values than this stay text
+CATEGORY_MAX_DISTINCT = int(os.getenv("CATEGORY_MAX_DISTINCT", 100_000))
+
+# Integer dtypes by preference, smallest first
+SIGNED_INTEGER_DTYPES = ("int8", "int16", "int32")
+UNSIGNED_INTEGER_DTYPES = ("uint8", "uint16", "uint32")
+
+
+class DtypeOptimizer:
+    """
+    Service for compacting the column dtypes of datasets.
+
+    The plan is derived from the dataset profile at ingest: integers are
+    downcast to the smallest dtype holding their range, and text columns
+    with few distinct values become categoricals (dictionary-encoded in
+    Parquet). The Parquet file is written with these dtypes, so every later
+    load gets them. Floats are kept, as float32 would lose precision.
+    """
+
+    @staticmethod
+    def plan(profile: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Choose compact dtypes for the columns of a profiled dataset.
+
+        Args:
+            profile: Dataset profile (see DatasetProfiler)
+
+        Returns:
+            Compact dtype by column, for the columns that change
+        """
+        plan = {}
+        row_count = profile["row_count"]
+        for col, dtype in profile["data_types"].items():
+            column_profile = profile["column_profiles"][col]
+            if dtype.startswith(("int", "uint")):
+                numeric = column_profile.get("numeric")
+                if not numeric:
+                    continue
+                low, high = numeric["min"], numeric["max"]
+                candidates = UNSIGNED_INTEGER_DTYPES if low >= 0 else SIGNED_INTEGER_DTYPES
+                for candidate in candidates:
+                    info = np.iinfo(candidate)
+                    if info.min <= low and high <= info.max:
+                        if np.dtype(candidate).itemsize < np.dtype(dtype).itemsize:
+                            plan[col] = candidate
+                        break
+            elif dtype in ("object", "str", "string") or dtype.startswith("string"):
+                present = row_count - column_profile["missing"]
+                distinct = column_profile["distinct"]
+                if present > 0 and distinct <= CATEGORY_MAX_DISTINCT and distinct <= CATEGORY_MAX_RATIO * present:
+                    plan[col] = "category"
+        return plan
+
+    @staticmethod
+    def apply(df: pd.DataFrame, plan: Dict[str, str]) -> pd.DataFrame:
+        """
+        Convert the columns of a DataFrame to their planned dtypes.
+
+        Args:
+            df: DataFrame to compact
+            plan: Compact dtype by column (see plan)
+
+        Returns:
+            Compacted DataFrame
+        """
+        df = df.copy()
+        for col, dtype in plan.items():
+            if col not in df.columns or str(df[col].dtype) == dtype:
+                continue
+            if dtype == "category":
+                values = df[col]
+                df[col] = values.where(values.isna(), values.astype(str)).astype("category")
+            elif not df[col].isna().any():
+                df[col] = df[col].astype(dtype)
+        return df
+
+    @staticmethod
+    def widen(series: pd.Series) -> pd.Series:
+        """
+        Undo the compaction of a column before transforming its values.
+
+        Categoricals become plain values and small integers become int64, so
+        new values (e.g. fill values) fit and arithmetic does not overflow.
+
+        Args:
+            series: Column values
+
+        Returns:
+            Column with default dtypes
+        """
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            return series.astype(series.cat.categories.dtype)
+        if isinstance(series.dtype, np.dtype) and series.dtype.kind in "iu" and series.dtype.itemsize < 8:
+            return series.astype("int64")
+        return series
+
+    @staticmethod
+    def logical_dtype(dtype: str) -> str:
+        """
+        Get the dtype a compacted column has before compaction.
+
+        Only text columns become categoricals, so categoricals are reported
+        as text; small integers are reported as int64 (see widen).
+
+        Args:
+            dtype: Name of the column dtype
+
+        Returns:
+            Name of the dtype without compaction
+        """
+        if dtype == "category":
+            return "str"
+        if dtype in SIGNED_INTEGER_DTYPES or dtype in UNSIGNED_INTEGER_DTYPES:
+            return "int64"
+        return dtype
+
+    @staticmethod
+    def memory_report(sample: pd.DataFrame, plan: Dict[str, str], row_count: int) -> Dict[str, Any]:
+        """
+        Estimate the memory of a dataset in pandas before and after compaction.
+
+        The sizes are measured on a sample of rows and scaled to the row
+        count; the categories of a categorical are counted once.
+
+        Args:
+            sample: Rows of the dataset with their default dtypes
+            plan: Compact dtype by column (see plan)
+            row_count: Number of rows of the dataset
+
+        Returns:
+            Dictionary with the plan, estimated bytes before and after, and the reduction factor
+        """
+        before: Optional[int] = None
+        after: Optional[int] = None
+        if len(sample):
+            scale = row_count / len(sample)
+            before = int(sample.memory_usage(index=False, deep=True).sum() * scale)
+            compacted = DtypeOptimizer.apply(sample, plan)
+            after = 0
+            for col in compacted.columns:
+                values = compacted[col]
+                if isinstance(values.dtype, pd.CategoricalDtype):
+                    categories = int(values.cat.categories.memory_usage(deep=True))
+                    after += int(values.cat.codes.nbytes * scale) + categories
+                else:
+                    after += int(values.memory_usage(index=False, deep=True) * scale)
+        return {
+            "dtypes": plan,
+            "estimated_bytes_before": before,
+            "estimated_bytes_after": after,
+            "reduction": round(before / after, 2) if before and after else None
+        }
+
+    @staticmethod
+    def write_parquet(chunks: Iterable[pd.DataFrame], file_path: str, profile: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Write a profiled dataset as Parquet with compact dtypes.
+
+        The first chunk is the sample of the memory report.
+
+        Args:
+            chunks: DataFrame chunks of the dataset with their default dtypes
+            file_path: Destination Parquet path
+            profile: Profile of the dataset
+
+        Returns:
+            Memory report of the compaction (see memory_report), for the dataset metadata
+        """
+        plan = DtypeOptimizer.plan(profile)
+        report = None
+
+        def measured_chunks():
+            nonlocal report
+            for chunk in chunks:
+                if report is None:
+                    report = DtypeOptimizer.memory_report(chunk, plan, profile["row_count"])
+                yield chunk
+
+        ParquetStore.write_chunks(measured_chunks(), file_path, {**profile["data_types"], **plan})
+        if report is None:
+            report = DtypeOptimizer.memory_report(pd.DataFrame(), plan, 0)
+        if plan:
+            logger.info(f"Compacted {len(plan)} columns of {file_path}: estimated reduction {report['reduction']}x")
+        return report
@@ -0,0 +1,270 @@
+import os
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Optional, Tuple
+
+import pandas as pd
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import desc
+
+from app.core.database import async_session_maker
+from app.models.models import Dataset
+from app.services.data_service import DataService
+from app.services.file_storage import FileStorageService
+from app.services.parquet_store import ParquetStore, PARQUET_EXTENSION
+from app.services.dataset_profiler import DatasetProfiler
+from app.services.dtype_optimizer import DtypeOptimizer
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Folder of a dataset holding one Parquet file per sheet
+SHEET_DIR_NAME = "sheets"
+
+# Rows per chunk read from a sheet
+EXCEL_CHUNK_ROWS = int(os.getenv("EXCEL_CHUNK_ROWS", 50_000))
+
+
+class ExcelIngestService:
+    """
+    Service for converting Excel workbooks to Parquet, one file per sheet.
+
+    A workbook is read once, in the background after upload, sheet by sheet
+    and row by row in openpyxl's read-only mode. Chunks are profiled as they
+    are read and staged as small Parquet parts, which are then merged with
+    the column types of the whole sheet. The dataset then points at the
+    Parquet file of its selected sheet, so previews, statistics, processing
+    and downloads never parse the workbook again.
+    """
+
+    @staticmethod
+    def sheet_dir(file_path: str) -> str:
+        """Get the folder of the per-sheet Parquet files of a workbook."""
+        return os.path.join(os.path.dirname(file_path), SHEET_DIR_NAME)
+
+    @staticmethod
+    def sheet_path(file_path: str, index: int) -> str:
+        """Get the Parquet path of a sheet of a workbook."""
+        return os.path.join(ExcelIngestService.sheet_dir(file_path), f"{index}{PARQUET_EXTENSION}")
+
+    @staticmethod
+    def convert_sheet(file_path: str, sheet_name: str, output_path: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Convert one sheet of a workbook to Parquet and profile it.
+
+        Args:
+            file_path: Path to the workbook
+            sheet_name: Sheet to convert
+            output_path: Destination Parquet path
+
+        Returns:
+            Tuple of the profile of the converted sheet and its dtype compaction report
+        """
+        part_paths: List[str] = []
+
+        def staged_chunks():
+            # Chunks are typed independently; stage them until the sheet's types are known
+            for chunk in ParquetStore.iter_excel_chunks(file_path, sheet_name, EXCEL_CHUNK_ROWS):
+                part_path = f"{output_path}.part{len(part_paths)}"
+                ParquetStore.write(chunk, part_path)
+                part_paths.append(part_path)
+                yield chunk
+
+        try:
+            profile = DatasetProfiler.profile_chunks(staged_chunks())
+            compaction = DtypeOptimizer.write_parquet(
+                (pd.read_parquet(part_path) for part_path in part_paths),
+                output_path,
+                profile
+            )
+        finally:
+            for part_path in part_paths:
+                if os.path.exists(part_path):
+                    os.remove(part_path)
+        return DatasetProfiler.save_profile(profile, output_path), compaction
+
+    @staticmethod
+    def convert_workbook(file_path: str) -> List[Dict[str, Any]]:
+        """
+        Convert every sheet of a workbook to its own Parquet file.
+
+        Args:
+            file_path: Path to the workbook
+
+        Returns:
+            List of sheets with their index, name, Parquet path, row count, columns
+            and dtype compaction report
+        """
+        os.makedirs(ExcelIngestService.sheet_dir(file_path), exist_ok=True)
+        sheets = []
+        for index, sheet_name in enumerate(ParquetStore.excel_sheets(file_path)):
+            output_path = ExcelIngestService.sheet_path(file_path, index)
+            profile, compaction = ExcelIngestService.convert_sheet(file_path, sheet_name, output_path)
+            sheets.append({
+                "index": index,
+                "name": sheet_name,
+                "file_path": output_path,
+                "row_count": profile["row_count"],
+                "columns": profile["columns"],
+                "compaction": compaction
+            })
+            logger.info(f"Converted sheet '{sheet_name}' of {file_path}: {profile['row_count']} rows")
+        return sheets
+
+    @staticmethod
+    def reuse_sheets(file_path: str, sheets: List[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+        """
+        Link the converted sheets of an identical workbook uploaded before.
+
+        Args:
+            file_path: Workbook with the same content
+            sheets: Converted sheets of the earlier workbook
+
+        Returns:
+            Sheets of the new workbook, or None if a sheet file is missing or
+            has appended rows (its profile then describes more than the sheet)
+        """
+        if any(not os.path.exists(sheet["file_path"]) or ParquetStore.fragment_paths(sheet["file_path"]) for sheet in sheets):
+            return None
+        os.makedirs(ExcelIngestService.sheet_dir(file_path), exist_ok=True)
+        reused = []
+        for sheet in sheets:
+            output_path = ExcelIngestService.sheet_path(file_path, sheet["index"])
+            FileStorageService.link_blob(sheet["file_path"], output_path)
+            DatasetProfiler.copy_profile(sheet["file_path"], output_path)
+            reused.append({**sheet, "file_path": output_path})
+        return reused
+
+    @staticmethod
+    def sheet_fields(metadata: Dict[str, Any], sheet: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Get the dataset fields making a sheet the dataset's data.
+
+        Processed and anonymized versions of another sheet no longer apply.
+
+        Args:
+            metadata: Current dataset metadata
+            sheet: Sheet entry (see convert_workbook)
+
+        Returns:
+            Fields for DataService.update_dataset
+        """
+        metadata = {**metadata, "sheet": sheet["name"], "compaction": sheet.get("compaction")}
+        profile = DatasetProfiler.load_profile(sheet["file_path"])
+        if profile is not None:
+            metadata["profile"] = DatasetProfiler.summarize(profile)
+        return {
+            "file_path": sheet["file_path"],
+            "processed_file_path": None,
+            "anonymized_file_path": None,
+            "status": "Raw",
+            "row_count": sheet["row_count"],
+            "columns": sheet["columns"],
+            "metadata": metadata
+        }
+
+    @staticmethod
+    async def _find_converted(db: AsyncSession, dataset: Dataset) -> Optional[Dataset]:
+        """Find an earlier dataset with the same workbook content whose sheets are converted."""
+        if not dataset.content_hash:
+            return None
+        result = await db.execute(
+            select(Dataset)
+            .where(Dataset.content_hash == dataset.content_hash, Dataset.type == dataset.type, Dataset.id != dataset.id)
+            .order_by(desc(Dataset.created_at))
+        )
+        for existing in result.scalars().all():
+            metadata = existing.dataset_metadata or {}
+            # Sheets of a dataset with appended batches hold more than the workbook
+            if (metadata.get("conversion") or {}).get("status") == "completed" and not metadata.get("appends"):
+                return existing
+        return None
+
+    @staticmethod
+    async def convert_dataset(dataset_id: int) -> None:
+        """
+        Convert the workbook of an uploaded dataset in the background.
+
+        Runs after the upload response with its own database session; the
+        conversion state is kept in the dataset metadata under "conversion".
+        Sheets of an identical workbook converted before are linked instead.
+
+        Args:
+            dataset_id: Dataset ID
+        """
+        async with async_session_maker() as db:
+            dataset = await DataService.get_dataset(db, dataset_id)
+            if not dataset:
+                return
+            workbook_path = (dataset.dataset_metadata or {}).get("original_file_path") or dataset.file_path
+
+            sheets = None
+            error = None
+            try:
+                existing = await ExcelIngestService._find_converted(db, dataset)
+                if existing is not None:
+                    sheets = ExcelIngestService.reuse_sheets(workbook_path, existing.dataset_metadata["sheets"])
+                if sheets is None:
+                    sheets = await asyncio.to_thread(ExcelIngestService.convert_workbook, workbook_path)
+            except Exception as e:
+                logger.error(f"Error converting workbook of dataset {dataset_id}: {e}")
+                error = str(e)
+
+            # Re-read the metadata, which may have changed while the workbook was converted
+            try:
+                await db.refresh(dataset)
+            except Exception:
+                logger.warning(f"Dataset {dataset_id} was deleted while its workbook was converted")
+                return
+            metadata = dict(dataset.dataset_metadata or {})
+            if sheets is None:
+                metadata["conversion"] = {"status": "failed", "error": error}
+                await DataService.update_dataset(db, dataset_id, {"metadata": metadata})
+                return
+
+            metadata["sheets"] = sheets
+            metadata["conversion"] = {"status": "completed", "completed_at": datetime.now(timezone.utc).isoformat()}
+            selected = next((sheet for sheet in sheets if sheet["columns"]), sheets[0] if sheets else None)
+            if selected is None:
+                await DataService.update_dataset(db, dataset_id, {"metadata": metadata})
+                return
+
+            # Keep versions already derived from the workbook (its first sheet)
+            fields = ExcelIngestService.sheet_fields(metadata, selected)
+            for key in ("processed_file_path", "anonymized_file_path", "status"):
+                fields.pop(key)
+            await DataService.update_dataset(db, dataset_id, fields)
+
+    @staticmethod
+    async def select_sheet(db: AsyncSession, dataset: Dataset, sheet: str) -> Dataset:
+        """
+        Make another sheet of a workbook dataset its data.
+
+        Args:
+            db: Database session
+            dataset: Dataset model instance
+            sheet: Sheet name or index
+
+        Returns:
+            Updated dataset
+        """
+        metadata = dict(dataset.dataset_metadata or {})
+        if (metadata.get("conversion") or {}).get("status") != "completed":
+            raise HTTPException(status_code=409, detail="The workbook has not been converted yet")
+
+        sheets = metadata.get("sheets") or []
+        selected = next(
+            (entry for entry in sheets if entry["name"] == sheet or str(entry["index"]) == sheet),
+            None
+        )
+        if selected is None:
+            raise HTTPException(status_code=404, detail=f"Sheet not found: {sheet}")
+        if not os.path.exists(selected["file_path"]):
+            raise HTTPException(status_code=400, detail="Sheet file not found")
+        if selected["file_path"] == dataset.file_path:
+            return dataset
+
+        return await DataService.update_dataset(db, dataset.id, ExcelIngestService.sheet_fields(metadata, selected))
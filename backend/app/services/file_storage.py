@@ -1,15 +1,31 @@
 import os
 import uuid
 import shutil
+import asyncio
+import hashlib
 from typing import Optional, List, Dict, Any, Tuple
 from pathlib import Path
 import json
 import pandas as pd
 import networkx as nx
+from fastapi import HTTPException
+
+from app.services.parquet_store import ParquetStore
 
 # Base storage directory
 STORAGE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data")
 
+# Content-addressed store for uploaded files (blobs/<first two hex chars>/<sha256>)
+BLOB_DIR = os.path.join(STORAGE_DIR, "blobs")
+
+# Size of the chunks read from an upload
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Upload limits (override with environment variables)
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", 2 * 1024 * 1024 * 1024))
+MIN_FREE_DISK_BYTES = int(os.getenv("MIN_FREE_DISK_BYTES", 1024 * 1024 * 1024))
+STORAGE_QUOTA_BYTES = int(os.getenv("STORAGE_QUOTA_BYTES", 0))  # 0 disables the blob store quota
+
 # Ensure storage directory exists
 os.makedirs(STORAGE_DIR, exist_ok=True)
 
@@ -39,19 +55,180 @@ class FileStorageService:
         
         return folder_path
     
+    @staticmethod
+    def blob_path(content_hash: str) -> str:
+        """
+        Get the path of a blob in the content-addressed store.
+        
+        Args:
+            content_hash: SHA-256 hex digest of the content
+            
+        Returns:
+            str: Path to the blob
+        """
+        return os.path.join(BLOB_DIR, content_hash[:2], content_hash)
+    
+    @staticmethod
+    def blob_store_usage() -> int:
+        """
+        Get the number of bytes stored in the blob store.
+        
+        Returns:
+            int: Total size of all blobs
+        """
+        total = 0
+        for root, _, files in os.walk(BLOB_DIR):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    pass
+        return total
+    
+    @staticmethod
+    def check_upload_capacity(declared_size: Optional[int], max_bytes: int = MAX_UPLOAD_BYTES) -> None:
+        """
+        Reject an upload before its body is read when it cannot be stored.
+        
+        Args:
+            declared_size: Size announced by the client (None if unknown)
+            max_bytes: Maximum accepted upload size
+        """
+        if declared_size is None:
+            return
+        
+        if declared_size > max_bytes:
+            raise HTTPException(status_code=413, detail=f"File exceeds the maximum upload size of {max_bytes} bytes")
+        
+        # Keep a reserve of free disk space
+        free_bytes = shutil.disk_usage(STORAGE_DIR).free
+        if free_bytes - declared_size < MIN_FREE_DISK_BYTES:
+            raise HTTPException(status_code=507, detail="Not enough storage space for this upload")
+        
+        # Enforce the blob store quota
+        if STORAGE_QUOTA_BYTES and FileStorageService.blob_store_usage() + declared_size > STORAGE_QUOTA_BYTES:
+            raise HTTPException(status_code=507, detail="Storage quota exceeded")
+    
+    @staticmethod
+    async def stream_to_blob(file, max_bytes: int = MAX_UPLOAD_BYTES) -> Dict[str, Any]:
+        """
+        Stream an upload into the content-addressed blob store.
+        
+        The upload is written to disk in chunks while its SHA-256 hash is
+        computed. Content that is already stored is not stored again.
+        
+        Args:
+            file: UploadFile from FastAPI
+            max_bytes: Maximum accepted upload size
+            
+        Returns:
+            Dict with the content hash, blob path, size and whether the content was already stored
+        """
+        FileStorageService.check_upload_capacity(getattr(file, "size", None), max_bytes)
+        
+        incoming_dir = os.path.join(BLOB_DIR, "incoming")
+        os.makedirs(incoming_dir, exist_ok=True)
+        temp_path = os.path.join(incoming_dir, str(uuid.uuid4()))
+        
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with open(temp_path, "wb") as buffer:
+                while True:
+                    chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise HTTPException(status_code=413, detail=f"File exceeds the maximum upload size of {max_bytes} bytes")
+                    digest.update(chunk)
+                    await asyncio.to_thread(buffer.write, chunk)
+            
+            content_hash = digest.hexdigest()
+            blob_path = FileStorageService.blob_path(content_hash)
+            deduplicated = os.path.exists(blob_path)
+            if deduplicated:
+                os.remove(temp_path)
+            else:
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                os.replace(temp_path, blob_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        
+        return {
+            "content_hash": content_hash,
+            "blob_path": blob_path,
+            "size": size,
+            "deduplicated": deduplicated
+        }
+    
+    @staticmethod
+    def link_blob(blob_path: str, destination: str) -> str:
+        """
+        Make a blob available at a destination path.
+        
+        A hard link is used so the content is stored once; a copy is made
+        when the destination is on another file system.
+        
+        Args:
+            blob_path: Path to the blob
+            destination: Path where the content should appear
+            
+        Returns:
+            str: Destination path
+        """
+        os.makedirs(os.path.dirname(destination) or ".", exist_ok=True)
+        if os.path.exists(destination):
+            os.remove(destination)
+        try:
+            os.link(blob_path, destination)
+        except OSError:
+            shutil.copyfile(blob_path, destination)
+        return destination
+    
+    @staticmethod
+    def release_blob(content_hash: Optional[str]) -> bool:
+        """
+        Remove a blob that is no longer linked from any storage folder.
+        
+        Args:
+            content_hash: SHA-256 hex digest of the content
+            
+        Returns:
+            bool: True if the blob was removed
+        """
+        if not content_hash:
+            return False
+        blob_path = FileStorageService.blob_path(content_hash)
+        try:
+            if os.path.exists(blob_path) and os.stat(blob_path).st_nlink <= 1:
+                os.remove(blob_path)
+                return True
+        except OSError as e:
+            print(f"Error releasing blob {content_hash}: {e}")
+        return False
+    
     @staticmethod
     async def save_uploaded_file(file, entity_type: str, keep_original_name: bool = False) -> Dict[str, str]:
         """
         Save an uploaded file to storage.
         
+        The file is streamed into the blob store and linked into a new
+        storage folder.
+        
         Args:
             file: UploadFile from FastAPI
             entity_type: Type of entity (datasets, networks, models, simulations)
             keep_original_name: Whether to keep the original filename
             
         Returns:
-            Dict with file paths
+            Dict with file paths and the content hash
         """
+        # Store the content first so oversized uploads leave no folder behind
+        blob = await FileStorageService.stream_to_blob(file)
+        
         folder_path = FileStorageService.create_storage_folder(entity_type)
         
         # Keep original filename or generate UUID
@@ -63,15 +240,14 @@ class FileStorageService:
         
         file_path = os.path.join(folder_path, filename)
         
-        # Save the file
-        with open(file_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
+        # Link the stored content into the folder
+        FileStorageService.link_blob(blob["blob_path"], file_path)
         
         return {
             "folder_path": folder_path,
             "file_path": file_path,
-            "filename": filename
+            "filename": filename,
+            "content_hash": blob["content_hash"]
         }
     
     @staticmethod
@@ -82,7 +258,7 @@ class FileStorageService:
         Args:
             original_file_path: Path to the original file
             processed_data: Data to save (DataFrame, dict, etc.)
-            file_type: Type of file to save (csv, json, pickle, etc.)
+            file_type: Type of file to save (parquet, csv, json, pickle, etc.)
             
         Returns:
             str: Path to the processed file
@@ -106,6 +282,10 @@ class FileStorageService:
             processed_file_path = os.path.join(folder_path, "processed_data.xlsx")
             processed_data.to_excel(processed_file_path, index=False)
         
+        elif file_type == "parquet" and isinstance(processed_data, pd.DataFrame):
+            processed_file_path = os.path.join(folder_path, "processed_data.parquet")
+            ParquetStore.write(processed_data, processed_file_path)
+        
         elif file_type == "graphml" and isinstance(processed_data, nx.Graph):
             processed_file_path = os.path.join(folder_path, "processed_network.graphml")
             nx.write_graphml(processed_data, processed_file_path)
@@ -137,7 +317,10 @@ class FileStorageService:
         
         ext = os.path.splitext(file_path)[1].lower()
         
-        if ext in ['.csv']:
+        if ext == '.parquet':
+            return ParquetStore.read_dataset_file(file_path)
+        
+        elif ext in ['.csv']:
             return pd.read_csv(file_path)
         
         elif ext in ['.xlsx', '.xls']:
@@ -27,6 +27,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
 
 from app.services.network_analysis import NetworkAnalysisService
+from app.services.parquet_store import ParquetStore
+from app.services.dataset_reader import DatasetReader
 from app.models.models import Dataset
 
 # Set up logging
@@ -87,20 +89,19 @@ class MachineLearningService:
             
         # Load the dataset
         try:
-            # Load dataset based on file extension
-            if file_path.endswith(".csv"):
-                df = pd.read_csv(file_path)
-            elif file_path.endswith((".xlsx", ".xls")):
-                df = pd.read_excel(file_path)
-            elif file_path.endswith(".json"):
-                with open(file_path, 'r') as f:
-                    data = json.load(f)
-                if isinstance(data, list):
-                    df = pd.DataFrame(data)
-                else:
-                    df = pd.DataFrame([data])
-            else:
+            # Load only the target and feature columns (all columns if no features were given)
+            if not ParquetStore.is_tabular(file_path):
                 raise ValueError(f"Unsupported file format: {file_path}")
+            available_columns = ParquetStore.read_columns(file_path)
+            if target_column not in available_columns:
+                raise HTTPException(status_code=400, detail=f"Target column '{target_column}' not found in dataset")
+            if feature_columns and all(col in available_columns for col in feature_columns):
+                projected_columns = [target_column] + list(feature_columns)
+                if network_id and network_metrics and 'id' in available_columns:
+                    projected_columns.append('id')  # Needed to join network metrics
+                df = DatasetReader.read_file(file_path, columns=list(dict.fromkeys(projected_columns)))
+            else:
+                df = DatasetReader.read_file(file_path)
                 
             # Check if target column exists
             if target_column not in df.columns:
@@ -197,7 +198,8 @@ class MachineLearningService:
             y = df[target_column]
             
             # Identify column types for preprocessing
-            numeric_cols = X.select_dtypes(include=['int64', 'float64']).columns.tolist()
+            # Stored datasets may have compacted dtypes (int8, category, ...)
+            numeric_cols = X.select_dtypes(include=['number']).columns.tolist()
             categorical_cols = X.select_dtypes(include=['object', 'category', 'bool']).columns.tolist()
             
             # Create preprocessing pipeline
@@ -280,15 +282,15 @@ class MachineLearningService:
                 "network_metrics": network_metrics if network_metrics else [],
                 "target_column": target_column,
                 "target_type": str(y.dtype),
-                "is_classification": y.dtype == 'object' or y.dtype == 'bool' or (y.dtype == 'int64' and y.nunique() < 10),
+                "is_classification": y.dtype == 'object' or y.dtype == 'bool' or isinstance(y.dtype, pd.CategoricalDtype) or (pd.api.types.is_integer_dtype(y.dtype) and y.nunique() < 10),
                 "train_size": len(X_train),
                 "test_size": len(X_test),
-                "class_distribution": y.value_counts().to_dict() if y.dtype == 'object' or y.dtype == 'bool' or (y.dtype == 'int64' and y.nunique() < 10) else None,
+                "class_distribution": y.value_counts().to_dict() if y.dtype == 'object' or y.dtype == 'bool' or isinstance(y.dtype, pd.CategoricalDtype) or (pd.api.types.is_integer_dtype(y.dtype) and y.nunique() < 10) else None,
                 "transformed_feature_count": X_train_processed.shape[1]
             }
             
             # If network metrics included, calculate their correlation with target if possible
-            if network_id and network_metrics and (y.dtype == 'float64' or y.dtype == 'int64'):
+            if network_id and network_metrics and pd.api.types.is_numeric_dtype(y.dtype):
                 network_feature_correlations = {}
                 for metric in network_metrics:
                     metric_col = f"network_{metric}"
@@ -2,11 +2,45 @@ import networkx as nx
 import pandas as pd
 import numpy as np
 import community as community_louvain
+from scipy import sparse
 from typing import Dict, List, Any, Optional, Tuple, Union
 import json
 import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
+from app.services.network_store import NetworkStore
+
+# Metrics available for cross-network comparison
+COMPARISON_METRICS = [
+    "node_count",
+    "edge_count",
+    "density",
+    "average_degree",
+    "average_clustering",
+    "transitivity",
+    "reciprocity",
+    "connected_components",
+    "largest_component_share",
+    "degree_centralization",
+    "betweenness_centralization",
+    "modularity",
+    "num_communities"
+]
+
+# Process pool shared by batch analytics, created on first use
+_analysis_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_analysis_pool() -> ProcessPoolExecutor:
+    """Get the process pool used to fan out network analytics."""
+    global _analysis_pool
+    if _analysis_pool is None:
+        max_workers = int(os.getenv("NETWORK_ANALYSIS_WORKERS", 0)) or None
+        _analysis_pool = ProcessPoolExecutor(max_workers=max_workers)
+    return _analysis_pool
+
+
 class NetworkAnalysisService:
     """Service for network analysis using NetworkX."""
     
@@ -49,6 +83,122 @@ class NetworkAnalysisService:
         
         return G
     
+    @staticmethod
+    def project_affiliations(
+        persons: pd.Series,
+        affiliations: pd.Series,
+        weights: Optional[pd.Series] = None,
+        normalization: str = "none",
+        max_affiliation_size: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Compute the weighted one-mode (person x person) projection of affiliation data.
+        
+        Memberships are encoded as a sparse affiliation x person incidence
+        matrix B and the projection is computed as B^T B. With Newman
+        normalization each affiliation contributes 1 / (size - 1) instead of 1,
+        i.e. the projection is B^T D B with D = diag(1 / (size - 1)).
+        
+        Args:
+            persons: Person identifier of each membership record
+            affiliations: Affiliation identifier of each membership record
+            weights: Optional membership weights (summed for repeated memberships)
+            normalization: "none" or "newman"
+            max_affiliation_size: Ignore affiliations with more members than this
+            
+        Returns:
+            Tuple (person labels, row indices, column indices, weights) of the
+            upper triangle of the projection, self-ties excluded
+        """
+        valid = persons.notna() & affiliations.notna()
+        memberships = pd.DataFrame({
+            "person": persons[valid].astype(str).values,
+            "affiliation": affiliations[valid].astype(str).values
+        })
+        
+        # Collapse repeated memberships
+        if weights is not None:
+            memberships["weight"] = pd.to_numeric(weights[valid], errors="coerce").fillna(0).values
+            memberships = memberships.groupby(["person", "affiliation"], sort=False)["weight"].sum().reset_index()
+        else:
+            memberships = memberships.drop_duplicates()
+            memberships["weight"] = 1.0
+        
+        person_codes, person_labels = pd.factorize(memberships["person"])
+        affiliation_codes, affiliation_labels = pd.factorize(memberships["affiliation"])
+        
+        B = sparse.csr_matrix(
+            (memberships["weight"].to_numpy(dtype=np.float64), (affiliation_codes, person_codes)),
+            shape=(len(affiliation_labels), len(person_labels))
+        )
+        
+        # Per-affiliation scaling: drop oversized affiliations, apply Newman weighting
+        sizes = np.diff(B.indptr)
+        scale = np.ones(len(sizes), dtype=np.float64)
+        if normalization == "newman":
+            scale = np.zeros(len(sizes), dtype=np.float64)
+            shared = sizes > 1
+            scale[shared] = 1.0 / (sizes[shared] - 1)
+        elif normalization != "none":
+            raise ValueError(f"Unsupported projection normalization: {normalization}")
+        if max_affiliation_size:
+            scale[sizes > max_affiliation_size] = 0.0
+        
+        projection = (B.T @ sparse.diags(scale) @ B).tocsr()
+        projection = sparse.triu(projection, k=1).tocoo()
+        projection.eliminate_zeros()
+        
+        return np.asarray(person_labels), projection.row, projection.col, projection.data
+    
+    @staticmethod
+    def create_affiliation_network(
+        df: pd.DataFrame,
+        person_column: str,
+        affiliation_column: str,
+        weight_column: Optional[str] = None,
+        normalization: str = "none",
+        weighted: bool = True,
+        max_affiliation_size: Optional[int] = None
+    ) -> nx.Graph:
+        """
+        Create a person network from affiliation data (e.g. employee x project).
+        
+        Args:
+            df: DataFrame with one row per membership
+            person_column: Column identifying the person
+            affiliation_column: Column identifying the affiliation
+            weight_column: Optional membership weight column
+            normalization: "none" or "newman"
+            weighted: Whether to store the projection weights on the edges
+            max_affiliation_size: Ignore affiliations with more members than this
+            
+        Returns:
+            Undirected NetworkX graph of persons
+        """
+        labels, rows, cols, weights = NetworkAnalysisService.project_affiliations(
+            df[person_column],
+            df[affiliation_column],
+            weights=df[weight_column] if weight_column else None,
+            normalization=normalization,
+            max_affiliation_size=max_affiliation_size
+        )
+        
+        G = nx.Graph()
+        
+        # Node attributes come from the first membership record of each person
+        attr_columns = [col for col in df.columns if col not in (person_column, affiliation_column, weight_column)]
+        first_rows = df[df[person_column].notna()].drop_duplicates(subset=[person_column])
+        first_rows = first_rows.assign(**{person_column: first_rows[person_column].astype(str)}).set_index(person_column)
+        attr_records = first_rows[attr_columns].to_dict(orient="index") if attr_columns else {}
+        G.add_nodes_from((label, attr_records.get(label, {})) for label in labels)
+        
+        if weighted:
+            G.add_weighted_edges_from(zip(labels[rows], labels[cols], weights.tolist()))
+        else:
+            G.add_edges_from(zip(labels[rows], labels[cols]))
+        
+        return G
+    
     @staticmethod
     def calculate_network_metrics(G: nx.Graph) -> Dict[str, Any]:
         """
@@ -157,6 +307,193 @@ class NetworkAnalysisService:
         
         return metrics
     
+    @staticmethod
+    def calculate_comparison_metrics(file_path: str, metrics: List[str]) -> Dict[str, Any]:
+        """
+        Calculate a set of global metrics used to compare networks.
+        
+        Runs in a worker process, so it loads the graph itself from disk.
+        
+        Args:
+            file_path: Path to the network file
+            metrics: Names of the metrics to calculate (see COMPARISON_METRICS)
+            
+        Returns:
+            Dictionary mapping metric name to value
+        """
+        G = NetworkStore.load_graph(file_path)
+        n = G.number_of_nodes()
+        results = {}
+        
+        if "node_count" in metrics:
+            results["node_count"] = n
+        if "edge_count" in metrics:
+            results["edge_count"] = G.number_of_edges()
+        if "density" in metrics:
+            results["density"] = nx.density(G)
+        if "average_degree" in metrics:
+            results["average_degree"] = (sum(d for _, d in G.degree()) / n) if n > 0 else 0
+        if "average_clustering" in metrics:
+            try:
+                results["average_clustering"] = nx.average_clustering(G)
+            except:
+                results["average_clustering"] = None
+        if "transitivity" in metrics:
+            try:
+                results["transitivity"] = nx.transitivity(G)
+            except:
+                results["transitivity"] = None
+        if "reciprocity" in metrics:
+            results["reciprocity"] = nx.reciprocity(G) if G.is_directed() and G.number_of_edges() > 0 else None
+        
+        if "connected_components" in metrics or "largest_component_share" in metrics:
+            if G.is_directed():
+                components = list(nx.weakly_connected_components(G))
+            else:
+                components = list(nx.connected_components(G))
+            if "connected_components" in metrics:
+                results["connected_components"] = len(components)
+            if "largest_component_share" in metrics:
+                results["largest_component_share"] = (max(len(c) for c in components) / n) if n > 0 else 0
+        
+        # Freeman centralization: sum of differences to the most central node,
+        # divided by the maximum possible sum (attained by a star graph).
+        # Directed graphs take the larger of the in-degree and out-degree
+        # centralizations, whose maximum (a one-way star) is (n - 1)^2.
+        if "degree_centralization" in metrics:
+            if n > 2:
+                if G.is_directed():
+                    results["degree_centralization"] = max(
+                        sum(max(degrees) - d for d in degrees) / ((n - 1) ** 2)
+                        for degrees in ([d for _, d in G.in_degree()], [d for _, d in G.out_degree()])
+                    )
+                else:
+                    degrees = [d for _, d in G.degree()]
+                    max_degree = max(degrees)
+                    results["degree_centralization"] = sum(max_degree - d for d in degrees) / ((n - 1) * (n - 2))
+            else:
+                results["degree_centralization"] = 0
+        if "betweenness_centralization" in metrics:
+            if n > 2:
+                betweenness = list(nx.betweenness_centrality(G, normalized=True).values())
+                max_betweenness = max(betweenness)
+                results["betweenness_centralization"] = sum(max_betweenness - b for b in betweenness) / (n - 1)
+            else:
+                results["betweenness_centralization"] = 0
+        
+        if "modularity" in metrics or "num_communities" in metrics:
+            if G.number_of_edges() > 0:
+                communities = NetworkAnalysisService.detect_communities(G, algorithm="louvain")
+                results["modularity"] = communities.get("modularity")
+                results["num_communities"] = communities.get("num_communities")
+            else:
+                results["modularity"] = None
+                results["num_communities"] = n
+        
+        return {metric: results.get(metric) for metric in metrics}
+    
+    @staticmethod
+    def calculate_multiplex_metrics(arrays: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Calculate per-layer and cross-layer metrics of a multiplex network.
+        
+        All layers are stacked into one edge array and processed together:
+        per-layer degrees and strengths come from a single bincount over
+        (layer, node) pairs, edge multiplicity from a single unique over the
+        stacked edge keys.
+        
+        Args:
+            arrays: Array representation of a multiplex network (see NetworkStore.build_multiplex)
+            
+        Returns:
+            Dictionary containing layer, overlap, global and node-level metrics
+        """
+        node_ids = [str(node_id) for node_id in arrays["node_ids"]]
+        layers = NetworkStore.get_layers(arrays)
+        n = len(node_ids)
+        L = len(layers)
+        directed = bool(arrays.get("directed"))
+        
+        layer_index = np.concatenate([np.full(len(layer["source"]), i, dtype=np.int64) for i, layer in enumerate(layers)]) if L else np.array([], dtype=np.int64)
+        source = np.concatenate([layer["source"] for layer in layers]) if L else np.array([], dtype=np.int64)
+        target = np.concatenate([layer["target"] for layer in layers]) if L else np.array([], dtype=np.int64)
+        weight = np.concatenate([layer["weight"] for layer in layers]) if L else np.array([], dtype=np.float64)
+        
+        # Degree and strength of every node in every layer (L x n)
+        out_slots = layer_index * n + source
+        in_slots = layer_index * n + target
+        out_degree = np.bincount(out_slots, minlength=L * n).reshape(L, n)
+        in_degree = np.bincount(in_slots, minlength=L * n).reshape(L, n)
+        degree = out_degree + in_degree
+        strength = (
+            np.bincount(out_slots, weights=weight, minlength=L * n)
+            + np.bincount(in_slots, weights=weight, minlength=L * n)
+        ).reshape(L, n)
+        
+        # Overlapping degree and participation coefficient across layers
+        overlapping_degree = degree.sum(axis=0)
+        active = overlapping_degree > 0
+        participation = np.zeros(n, dtype=np.float64)
+        if L > 1:
+            shares = np.divide(degree, overlapping_degree, out=np.zeros(degree.shape, dtype=np.float64), where=active)
+            participation[active] = (L / (L - 1)) * (1.0 - (shares[:, active] ** 2).sum(axis=0))
+        active_layers = (degree > 0).sum(axis=0)
+        
+        # Edge multiplicity across layers
+        keys = source * n + target
+        unique_keys, edge_inverse, multiplicity = np.unique(keys, return_inverse=True, return_counts=True)
+        aggregate_degree = np.zeros(n, dtype=np.int64)
+        if len(unique_keys):
+            aggregate_degree = np.bincount(unique_keys // n, minlength=n) + np.bincount(unique_keys % n, minlength=n)
+        
+        # Pairwise edge overlap (Jaccard) between layers
+        membership = np.zeros((len(unique_keys), L), dtype=np.int64)
+        membership[edge_inverse, layer_index] = 1
+        shared_edges = membership.T @ membership
+        layer_edge_counts = np.diag(shared_edges)
+        union = layer_edge_counts[:, None] + layer_edge_counts[None, :] - shared_edges
+        jaccard = np.divide(shared_edges, union, out=np.zeros(shared_edges.shape, dtype=np.float64), where=union > 0)
+        
+        layer_names = [layer["name"] for layer in layers]
+        pair_factor = 1 if directed else 2
+        layer_metrics = {}
+        for i, name in enumerate(layer_names):
+            active_nodes = int((degree[i] > 0).sum())
+            possible = active_nodes * (active_nodes - 1) / pair_factor
+            layer_metrics[name] = {
+                "active_nodes": active_nodes,
+                "edge_count": int(layer_edge_counts[i]),
+                "density": float(layer_edge_counts[i] / possible) if possible > 0 else 0.0,
+                "average_degree": float(degree[i][degree[i] > 0].mean()) if active_nodes else 0.0,
+                "total_weight": float(layers[i]["weight"].sum())
+            }
+        
+        return {
+            "layers": layer_names,
+            "layer_metrics": layer_metrics,
+            "edge_overlap": {
+                name: {other: float(jaccard[i, j]) for j, other in enumerate(layer_names)}
+                for i, name in enumerate(layer_names)
+            },
+            "global_metrics": {
+                "node_count": n,
+                "layer_count": L,
+                "aggregate_edge_count": int(len(unique_keys)),
+                "multiplex_edge_share": float((multiplicity > 1).mean()) if len(unique_keys) else 0.0,
+                "average_overlapping_degree": float(overlapping_degree.mean()) if n else 0.0,
+                "average_participation": float(participation[active].mean()) if active.any() else 0.0,
+                "nodes_active_in_all_layers": int((active_layers == L).sum()) if L else 0
+            },
+            "node_metrics": {
+                "overlapping_degree": dict(zip(node_ids, overlapping_degree.tolist())),
+                "aggregate_degree": dict(zip(node_ids, aggregate_degree.tolist())),
+                "participation_coefficient": dict(zip(node_ids, participation.tolist())),
+                "active_layers": dict(zip(node_ids, active_layers.tolist())),
+                **{f"degree_{name}": dict(zip(node_ids, degree[i].tolist())) for i, name in enumerate(layer_names)},
+                **{f"strength_{name}": dict(zip(node_ids, strength[i].tolist())) for i, name in enumerate(layer_names)}
+            }
+        }
+    
     @staticmethod
     def detect_communities(G: nx.Graph, algorithm: str = "louvain") -> Dict[str, Any]:
         """
@@ -0,0 +1,387 @@
+import os
+import asyncio
+import logging
+from array import array
+from typing import Dict, List, Any, Optional
+import xml.etree.ElementTree as ET
+
+import networkx as nx
+import numpy as np
+from fastapi import UploadFile, HTTPException
+
+from app.services.network_store import NetworkStore
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Size of the chunks read from an upload
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Limits for uploaded network files (override with environment variables)
+MAX_NETWORK_UPLOAD_BYTES = int(os.getenv("MAX_NETWORK_UPLOAD_BYTES", 512 * 1024 * 1024))
+MAX_NETWORK_NODES = int(os.getenv("MAX_NETWORK_NODES", 2_000_000))
+MAX_NETWORK_EDGES = int(os.getenv("MAX_NETWORK_EDGES", 20_000_000))
+
+# Conversion of declared GraphML/GEXF attribute types
+_ATTRIBUTE_TYPES = {
+    "int": int,
+    "integer": int,
+    "long": int,
+    "float": float,
+    "double": float,
+    "boolean": lambda value: str(value).strip().lower() in ("true", "1", "yes"),
+    "string": str,
+}
+
+
+class NetworkLimitExceeded(ValueError):
+    """Raised when an uploaded network exceeds the configured size limits."""
+
+
+def _local_name(tag: str) -> str:
+    """Strip the XML namespace from a tag name."""
+    return tag.rsplit("}", 1)[-1]
+
+
+def _convert_value(value: Optional[str], attr_type: str) -> Any:
+    """Convert an attribute value to its declared type, keeping the string if it fails."""
+    if value is None:
+        return None
+    converter = _ATTRIBUTE_TYPES.get(attr_type, str)
+    try:
+        return converter(value)
+    except (TypeError, ValueError):
+        return value
+
+
+class _ArrayBuilder:
+    """Accumulates node and edge arrays while a network file is parsed."""
+
+    def __init__(self, max_nodes: int, max_edges: int):
+        self.max_nodes = max_nodes
+        self.max_edges = max_edges
+        self.node_index: Dict[str, int] = {}
+        self.node_ids: List[str] = []
+        self.node_attributes: Dict[str, Dict[int, Any]] = {}
+        self.source = array("i")
+        self.target = array("i")
+        self.weight = array("d")
+        self.has_weight = False
+        self.edge_attributes: Dict[str, Dict[int, Any]] = {}
+
+    def node(self, node_id: str, attrs: Optional[Dict[str, Any]] = None) -> int:
+        index = self.node_index.get(node_id)
+        if index is None:
+            if len(self.node_ids) >= self.max_nodes:
+                raise NetworkLimitExceeded(f"Network exceeds the maximum of {self.max_nodes} nodes")
+            index = len(self.node_ids)
+            self.node_index[node_id] = index
+            self.node_ids.append(node_id)
+        for key, value in (attrs or {}).items():
+            self.node_attributes.setdefault(key, {})[index] = value
+        return index
+
+    def edge(self, source: str, target: str, weight: Optional[float], attrs: Dict[str, Any]):
+        if len(self.source) >= self.max_edges:
+            raise NetworkLimitExceeded(f"Network exceeds the maximum of {self.max_edges} edges")
+        index = len(self.source)
+        self.source.append(self.node(source))
+        self.target.append(self.node(target))
+        if weight is not None:
+            self.has_weight = True
+            self.weight.append(float(weight))
+        else:
+            self.weight.append(1.0)
+        for key, value in attrs.items():
+            self.edge_attributes.setdefault(key, {})[index] = value
+
+    def build(self, directed: bool) -> Dict[str, Any]:
+        node_count = len(self.node_ids)
+        edge_count = len(self.source)
+        return {
+            "node_ids": np.array(self.node_ids, dtype=str),
+            "source": np.frombuffer(self.source, dtype=np.int32).copy() if edge_count else np.array([], dtype=np.int32),
+            "target": np.frombuffer(self.target, dtype=np.int32).copy() if edge_count else np.array([], dtype=np.int32),
+            "weight": np.frombuffer(self.weight, dtype=np.float64).copy() if self.has_weight else None,
+            "directed": directed,
+            "node_attributes": {
+                key: [values.get(i) for i in range(node_count)]
+                for key, values in self.node_attributes.items()
+            },
+            "edge_attributes": {
+                key: [values.get(i) for i in range(edge_count)]
+                for key, values in self.edge_attributes.items()
+            }
+        }
+
+
+class NetworkIngestService:
+    """Service for streaming network file uploads into the native format."""
+
+    @staticmethod
+    async def stream_upload_to_disk(
+        file: UploadFile,
+        destination: str,
+        max_bytes: int = MAX_NETWORK_UPLOAD_BYTES
+    ) -> int:
+        """
+        Write an uploaded file to disk in chunks, enforcing a size limit.
+
+        Args:
+            file: UploadFile from FastAPI
+            destination: Path of the file to write
+            max_bytes: Maximum accepted upload size
+
+        Returns:
+            int: Number of bytes written
+        """
+        # Reject early when the client announced the size
+        declared_size = getattr(file, "size", None)
+        if declared_size is not None and declared_size > max_bytes:
+            raise HTTPException(status_code=413, detail=f"Network file exceeds the maximum size of {max_bytes} bytes")
+
+        written = 0
+        try:
+            with open(destination, "wb") as buffer:
+                while True:
+                    chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    written += len(chunk)
+                    if written > max_bytes:
+                        raise HTTPException(
+                            status_code=413,
+                            detail=f"Network file exceeds the maximum size of {max_bytes} bytes"
+                        )
+                    buffer.write(chunk)
+        except Exception:
+            if os.path.exists(destination):
+                os.remove(destination)
+            raise
+
+        return written
+
+    @staticmethod
+    def parse_network_file(
+        file_path: str,
+        max_nodes: int = MAX_NETWORK_NODES,
+        max_edges: int = MAX_NETWORK_EDGES
+    ) -> Dict[str, Any]:
+        """
+        Parse a network file into node and edge arrays.
+
+        GraphML and GEXF are parsed incrementally with ``iterparse`` so that
+        elements are discarded as soon as they have been converted. GML has no
+        streaming parser and is read with NetworkX.
+
+        Args:
+            file_path: Path to the network file
+            max_nodes: Maximum number of nodes accepted
+            max_edges: Maximum number of edges accepted
+
+        Returns:
+            Dictionary with node ids, edge arrays and attribute columns
+        """
+        lower_path = file_path.lower()
+        if lower_path.endswith(".graphml"):
+            return NetworkIngestService._parse_graphml(file_path, max_nodes, max_edges)
+        elif lower_path.endswith(".gexf"):
+            return NetworkIngestService._parse_gexf(file_path, max_nodes, max_edges)
+        elif lower_path.endswith(".gml"):
+            G = nx.read_gml(file_path)
+            if G.number_of_nodes() > max_nodes:
+                raise NetworkLimitExceeded(f"Network exceeds the maximum of {max_nodes} nodes")
+            if G.number_of_edges() > max_edges:
+                raise NetworkLimitExceeded(f"Network exceeds the maximum of {max_edges} edges")
+            return NetworkStore.graph_to_arrays(G)
+        else:
+            raise ValueError(f"Unsupported network file format: {file_path}")
+
+    @staticmethod
+    def _parse_graphml(file_path: str, max_nodes: int, max_edges: int) -> Dict[str, Any]:
+        """Parse a GraphML file incrementally."""
+        builder = _ArrayBuilder(max_nodes, max_edges)
+        keys: Dict[str, Dict[str, Any]] = {}
+        directed = False
+        current_key = None
+        container = None
+
+        for event, elem in ET.iterparse(file_path, events=("start", "end")):
+            tag = _local_name(elem.tag)
+
+            if event == "start":
+                if tag == "graph":
+                    directed = elem.get("edgedefault", "undirected") == "directed"
+                    container = elem
+                elif tag == "key":
+                    current_key = elem.get("id")
+                    keys[current_key] = {
+                        "name": elem.get("attr.name") or current_key,
+                        "type": elem.get("attr.type", "string"),
+                        "for": elem.get("for", "all"),
+                        "default": None
+                    }
+                continue
+
+            if tag == "default" and current_key is not None:
+                keys[current_key]["default"] = _convert_value(elem.text, keys[current_key]["type"])
+            elif tag == "key":
+                current_key = None
+            elif tag == "node":
+                attrs = NetworkIngestService._graphml_data(elem, keys, "node")
+                builder.node(elem.get("id"), attrs)
+                # Drop processed elements so memory stays bounded
+                if container is not None:
+                    container.clear()
+            elif tag == "edge":
+                attrs = NetworkIngestService._graphml_data(elem, keys, "edge")
+                weight = attrs.pop("weight", None)
+                if weight is not None:
+                    try:
+                        weight = float(weight)
+                    except (TypeError, ValueError):
+                        attrs["weight"] = weight
+                        weight = None
+                builder.edge(elem.get("source"), elem.get("target"), weight, attrs)
+                if container is not None:
+                    container.clear()
+
+        return builder.build(directed)
+
+    @staticmethod
+    def _graphml_data(elem: ET.Element, keys: Dict[str, Dict[str, Any]], owner: str) -> Dict[str, Any]:
+        """Collect the typed ``<data>`` values of a GraphML node or edge, including key defaults."""
+        attrs = {
+            key["name"]: key["default"]
+            for key in keys.values()
+            if key["default"] is not None and key["for"] in (owner, "all")
+        }
+        for child in elem:
+            if _local_name(child.tag) != "data":
+                continue
+            key = keys.get(child.get("key"))
+            if key is None:
+                attrs[child.get("key")] = child.text
+            else:
+                attrs[key["name"]] = _convert_value(child.text, key["type"])
+        return attrs
+
+    @staticmethod
+    def _parse_gexf(file_path: str, max_nodes: int, max_edges: int) -> Dict[str, Any]:
+        """Parse a GEXF file incrementally."""
+        builder = _ArrayBuilder(max_nodes, max_edges)
+        attributes: Dict[str, Dict[str, Dict[str, Any]]] = {"node": {}, "edge": {}}
+        attribute_class = "node"
+        directed = False
+        container = None
+
+        for event, elem in ET.iterparse(file_path, events=("start", "end")):
+            tag = _local_name(elem.tag)
+
+            if event == "start":
+                if tag == "graph":
+                    directed = elem.get("defaultedgetype", "undirected") == "directed"
+                elif tag == "attributes":
+                    attribute_class = elem.get("class", "node")
+                elif tag in ("nodes", "edges"):
+                    container = elem
+                continue
+
+            if tag == "attribute":
+                default = None
+                for child in elem:
+                    if _local_name(child.tag) == "default":
+                        default = child.text
+                attr_type = elem.get("type", "string")
+                attributes[attribute_class][elem.get("id")] = {
+                    "name": elem.get("title") or elem.get("id"),
+                    "type": attr_type,
+                    "default": _convert_value(default, attr_type)
+                }
+            elif tag == "node":
+                attrs = NetworkIngestService._gexf_attvalues(elem, attributes["node"])
+                if elem.get("label") is not None:
+                    attrs["label"] = elem.get("label")
+                builder.node(elem.get("id"), attrs)
+                # Drop processed elements so memory stays bounded
+                if container is not None:
+                    container.clear()
+            elif tag == "edge":
+                attrs = NetworkIngestService._gexf_attvalues(elem, attributes["edge"])
+                weight = elem.get("weight")
+                if elem.get("type") == "directed":
+                    directed = True
+                builder.edge(
+                    elem.get("source"),
+                    elem.get("target"),
+                    float(weight) if weight is not None else None,
+                    attrs
+                )
+                if container is not None:
+                    container.clear()
+
+        return builder.build(directed)
+
+    @staticmethod
+    def _gexf_attvalues(elem: ET.Element, definitions: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Collect the typed ``<attvalue>`` values of a GEXF node or edge, including defaults."""
+        attrs = {
+            definition["name"]: definition["default"]
+            for definition in definitions.values()
+            if definition["default"] is not None
+        }
+        for child in elem.iter():
+            if _local_name(child.tag) != "attvalue":
+                continue
+            attr_id = child.get("for") or child.get("id")
+            definition = definitions.get(attr_id)
+            if definition is None:
+                attrs[attr_id] = child.get("value")
+            else:
+                attrs[definition["name"]] = _convert_value(child.get("value"), definition["type"])
+        return attrs
+
+    @staticmethod
+    async def ingest_upload(
+        file: UploadFile,
+        network_folder: str,
+        directed: bool,
+        max_bytes: int = MAX_NETWORK_UPLOAD_BYTES
+    ) -> Dict[str, Any]:
+        """
+        Stream an uploaded network file to disk, parse it and store it in the native format.
+
+        The raw upload is removed once the native file has been written.
+
+        Args:
+            file: UploadFile from FastAPI
+            network_folder: Folder in which the network is stored
+            directed: Whether the stored network should be directed
+            max_bytes: Maximum accepted upload size
+
+        Returns:
+            Dictionary with the node/edge arrays and the path of the native file
+        """
+        filename = os.path.basename(file.filename.lower())
+        raw_path = os.path.join(network_folder, f"upload_{filename}")
+        native_path = os.path.join(network_folder, "network.npz")
+
+        await NetworkIngestService.stream_upload_to_disk(file, raw_path, max_bytes=max_bytes)
+        try:
+            # Parsing a large file takes a while; keep it off the event loop
+            arrays = await asyncio.to_thread(NetworkIngestService.parse_network_file, raw_path)
+        except NetworkLimitExceeded as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except ET.ParseError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid network file: {e}")
+        finally:
+            if os.path.exists(raw_path):
+                os.remove(raw_path)
+
+        arrays = await asyncio.to_thread(NetworkStore.make_directed, arrays, directed)
+        await asyncio.to_thread(NetworkStore.save_arrays, native_path, arrays)
+        logger.info(
+            f"Ingested network {filename}: {len(arrays['node_ids'])} nodes, {len(arrays['source'])} edges"
+        )
+
+        return {"arrays": arrays, "file_path": native_path}
@@ -0,0 +1,374 @@
+import json
+import os
+from typing import Dict, List, Any
+
+import networkx as nx
+import numpy as np
+
+# Extension used for networks stored in the compact native format
+NATIVE_EXTENSION = ".npz"
+
+
+class NetworkStore:
+    """
+    Service for reading and writing networks.
+
+    Networks are stored in a compact native format: a single ``.npz`` archive
+    holding the node id table, integer edge arrays that index into it and an
+    optional weight array. Node and edge attributes are kept as JSON columns
+    aligned with the node table and edge arrays. Legacy GraphML, GEXF and GML
+    files are still readable.
+    """
+
+    @staticmethod
+    def empty_arrays(directed: bool = False) -> Dict[str, Any]:
+        """
+        Create an empty array representation of a network.
+
+        Args:
+            directed: Whether the network is directed
+
+        Returns:
+            Dictionary with node ids, edge arrays and attribute columns
+        """
+        return {
+            "node_ids": np.array([], dtype=str),
+            "source": np.array([], dtype=np.int32),
+            "target": np.array([], dtype=np.int32),
+            "weight": None,
+            "directed": directed,
+            "node_attributes": {},
+            "edge_attributes": {}
+        }
+
+    @staticmethod
+    def save_arrays(file_path: str, arrays: Dict[str, Any]) -> str:
+        """
+        Save an array representation of a network in the native format.
+
+        Args:
+            file_path: Destination path (``.npz``)
+            arrays: Dictionary as returned by ``graph_to_arrays`` or the ingest parser
+
+        Returns:
+            str: Path to the saved file
+        """
+        payload = {
+            "node_ids": np.asarray(arrays["node_ids"], dtype=str),
+            "source": np.asarray(arrays["source"], dtype=np.int32),
+            "target": np.asarray(arrays["target"], dtype=np.int32),
+            "directed": np.array(bool(arrays.get("directed", False))),
+            "node_attributes": np.array(json.dumps(arrays.get("node_attributes") or {}, default=str)),
+            "edge_attributes": np.array(json.dumps(arrays.get("edge_attributes") or {}, default=str))
+        }
+        if arrays.get("weight") is not None:
+            payload["weight"] = np.asarray(arrays["weight"], dtype=np.float64)
+
+        # Extra keys (e.g. per-layer edge arrays) are stored as-is
+        for key, value in arrays.items():
+            if key not in payload and key != "weight" and isinstance(value, np.ndarray):
+                payload[key] = value
+
+        np.savez_compressed(file_path, **payload)
+        return file_path
+
+    @staticmethod
+    def load_arrays(file_path: str) -> Dict[str, Any]:
+        """
+        Load an array representation of a network stored in the native format.
+
+        Args:
+            file_path: Path to the ``.npz`` file
+
+        Returns:
+            Dictionary with node ids, edge arrays and attribute columns
+        """
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"Network file not found: {file_path}")
+
+        with np.load(file_path, allow_pickle=False) as archive:
+            arrays = {key: archive[key] for key in archive.files}
+
+        arrays["directed"] = bool(arrays["directed"])
+        arrays["weight"] = arrays.get("weight")
+        arrays["node_attributes"] = json.loads(str(arrays["node_attributes"]))
+        arrays["edge_attributes"] = json.loads(str(arrays["edge_attributes"]))
+        return arrays
+
+    @staticmethod
+    def arrays_to_graph(arrays: Dict[str, Any]) -> nx.Graph:
+        """
+        Build a NetworkX graph from an array representation.
+
+        Args:
+            arrays: Dictionary with node ids, edge arrays and attribute columns
+
+        Returns:
+            NetworkX graph object
+        """
+        G = nx.DiGraph() if arrays.get("directed") else nx.Graph()
+
+        node_ids = [str(node_id) for node_id in arrays["node_ids"]]
+        node_attributes = arrays.get("node_attributes") or {}
+        if node_attributes:
+            attr_names = list(node_attributes.keys())
+            attr_columns = [node_attributes[name] for name in attr_names]
+            for i, node_id in enumerate(node_ids):
+                attrs = {}
+                for name, column in zip(attr_names, attr_columns):
+                    if column[i] is not None:
+                        attrs[name] = column[i]
+                G.add_node(node_id, **attrs)
+        else:
+            G.add_nodes_from(node_ids)
+
+        sources = np.asarray(node_ids, dtype=object)[np.asarray(arrays["source"], dtype=np.int64)]
+        targets = np.asarray(node_ids, dtype=object)[np.asarray(arrays["target"], dtype=np.int64)]
+        edge_attributes = arrays.get("edge_attributes") or {}
+
+        if arrays.get("weight") is None and not edge_attributes:
+            G.add_edges_from(zip(sources, targets))
+            return G
+
+        weights = arrays.get("weight")
+        attr_names = list(edge_attributes.keys())
+        for i, (source, target) in enumerate(zip(sources, targets)):
+            attrs = {}
+            if weights is not None:
+                attrs["weight"] = float(weights[i])
+            for name in attr_names:
+                value = edge_attributes[name][i]
+                if value is not None:
+                    attrs[name] = value
+            G.add_edge(source, target, **attrs)
+
+        return G
+
+    @staticmethod
+    def graph_to_arrays(G: nx.Graph) -> Dict[str, Any]:
+        """
+        Convert a NetworkX graph to an array representation.
+
+        Args:
+            G: NetworkX graph object
+
+        Returns:
+            Dictionary with node ids, edge arrays and attribute columns
+        """
+        nodes = list(G.nodes())
+        index = {node: i for i, node in enumerate(nodes)}
+
+        node_attributes: Dict[str, List[Any]] = {}
+        for i, (_, attrs) in enumerate(G.nodes(data=True)):
+            for key, value in attrs.items():
+                if key not in node_attributes:
+                    node_attributes[key] = [None] * len(nodes)
+                node_attributes[key][i] = value
+
+        edge_count = G.number_of_edges()
+        source = np.empty(edge_count, dtype=np.int32)
+        target = np.empty(edge_count, dtype=np.int32)
+        weight = None
+        edge_attributes: Dict[str, List[Any]] = {}
+
+        for i, (u, v, attrs) in enumerate(G.edges(data=True)):
+            source[i] = index[u]
+            target[i] = index[v]
+            for key, value in attrs.items():
+                if key == "weight":
+                    if weight is None:
+                        weight = np.ones(edge_count, dtype=np.float64)
+                    weight[i] = float(value)
+                else:
+                    if key not in edge_attributes:
+                        edge_attributes[key] = [None] * edge_count
+                    edge_attributes[key][i] = value
+
+        return {
+            "node_ids": np.array([str(node) for node in nodes], dtype=str),
+            "source": source,
+            "target": target,
+            "weight": weight,
+            "directed": G.is_directed(),
+            "node_attributes": node_attributes,
+            "edge_attributes": edge_attributes
+        }
+
+    @staticmethod
+    def load_graph(file_path: str) -> nx.Graph:
+        """
+        Load a network from any supported file format.
+
+        Args:
+            file_path: Path to a native ``.npz``, GraphML, GEXF or GML file
+
+        Returns:
+            NetworkX graph object
+        """
+        if file_path.endswith(NATIVE_EXTENSION):
+            return NetworkStore.arrays_to_graph(NetworkStore.load_arrays(file_path))
+        elif file_path.endswith(".graphml"):
+            return nx.read_graphml(file_path)
+        elif file_path.endswith(".gexf"):
+            return nx.read_gexf(file_path)
+        elif file_path.endswith(".gml"):
+            return nx.read_gml(file_path)
+        else:
+            raise ValueError(f"Unsupported network file format: {file_path}")
+
+    @staticmethod
+    def save_graph(G: nx.Graph, file_path: str) -> str:
+        """
+        Save a NetworkX graph in the native format.
+
+        Args:
+            G: NetworkX graph object
+            file_path: Destination path (``.npz``)
+
+        Returns:
+            str: Path to the saved file
+        """
+        return NetworkStore.save_arrays(file_path, NetworkStore.graph_to_arrays(G))
+
+    @staticmethod
+    def make_directed(arrays: Dict[str, Any], directed: bool) -> Dict[str, Any]:
+        """
+        Change the directedness of an array representation.
+
+        Making an undirected network directed mirrors every edge, matching
+        ``nx.DiGraph(G)``. Making a directed network undirected only flips
+        the flag, since the graph loader merges reciprocal edges.
+
+        Args:
+            arrays: Dictionary with node ids, edge arrays and attribute columns
+            directed: Desired directedness
+
+        Returns:
+            Updated dictionary
+        """
+        if directed and not arrays.get("directed"):
+            non_loops = arrays["source"] != arrays["target"]
+            arrays["source"], arrays["target"] = (
+                np.concatenate([arrays["source"], arrays["target"][non_loops]]),
+                np.concatenate([arrays["target"], arrays["source"][non_loops]])
+            )
+            if arrays.get("weight") is not None:
+                arrays["weight"] = np.concatenate([arrays["weight"], arrays["weight"][non_loops]])
+            for key, column in (arrays.get("edge_attributes") or {}).items():
+                arrays["edge_attributes"][key] = list(column) + [
+                    value for value, keep in zip(column, non_loops) if keep
+                ]
+        arrays["directed"] = directed
+        return arrays
+
+    @staticmethod
+    def load_network_arrays(file_path: str) -> Dict[str, Any]:
+        """
+        Load any supported network file as an array representation.
+
+        Args:
+            file_path: Path to a native ``.npz``, GraphML, GEXF or GML file
+
+        Returns:
+            Dictionary with node ids, edge arrays and attribute columns
+        """
+        if file_path.endswith(NATIVE_EXTENSION):
+            return NetworkStore.load_arrays(file_path)
+        return NetworkStore.graph_to_arrays(NetworkStore.load_graph(file_path))
+
+    @staticmethod
+    def build_multiplex(layers: List[Any], directed: bool = False) -> Dict[str, Any]:
+        """
+        Combine several networks over the same people into one multiplex network.
+
+        All layers share one node table (node attributes are stored once, the
+        first non-null value across layers wins). Each layer keeps its own
+        compact ``layer_<i>_source``/``layer_<i>_target``/``layer_<i>_weight``
+        arrays, with parallel edges inside a layer merged and their weights
+        summed. The standard ``source``/``target``/``weight`` arrays hold the
+        aggregated network (union of all layers, weights summed), so every
+        single-layer analysis also works on a multiplex file.
+
+        Args:
+            layers: List of (layer name, array representation) tuples
+            directed: Whether the multiplex network is directed
+
+        Returns:
+            Dictionary with the shared node table, per-layer and aggregated edge arrays
+        """
+        layer_node_ids = [np.asarray(arrays["node_ids"], dtype=str) for _, arrays in layers]
+        node_ids = np.unique(np.concatenate(layer_node_ids)) if layer_node_ids else np.array([], dtype=str)
+        n = len(node_ids)
+
+        # Shared node table
+        node_attributes: Dict[str, List[Any]] = {}
+        for ids, (_, arrays) in zip(layer_node_ids, layers):
+            positions = np.searchsorted(node_ids, ids)
+            for key, column in (arrays.get("node_attributes") or {}).items():
+                shared_column = node_attributes.setdefault(key, [None] * n)
+                for position, value in zip(positions.tolist(), column):
+                    if value is not None and shared_column[position] is None:
+                        shared_column[position] = value
+
+        result = {
+            "node_ids": node_ids,
+            "directed": directed,
+            "node_attributes": node_attributes,
+            "edge_attributes": {},
+            "layer_names": np.array([name for name, _ in layers], dtype=str)
+        }
+
+        all_keys = []
+        all_weights = []
+        for i, (ids, (_, arrays)) in enumerate(zip(layer_node_ids, layers)):
+            remap = np.searchsorted(node_ids, ids).astype(np.int64)
+            source = remap[np.asarray(arrays["source"], dtype=np.int64)]
+            target = remap[np.asarray(arrays["target"], dtype=np.int64)]
+            weight = arrays.get("weight")
+            weight = np.ones(len(source), dtype=np.float64) if weight is None else np.asarray(weight, dtype=np.float64)
+
+            if not directed:
+                source, target = np.minimum(source, target), np.maximum(source, target)
+
+            # Merge parallel edges within the layer
+            keys, inverse = np.unique(source * n + target, return_inverse=True)
+            weight = np.bincount(inverse, weights=weight, minlength=len(keys))
+
+            result[f"layer_{i}_source"] = (keys // n).astype(np.int32)
+            result[f"layer_{i}_target"] = (keys % n).astype(np.int32)
+            result[f"layer_{i}_weight"] = weight
+            all_keys.append(keys)
+            all_weights.append(weight)
+
+        if all_keys:
+            keys, inverse = np.unique(np.concatenate(all_keys), return_inverse=True)
+            result["source"] = (keys // n).astype(np.int32) if n else keys.astype(np.int32)
+            result["target"] = (keys % n).astype(np.int32) if n else keys.astype(np.int32)
+            result["weight"] = np.bincount(inverse, weights=np.concatenate(all_weights), minlength=len(keys))
+        else:
+            result["source"] = np.array([], dtype=np.int32)
+            result["target"] = np.array([], dtype=np.int32)
+            result["weight"] = None
+
+        return result
+
+    @staticmethod
+    def get_layers(arrays: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Get the per-layer edge arrays of a multiplex network.
+
+        Args:
+            arrays: Array representation of a multiplex network
+
+        Returns:
+            List of dictionaries with the layer name and its edge arrays
+        """
+        layers = []
+        for i, name in enumerate(arrays.get("layer_names", [])):
+            layers.append({
+                "name": str(name),
+                "source": np.asarray(arrays[f"layer_{i}_source"], dtype=np.int64),
+                "target": np.asarray(arrays[f"layer_{i}_target"], dtype=np.int64),
+                "weight": np.asarray(arrays[f"layer_{i}_weight"], dtype=np.float64)
+            })
+        return layers
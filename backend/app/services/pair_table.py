@@ -0,0 +1,430 @@
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+from app.services.parquet_store import ParquetStore
+from app.services.dataset_reader import DatasetReader
+from app.services.date_parsing import DateParser
+
+logger = logging.getLogger(__name__)
+
+# Folder (next to the dataset file) holding the pre-aggregated pair tables
+PAIR_TABLE_DIR = "pair_tables"
+
+# Default width of the time buckets when a timestamp column is defined
+DEFAULT_TIME_BUCKET_SECONDS = 86400
+
+# Prefix of the per-pair sum columns in the pair table
+SUM_PREFIX = "sum__"
+
+# Methods that build networks from source/target pairs
+PAIR_METHODS = ("frequency", "attribute_value")
+
+
+class PairTableService:
+    """
+    Service for pre-aggregated interaction pair tables.
+
+    A pair table holds one row per (source, target, time bucket) with the
+    number of interactions and the sum of every numeric column, together with
+    a node table holding the attributes of the first row each node occurs in.
+    Both are stored as Parquet next to the dataset file and keyed by the file
+    and the source/target/timestamp columns, so switching between frequency,
+    attribute-value, directed and undirected definitions rebuilds the network
+    from the small table instead of the raw interaction file.
+    """
+
+    @staticmethod
+    def read_source(file_path: str) -> pd.DataFrame:
+        """
+        Read a tabular dataset file.
+
+        Args:
+            file_path: Path to a Parquet, CSV, Excel or JSON file
+
+        Returns:
+            DataFrame with the file contents
+        """
+        if not ParquetStore.is_tabular(file_path):
+            raise ValueError("Unsupported file format")
+        return DatasetReader.read_file(file_path)
+
+    @staticmethod
+    def uses_pair_table(definition: Optional[Dict[str, Any]]) -> bool:
+        """
+        Check whether a tie strength definition is served by a pair table.
+
+        Args:
+            definition: Tie strength definition of a dataset
+
+        Returns:
+            bool: True for source/target based definitions
+        """
+        return bool(
+            definition
+            and definition.get("calculation_method") in PAIR_METHODS
+            and definition.get("source_column")
+            and definition.get("target_column")
+        )
+
+    @staticmethod
+    def _table_key(file_path: str, definition: Dict[str, Any]) -> str:
+        """
+        Compute the key of the pair table for a file and definition.
+
+        Only the columns that shape the table are part of the key; the
+        calculation method, weight column and direction are applied when the
+        network is rebuilt.
+        """
+        timestamp_col = definition.get("timestamp_column")
+        key = {
+            "file": os.path.abspath(file_path),
+            "source": definition["source_column"],
+            "target": definition["target_column"],
+            "timestamp": timestamp_col,
+            "bucket_seconds": (definition.get("time_window_seconds") or DEFAULT_TIME_BUCKET_SECONDS) if timestamp_col else None
+        }
+        return hashlib.sha1(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def _table_paths(file_path: str, definition: Dict[str, Any]) -> Dict[str, str]:
+        """Get the pair, node and sidecar paths of the pair table for a file and definition."""
+        folder = os.path.join(os.path.dirname(file_path), PAIR_TABLE_DIR)
+        key = PairTableService._table_key(file_path, definition)
+        return {
+            "folder": folder,
+            "pairs": os.path.join(folder, f"{key}.pairs.parquet"),
+            "nodes": os.path.join(folder, f"{key}.nodes.parquet"),
+            "meta": os.path.join(folder, f"{key}.json")
+        }
+
+    @staticmethod
+    def _source_signature(file_path: str) -> Dict[str, int]:
+        """Get the size and modification time used to detect changed source files (appended fragments included)."""
+        return ParquetStore.signature(file_path)
+
+    @staticmethod
+    def aggregate(df: pd.DataFrame, definition: Dict[str, Any], sum_columns: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Aggregate interaction rows into a pair table and a node table.
+
+        Args:
+            df: Interaction rows
+            definition: Tie strength definition with source/target columns
+            sum_columns: Columns to sum per pair (numeric attribute columns if omitted)
+
+        Returns:
+            Dictionary with the pair table, node table, summed columns and bucket width
+        """
+        source_col = definition["source_column"]
+        target_col = definition["target_column"]
+        timestamp_col = definition.get("timestamp_column")
+
+        required_cols = [source_col, target_col] + ([timestamp_col] if timestamp_col else [])
+        missing_cols = [col for col in required_cols if col not in df.columns]
+        if missing_cols:
+            raise ValueError(f"Required columns missing in data file: {', '.join(missing_cols)}")
+
+        df = df.reset_index(drop=True)
+        source_valid = df[source_col].notna()
+        target_valid = df[target_col].notna()
+
+        # Node table: attributes of the first row each node occurs in
+        occurrences = pd.concat([
+            pd.DataFrame({"node_id": df.loc[source_valid, source_col].astype(str), "row": np.flatnonzero(source_valid)}),
+            pd.DataFrame({"node_id": df.loc[target_valid, target_col].astype(str), "row": np.flatnonzero(target_valid)})
+        ], ignore_index=True)
+        first_rows = occurrences.sort_values("row", kind="stable").drop_duplicates("node_id")
+        attribute_cols = [col for col in df.columns if col not in (source_col, target_col)]
+        nodes = df.loc[first_rows["row"].values, attribute_cols].reset_index(drop=True)
+        nodes.insert(0, "__node_id", first_rows["node_id"].values)
+
+        # Pair table: interaction count and numeric sums per (source, target, bucket)
+        valid = df[source_valid & target_valid]
+        bucket_seconds = None
+        if timestamp_col:
+            bucket_seconds = definition.get("time_window_seconds") or DEFAULT_TIME_BUCKET_SECONDS
+            timestamps, _ = DateParser.infer_and_parse(valid[timestamp_col])
+            epoch_seconds = (timestamps - pd.Timestamp(0, tz=timestamps.dt.tz)) // pd.Timedelta(seconds=1)
+            buckets = ((epoch_seconds // bucket_seconds) * bucket_seconds).astype("Int64")
+        else:
+            buckets = pd.Series(0, index=valid.index, dtype="Int64")
+
+        if sum_columns is None:
+            sum_columns = [
+                col for col in attribute_cols
+                if col != timestamp_col and pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col])
+            ]
+        frame = pd.DataFrame({
+            "source": valid[source_col].astype(str),
+            "target": valid[target_col].astype(str),
+            "bucket": buckets
+        })
+        for col in sum_columns:
+            frame[f"{SUM_PREFIX}{col}"] = pd.to_numeric(valid[col], errors="coerce") if col in valid.columns else np.nan
+
+        grouped = frame.groupby(["source", "target", "bucket"], dropna=False, sort=False)
+        pairs = grouped.size().rename("count").to_frame()
+        if sum_columns:
+            pairs = pairs.join(grouped[[f"{SUM_PREFIX}{col}" for col in sum_columns]].sum())
+        pairs = pairs.reset_index()
+        return {"pairs": pairs, "nodes": nodes, "sum_columns": sum_columns, "bucket_seconds": bucket_seconds}
+
+    @staticmethod
+    def _store(file_path: str, definition: Dict[str, Any], table: Dict[str, Any], row_count: int) -> Dict[str, Any]:
+        """Store a pair table and its sidecar metadata next to a dataset file."""
+        paths = PairTableService._table_paths(file_path, definition)
+        os.makedirs(paths["folder"], exist_ok=True)
+        ParquetStore.write(table["pairs"], paths["pairs"])
+        ParquetStore.write(table["nodes"], paths["nodes"])
+
+        meta = {
+            "source_file": os.path.abspath(file_path),
+            "source_signature": PairTableService._source_signature(file_path),
+            "source_column": definition["source_column"],
+            "target_column": definition["target_column"],
+            "timestamp_column": definition.get("timestamp_column"),
+            "bucket_seconds": table["bucket_seconds"],
+            "sum_columns": table["sum_columns"],
+            "row_count": int(row_count),
+            "pair_count": int(len(table["pairs"])),
+            "node_count": int(len(table["nodes"])),
+            "created_at": datetime.now().isoformat()
+        }
+        with open(paths["meta"], 'w') as f:
+            json.dump(meta, f)
+        return {"pairs": table["pairs"], "nodes": table["nodes"], "meta": meta}
+
+    @staticmethod
+    def build(file_path: str, definition: Dict[str, Any], df: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+        """
+        Build and store the pair table of a dataset file.
+
+        Args:
+            file_path: Path to the dataset file
+            definition: Tie strength definition with source/target columns
+            df: Already loaded contents of the file (optional)
+
+        Returns:
+            Dictionary with the pair table, node table and metadata
+        """
+        if df is None:
+            df = PairTableService.read_source(file_path)
+
+        table = PairTableService._store(file_path, definition, PairTableService.aggregate(df, definition), len(df))
+        logger.info(f"Built pair table for {file_path}: {len(df)} rows -> {len(table['pairs'])} pairs")
+        return table
+
+    @staticmethod
+    def append(
+        file_path: str,
+        definition: Dict[str, Any],
+        batch: pd.DataFrame,
+        previous_signature: Dict[str, int]
+    ) -> Dict[str, Any]:
+        """
+        Aggregate rows appended to a dataset file and add them to its pair table.
+
+        The pair table stored for the file before the append (identified by
+        its previous signature) is extended with the pairs and new nodes of
+        the batch, so the earlier rows are not read again. Without such a
+        table only the delta is returned and the table is left to the lazy
+        build.
+
+        Args:
+            file_path: Path to the dataset file, already holding the batch
+            definition: Tie strength definition with source/target columns
+            batch: Appended rows
+            previous_signature: Signature of the file before the append
+
+        Returns:
+            Dictionary with the edge delta (pairs and nodes of the batch, new
+            nodes only) and the updated pair table metadata, if any
+        """
+        paths = PairTableService._table_paths(file_path, definition)
+        existing = None
+        if all(os.path.exists(paths[name]) for name in ("pairs", "nodes", "meta")):
+            try:
+                with open(paths["meta"], 'r') as f:
+                    meta = json.load(f)
+                if meta.get("source_signature") == previous_signature:
+                    existing = {"pairs": pd.read_parquet(paths["pairs"]), "nodes": pd.read_parquet(paths["nodes"]), "meta": meta}
+            except Exception as e:
+                logger.warning(f"Could not load pair table for {file_path}: {str(e)}")
+
+        delta = PairTableService.aggregate(batch, definition, existing["meta"]["sum_columns"] if existing else None)
+        if existing is None:
+            return {"pairs": delta["pairs"], "nodes": delta["nodes"], "meta": None}
+
+        # Earlier occurrences of a node keep their attributes
+        new_nodes = delta["nodes"][~delta["nodes"]["__node_id"].isin(existing["nodes"]["__node_id"])]
+        sum_cols = [f"{SUM_PREFIX}{col}" for col in delta["sum_columns"]]
+        pairs = pd.concat([existing["pairs"], delta["pairs"]], ignore_index=True)
+        pairs["bucket"] = pairs["bucket"].astype("Int64")
+        grouped = pairs.groupby(["source", "target", "bucket"], dropna=False, sort=False)
+        merged = grouped["count"].sum().to_frame()
+        if sum_cols:
+            merged = merged.join(grouped[sum_cols].sum())
+        table = {
+            "pairs": merged.reset_index(),
+            "nodes": pd.concat([existing["nodes"], new_nodes], ignore_index=True),
+            "sum_columns": delta["sum_columns"],
+            "bucket_seconds": delta["bucket_seconds"]
+        }
+        stored = PairTableService._store(file_path, definition, table, existing["meta"]["row_count"] + len(batch))
+        logger.info(f"Appended {len(batch)} rows to the pair table for {file_path}: {len(stored['pairs'])} pairs")
+        return {"pairs": delta["pairs"], "nodes": new_nodes.reset_index(drop=True), "meta": stored["meta"]}
+
+    @staticmethod
+    def load(file_path: str, definition: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Load the stored pair table of a dataset file if it is up to date.
+
+        Args:
+            file_path: Path to the dataset file
+            definition: Tie strength definition with source/target columns
+
+        Returns:
+            Dictionary with the pair table, node table and metadata, or None
+        """
+        paths = PairTableService._table_paths(file_path, definition)
+        if not all(os.path.exists(paths[name]) for name in ("pairs", "nodes", "meta")):
+            return None
+
+        try:
+            with open(paths["meta"], 'r') as f:
+                meta = json.load(f)
+            if meta.get("source_signature") != PairTableService._source_signature(file_path):
+                return None
+            return {
+                "pairs": pd.read_parquet(paths["pairs"]),
+                "nodes": pd.read_parquet(paths["nodes"]),
+                "meta": meta
+            }
+        except Exception as e:
+            logger.warning(f"Could not load pair table for {file_path}: {str(e)}")
+            return None
+
+    @staticmethod
+    def get_or_build(file_path: str, definition: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Get the pair table of a dataset file, building it when missing or stale.
+
+        Args:
+            file_path: Path to the dataset file
+            definition: Tie strength definition with source/target columns
+
+        Returns:
+            Dictionary with the pair table, node table and metadata
+        """
+        table = PairTableService.load(file_path, definition)
+        if table is None:
+            table = PairTableService.build(file_path, definition)
+        return table
+
+    @staticmethod
+    def refresh_for_dataset(dataset: Any) -> Optional[Dict[str, Any]]:
+        """
+        Rebuild the pair table of a dataset's current file.
+
+        Called when the tie strength definition is set and after the dataset
+        is processed or anonymized. Failures are logged and left to the lazy
+        build when the network is created.
+
+        Args:
+            dataset: Dataset model instance
+
+        Returns:
+            Pair table metadata, or None if no pair table applies
+        """
+        definition = dataset.tie_strength_definition
+        if dataset.type == "NETWORK" or not PairTableService.uses_pair_table(definition):
+            return None
+
+        file_path = dataset.anonymized_file_path or dataset.processed_file_path or dataset.file_path
+        if not file_path or not os.path.exists(file_path):
+            return None
+
+        try:
+            table = PairTableService.load(file_path, definition)
+            if table is None:
+                table = PairTableService.build(file_path, definition)
+            return table["meta"]
+        except Exception as e:
+            logger.warning(f"Could not build pair table for dataset {dataset.id}: {str(e)}")
+            return None
+
+    @staticmethod
+    def build_graph(
+        table: Dict[str, Any],
+        definition: Dict[str, Any],
+        directed: bool = False,
+        weighted: bool = False
+    ) -> Tuple[nx.Graph, bool]:
+        """
+        Build a network from a pair table.
+
+        Args:
+            table: Pair table as returned by ``get_or_build``
+            definition: Tie strength definition
+            directed: Whether to build a directed network
+            weighted: Whether to calculate edge weights
+
+        Returns:
+            Tuple of the graph and whether it is effectively weighted
+        """
+        pairs = table["pairs"]
+        nodes = table["nodes"]
+        calc_method = definition.get("calculation_method")
+        weight_col = definition.get("weight_column")
+
+        # Select the per-pair value the definition aggregates
+        value = None
+        if weighted:
+            if calc_method == "frequency":
+                value = pairs["count"]
+            elif calc_method == "attribute_value" and weight_col:
+                sum_col = f"{SUM_PREFIX}{weight_col}"
+                if sum_col not in pairs.columns:
+                    raise ValueError(f"Weight column '{weight_col}' must be numeric for ATTRIBUTE_VALUE method.")
+                value = pairs[sum_col]
+            else:
+                # Unsupported method for weighted - treat as unweighted
+                weighted = False
+
+        source = pairs["source"].to_numpy(dtype=object)
+        target = pairs["target"].to_numpy(dtype=object)
+        if not directed:
+            # Canonical (min, max) node order so both directions aggregate together
+            swap = source > target
+            source, target = np.where(swap, target, source), np.where(swap, source, target)
+
+        edges = pd.DataFrame({"source": source, "target": target})
+        if value is not None:
+            edges["weight"] = value.to_numpy(dtype=np.float64)
+            edges = edges.groupby(["source", "target"], sort=False)["weight"].sum().reset_index()
+        else:
+            edges = edges.drop_duplicates()
+
+        G = nx.DiGraph() if directed else nx.Graph()
+
+        # Add nodes with the attributes of their first occurrence
+        attribute_cols = [col for col in nodes.columns if col not in ("__node_id", weight_col)]
+        node_ids = nodes["__node_id"].tolist()
+        attribute_records = nodes[attribute_cols].to_dict("records") if attribute_cols else [{} for _ in node_ids]
+        G.add_nodes_from(zip(node_ids, attribute_records))
+
+        # Add edges
+        if value is not None:
+            G.add_weighted_edges_from(zip(edges["source"].tolist(), edges["target"].tolist(), edges["weight"].tolist()))
+        else:
+            G.add_edges_from(zip(edges["source"].tolist(), edges["target"].tolist()))
+
+        return G, weighted
@@ -0,0 +1,740 @@
+import os
+import json
+import logging
+from itertools import islice
+from typing import Dict, List, Any, Optional, Iterator, Iterable, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Extension of datasets stored in the canonical internal format
+PARQUET_EXTENSION = ".parquet"
+
+# Suffix of the folder next to a Parquet dataset file holding the fragments appended to it
+FRAGMENTS_SUFFIX = ".fragments"
+
+# Extensions of newline-delimited JSON files (one record per line)
+JSON_LINES_EXTENSIONS = (".ndjson", ".jsonl")
+
+# Extensions of tabular dataset files
+TABULAR_EXTENSIONS = (".csv", ".xlsx", ".xls", ".json", *JSON_LINES_EXTENSIONS, PARQUET_EXTENSION)
+
+# Characters read at a time when parsing a JSON document incrementally
+JSON_READ_CHARS = 1024 * 1024
+
+# Rows per Parquet row group (override with environment variable)
+PARQUET_ROW_GROUP_SIZE = int(os.getenv("PARQUET_ROW_GROUP_SIZE", 100_000))
+
+# Rows per batch when iterating over a dataset
+READ_BATCH_ROWS = int(os.getenv("READ_BATCH_ROWS", 100_000))
+
+# Filter in pyarrow's (column, operator, value) form
+Filter = Tuple[str, str, Any]
+
+
+class ParquetStore:
+    """
+    Service for reading and writing datasets in the canonical Parquet format.
+
+    Tabular uploads are converted to Parquet once at ingest and processed or
+    anonymized versions are written as Parquet, so readers get typed columns,
+    column projection and row-group skipping for filters. Legacy CSV, Excel
+    and JSON files are still readable through the same functions.
+
+    Rows appended to a Parquet dataset are stored as numbered fragment files
+    in a folder next to it (see fragment_paths); the readers here read the
+    file and its fragments as one dataset, in append order.
+    """
+
+    @staticmethod
+    def is_parquet(file_path: str) -> bool:
+        """Check whether a file is stored in the Parquet format."""
+        return file_path.lower().endswith(PARQUET_EXTENSION)
+
+    @staticmethod
+    def is_tabular(file_path: str) -> bool:
+        """Check whether a file is a tabular dataset file."""
+        return file_path.lower().endswith(TABULAR_EXTENSIONS)
+
+    @staticmethod
+    def is_json(file_path: str) -> bool:
+        """Check whether a file is a JSON or JSON Lines dataset file."""
+        return file_path.lower().endswith((".json", *JSON_LINES_EXTENSIONS))
+
+    @staticmethod
+    def fragment_dir(file_path: str) -> str:
+        """Get the folder of the fragments appended to a Parquet dataset file."""
+        return f"{file_path}{FRAGMENTS_SUFFIX}"
+
+    @staticmethod
+    def fragment_paths(file_path: str) -> List[str]:
+        """
+        Get the fragments appended to a Parquet dataset file.
+
+        Fragments are named by their append number ("1.parquet", "2.parquet", ...).
+
+        Args:
+            file_path: Path to the Parquet dataset file
+
+        Returns:
+            Paths of the fragments in append order
+        """
+        folder = ParquetStore.fragment_dir(file_path)
+        if not ParquetStore.is_parquet(file_path) or not os.path.isdir(folder):
+            return []
+        numbers = sorted(
+            int(name[:-len(PARQUET_EXTENSION)]) for name in os.listdir(folder)
+            if name.endswith(PARQUET_EXTENSION) and name[:-len(PARQUET_EXTENSION)].isdigit()
+        )
+        return [os.path.join(folder, f"{number}{PARQUET_EXTENSION}") for number in numbers]
+
+    @staticmethod
+    def part_paths(file_path: str) -> List[str]:
+        """Get the files holding the rows of a dataset file: the file and its appended fragments."""
+        return [file_path] + ParquetStore.fragment_paths(file_path)
+
+    @staticmethod
+    def signature(file_path: str) -> Dict[str, int]:
+        """
+        Get the size and modification time used to detect changed dataset files.
+
+        Appended fragments count as part of the file, so appending changes the signature.
+
+        Args:
+            file_path: Path to the dataset file
+
+        Returns:
+            Dictionary with the total size and the latest modification time
+        """
+        stats = [os.stat(path) for path in ParquetStore.part_paths(file_path)]
+        return {"size": sum(stat.st_size for stat in stats), "mtime_ns": max(stat.st_mtime_ns for stat in stats)}
+
+    @staticmethod
+    def file_size(file_path: str) -> int:
+        """Get the size of a dataset file in bytes, its appended fragments included."""
+        return ParquetStore.signature(file_path)["size"]
+
+    @staticmethod
+    def read_schema(file_path: str) -> pa.Schema:
+        """
+        Get the Arrow schema of a Parquet dataset file and its fragments.
+
+        Appends only widen column types, so the latest fragment has the
+        schema all parts are read with.
+
+        Args:
+            file_path: Path to the Parquet dataset file
+
+        Returns:
+            Arrow schema
+        """
+        return pq.read_schema(ParquetStore.part_paths(file_path)[-1])
+
+    @staticmethod
+    def open_dataset(file_path: str) -> ds.Dataset:
+        """Open a Parquet dataset file and its fragments as one pyarrow dataset."""
+        return ds.dataset(ParquetStore.part_paths(file_path), schema=ParquetStore.read_schema(file_path), format="parquet")
+
+    @staticmethod
+    def prepare_frame(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Make a DataFrame storable as Parquet.
+
+        Object columns holding mixed types and categories of intervals (e.g.
+        from binning), which Parquet cannot represent, are stored as strings;
+        nulls are kept.
+
+        Args:
+            df: DataFrame to store
+
+        Returns:
+            DataFrame with storable columns
+        """
+        prepared = None
+        for col in df.columns:
+            if isinstance(df[col].dtype, pd.CategoricalDtype) and isinstance(df[col].cat.categories, pd.IntervalIndex):
+                if prepared is None:
+                    prepared = df.copy()
+                prepared[col] = df[col].cat.rename_categories(df[col].cat.categories.astype(str))
+            elif df[col].dtype == object and pd.api.types.infer_dtype(df[col], skipna=True) not in ("string", "empty", "boolean", "bytes"):
+                if prepared is None:
+                    prepared = df.copy()
+                prepared[col] = df[col].where(df[col].isna(), df[col].astype(str))
+        return df if prepared is None else prepared
+
+    @staticmethod
+    def cast_to_types(df: pd.DataFrame, data_types: Dict[str, str]) -> pd.DataFrame:
+        """
+        Cast a chunk to dtypes unified over the whole file.
+
+        Chunks are typed independently when read, so a column may be integer
+        in one chunk and float or text in another.
+
+        Args:
+            df: DataFrame chunk
+            data_types: Column dtypes for the whole file (e.g. from the dataset profile)
+
+        Returns:
+            DataFrame with the unified dtypes
+        """
+        df = df.copy()
+        for col, dtype in data_types.items():
+            if col not in df.columns or str(df[col].dtype) == dtype:
+                continue
+            if dtype.startswith(("int", "uint", "float")):
+                numbers = pd.to_numeric(df[col], errors="coerce")
+                df[col] = numbers.astype("float64" if numbers.isna().any() else dtype)
+            elif dtype.startswith("datetime64"):
+                df[col] = pd.to_datetime(df[col], errors="coerce")
+            elif dtype in ("bool", "boolean"):
+                df[col] = df[col].astype("boolean")
+            elif dtype == "category":
+                values = df[col]
+                df[col] = values.where(values.isna(), values.astype(str)).astype("category")
+            else:
+                df[col] = df[col].where(df[col].isna(), df[col].astype(str)).astype(object)
+        return df
+
+    @staticmethod
+    def write(df: pd.DataFrame, file_path: str) -> str:
+        """
+        Write a DataFrame as Parquet.
+
+        Args:
+            df: DataFrame to store
+            file_path: Destination path
+
+        Returns:
+            str: Path to the written file
+        """
+        table = pa.Table.from_pandas(ParquetStore.prepare_frame(df), preserve_index=False)
+        pq.write_table(table, file_path, row_group_size=PARQUET_ROW_GROUP_SIZE)
+        return file_path
+
+    @staticmethod
+    def write_chunks(chunks: Iterable[pd.DataFrame], file_path: str, data_types: Optional[Dict[str, str]] = None) -> int:
+        """
+        Write DataFrame chunks to one Parquet file.
+
+        Args:
+            chunks: DataFrame chunks with the same columns
+            file_path: Destination path
+            data_types: Column dtypes for the whole file, used to unify chunk types
+
+        Returns:
+            int: Number of rows written
+        """
+        writer = None
+        schema = None
+        rows = 0
+        temp_path = f"{file_path}.tmp"
+        try:
+            for chunk in chunks:
+                if data_types:
+                    if list(chunk.columns) != list(data_types):
+                        # Keys missing from the records of a chunk (JSON) leave out columns
+                        chunk = chunk.reindex(columns=list(data_types))
+                    chunk = ParquetStore.cast_to_types(chunk, data_types)
+                chunk = ParquetStore.prepare_frame(chunk)
+                if writer is None:
+                    # Columns without values in the first chunk are stored as text
+                    schema = pa.Table.from_pandas(chunk, preserve_index=False).schema
+                    for i, field in enumerate(schema):
+                        if pa.types.is_null(field.type):
+                            schema = schema.set(i, field.with_type(pa.string()))
+                        elif pa.types.is_dictionary(field.type):
+                            # Categoricals of later chunks may need wider codes
+                            schema = schema.set(i, field.with_type(pa.dictionary(pa.int32(), field.type.value_type)))
+                    writer = pq.ParquetWriter(temp_path, schema)
+                table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+                writer.write_table(table, row_group_size=PARQUET_ROW_GROUP_SIZE)
+                rows += len(chunk)
+            if writer is None:
+                # No rows: write an empty file
+                pq.write_table(pa.table({}), temp_path)
+            else:
+                writer.close()
+                writer = None
+            os.replace(temp_path, file_path)
+        finally:
+            if writer is not None:
+                writer.close()
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return rows
+
+    @staticmethod
+    def read_columns(file_path: str) -> List[str]:
+        """
+        Get the column names of a dataset file.
+
+        Args:
+            file_path: Path to the dataset file
+
+        Returns:
+            List of column names
+        """
+        if ParquetStore.is_parquet(file_path):
+            return list(ParquetStore.read_schema(file_path).names)
+        return ParquetStore.read_dataset_file(file_path, nrows=1).columns.tolist()
+
+    @staticmethod
+    def row_count(file_path: str) -> int:
+        """
+        Get the number of rows of a Parquet file and its fragments from their footers.
+
+        Args:
+            file_path: Path to the Parquet file
+
+        Returns:
+            int: Number of rows
+        """
+        return sum(pq.ParquetFile(path).metadata.num_rows for path in ParquetStore.part_paths(file_path))
+
+    @staticmethod
+    def apply_filters(df: pd.DataFrame, filters: Optional[List[Filter]]) -> pd.DataFrame:
+        """
+        Apply (column, operator, value) filters to a DataFrame.
+
+        Args:
+            df: DataFrame to filter
+            filters: Filters combined with AND
+
+        Returns:
+            Filtered DataFrame
+        """
+        if not filters:
+            return df
+        mask = pd.Series(True, index=df.index)
+        for column, op, value in filters:
+            values = df[column]
+            if op in ("=", "=="):
+                mask &= values == value
+            elif op == "!=":
+                mask &= values != value
+            elif op == "<":
+                mask &= values < value
+            elif op == "<=":
+                mask &= values <= value
+            elif op == ">":
+                mask &= values > value
+            elif op == ">=":
+                mask &= values >= value
+            elif op == "in":
+                mask &= values.isin(list(value))
+            elif op == "not in":
+                mask &= ~values.isin(list(value))
+            else:
+                raise ValueError(f"Unsupported filter operator: {op}")
+        return df[mask]
+
+    @staticmethod
+    def read_dataset_file(
+        file_path: str,
+        columns: Optional[List[str]] = None,
+        filters: Optional[List[Filter]] = None,
+        nrows: Optional[int] = None,
+        dtypes: Optional[Dict[str, str]] = None
+    ) -> pd.DataFrame:
+        """
+        Read a tabular dataset file.
+
+        Parquet files are read with column projection and filter pushdown
+        (row groups whose statistics exclude the filter are skipped). Legacy
+        CSV, Excel and JSON files are parsed and then projected and filtered.
+
+        Args:
+            file_path: Path to the dataset file
+            columns: Columns to read (all if omitted)
+            filters: (column, operator, value) filters combined with AND
+            nrows: Maximum number of rows to return
+            dtypes: Known column dtypes, used to skip type inference of CSV files
+
+        Returns:
+            DataFrame with the requested rows and columns
+        """
+        if ParquetStore.is_parquet(file_path):
+            if nrows is not None and not filters:
+                return ParquetStore.read_head(file_path, nrows, columns=columns)
+            if ParquetStore.fragment_paths(file_path):
+                table = ParquetStore.open_dataset(file_path).to_table(
+                    columns=columns, filter=pq.filters_to_expression(filters) if filters else None
+                )
+                df = table.to_pandas()
+            else:
+                df = pd.read_parquet(file_path, engine="pyarrow", columns=columns, filters=filters or None)
+            return df.head(nrows) if nrows is not None else df
+
+        lower_path = file_path.lower()
+        read_rows = nrows if not filters else None
+        if lower_path.endswith(".csv"):
+            # Only numeric, boolean and categorical dtypes are safe to force on parsing
+            known_dtypes = {
+                col: dtype for col, dtype in (dtypes or {}).items()
+                if (columns is None or col in columns) and (dtype.startswith(("int", "float", "bool")) or dtype == "category")
+            }
+            df = pd.read_csv(file_path, usecols=columns, nrows=read_rows, dtype=known_dtypes or None)
+        elif lower_path.endswith((".xlsx", ".xls")):
+            # Workbooks are normally converted to Parquet per sheet at ingest
+            df = pd.concat(list(ParquetStore.iter_excel_chunks(file_path)), ignore_index=True)
+            if columns is not None:
+                df = df[columns]
+            if read_rows is not None:
+                df = df.head(read_rows)
+        elif ParquetStore.is_json(file_path):
+            chunks = ParquetStore.iter_json_chunks(file_path)
+            if read_rows is not None:
+                # Stop parsing once enough records are read
+                chunks = ParquetStore._take_rows(chunks, read_rows)
+            df = pd.concat(list(chunks), ignore_index=True)
+            if columns is not None:
+                df = df.reindex(columns=columns)
+        else:
+            raise ValueError(f"Unsupported file format: {file_path}")
+
+        df = ParquetStore.apply_filters(df, filters)
+        return df.head(nrows) if nrows is not None else df
+
+    @staticmethod
+    def excel_sheets(file_path: str) -> List[str]:
+        """
+        Get the sheet names of an Excel workbook without loading its cells.
+
+        Args:
+            file_path: Path to the workbook
+
+        Returns:
+            List of sheet names in workbook order
+        """
+        if file_path.lower().endswith(".xls"):
+            # Legacy binary workbooks are not readable by openpyxl
+            return list(pd.ExcelFile(file_path).sheet_names)
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(file_path, read_only=True)
+        try:
+            return list(workbook.sheetnames)
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def _header_names(values: Tuple[Any, ...]) -> List[str]:
+        """Column names from a header row, named and deduplicated like pandas."""
+        names: List[str] = []
+        seen: Dict[str, int] = {}
+        for i, value in enumerate(values):
+            name = f"Unnamed: {i}" if value is None or str(value).strip() == "" else str(value)
+            if name in seen:
+                seen[name] += 1
+                name = f"{name}.{seen[name]}"
+            seen.setdefault(name, 0)
+            names.append(name)
+        return names
+
+    @staticmethod
+    def iter_excel_chunks(
+        file_path: str,
+        sheet_name: Optional[str] = None,
+        chunk_rows: int = READ_BATCH_ROWS
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Read a sheet of an Excel workbook row by row in chunks.
+
+        The workbook is opened in openpyxl's read-only mode, which streams
+        rows from the sheet XML instead of building every cell in memory. The
+        first row is the header; empty rows at the end of the sheet are
+        dropped.
+
+        Args:
+            file_path: Path to the workbook
+            sheet_name: Sheet to read (the first sheet if omitted)
+            chunk_rows: Rows per chunk
+
+        Returns:
+            Iterator of DataFrame chunks
+        """
+        if file_path.lower().endswith(".xls"):
+            df = pd.read_excel(file_path, sheet_name=sheet_name or 0)
+            for start in range(0, max(len(df), 1), chunk_rows):
+                yield df.iloc[start:start + chunk_rows]
+            return
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            sheet = workbook[sheet_name] if sheet_name is not None else workbook.worksheets[0]
+            rows = sheet.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                yield pd.DataFrame()
+                return
+            columns = ParquetStore._header_names(header)
+            width = len(columns)
+
+            chunk: List[Tuple[Any, ...]] = []
+            blank_rows: List[Tuple[Any, ...]] = []
+            yielded = False
+            for row in rows:
+                row = tuple(row[:width]) + (None,) * (width - len(row))
+                if all(value is None for value in row):
+                    # Kept only if a non-empty row follows
+                    blank_rows.append(row)
+                    continue
+                chunk.extend(blank_rows)
+                blank_rows = []
+                chunk.append(row)
+                if len(chunk) >= chunk_rows:
+                    yield pd.DataFrame.from_records(chunk, columns=columns)
+                    yielded = True
+                    chunk = []
+            if chunk or not yielded:
+                yield pd.DataFrame.from_records(chunk, columns=columns)
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def _empty_frame(schema: pa.Schema, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Get an empty DataFrame with the columns of a Parquet schema."""
+        table = schema.empty_table()
+        return (table.select(columns) if columns is not None else table).to_pandas()
+
+    @staticmethod
+    def iter_record_batches(file_path: str, columns: Optional[List[str]], batch_rows: int) -> Iterator[pa.RecordBatch]:
+        """Iterate over the record batches of a Parquet file and its fragments, cast to one schema."""
+        schema = ParquetStore.read_schema(file_path)
+        if columns is not None:
+            schema = pa.schema([schema.field(col) for col in columns], metadata=schema.metadata)
+        for path in ParquetStore.part_paths(file_path):
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_rows, columns=columns):
+                # Fragments appended after a column was widened have the wider type
+                yield batch if batch.schema.equals(schema) else pa.Table.from_batches([batch]).cast(schema).to_batches()[0]
+
+    @staticmethod
+    def read_head(file_path: str, nrows: int, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Read the first rows of a Parquet file without reading the whole file.
+
+        Args:
+            file_path: Path to the Parquet file
+            nrows: Number of rows
+            columns: Columns to read (all if omitted)
+
+        Returns:
+            DataFrame with the first rows
+        """
+        batches = []
+        remaining = nrows
+        for batch in ParquetStore.iter_record_batches(file_path, columns, max(min(nrows, READ_BATCH_ROWS), 1)):
+            batches.append(batch.slice(0, remaining))
+            remaining -= min(batch.num_rows, remaining)
+            if remaining <= 0:
+                break
+        if not batches:
+            return ParquetStore._empty_frame(ParquetStore.read_schema(file_path), columns)
+        return pa.Table.from_batches(batches).to_pandas()
+
+    @staticmethod
+    def iter_batches(
+        file_path: str,
+        columns: Optional[List[str]] = None,
+        batch_rows: int = READ_BATCH_ROWS
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Iterate over a Parquet file and its fragments in batches of rows.
+
+        Args:
+            file_path: Path to the Parquet file
+            columns: Columns to read (all if omitted)
+            batch_rows: Rows per batch
+
+        Returns:
+            Iterator of DataFrame batches
+        """
+        empty = True
+        for batch in ParquetStore.iter_record_batches(file_path, columns, batch_rows):
+            empty = False
+            yield batch.to_pandas()
+        if empty:
+            yield ParquetStore._empty_frame(ParquetStore.read_schema(file_path), columns)
+
+    @staticmethod
+    def _take_rows(chunks: Iterable[pd.DataFrame], nrows: int) -> Iterator[pd.DataFrame]:
+        """Yield chunks until a number of rows is reached."""
+        remaining = nrows
+        for chunk in chunks:
+            yield chunk.iloc[:remaining]
+            remaining -= len(chunk)
+            if remaining <= 0:
+                return
+
+    @staticmethod
+    def _records_frame(records: List[Any]) -> pd.DataFrame:
+        """Build a DataFrame from parsed JSON records; values other than objects go to a "value" column."""
+        if all(isinstance(record, dict) for record in records):
+            return pd.DataFrame.from_records(records)
+        return pd.DataFrame.from_records(
+            [record if isinstance(record, dict) else {"value": record} for record in records]
+        )
+
+    @staticmethod
+    def iter_json_records(file_path: str) -> Iterator[Any]:
+        """
+        Parse the records of a JSON document incrementally.
+
+        A top-level array yields its elements one at a time; otherwise the
+        file is read as a sequence of JSON values (a single object, or
+        concatenated objects). The file is read in blocks and each value is
+        decoded with ``JSONDecoder.raw_decode``, so memory use is bounded by
+        the block size and the largest record, not the size of the file.
+
+        Args:
+            file_path: Path to the JSON file
+
+        Returns:
+            Iterator of parsed records
+
+        Raises:
+            ValueError: If the file is not valid JSON
+        """
+        decoder = json.JSONDecoder()
+        with open(file_path, "r", encoding="utf-8") as f:
+            buffer = ""
+            pos = 0
+            eof = False
+
+            def fill() -> bool:
+                # Drop consumed text and read the next block; False at end of file
+                nonlocal buffer, pos, eof
+                if eof:
+                    return False
+                block = f.read(JSON_READ_CHARS)
+                buffer = buffer[pos:] + block
+                pos = 0
+                eof = not block
+                return not eof
+
+            def skip_whitespace() -> bool:
+                # Move to the next non-whitespace character; False at end of file
+                nonlocal pos
+                while True:
+                    while pos < len(buffer) and buffer[pos].isspace():
+                        pos += 1
+                    if pos < len(buffer):
+                        return True
+                    if not fill():
+                        return False
+
+            def decode() -> Any:
+                nonlocal pos
+                while True:
+                    try:
+                        value, end = decoder.raw_decode(buffer, pos)
+                        # A number at the end of the block may continue in the next one
+                        if end < len(buffer) or eof:
+                            pos = end
+                            return value
+                    except json.JSONDecodeError as e:
+                        if eof:
+                            raise ValueError(f"Invalid JSON in {file_path}: {e}") from e
+                    fill()
+
+            fill()
+            if not skip_whitespace():
+                return
+            if buffer[pos] != "[":
+                # Sequence of top-level values
+                while skip_whitespace():
+                    yield decode()
+                return
+
+            pos += 1
+            if skip_whitespace() and buffer[pos] == "]":
+                return
+            while True:
+                if not skip_whitespace():
+                    raise ValueError(f"Invalid JSON in {file_path}: unterminated array")
+                yield decode()
+                if not skip_whitespace():
+                    raise ValueError(f"Invalid JSON in {file_path}: unterminated array")
+                separator = buffer[pos]
+                pos += 1
+                if separator == "]":
+                    return
+                if separator != ",":
+                    raise ValueError(f"Invalid JSON in {file_path}: expected ',' or ']' at array element")
+
+    @staticmethod
+    def iter_json_lines(file_path: str, chunk_rows: int = READ_BATCH_ROWS) -> Iterator[pd.DataFrame]:
+        """
+        Read a JSON Lines (NDJSON) file in chunks of records.
+
+        The lines of a chunk are decoded together as one JSON array, which is
+        much faster than decoding them one by one. Blank lines are skipped.
+
+        Args:
+            file_path: Path to the JSON Lines file
+            chunk_rows: Records per chunk
+
+        Returns:
+            Iterator of DataFrame chunks
+
+        Raises:
+            ValueError: If a line is not valid JSON
+        """
+        yielded = False
+        first_line = 1
+        with open(file_path, "r", encoding="utf-8") as f:
+            while True:
+                lines = list(islice(f, chunk_rows))
+                if not lines:
+                    break
+                values = [line for line in lines if line.strip()]
+                try:
+                    records = json.loads("[" + ",".join(values) + "]")
+                except json.JSONDecodeError:
+                    # Find the offending line for the error message
+                    for number, line in enumerate(lines, start=first_line):
+                        if line.strip():
+                            try:
+                                json.loads(line)
+                            except json.JSONDecodeError as e:
+                                raise ValueError(f"Invalid JSON on line {number} of {file_path}: {e}") from e
+                    raise
+                first_line += len(lines)
+                if records:
+                    yield ParquetStore._records_frame(records)
+                    yielded = True
+        if not yielded:
+            yield pd.DataFrame()
+
+    @staticmethod
+    def iter_json_chunks(file_path: str, chunk_rows: int = READ_BATCH_ROWS) -> Iterator[pd.DataFrame]:
+        """
+        Read a JSON or JSON Lines dataset file in chunks of records.
+
+        Args:
+            file_path: Path to the JSON file
+            chunk_rows: Records per chunk
+
+        Returns:
+            Iterator of DataFrame chunks
+        """
+        if file_path.lower().endswith(JSON_LINES_EXTENSIONS):
+            yield from ParquetStore.iter_json_lines(file_path, chunk_rows)
+            return
+
+        records = ParquetStore.iter_json_records(file_path)
+        yielded = False
+        while True:
+            batch = list(islice(records, chunk_rows))
+            if not batch:
+                break
+            yield ParquetStore._records_frame(batch)
+            yielded = True
+        if not yielded:
+            yield pd.DataFrame()
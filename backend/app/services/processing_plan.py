@@ -0,0 +1,679 @@
+import os
+import json
+import uuid
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Optional, Iterable, Callable
+
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException
+
+from app.schemas.data import ProcessingOptions
+from app.services.file_storage import STORAGE_DIR
+from app.services.parquet_store import ParquetStore
+from app.services.dataset_reader import DatasetReader
+from app.services.dataset_profiler import DatasetProfiler, TDigest, TopK, Moments, TOP_K_CAPACITY
+from app.services.date_parsing import DateParser, DATE_SAMPLE_SIZE
+from app.services.dtype_optimizer import DtypeOptimizer
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Source files up to this size are processed in memory (override with environment variable)
+PROCESSING_IN_MEMORY_BYTES = int(os.getenv("PROCESSING_IN_MEMORY_BYTES", 128 * 1024 * 1024))
+
+# Rows per chunk when a source file is processed out of core
+PROCESSING_CHUNK_ROWS = int(os.getenv("PROCESSING_CHUNK_ROWS", 250_000))
+
+# Directory of saved processing recipes
+RECIPE_DIR = os.path.join(STORAGE_DIR, "recipes")
+
+# Version of the compiled plan layout
+PLAN_VERSION = 1
+
+# String representations converted to booleans
+BOOL_MAP = {
+    "true": True, "True": True, "TRUE": True, "1": True,
+    "yes": True, "Yes": True, "YES": True, "y": True, "Y": True, "t": True, "T": True,
+    "false": False, "False": False, "FALSE": False, "0": False,
+    "no": False, "No": False, "NO": False, "n": False, "N": False, "f": False, "F": False
+}
+
+# Statistics each normalization strategy is fitted on
+SCALER_STATS = {
+    "min_max": ["min", "max"],
+    "standard": ["mean", "std"],
+    "robust": ["median", "q25", "q75"]
+}
+
+# Statistics computed from numeric values
+NUMERIC_STATS = {"mean", "std", "min", "max", "median", "q25", "q75"}
+QUANTILE_STATS = {"median": 0.5, "q25": 0.25, "q75": 0.75}
+
+
+def _column_kind(dtype: str) -> str:
+    """Classify a dtype name as numeric, bool, datetime or other."""
+    try:
+        dtype = pd.api.types.pandas_dtype(dtype)
+    except TypeError:
+        return "other"
+    if pd.api.types.is_bool_dtype(dtype):
+        return "bool"
+    if pd.api.types.is_numeric_dtype(dtype):
+        return "numeric"
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return "datetime"
+    return "other"
+
+
+class _StatAccumulator:
+    """Column statistics, exact when the column arrives in one chunk and sketched otherwise."""
+
+    def __init__(self, stats: List[str]):
+        self.stats = set(stats)
+        self.chunks = 0
+        self.single: Optional[pd.Series] = None
+        self.count = 0
+        self.moments = Moments()
+        self.tdigest = TDigest()
+        self.top_k = TopK()
+        self.originals: Dict[str, Any] = {}
+
+    def update(self, series: pd.Series) -> None:
+        self.chunks += 1
+        if self.chunks == 1:
+            self.single = series
+            return
+        if self.single is not None:
+            self._sketch(self.single)
+            self.single = None
+        self._sketch(series)
+
+    def _sketch(self, series: pd.Series) -> None:
+        values = series.dropna()
+        self.count += len(values)
+        if self.stats & NUMERIC_STATS:
+            numbers = values.to_numpy(dtype=np.float64)
+            self.moments.update(numbers)
+            if self.stats & set(QUANTILE_STATS):
+                self.tdigest.update(numbers)
+        if "mode" in self.stats:
+            value_counts = values.value_counts()
+            self.top_k.update(value_counts)
+            # Remember the typed value behind each candidate key
+            for value in value_counts.index[:TOP_K_CAPACITY]:
+                self.originals.setdefault(str(value), value)
+            self.originals = {key: value for key, value in self.originals.items() if key in self.top_k.counts}
+
+    def result(self) -> Dict[str, Any]:
+        if self.single is not None or self.chunks == 0:
+            values = self.single.dropna() if self.single is not None else pd.Series(dtype=np.float64)
+            result: Dict[str, Any] = {"count": len(values)}
+            empty = len(values) == 0
+            if "mean" in self.stats:
+                result["mean"] = None if empty else float(values.mean())
+            if "std" in self.stats:
+                result["std"] = None if empty else float(values.std(ddof=0))
+            if "min" in self.stats:
+                result["min"] = None if empty else float(values.min())
+            if "max" in self.stats:
+                result["max"] = None if empty else float(values.max())
+            for name, q in QUANTILE_STATS.items():
+                if name in self.stats:
+                    result[name] = None if empty else float(values.quantile(q))
+            if "mode" in self.stats:
+                modes = values.mode()
+                result["mode"] = None if modes.empty else modes.iloc[0]
+            return result
+
+        result = {"count": self.count}
+        if "mean" in self.stats:
+            result["mean"] = self.moments.mean if self.moments.count else None
+        if "std" in self.stats:
+            result["std"] = float(np.sqrt(self.moments.m2 / self.moments.count)) if self.moments.count else None
+        if "min" in self.stats:
+            result["min"] = self.moments.min
+        if "max" in self.stats:
+            result["max"] = self.moments.max
+        for name, q in QUANTILE_STATS.items():
+            if name in self.stats:
+                result[name] = self.tdigest.quantile(q)
+        if "mode" in self.stats:
+            top = self.top_k.top(1)
+            result["mode"] = self.originals.get(top[0][0], top[0][0]) if top else None
+        return result
+
+
+class ProcessingPlan:
+    """
+    Compiled, lazily executed form of dataset processing options.
+
+    Options are compiled against the dataset schema into one chain of
+    vectorized operations per column plus an optional row filter. Steps that
+    depend on statistics of their input (imputation values, scaler
+    parameters, log offsets, bin edges) are fitted first; a column needing
+    statistics of already transformed values takes one more fitting pass.
+    The output is then produced in a single pass that applies every column
+    chain to each chunk. Small files are held in memory; larger files are
+    streamed in chunks, with medians, quantiles and modes estimated by
+    sketches.
+    """
+
+    def __init__(self, steps: List[Dict[str, Any]], drop_na: Optional[List[str]] = None):
+        self.steps = steps
+        self.drop_na = drop_na
+        self.column_steps: Dict[str, List[Dict[str, Any]]] = {}
+        for step in steps:
+            self.column_steps.setdefault(step["column"], []).append(step)
+
+    @classmethod
+    def compile(cls, options: ProcessingOptions, data_types: Dict[str, str]) -> "ProcessingPlan":
+        """
+        Compile processing options against the dtypes of a dataset.
+
+        Args:
+            options: Processing options
+            data_types: Column dtypes of the source dataset
+
+        Returns:
+            Unfitted processing plan
+        """
+        columns = list(data_types)
+        kinds = {col: _column_kind(dtype) for col, dtype in data_types.items()}
+        steps: List[Dict[str, Any]] = []
+        drop_na = None
+
+        def require(required: List[str], context: str) -> None:
+            missing_cols = [col for col in required if col not in kinds]
+            if missing_cols:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Columns not found in dataset{context}: {', '.join(missing_cols)}"
+                )
+
+        # Missing values
+        missing_values = options.missing_values or {}
+        strategy = missing_values.get("strategy")
+        if strategy:
+            target_columns = missing_values.get("columns") or columns
+            require(target_columns, "")
+
+            if strategy in ("mean", "median"):
+                for col in target_columns:
+                    if kinds[col] == "numeric":
+                        steps.append({"column": col, "op": "fill", "strategy": strategy, "stats": [strategy]})
+                    else:
+                        logger.warning(f"Cannot apply '{strategy}' strategy to non-numeric column: {col}")
+            elif strategy == "mode":
+                for col in target_columns:
+                    steps.append({"column": col, "op": "fill", "strategy": strategy, "stats": ["mode"]})
+            elif strategy == "constant":
+                fill_value = missing_values.get("fill_value")
+                if fill_value is None:
+                    raise HTTPException(status_code=400, detail="Fill value is required for constant strategy")
+                for col in target_columns:
+                    # Type the fill value for the column, falling back to text
+                    value, value_type = str(fill_value), "str"
+                    if kinds[col] == "numeric":
+                        try:
+                            value, value_type = float(fill_value), "float"
+                        except (TypeError, ValueError):
+                            pass
+                    elif kinds[col] == "datetime":
+                        try:
+                            pd.to_datetime(fill_value)
+                            value_type = "datetime"
+                        except (TypeError, ValueError):
+                            pass
+                    steps.append({"column": col, "op": "fill_value", "value": value, "value_type": value_type, "stats": []})
+                    if value_type == "str" and kinds[col] != "other":
+                        kinds[col] = "other"
+            elif strategy == "remove":
+                drop_na = list(target_columns)
+            else:
+                logger.warning(f"Unsupported missing value strategy: {strategy}")
+
+        # Type conversions
+        converted_kinds = {"number": "numeric", "string": "other", "boolean": "bool", "date": "datetime"}
+        for col, dtype in (options.data_types or {}).items():
+            if col not in kinds or dtype not in converted_kinds:
+                continue
+            step = {"column": col, "op": "cast", "to": dtype, "stats": []}
+            if dtype == "boolean":
+                step["from_numeric"] = kinds[col] in ("numeric", "bool")
+            steps.append(step)
+            kinds[col] = converted_kinds[dtype]
+
+        # Normalization
+        normalization = options.normalization or {}
+        strategy = normalization.get("strategy")
+        if strategy and strategy != "none":
+            target_columns = normalization.get("columns") or [col for col in columns if kinds[col] == "numeric"]
+            require(target_columns, " for normalization")
+            if strategy not in SCALER_STATS:
+                raise HTTPException(status_code=400, detail=f"Unsupported normalization strategy: {strategy}")
+            numeric_columns = [col for col in target_columns if kinds[col] == "numeric"]
+            if not numeric_columns:
+                logger.warning("No numeric columns found for normalization")
+            for col in numeric_columns:
+                steps.append({"column": col, "op": "scale", "strategy": strategy, "stats": SCALER_STATS[strategy]})
+
+        # Transformations
+        for transform in options.transformations or []:
+            operation = transform.get("operation")
+            parameters = transform.get("parameters") or {}
+            target_columns = transform.get("columns", [])
+            require(target_columns, " for transformation")
+
+            try:
+                if operation == "log":
+                    params = {"base": float(parameters.get("base", 10)), "stats": ["min"]}
+                elif operation == "sqrt":
+                    params = {"stats": ["min"]}
+                elif operation == "power":
+                    params = {"power": float(parameters.get("power", 2)), "stats": []}
+                elif operation == "bin":
+                    bins = int(parameters.get("bins", 5))
+                    labels = parameters.get("labels")
+                    if labels and len(labels) != bins:
+                        labels = None
+                    params = {"bins": bins, "labels": labels, "stats": ["min", "max"]}
+                else:
+                    logger.warning(f"Unsupported transformation: {operation}")
+                    continue
+            except (TypeError, ValueError) as e:
+                raise HTTPException(status_code=400, detail=f"Invalid parameters for {operation}: {str(e)}")
+
+            for col in target_columns:
+                if kinds[col] != "numeric":
+                    logger.warning(f"Cannot apply {operation} to non-numeric column: {col}")
+                    continue
+                steps.append({"column": col, "op": operation, **params})
+                if operation == "bin":
+                    kinds[col] = "other"
+
+        # Steps needing statistics of an earlier fitted step's output go in a later pass
+        fitted_counts: Dict[str, int] = {}
+        for step in steps:
+            if step["stats"]:
+                step["level"] = fitted_counts.get(step["column"], 0)
+                fitted_counts[step["column"]] = step["level"] + 1
+
+        return cls(steps, drop_na)
+
+    @classmethod
+    def for_file(
+        cls,
+        options: ProcessingOptions,
+        file_path: str,
+        date_formats: Optional[Dict[str, str]] = None
+    ) -> "ProcessingPlan":
+        """
+        Compile processing options against the schema of a dataset file.
+
+        Args:
+            options: Processing options
+            file_path: Path to the source dataset file
+            date_formats: Date formats per column inferred on earlier runs
+
+        Returns:
+            Unfitted processing plan
+        """
+        profile = DatasetProfiler.get_or_create_profile(file_path)
+        plan = cls.compile(options, profile["data_types"])
+
+        # Infer one format per date column from values spread over the file
+        date_steps = [step for step in plan.steps if step["op"] == "cast" and step["to"] == "date"]
+        if date_steps:
+            date_columns = list(dict.fromkeys(step["column"] for step in date_steps))
+            if ParquetStore.is_parquet(file_path):
+                sample = pd.concat([
+                    batch.iloc[::max(len(batch) // DATE_SAMPLE_SIZE, 1)]
+                    for batch in ParquetStore.iter_batches(file_path, columns=date_columns)
+                ])
+            else:
+                sample = DatasetReader.read_file(file_path, columns=date_columns)
+            for step in date_steps:
+                step["date_format"] = DateParser.infer_format(sample[step["column"]], (date_formats or {}).get(step["column"]))
+        return plan
+
+    @property
+    def date_formats(self) -> Dict[str, str]:
+        """Date formats used per column."""
+        return {
+            step["column"]: step["date_format"] for step in self.steps
+            if step["op"] == "cast" and step.get("date_format")
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the plan without fitted parameters."""
+        return {
+            "version": PLAN_VERSION,
+            "drop_na": self.drop_na,
+            "steps": [{key: value for key, value in step.items() if key != "fitted"} for step in self.steps]
+        }
+
+    @staticmethod
+    def _fit_step(step: Dict[str, Any], stats: Dict[str, Any]) -> Dict[str, Any]:
+        """Turn the statistics of a step's input into its parameters."""
+        col = step["column"]
+        op = step["op"]
+        if op == "fill":
+            if stats["count"] == 0 or stats[step["strategy"]] is None:
+                logger.warning(f"Column {col} contains all NaN values, cannot apply {step['strategy']} imputation")
+                return {"skip": True}
+            return {"value": stats[step["strategy"]]}
+
+        if op == "scale":
+            if stats["count"] < 2:
+                return {"skip": True}
+            if step["strategy"] == "min_max":
+                shift, scale = stats["min"], stats["max"] - stats["min"]
+            elif step["strategy"] == "standard":
+                shift, scale = stats["mean"], stats["std"]
+            else:
+                shift, scale = stats["median"], stats["q75"] - stats["q25"]
+            # Constant columns are shifted but not scaled
+            return {"shift": shift, "scale": scale or 1.0}
+
+        if op == "log":
+            min_value = stats["min"]
+            return {"offset": abs(min_value) + 1.0 if min_value is not None and min_value <= 0 else 0.0}
+
+        if op == "sqrt":
+            min_value = stats["min"]
+            return {"offset": abs(min_value) + 1.0 if min_value is not None and min_value < 0 else 0.0}
+
+        if op == "bin":
+            min_value, max_value = stats["min"], stats["max"]
+            if min_value is None or min_value == max_value:
+                logger.warning(f"Cannot bin column {col} with constant value {min_value}")
+                return {"skip": True}
+            # Equal-width edges as pandas.cut computes them, so every chunk gets the same bins
+            edges = np.linspace(min_value, max_value, step["bins"] + 1)
+            edges[0] -= (max_value - min_value) * 0.001
+            return {"edges": edges}
+
+        return {}
+
+    @staticmethod
+    def _apply_step(series: pd.Series, step: Dict[str, Any]) -> pd.Series:
+        """Apply one fitted step to a column."""
+        fitted = step.get("fitted", {})
+        if fitted.get("skip"):
+            return series
+        op = step["op"]
+
+        if op == "fill":
+            return series.fillna(fitted["value"])
+        if op == "fill_value":
+            value = pd.to_datetime(step["value"]) if step["value_type"] == "datetime" else step["value"]
+            return series.fillna(value)
+        if op == "cast":
+            if step["to"] == "number":
+                return pd.to_numeric(series, errors="coerce")
+            if step["to"] == "string":
+                return series.astype(str)
+            if step["to"] == "boolean":
+                return series.astype(bool) if step["from_numeric"] else series.astype(str).map(BOOL_MAP)
+            return DateParser.parse(series, step.get("date_format"))
+        if op == "scale":
+            return (series - fitted["shift"]) / fitted["scale"]
+        if op == "log":
+            return np.log(series + fitted["offset"]) / np.log(step["base"])
+        if op == "sqrt":
+            return np.sqrt(series + fitted["offset"])
+        if op == "power":
+            return series ** step["power"]
+        if op == "bin":
+            return pd.cut(series, bins=fitted["edges"], labels=step["labels"], include_lowest=True)
+        return series
+
+    def _filter_rows(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """Drop rows with missing values in the row filter columns."""
+        if not self.drop_na:
+            return chunk
+        subset = [col for col in self.drop_na if col in chunk.columns]
+        return chunk.dropna(subset=subset) if subset else chunk
+
+    def _apply_column(self, series: pd.Series, steps: List[Dict[str, Any]]) -> pd.Series:
+        if steps:
+            # Stored categoricals and small integers would reject fill values or overflow
+            series = DtypeOptimizer.widen(series)
+        for step in steps:
+            series = self._apply_step(series, step)
+        return series
+
+    def fit(self, chunk_source: Callable[[], Iterable[pd.DataFrame]]) -> int:
+        """
+        Fit the steps that depend on statistics of their input.
+
+        Args:
+            chunk_source: Function returning a fresh iterable of source chunks
+
+        Returns:
+            int: Number of passes over the source
+        """
+        levels = sorted({step["level"] for step in self.steps if step["stats"]})
+        for level in levels:
+            targets = [step for step in self.steps if step["stats"] and step["level"] == level]
+            accumulators = [_StatAccumulator(step["stats"]) for step in targets]
+
+            for chunk in chunk_source():
+                chunk = self._filter_rows(chunk)
+                for step, accumulator in zip(targets, accumulators):
+                    column_steps = self.column_steps[step["column"]]
+                    # Values the step sees: the column after its earlier (already fitted) steps
+                    prefix = column_steps[:next(i for i, other in enumerate(column_steps) if other is step)]
+                    accumulator.update(self._apply_column(chunk[step["column"]], prefix))
+
+            for step, accumulator in zip(targets, accumulators):
+                step["fitted"] = self._fit_step(step, accumulator.result())
+        return len(levels)
+
+    def transform(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """
+        Apply the fitted plan to a chunk.
+
+        Args:
+            chunk: Source DataFrame chunk
+
+        Returns:
+            Processed chunk
+        """
+        chunk = self._filter_rows(chunk)
+        updates = {col: self._apply_column(chunk[col], steps) for col, steps in self.column_steps.items()}
+        return chunk.assign(**updates) if updates else chunk
+
+    def execute(self, file_path: str, output_path: str) -> Dict[str, Any]:
+        """
+        Fit the plan on a dataset file and write the processed dataset.
+
+        Args:
+            file_path: Path to the source dataset file
+            output_path: Path of the processed Parquet file
+
+        Returns:
+            Dictionary with the row counts, passes and execution mode
+        """
+        in_memory = ParquetStore.file_size(file_path) <= PROCESSING_IN_MEMORY_BYTES
+        if in_memory:
+            df = DatasetReader.read_file(file_path)
+            chunk_source = lambda: [df]
+        else:
+            chunk_source = lambda: DatasetProfiler.iter_chunks(file_path, chunk_rows=PROCESSING_CHUNK_ROWS)
+
+        passes = self.fit(chunk_source)
+
+        source_rows = 0
+
+        def processed_chunks():
+            nonlocal source_rows
+            for chunk in chunk_source():
+                source_rows += len(chunk)
+                yield self.transform(chunk)
+
+        if in_memory:
+            processed = next(processed_chunks())
+            ParquetStore.write(processed, output_path)
+            rows = len(processed)
+        else:
+            rows = ParquetStore.write_chunks(processed_chunks(), output_path)
+
+        if source_rows != rows:
+            logger.info(f"Removed {source_rows - rows} rows with missing values")
+
+        return {
+            "mode": "in_memory" if in_memory else "chunked",
+            "passes": passes + 1,
+            "source_rows": source_rows,
+            "rows": rows
+        }
+
+
+class ProcessingRecipeService:
+    """
+    Service for saved processing recipes.
+
+    A recipe stores processing options under a name so they can be applied
+    again, e.g. to next month's export of the same source. Recipes are
+    compiled against each dataset they are applied to.
+    """
+
+    @staticmethod
+    def _recipe_path(recipe_id: str) -> str:
+        """Get the file of a recipe, rejecting malformed IDs."""
+        try:
+            recipe_id = str(uuid.UUID(recipe_id))
+        except ValueError:
+            raise HTTPException(status_code=404, detail="Recipe not found")
+        return os.path.join(RECIPE_DIR, f"{recipe_id}.json")
+
+    @staticmethod
+    def required_columns(options: ProcessingOptions) -> List[str]:
+        """
+        Get the columns a dataset needs for the recipe to apply.
+
+        Args:
+            options: Processing options
+
+        Returns:
+            List of column names
+        """
+        columns = list((options.missing_values or {}).get("columns") or [])
+        columns += list(options.data_types or {})
+        columns += list((options.normalization or {}).get("columns") or [])
+        for transform in options.transformations or []:
+            columns += list(transform.get("columns") or [])
+        return list(dict.fromkeys(columns))
+
+    @staticmethod
+    def save_recipe(
+        user_id: int,
+        name: str,
+        options: ProcessingOptions,
+        description: Optional[str] = None,
+        source_dataset_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Save processing options as a recipe.
+
+        Args:
+            user_id: ID of the owner
+            name: Recipe name
+            options: Processing options
+            description: Recipe description
+            source_dataset_id: Dataset the recipe was created from
+
+        Returns:
+            Recipe dictionary
+        """
+        os.makedirs(RECIPE_DIR, exist_ok=True)
+        recipe = {
+            "id": str(uuid.uuid4()),
+            "name": name,
+            "description": description,
+            "options": options.dict(),
+            "required_columns": ProcessingRecipeService.required_columns(options),
+            "date_formats": {},
+            "user_id": user_id,
+            "source_dataset_id": source_dataset_id,
+            "created_at": datetime.now(timezone.utc).isoformat()
+        }
+        with open(ProcessingRecipeService._recipe_path(recipe["id"]), 'w') as f:
+            json.dump(recipe, f)
+        return recipe
+
+    @staticmethod
+    def get_recipe(recipe_id: str) -> Dict[str, Any]:
+        """
+        Load a recipe.
+
+        Args:
+            recipe_id: ID of the recipe
+
+        Returns:
+            Recipe dictionary
+        """
+        path = ProcessingRecipeService._recipe_path(recipe_id)
+        if not os.path.exists(path):
+            raise HTTPException(status_code=404, detail="Recipe not found")
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    @staticmethod
+    def update_date_formats(recipe_id: str, date_formats: Dict[str, str]) -> None:
+        """
+        Remember the date formats inferred when a recipe was applied.
+
+        Args:
+            recipe_id: ID of the recipe
+            date_formats: Date formats per column
+        """
+        recipe = ProcessingRecipeService.get_recipe(recipe_id)
+        if all(recipe.get("date_formats", {}).get(col) == fmt for col, fmt in date_formats.items()):
+            return
+        recipe["date_formats"] = {**recipe.get("date_formats", {}), **date_formats}
+        with open(ProcessingRecipeService._recipe_path(recipe_id), 'w') as f:
+            json.dump(recipe, f)
+
+    @staticmethod
+    def list_recipes(user_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        List saved recipes, newest first.
+
+        Args:
+            user_id: Only list recipes of this user (all if omitted)
+
+        Returns:
+            List of recipe dictionaries
+        """
+        if not os.path.isdir(RECIPE_DIR):
+            return []
+        recipes = []
+        for file_name in os.listdir(RECIPE_DIR):
+            if not file_name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(RECIPE_DIR, file_name), 'r') as f:
+                    recipe = json.load(f)
+            except Exception as e:
+                logger.warning(f"Could not read recipe {file_name}: {str(e)}")
+                continue
+            if user_id is None or recipe.get("user_id") == user_id:
+                recipes.append(recipe)
+        return sorted(recipes, key=lambda recipe: recipe["created_at"], reverse=True)
+
+    @staticmethod
+    def delete_recipe(recipe_id: str) -> None:
+        """
+        Delete a recipe.
+
+        Args:
+            recipe_id: ID of the recipe
+        """
+        path = ProcessingRecipeService._recipe_path(recipe_id)
+        if not os.path.exists(path):
+            raise HTTPException(status_code=404, detail="Recipe not found")
+        os.remove(path)
@@ -16,7 +16,7 @@ interface FileUploaderProps {
 const FileUploader: React.FC<FileUploaderProps> = ({
   onFileSelect,
   onFileRemove,
-  acceptedFormats = '.csv,.json,.xlsx,.xls',
+  acceptedFormats = '.csv,.json,.ndjson,.jsonl,.xlsx,.xls',
   multiple = false,
   maxSize = 50, // 50MB default
   label = 'Drag files here',